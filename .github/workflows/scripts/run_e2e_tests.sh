@@ -7,7 +7,7 @@ export CI=true
 
 # アプリケーションを起動
 echo "Starting application in the background..."
-python app.py &
+gunicorn --config gunicorn.conf.py "src.app:create_app()" &
 APP_PID=$!
 
 # アプリケーションの起動を待つ
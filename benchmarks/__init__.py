@@ -0,0 +1,11 @@
+"""
+性能ベンチマーク
+
+パーサー、合算、コスト計算、エクスポート、保存の処理時間と最大メモリ使用量を、
+サービス数の異なる合成データで計測します。結果はJSONファイルに保存し、
+基準（ベースライン）の結果と比較して性能の低下を検出します。
+
+使用例:
+    python -m benchmarks.run --sizes 10,1k,100k --output benchmarks/baselines/local.json
+    python -m benchmarks.compare benchmarks/baselines/local.json benchmarks/results/latest.json
+"""
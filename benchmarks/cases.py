@@ -0,0 +1,112 @@
+"""
+ベンチマークの計測対象
+
+計測対象ごとに、入力を作成する関数（計測に含めない）と計測する関数を定義します。
+入力を書き換える処理や、ファイルに書き込む処理は、繰り返しのたびに入力を作り直します。
+"""
+
+import shutil
+import tempfile
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks import inputs
+from src.api.calculator_api import CalculatorAPI
+from src.data.parser import EstimateParser
+from src.merger import cost_merger
+from src.merger.estimate_merger import EstimateMerger
+from src.storage.estimate_store import FileSystemEstimateStore
+
+
+class BenchmarkCase:
+    """
+    ベンチマークの計測対象
+
+    setup(サービス数) で入力と後片付けの関数を作成し、run(入力) の時間とメモリを計測します。
+    """
+
+    def __init__(self, name: str, description: str, setup: Callable[[int], Tuple[Any, Callable[[], None]]],
+                 run: Callable[[Any], Any]):
+        """
+        初期化
+
+        Args:
+            name: 計測対象の名前
+            description: 説明
+            setup: サービス数を受け取り、(入力, 後片付けの関数) を返す関数
+            run: 入力を受け取って計測する処理を実行する関数
+        """
+        self.name = name
+        self.description = description
+        self.setup = setup
+        self.run = run
+
+
+def _no_cleanup() -> None:
+    pass
+
+
+def _with_temp_dir(make_input: Callable[[int], Any]) -> Callable[[int], Tuple[Any, Callable[[], None]]]:
+    """入力に一時ディレクトリを添え、後片付けで削除する setup 関数を作成する"""
+    def setup(size: int):
+        temp_dir = tempfile.mkdtemp(prefix='merger-bench-')
+        return (make_input(size), temp_dir), lambda: shutil.rmtree(temp_dir, ignore_errors=True)
+    return setup
+
+
+_parser = EstimateParser()
+_merger = EstimateMerger()
+_cost_merger = cost_merger.EstimateMerger()
+_calculator = CalculatorAPI()
+
+
+def _save(args: Tuple[Dict[str, Any], str]) -> str:
+    estimate, temp_dir = args
+    return FileSystemEstimateStore(temp_dir).save(estimate)
+
+
+CASES: List[BenchmarkCase] = [
+    BenchmarkCase(
+        'parser.normalize',
+        'EstimateParser._normalize_data（通貨記号付きのコストの数値化）',
+        lambda size: (inputs.raw_estimate(size), _no_cleanup),
+        _parser._normalize_data
+    ),
+    BenchmarkCase(
+        'parser.parse_native',
+        'EstimateParser.parse_from_json（エクスポート形式の変換と正規化）',
+        lambda size: (inputs.native_export(size), _no_cleanup),
+        _parser.parse_from_json
+    ),
+    BenchmarkCase(
+        'merger.merge_estimates',
+        'src.merger.estimate_merger.EstimateMerger.merge_estimates（2つの見積もり）',
+        lambda size: (inputs.estimate_pair(size), _no_cleanup),
+        _merger.merge_estimates
+    ),
+    BenchmarkCase(
+        'cost_merger.merge_estimates',
+        'src.merger.cost_merger.EstimateMerger.merge_estimates（2つの見積もり）',
+        lambda size: (inputs.legacy_estimate_pair(size), _no_cleanup),
+        _cost_merger.merge_estimates
+    ),
+    BenchmarkCase(
+        'calculator.total_cost',
+        'CalculatorAPI.calculate_total_cost',
+        lambda size: (inputs.normalized_estimate(size), _no_cleanup),
+        _calculator.calculate_total_cost
+    ),
+    BenchmarkCase(
+        'calculator.export_csv',
+        'CalculatorAPI.export_to_csv（一時ディレクトリへの書き込み）',
+        _with_temp_dir(inputs.normalized_estimate),
+        lambda args: _calculator.export_to_csv(args[0], 'benchmark', args[1])
+    ),
+    BenchmarkCase(
+        'store.save',
+        'FileSystemEstimateStore.save（内容ハッシュの計算とJSONの書き込み）',
+        _with_temp_dir(inputs.normalized_estimate),
+        _save
+    )
+]
+
+CASES_BY_NAME: Dict[str, BenchmarkCase] = {case.name: case for case in CASES}
@@ -0,0 +1,177 @@
+"""
+ベンチマーク結果の比較
+
+基準（ベースライン）の結果と今回の結果を、計測対象とサービス数ごとに比較した表を出力します。
+処理時間（最小値）または最大メモリ使用量が、しきい値を超えて増えた組み合わせを性能の低下とし、
+1件でもあれば終了コード1で終了します。
+
+使用例:
+    python -m benchmarks.compare benchmarks/baselines/main.json benchmarks/results/latest.json
+    python -m benchmarks.compare base.json current.json --time-threshold 0.2 --format markdown
+"""
+
+import sys
+import json
+import argparse
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.inputs import format_size
+
+# 状態
+STATUS_OK = "ok"
+STATUS_REGRESSION = "regression"
+STATUS_IMPROVEMENT = "improvement"
+STATUS_NEW = "new"
+STATUS_MISSING = "missing"
+
+
+def load_results(path: str) -> Dict[Tuple[str, int], Dict[str, Any]]:
+    """
+    結果のJSONファイルを読み込み、(計測対象, サービス数) ごとの結果を返す
+
+    Args:
+        path: 結果のJSONファイル
+
+    Returns:
+        Dict: (計測対象, サービス数) をキーとする計測結果
+    """
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    return {(result["case"], result["size"]): result for result in report.get("results", [])}
+
+
+def _ratio(baseline: Optional[float], current: Optional[float]) -> Optional[float]:
+    if baseline is None or current is None or baseline <= 0:
+        return None
+    return current / baseline
+
+
+def compare_results(baseline: Dict[Tuple[str, int], Dict[str, Any]], current: Dict[Tuple[str, int], Dict[str, Any]],
+                    time_threshold: float = 0.10, memory_threshold: float = 0.10,
+                    min_seconds: float = 0.001) -> List[Dict[str, Any]]:
+    """
+    基準の結果と今回の結果を比較する
+
+    Args:
+        baseline: 基準の結果（load_results の戻り値）
+        current: 今回の結果（load_results の戻り値）
+        time_threshold: 性能の低下とする処理時間の増加率（0.10 で10%）
+        memory_threshold: 性能の低下とする最大メモリ使用量の増加率
+        min_seconds: 処理時間の比較の対象とする最小の秒数（これより短い計測は誤差が大きいため判定しない）
+
+    Returns:
+        List: 組み合わせごとの比較結果（case, size, time_ratio, memory_ratio, status など）
+    """
+    rows = []
+    for key in sorted(set(baseline) | set(current), key=lambda item: (item[1], item[0])):
+        base, cur = baseline.get(key), current.get(key)
+        row = {
+            "case": key[0],
+            "size": key[1],
+            "baseline_seconds": base["min_seconds"] if base else None,
+            "current_seconds": cur["min_seconds"] if cur else None,
+            "baseline_memory": base.get("peak_memory_bytes") if base else None,
+            "current_memory": cur.get("peak_memory_bytes") if cur else None
+        }
+        row["time_ratio"] = _ratio(row["baseline_seconds"], row["current_seconds"])
+        row["memory_ratio"] = _ratio(row["baseline_memory"], row["current_memory"])
+
+        if base is None:
+            row["status"] = STATUS_NEW
+        elif cur is None:
+            row["status"] = STATUS_MISSING
+        else:
+            timed = max(row["baseline_seconds"], row["current_seconds"]) >= min_seconds
+            slower = timed and row["time_ratio"] is not None and row["time_ratio"] > 1 + time_threshold
+            faster = timed and row["time_ratio"] is not None and row["time_ratio"] < 1 - time_threshold
+            larger = row["memory_ratio"] is not None and row["memory_ratio"] > 1 + memory_threshold
+            if slower or larger:
+                row["status"] = STATUS_REGRESSION
+            elif faster:
+                row["status"] = STATUS_IMPROVEMENT
+            else:
+                row["status"] = STATUS_OK
+        rows.append(row)
+    return rows
+
+
+def _seconds(value: Optional[float]) -> str:
+    if value is None:
+        return "-"
+    if value < 1:
+        return f"{value * 1000:.3f} ms"
+    return f"{value:.3f} s"
+
+
+def _memory(value: Optional[int]) -> str:
+    return "-" if value is None else f"{value / (1024 * 1024):.2f} MiB"
+
+
+def _change(ratio: Optional[float]) -> str:
+    return "-" if ratio is None else f"{(ratio - 1) * 100:+.1f}%"
+
+
+def format_report(rows: List[Dict[str, Any]], markdown: bool = False) -> str:
+    """
+    比較結果を表にする
+
+    Args:
+        rows: compare_results の戻り値
+        markdown: Markdownの表にする場合はTrue（プルリクエストのコメントなどに使用）
+
+    Returns:
+        str: 比較結果の表
+    """
+    headers = ["case", "size", "baseline", "current", "time", "baseline mem", "current mem", "memory", "status"]
+    table = [[
+        row["case"], format_size(row["size"]),
+        _seconds(row["baseline_seconds"]), _seconds(row["current_seconds"]), _change(row["time_ratio"]),
+        _memory(row["baseline_memory"]), _memory(row["current_memory"]), _change(row["memory_ratio"]),
+        row["status"]
+    ] for row in rows]
+
+    if markdown:
+        lines = ["| " + " | ".join(headers) + " |", "|" + "---|" * len(headers)]
+        lines.extend("| " + " | ".join(cells) + " |" for cells in table)
+        return "\n".join(lines)
+
+    widths = [max(len(cells[index]) for cells in [headers] + table) for index in range(len(headers))]
+    lines = ["  ".join(cell.ljust(width) for cell, width in zip(cells, widths)).rstrip()
+             for cells in [headers] + table]
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    """
+    比較のエントリーポイント
+
+    Returns:
+        int: 終了コード（性能の低下がある場合は1）
+    """
+    arg_parser = argparse.ArgumentParser(description="ベンチマーク結果の比較")
+    arg_parser.add_argument("baseline", help="基準の結果のJSONファイル")
+    arg_parser.add_argument("current", help="今回の結果のJSONファイル")
+    arg_parser.add_argument("--time-threshold", type=float, default=0.10, help="性能の低下とする処理時間の増加率")
+    arg_parser.add_argument("--memory-threshold", type=float, default=0.10, help="性能の低下とするメモリの増加率")
+    arg_parser.add_argument("--min-seconds", type=float, default=0.001, help="処理時間を判定する最小の秒数")
+    arg_parser.add_argument("--format", choices=["text", "markdown"], default="text", help="出力形式")
+    args = arg_parser.parse_args(argv)
+
+    rows = compare_results(
+        load_results(args.baseline),
+        load_results(args.current),
+        args.time_threshold,
+        args.memory_threshold,
+        args.min_seconds
+    )
+    print(format_report(rows, markdown=args.format == "markdown"))
+
+    regressions = [row for row in rows if row["status"] == STATUS_REGRESSION]
+    if regressions:
+        print(f"性能の低下: {len(regressions)}件", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
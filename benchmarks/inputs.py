@@ -0,0 +1,198 @@
+"""
+ベンチマークの入力データ
+
+サービス数を指定して、シード値から毎回同じ内容の見積もりデータを作成します。
+エクスポート形式の見積もりは src.data.synthetic の合成見積もりデータ生成を使用します。
+2つの見積もりを合算する場合は、同じサービス名・リージョンのサービスを両方に含め、
+すべてのサービスがグループにまとまるようにします。
+"""
+
+import random
+from typing import Any, Dict, List
+
+from src.data.synthetic import SyntheticEstimateGenerator
+
+SERVICE_TYPES = [
+    ('Amazon EC2', 'ec2'),
+    ('Amazon S3', 's3'),
+    ('Amazon RDS', 'rds'),
+    ('Amazon DynamoDB', 'dynamodb'),
+    ('AWS Lambda', 'lambda'),
+    ('Amazon CloudFront', 'cloudfront'),
+    ('Amazon ElastiCache', 'elasticache'),
+    ('Elastic Load Balancing', 'elb')
+]
+
+REGIONS = [
+    'us-east-1', 'us-east-2', 'us-west-1', 'us-west-2', 'ap-northeast-1', 'ap-northeast-2', 'ap-northeast-3',
+    'ap-southeast-1', 'ap-southeast-2', 'ap-south-1', 'eu-central-1', 'eu-west-1', 'eu-west-2', 'eu-west-3',
+    'eu-north-1', 'sa-east-1'
+]
+
+# サイズの指定（10, 1k, 100k, 1m）
+SIZE_SUFFIXES = {'k': 1000, 'm': 1000000}
+
+
+def parse_size(value: str) -> int:
+    """
+    サービス数の指定を整数にする
+
+    Args:
+        value: サービス数（例: 10, 1k, 100k, 1m）
+
+    Returns:
+        int: サービス数
+
+    Raises:
+        ValueError: 形式が不正な場合
+    """
+    text = value.strip().lower()
+    multiplier = SIZE_SUFFIXES.get(text[-1:], 1)
+    number = text[:-1] if multiplier > 1 else text
+    size = int(number) * multiplier
+    if size <= 0:
+        raise ValueError(f"サービス数は1以上を指定してください: {value}")
+    return size
+
+
+def format_size(size: int) -> str:
+    """サービス数を 1k や 1m の形式にする"""
+    for suffix, multiplier in sorted(SIZE_SUFFIXES.items(), key=lambda item: -item[1]):
+        if size >= multiplier and size % multiplier == 0:
+            return f"{size // multiplier}{suffix}"
+    return str(size)
+
+
+def _service_key(index: int):
+    """index 番目のサービスの (サービス名, サービスコード, リージョン) を返す（見積もり内で重複しない）"""
+    name, code = SERVICE_TYPES[index % len(SERVICE_TYPES)]
+    cycle = index // (len(SERVICE_TYPES) * len(REGIONS))
+    region = REGIONS[(index // len(SERVICE_TYPES)) % len(REGIONS)]
+    if cycle:
+        name = f"{name} #{cycle}"
+    return name, code, region
+
+
+def _config(code: str, rng: random.Random) -> Dict[str, Any]:
+    """サービスの種類に応じた設定を作成する"""
+    if code == 'ec2':
+        return {'serviceCode': code, 'instanceType': rng.choice(['t3.micro', 'm5.large', 'c5.xlarge', 'r5.2xlarge']),
+                'count': rng.randint(1, 20)}
+    if code == 's3':
+        return {'serviceCode': code, 'storage': {'totalGB': rng.randint(1, 10000), 'standardGB': rng.randint(1, 5000)}}
+    if code == 'rds':
+        return {'serviceCode': code, 'instanceType': rng.choice(['db.t3.medium', 'db.r5.large']),
+                'count': rng.randint(1, 4), 'storageGB': rng.randint(20, 2000)}
+    if code == 'dynamodb':
+        return {'serviceCode': code, 'totalStorage': rng.randint(1, 500), 'readCapacity': rng.randint(5, 5000),
+                'writeCapacity': rng.randint(5, 5000)}
+    return {'serviceCode': code, 'requests': rng.randint(1000, 10000000)}
+
+
+def raw_estimate(service_count: int, seed: int = 0, name: str = 'Benchmark Estimate') -> Dict[str, Any]:
+    """
+    正規化前の見積もりデータ（コストが通貨記号付きの文字列）を作成する
+
+    Args:
+        service_count: サービス数
+        seed: シード値
+        name: 見積もりの名前
+
+    Returns:
+        Dict: 内部形式の見積もりデータ
+    """
+    rng = random.Random(seed)
+    services = []
+    for index in range(service_count):
+        service_name, code, region = _service_key(index)
+        services.append({
+            'name': service_name,
+            'region': region,
+            'monthlyCost': f"${rng.uniform(1, 5000):,.2f}",
+            'upfrontCost': f"${rng.uniform(0, 10000):,.2f}" if code in ('ec2', 'rds') else '0',
+            'description': f"{service_name} workload {index}",
+            'config': _config(code, rng)
+        })
+    return {'name': name, 'currency': 'USD', 'services': services}
+
+
+def normalized_estimate(service_count: int, seed: int = 0, name: str = 'Benchmark Estimate') -> Dict[str, Any]:
+    """
+    正規化済みの見積もりデータ（コストが数値）を作成する
+
+    Args:
+        service_count: サービス数
+        seed: シード値
+        name: 見積もりの名前
+
+    Returns:
+        Dict: 内部形式の見積もりデータ
+    """
+    estimate = raw_estimate(service_count, seed, name)
+    for service in estimate['services']:
+        service['monthlyCost'] = float(service['monthlyCost'].lstrip('$').replace(',', ''))
+        service['upfrontCost'] = float(service['upfrontCost'].lstrip('$').replace(',', ''))
+    return estimate
+
+
+def native_export(service_count: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    AWS Pricing Calculatorのエクスポート形式の見積もりデータ（入れ子のグループを含む）を作成する
+
+    Args:
+        service_count: サービス数
+        seed: シード値
+
+    Returns:
+        Dict: エクスポート形式の見積もりデータ
+    """
+    return SyntheticEstimateGenerator(seed).generate(service_count, 'Benchmark Estimate')
+
+
+def estimate_pair(total_services: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    合算する2つの正規化済みの見積もりを作成する（合計のサービス数が total_services）
+
+    Args:
+        total_services: 2つの見積もりのサービス数の合計
+        seed: シード値
+
+    Returns:
+        List: 見積もりデータのリスト
+    """
+    first = max(1, total_services // 2)
+    second = max(1, total_services - first)
+    return [normalized_estimate(first, seed, 'Estimate A'), normalized_estimate(second, seed + 1, 'Estimate B')]
+
+
+def legacy_estimate_pair(total_services: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    src.merger.cost_merger の形式（service_name, monthly_cost など）の2つの見積もりを作成する
+
+    Args:
+        total_services: 2つの見積もりのサービス数の合計
+        seed: シード値
+
+    Returns:
+        List: 見積もりデータのリスト
+    """
+    estimates = []
+    for offset, estimate in enumerate(estimate_pair(total_services, seed)):
+        services = []
+        for service in estimate['services']:
+            monthly = service['monthlyCost']
+            services.append({
+                'service_name': service['name'],
+                'region': service['region'],
+                'monthly_cost': f"{monthly:,.2f}",
+                'upfront_cost': f"{service['upfrontCost']:,.2f}",
+                'yearly_cost': f"{monthly * 12:,.2f}",
+                'description': service['description'],
+                'config': service['config']
+            })
+        estimates.append({
+            'name': estimate['name'],
+            'metadata': {'currency': 'USD', 'created_on': '2024-01-0%d' % (offset + 1), 'region': '', 'share_url': ''},
+            'services': services
+        })
+    return estimates
@@ -0,0 +1,192 @@
+"""
+ベンチマークの実行
+
+計測対象ごと・サービス数ごとに処理時間（最小値と中央値）と最大メモリ使用量を計測し、
+結果をJSONファイルに保存します。処理時間は合計が --min-time 秒に達するまで（最大 --max-repeat 回）
+繰り返して計測し、メモリは tracemalloc を有効にした別の1回で計測します。
+
+使用例:
+    python -m benchmarks.run
+    python -m benchmarks.run --sizes 10,1k --cases parser.normalize,merger.merge_estimates
+    python -m benchmarks.run --sizes 1m --no-memory --output benchmarks/results/1m.json
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from benchmarks.cases import CASES, CASES_BY_NAME, BenchmarkCase
+from benchmarks.inputs import format_size, parse_size
+
+# 結果ファイルの形式のバージョン
+RESULT_VERSION = 1
+
+DEFAULT_SIZES = "10,1k,100k,1m"
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def measure(case: BenchmarkCase, size: int, min_time: float = 0.5, max_repeat: int = 20,
+            memory: bool = True) -> Dict[str, Any]:
+    """
+    1つの計測対象をサービス数を指定して計測する
+
+    Args:
+        case: 計測対象
+        size: サービス数
+        min_time: 処理時間の計測を繰り返す合計秒数の目安
+        max_repeat: 処理時間の計測を繰り返す回数の上限
+        memory: 最大メモリ使用量を計測するか
+
+    Returns:
+        Dict: 計測結果（case, size, repeats, min_seconds, median_seconds, peak_memory_bytes）
+    """
+    timings: List[float] = []
+    while len(timings) < max_repeat and (not timings or sum(timings) < min_time):
+        timings.append(_timed_run(case, size))
+
+    peak_memory = _peak_memory(case, size) if memory else None
+    return {
+        "case": case.name,
+        "size": size,
+        "repeats": len(timings),
+        "min_seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        "peak_memory_bytes": peak_memory
+    }
+
+
+def _timed_run(case: BenchmarkCase, size: int) -> float:
+    """入力を作成し、1回分の処理時間を計測する（入力の作成と後片付けは含めない）"""
+    args, cleanup = case.setup(size)
+    try:
+        gc.collect()
+        start = time.perf_counter()
+        case.run(args)
+        return time.perf_counter() - start
+    finally:
+        cleanup()
+
+
+def _peak_memory(case: BenchmarkCase, size: int) -> int:
+    """入力を作成し、1回分の処理で増えたメモリの最大値を計測する（入力自体は含めない）"""
+    args, cleanup = case.setup(size)
+    try:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            case.run(args)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return max(0, peak - baseline)
+    finally:
+        cleanup()
+
+
+def run_benchmarks(cases: List[BenchmarkCase], sizes: List[int], min_time: float = 0.5, max_repeat: int = 20,
+                   memory: bool = True, log=None) -> Dict[str, Any]:
+    """
+    計測対象とサービス数のすべての組み合わせを計測する
+
+    Args:
+        cases: 計測対象のリスト
+        sizes: サービス数のリスト
+        min_time: 処理時間の計測を繰り返す合計秒数の目安
+        max_repeat: 処理時間の計測を繰り返す回数の上限
+        memory: 最大メモリ使用量を計測するか
+        log: 計測ごとの結果を1行で受け取る関数
+
+    Returns:
+        Dict: 実行環境（environment）と計測結果（results）
+    """
+    results = []
+    for size in sizes:
+        for case in cases:
+            result = measure(case, size, min_time, max_repeat, memory)
+            results.append(result)
+            if log is not None:
+                log(_format_result(result))
+    return {
+        "version": RESULT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": _environment(),
+        "results": results
+    }
+
+
+def _format_result(result: Dict[str, Any]) -> str:
+    memory = result["peak_memory_bytes"]
+    memory_text = f"{memory / (1024 * 1024):10.2f} MiB" if memory is not None else "         - MiB"
+    return (f"{result['case']:<28} {format_size(result['size']):>5} "
+            f"{result['min_seconds'] * 1000:12.3f} ms (x{result['repeats']}) {memory_text}")
+
+
+def _environment() -> Dict[str, Any]:
+    """結果を比較する際に確認する実行環境"""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "commit": _git_commit()
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        completed = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                   timeout=5, cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def main(argv=None) -> None:
+    """ベンチマークのエントリーポイント"""
+    arg_parser = argparse.ArgumentParser(description="見積もり合算の性能ベンチマーク")
+    arg_parser.add_argument("--sizes", default=DEFAULT_SIZES, help="サービス数（カンマ区切り、例: 10,1k,100k,1m）")
+    arg_parser.add_argument("--cases", default="", help="計測対象（カンマ区切り、省略時はすべて）")
+    arg_parser.add_argument("--min-time", type=float, default=0.5, help="処理時間の計測を繰り返す合計秒数の目安")
+    arg_parser.add_argument("--max-repeat", type=int, default=20, help="処理時間の計測を繰り返す回数の上限")
+    arg_parser.add_argument("--no-memory", action="store_true", help="最大メモリ使用量を計測しない")
+    arg_parser.add_argument("--output", help="結果のJSONファイル（省略時は benchmarks/results/<日時>.json）")
+    arg_parser.add_argument("--list", action="store_true", help="計測対象の一覧を表示して終了する")
+    args = arg_parser.parse_args(argv)
+
+    if args.list:
+        for case in CASES:
+            print(f"{case.name:<28} {case.description}")
+        return
+
+    try:
+        sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+        names = [name.strip() for name in args.cases.split(",") if name.strip()]
+        cases = [CASES_BY_NAME[name] for name in names] if names else CASES
+    except (KeyError, ValueError) as e:
+        arg_parser.error(f"引数が不正です: {e}")
+
+    report = run_benchmarks(cases, sizes, args.min_time, args.max_repeat, not args.no_memory,
+                            log=lambda line: print(line, flush=True))
+
+    output = args.output or os.path.join(
+        DEFAULT_OUTPUT_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"結果を保存しました: {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -126,7 +126,7 @@ export class CalculatorMergerDevStack extends cdk.Stack {
       port: 80,
       targets: [],  // 後でサービスを追加
       healthCheck: {
-        path: '/',
+        path: '/readyz',
         interval: cdk.Duration.seconds(30),
         timeout: cdk.Duration.seconds(5),
         healthyHttpCodes: '200',
@@ -93,7 +93,7 @@ export class CalculatorMergerProdStack extends cdk.Stack {
         'STAGE': stageName,
       },
       healthCheck: {
-        command: ["CMD-SHELL", "curl -f http://localhost:5000/ || exit 1"],
+        command: ["CMD-SHELL", "curl -fs http://localhost:5000/healthz || exit 1"],
         interval: cdk.Duration.seconds(30),
         timeout: cdk.Duration.seconds(5),
         retries: 3,
@@ -202,7 +202,8 @@ export class CalculatorMergerProdStack extends cdk.Stack {
       port: 80,
       targets: [service],
       healthCheck: {
-        path: '/',
+        // 保存先やキューが使えないタスクにはリクエストを振り分けない
+        path: '/readyz',
         interval: cdk.Duration.seconds(30),
         timeout: cdk.Duration.seconds(5),
         healthyThresholdCount: 2,
@@ -345,16 +346,38 @@ export class CalculatorMergerProdStack extends cdk.Stack {
         }
       );
       
+      const origin = new origins.LoadBalancerV2Origin(lb, {
+        protocolPolicy: cloudfront.OriginProtocolPolicy.HTTP_ONLY,
+      });
+      
+      // アプリケーションのCache-Controlに従ってキャッシュする（指定がないレスポンスはキャッシュしない）
+      const originCachePolicy = new cloudfront.CachePolicy(this, 'OriginCacheControlPolicy', {
+        comment: 'Cache-Controlヘッダーに従ってキャッシュ',
+        defaultTtl: cdk.Duration.seconds(0),
+        minTtl: cdk.Duration.seconds(0),
+        maxTtl: cdk.Duration.days(365),
+        queryStringBehavior: cloudfront.CacheQueryStringBehavior.all(),
+        enableAcceptEncodingGzip: true,
+        enableAcceptEncodingBrotli: true,
+      });
+      
       const distribution = new cloudfront.Distribution(this, 'Distribution', {
         defaultBehavior: {
-          origin: new origins.LoadBalancerV2Origin(lb, {
-            protocolPolicy: cloudfront.OriginProtocolPolicy.HTTP_ONLY,
-          }),
+          origin: origin,
           allowedMethods: cloudfront.AllowedMethods.ALLOW_ALL,
-          cachePolicy: cloudfront.CachePolicy.CACHING_DISABLED,
+          cachePolicy: originCachePolicy,
           originRequestPolicy: cloudfront.OriginRequestPolicy.ALL_VIEWER,
           viewerProtocolPolicy: cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
         },
+        additionalBehaviors: {
+          // 内容ハッシュ付きのURLの静的ファイルは無期限にキャッシュする
+          '/assets/*': {
+            origin: origin,
+            allowedMethods: cloudfront.AllowedMethods.ALLOW_GET_HEAD,
+            cachePolicy: cloudfront.CachePolicy.CACHING_OPTIMIZED,
+            viewerProtocolPolicy: cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+          },
+        },
         domainNames: [domainName],
         certificate: cloudfront_certificate,
         enableLogging: true,
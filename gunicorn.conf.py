@@ -0,0 +1,141 @@
+"""
+gunicorn 設定
+
+アプリケーションを --preload でマスタープロセスに読み込み、サンプル見積もりなど
+読み取り専用のデータをコピーオンライトでワーカー間で共有します。
+バックグラウンドのスレッドはフォークで引き継がれないため、各ワーカーの起動後に開始します。
+
+使用例:
+    gunicorn --config gunicorn.conf.py "src.app:create_app()"
+
+環境変数:
+    PORT: 待ち受けるポート（既定: 5000）
+    GUNICORN_WORKERS / WEB_CONCURRENCY: ワーカープロセス数（省略時はCPU・メモリの上限から算出）
+    GUNICORN_THREADS: ワーカーあたりのスレッド数（省略時はCPU・メモリの上限から算出）
+    WRITE_QUEUE_ENABLED: 見積もりの遅延書き込み（省略時はワーカーが1つの場合だけ有効）
+    PROGRESS_WSGI_MAX_SUBSCRIBERS: ワーカーあたりの進捗の購読者数の上限（省略時はスレッド数の1/4）
+    GUNICORN_WORKER_MEMORY_MB: ワーカー1つあたりに見込むメモリ（既定: 256）
+    GUNICORN_MAX_REQUESTS: ワーカーを入れ替えるまでのリクエスト数（既定: 1000、0で無効）
+    GUNICORN_TIMEOUT: 応答のないワーカーを再起動するまでの秒数（既定: 120）
+    GUNICORN_GRACEFUL_TIMEOUT: 停止時に処理中のリクエストを待つ秒数（既定: 30）
+    PROMETHEUS_MULTIPROC_DIR: /metrics の値をワーカー間で集計するディレクトリ
+                              （既定: /dev/shm/merger-metrics、起動時に空にする）
+"""
+
+import gc
+import os
+import tempfile
+
+from gunicorn.glogging import Logger
+
+# /metrics の値をワーカー間で集計するため、prometheus_client を読み込む前に設定する
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "merger-metrics")
+)
+
+from src import metrics  # noqa: E402
+from src.ui.health import is_probe_path
+from src.ui.worker_sizing import cpu_limit, memory_limit_bytes, recommended_concurrency
+
+# 前回の起動で終了したワーカーの値を集計に含めない
+metrics.prepare_multiprocess_dir(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+# create_app() の中ではスレッドを開始せず、post_worker_init で開始する
+os.environ["START_BACKGROUND_SERVICES"] = "false"
+
+_cpus = cpu_limit()
+_memory = memory_limit_bytes()
+_workers, _threads = recommended_concurrency(
+    _cpus,
+    _memory,
+    int(os.environ.get("GUNICORN_WORKER_MEMORY_MB", "256")) * 1024 * 1024
+)
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+preload_app = True
+worker_class = "gthread"
+workers = int(os.environ.get("GUNICORN_WORKERS") or os.environ.get("WEB_CONCURRENCY") or _workers)
+threads = int(os.environ.get("GUNICORN_THREADS") or _threads)
+
+# 書き込み待ちの見積もりはワーカーのメモリにだけあり、別のワーカーに届いたダウンロードが404になるため、
+# 複数のワーカーで動かす場合は合算時に保存する
+if workers > 1:
+    os.environ.setdefault("WRITE_QUEUE_ENABLED", "false")
+
+# 進捗の購読（SSE）は接続中スレッドを占有するため、/merge のスレッドが足りなくならないよう少数に抑える
+os.environ.setdefault("PROGRESS_WSGI_MAX_SUBSCRIBERS", str(max(1, threads // 4)))
+
+# メモリの断片化やリークに備えて、一定数のリクエストを処理したワーカーを順に入れ替える
+# （全ワーカーが同時に再起動しないよう、ばらつきを持たせる）
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = max(1, max_requests // 10) if max_requests else 0
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+# ワーカーの生存確認用ファイルはメモリ上に置く（コンテナのディスクI/Oで停止扱いにならないように）
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+accesslog = "-"
+errorlog = "-"
+
+
+class ProbeFilteringLogger(Logger):
+    """ヘルスチェック（/healthz, /readyz）のリクエストをアクセスログに記録しないロガー"""
+
+    def access(self, resp, req, environ, request_time):
+        if is_probe_path(environ.get("PATH_INFO")):
+            return
+        super().access(resp, req, environ, request_time)
+
+
+logger_class = ProbeFilteringLogger
+
+
+def when_ready(server):
+    """マスタープロセスの準備完了時に算出したワーカー数を記録する"""
+    memory_mb = _memory // (1024 * 1024) if _memory else None
+    server.log.info(
+        f"ワーカー数: {workers}, スレッド数: {threads} (CPU: {_cpus:g}, メモリ: {memory_mb}MB)"
+    )
+
+
+def pre_fork(server, worker):
+    """
+    フォーク前に読み込み済みのオブジェクトをGCの対象外にする
+
+    GCがオブジェクトのヘッダーに書き込むと共有ページがコピーされるため、
+    フォーク前に読み込んだデータはワーカーのGCで走査させない。
+    """
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    """ワーカーの起動後にバックグラウンドのスレッドを開始する"""
+    services = _services(worker)
+    if services is not None:
+        services.start()
+
+
+def worker_exit(server, worker):
+    """ワーカーの終了時に書き込み待ちの見積もりを書き出す"""
+    services = _services(worker)
+    if services is not None:
+        services.shutdown()
+
+
+def child_exit(server, worker):
+    """終了したワーカーの値を /metrics の集計から除く（カウンターとヒストグラムは残す）"""
+    metrics.mark_process_dead(worker.pid)
+
+
+def _services(worker):
+    """ワーカーが読み込んだアプリケーションの AppServices を返す"""
+    from src.app import get_services
+
+    app = getattr(worker, "wsgi", None)
+    if app is None or not hasattr(app, "extensions"):
+        return None
+    return get_services(app)
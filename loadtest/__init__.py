@@ -0,0 +1,12 @@
+"""
+負荷試験
+
+ローカルの見積もり取得元スタブ（loadtest.stub_calculator）に対して見積もりを取得するアプリケーションへ、
+実際の利用に近いURLの組み合わせで /merge を繰り返し送信し、応答時間（p50・p99）、スループット、
+処理段階ごとの内訳（/metrics の差分）を計測します。calculator.aws には接続しません。
+
+使用例:
+    python -m loadtest.stub_calculator --port 8081 --delay 0.05 --jitter 0.2
+    CALCULATOR_ESTIMATE_SOURCE_URL='http://localhost:8081/estimates/{id}' gunicorn -c gunicorn.conf.py app:app
+    python -m loadtest.run --target http://localhost:5000 --duration 60 --concurrency 16
+"""
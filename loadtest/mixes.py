@@ -0,0 +1,137 @@
+"""
+負荷試験のURLの組み合わせ
+
+1回の /merge で送信するURLの組み合わせ（シナリオ）を重み付きで選びます。
+見積もりIDは synthetic-<サービス数>-<番号> の形式で、スタブが合成見積もりデータを返します。
+番号はシナリオごとの件数（id_pool）から選ぶため、同じ見積もりが繰り返し合算され、
+実際の利用と同じようにキャッシュや同じ合算の集約が働きます。
+"""
+
+import json
+import random
+from typing import Dict, Iterator, List, Tuple
+
+CALCULATOR_URL = "https://calculator.aws/#/estimate?id={id}"
+
+
+class Scenario:
+    """
+    1回の /merge で送信するURLの組み合わせの種類
+
+    URL数は min_urls〜max_urls から選び、各URLは services 件のサービスを持つ見積もりを指します。
+    """
+
+    def __init__(self, name: str, weight: float, min_urls: int, max_urls: int, services: int,
+                 missing_rate: float = 0.0):
+        """
+        初期化
+
+        Args:
+            name: シナリオ名
+            weight: 選ばれる割合の重み
+            min_urls: URL数の最小値
+            max_urls: URL数の最大値
+            services: 見積もりごとのサービス数
+            missing_rate: 存在しない見積もり（404）を含める割合（0〜1）
+        """
+        self.name = name
+        self.weight = weight
+        self.min_urls = min_urls
+        self.max_urls = max_urls
+        self.services = services
+        self.missing_rate = missing_rate
+
+    def url_set(self, rng: random.Random, id_pool: int) -> List[str]:
+        """
+        URLの組み合わせを1つ作成する
+
+        Args:
+            rng: 乱数
+            id_pool: 見積もりの番号の件数
+
+        Returns:
+            List: 見積もりURLのリスト（見積もりは重複しない）
+        """
+        url_count = rng.randint(self.min_urls, self.max_urls)
+        numbers = rng.sample(range(id_pool), min(url_count, id_pool))
+        estimate_ids = [f"synthetic-{self.services}-{number}" for number in numbers]
+        if self.missing_rate > 0 and rng.random() < self.missing_rate:
+            estimate_ids[-1] = f"missing-{rng.randrange(id_pool)}"
+        return [CALCULATOR_URL.format(id=estimate_id) for estimate_id in estimate_ids]
+
+
+# URLの組み合わせの構成（default は小さい見積もり2〜3件の合算が中心で、まれに大きな見積もりを含む）
+MIXES: Dict[str, List[Scenario]] = {
+    'default': [
+        Scenario('pair', 50, 2, 2, 20),
+        Scenario('few', 25, 3, 5, 100),
+        Scenario('many', 10, 6, 12, 30),
+        Scenario('large', 5, 2, 3, 2000),
+        Scenario('missing', 5, 2, 3, 20, missing_rate=1.0),
+        Scenario('single', 5, 1, 1, 50)
+    ],
+    'small': [
+        Scenario('pair', 70, 2, 2, 10),
+        Scenario('few', 30, 3, 4, 30)
+    ],
+    'large': [
+        Scenario('medium', 60, 2, 4, 1000),
+        Scenario('large', 30, 2, 3, 10000),
+        Scenario('huge', 10, 2, 2, 50000)
+    ]
+}
+
+
+def iter_url_sets(mix: List[Scenario], seed: int = 0, id_pool: int = 100) -> Iterator[Tuple[str, List[str]]]:
+    """
+    シナリオを重み付きで選び、URLの組み合わせを限りなく生成する
+
+    Args:
+        mix: シナリオのリスト
+        seed: シード値
+        id_pool: シナリオごとの見積もりの番号の件数
+
+    Yields:
+        Tuple: (シナリオ名, 見積もりURLのリスト)
+    """
+    rng = random.Random(seed)
+    weights = [scenario.weight for scenario in mix]
+    while True:
+        scenario = rng.choices(mix, weights=weights)[0]
+        yield scenario.name, scenario.url_set(rng, id_pool)
+
+
+def read_url_sets(path: str) -> List[Tuple[str, List[str]]]:
+    """
+    ファイルに記録したURLの組み合わせを読み込む
+
+    ファイルはJSON Lines形式で、1行に1回分のURLのリスト（または {"name": ..., "urls": [...]}）を記録します。
+    name のない行のシナリオ名はファイル名になります。
+
+    Args:
+        path: URLの組み合わせのファイル
+
+    Returns:
+        List: (シナリオ名, 見積もりURLのリスト) のリスト
+
+    Raises:
+        ValueError: ファイルの形式が不正、または空の場合
+    """
+    url_sets = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                raise ValueError(f"{path}:{line_number}: JSONではありません")
+            if isinstance(entry, dict) and isinstance(entry.get("urls"), list):
+                url_sets.append((entry.get("name") or path, entry["urls"]))
+            elif isinstance(entry, list):
+                url_sets.append((path, entry))
+            else:
+                raise ValueError(f"{path}:{line_number}: URLのリストではありません")
+    if not url_sets:
+        raise ValueError(f"URLの組み合わせがありません: {path}")
+    return url_sets
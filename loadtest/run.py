@@ -0,0 +1,344 @@
+"""
+負荷試験の実行
+
+URLの組み合わせ（loadtest.mixes）を重み付きで選んで /merge に同時に送信し、指定した秒数（または回数）の
+応答時間の分位数（p50・p90・p99）、スループット、ステータスごとの件数、シナリオごとの応答時間と、
+/metrics の差分による処理段階ごとの内訳を出力します。結果はJSONファイルにも保存します。
+
+ステータス 429・5xx と通信エラーをエラーとして数えます（存在しない見積もりを含むシナリオの400は想定どおりの応答です）。
+--max-p99 や --max-error-rate を超えた場合は終了コード1で終了するため、デプロイ前の確認に使用できます。
+
+使用例:
+    python -m loadtest.run --target http://localhost:5000 --duration 60 --concurrency 16
+    python -m loadtest.run --mix large --duration 120 --max-p99 5000 --max-error-rate 0.01
+    python -m loadtest.run --url-sets recorded.jsonl --requests 500
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import itertools
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import aiohttp
+
+from loadtest.mixes import MIXES, iter_url_sets, read_url_sets
+from loadtest.stages import parse_stage_metrics, stage_breakdown
+from src import metrics
+
+# 結果ファイルの形式のバージョン
+RESULT_VERSION = 1
+
+DEFAULT_TARGET = "http://127.0.0.1:5000"
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# 内訳の表示順
+STAGE_ORDER = [
+    metrics.STAGE_VALIDATE, metrics.STAGE_DECODE, metrics.STAGE_FETCH, metrics.STAGE_NORMALIZE,
+    metrics.STAGE_MERGE, metrics.STAGE_URL, metrics.STAGE_TOTAL_COST, metrics.STAGE_PERSIST, metrics.STAGE_EXPORT
+]
+
+
+def _is_error(status: Optional[int]) -> bool:
+    """エラーとして数える応答か（通信エラーはステータスがNone）"""
+    return status is None or status == 429 or status >= 500
+
+
+async def _send(session: aiohttp.ClientSession, target: str, urls: List[str]) -> Tuple[Optional[int], float, Optional[str]]:
+    """
+    /merge を1回送信する
+
+    Returns:
+        Tuple: (HTTPステータス, 応答を読み終えるまでの秒数, 通信エラーの種類)
+    """
+    start = time.perf_counter()
+    try:
+        async with session.post(f"{target}/merge", data=[("urls", url) for url in urls]) as response:
+            await response.read()
+            return response.status, time.perf_counter() - start, None
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        return None, time.perf_counter() - start, type(e).__name__
+
+
+async def _fetch_stage_metrics(session: aiohttp.ClientSession, target: str) -> Optional[Dict[str, Dict]]:
+    """/metrics を取得する（無効な場合や取得できない場合はNone）"""
+    try:
+        async with session.get(f"{target}/metrics") as response:
+            if response.status != 200:
+                return None
+            return parse_stage_metrics(await response.text())
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return None
+
+
+async def _drive(session: aiohttp.ClientSession, target: str, url_sets: Iterator[Tuple[str, List[str]]],
+                 concurrency: int, until: float, max_requests: Optional[int]) -> List[Dict[str, Any]]:
+    """
+    concurrency 件の送信を並行して、until（time.monotonic の値）または max_requests 回まで繰り返す
+
+    Returns:
+        List: リクエストごとの {"scenario", "urls", "status", "seconds", "error"}
+    """
+    samples: List[Dict[str, Any]] = []
+    started = 0
+
+    async def worker():
+        nonlocal started
+        while time.monotonic() < until and (max_requests is None or started < max_requests):
+            started += 1
+            scenario, urls = next(url_sets)
+            status, seconds, error = await _send(session, target, urls)
+            samples.append({"scenario": scenario, "urls": len(urls), "status": status, "seconds": seconds,
+                            "error": error})
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples
+
+
+async def run_load_test(target: str, url_sets: Iterator[Tuple[str, List[str]]], concurrency: int = 8,
+                        duration: Optional[float] = 30.0, max_requests: Optional[int] = None, warmup: float = 0.0,
+                        timeout: float = 60.0) -> Dict[str, Any]:
+    """
+    負荷試験を実行する
+
+    Args:
+        target: アプリケーションのURL（例: http://localhost:5000）
+        url_sets: (シナリオ名, 見積もりURLのリスト) を返すイテレーター
+        concurrency: 同時に送信するリクエスト数
+        duration: 計測する秒数（Noneの場合は max_requests 回まで）
+        max_requests: 計測するリクエスト数の上限
+        warmup: 計測の前に送信を続ける秒数（結果に含めない）
+        timeout: リクエストごとのタイムアウト秒数
+
+    Returns:
+        Dict: summarize の戻り値
+    """
+    if duration is None and max_requests is None:
+        raise ValueError("計測する秒数かリクエスト数を指定してください")
+
+    target = target.rstrip("/")
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        if warmup > 0:
+            await _drive(session, target, url_sets, concurrency, time.monotonic() + warmup, None)
+
+        before = await _fetch_stage_metrics(session, target)
+        until = time.monotonic() + duration if duration is not None else float("inf")
+        start = time.perf_counter()
+        samples = await _drive(session, target, url_sets, concurrency, until, max_requests)
+        elapsed = time.perf_counter() - start
+        after = await _fetch_stage_metrics(session, target)
+
+    stages = stage_breakdown(before, after, len(samples)) if before is not None and after is not None else None
+    return summarize(samples, elapsed, stages)
+
+
+def percentile(sorted_values: List[float], quantile: float) -> Optional[float]:
+    """
+    昇順に並べた値の分位数を求める（隣り合う値を線形補間する）
+
+    Args:
+        sorted_values: 昇順に並べた値
+        quantile: 分位（0〜1）
+
+    Returns:
+        Optional[float]: 分位数（値がない場合はNone）
+    """
+    if not sorted_values:
+        return None
+    position = quantile * (len(sorted_values) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _latency_summary(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    latencies = sorted(sample["seconds"] for sample in samples)
+    errors = sum(1 for sample in samples if _is_error(sample["status"]))
+    return {
+        "requests": len(samples),
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "mean_seconds": sum(latencies) / len(latencies) if latencies else None,
+        "p50_seconds": percentile(latencies, 0.50),
+        "p90_seconds": percentile(latencies, 0.90),
+        "p99_seconds": percentile(latencies, 0.99),
+        "max_seconds": latencies[-1] if latencies else None
+    }
+
+
+def summarize(samples: List[Dict[str, Any]], elapsed: float, stages: Optional[Dict[str, Dict]] = None) -> Dict[str, Any]:
+    """
+    リクエストごとの結果を集計する
+
+    Args:
+        samples: リクエストごとの {"scenario", "urls", "status", "seconds", "error"}
+        elapsed: 計測した秒数
+        stages: stage_breakdown の戻り値（/metrics を取得できなかった場合はNone）
+
+    Returns:
+        Dict: 全体（requests, throughput_rps, error_rate, p50_seconds など）、statuses、scenarios、stages
+    """
+    summary = _latency_summary(samples)
+    summary["duration_seconds"] = elapsed
+    summary["throughput_rps"] = len(samples) / elapsed if elapsed > 0 else 0.0
+    summary["statuses"] = dict(sorted(Counter(
+        str(sample["status"]) if sample["status"] is not None else sample["error"] for sample in samples
+    ).items()))
+
+    by_scenario: Dict[str, List[Dict[str, Any]]] = {}
+    for sample in samples:
+        by_scenario.setdefault(sample["scenario"], []).append(sample)
+    summary["scenarios"] = {name: _latency_summary(group) for name, group in sorted(by_scenario.items())}
+
+    summary["stages"] = stages
+    if stages is not None and summary["mean_seconds"] is not None:
+        # 処理段階に含まれない時間（HTTP、受付制御の待ち、応答の作成など）。取得が並列の場合は過小になる
+        attributed = sum(stage["per_request_seconds"] or 0.0 for stage in stages.values())
+        summary["unattributed_per_request_seconds"] = max(0.0, summary["mean_seconds"] - attributed)
+    return summary
+
+
+def _ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value * 1000:.1f} ms"
+
+
+def format_report(summary: Dict[str, Any]) -> str:
+    """
+    集計結果を表にする
+
+    Args:
+        summary: summarize の戻り値
+
+    Returns:
+        str: 集計結果の表
+    """
+    lines = [
+        f"requests {summary['requests']} in {summary['duration_seconds']:.1f} s, "
+        f"throughput {summary['throughput_rps']:.2f} req/s, errors {summary['error_rate'] * 100:.2f}%",
+        "status   " + "  ".join(f"{status}: {count}" for status, count in summary["statuses"].items()),
+        f"latency  p50 {_ms(summary['p50_seconds'])}  p90 {_ms(summary['p90_seconds'])}  "
+        f"p99 {_ms(summary['p99_seconds'])}  max {_ms(summary['max_seconds'])}",
+        "",
+        f"{'scenario':<12} {'requests':>8} {'errors':>8} {'p50':>12} {'p99':>12}"
+    ]
+    for name, scenario in summary["scenarios"].items():
+        lines.append(f"{name:<12} {scenario['requests']:>8} {scenario['error_rate'] * 100:>7.2f}% "
+                     f"{_ms(scenario['p50_seconds']):>12} {_ms(scenario['p99_seconds']):>12}")
+
+    lines.append("")
+    stages = summary["stages"]
+    if stages is None:
+        lines.append("処理段階ごとの内訳: /metrics を取得できません（METRICS_ENABLED と prometheus_client を確認してください）")
+        return "\n".join(lines)
+
+    lines.append(f"{'stage':<12} {'calls':>8} {'errors':>8} {'mean':>12} {'p50':>12} {'p99':>12} {'per request':>12}")
+    ordered = [stage for stage in STAGE_ORDER if stage in stages] + sorted(set(stages) - set(STAGE_ORDER))
+    for name in ordered:
+        stage = stages[name]
+        lines.append(f"{name:<12} {stage['count']:>8} {stage['errors']:>8} {_ms(stage['mean_seconds']):>12} "
+                     f"{_ms(stage['p50_seconds']):>12} {_ms(stage['p99_seconds']):>12} "
+                     f"{_ms(stage['per_request_seconds']):>12}")
+    if "unattributed_per_request_seconds" in summary:
+        lines.append(f"{'(other)':<12} {'':>8} {'':>8} {'':>12} {'':>12} {'':>12} "
+                     f"{_ms(summary['unattributed_per_request_seconds']):>12}")
+    return "\n".join(lines)
+
+
+def check_thresholds(summary: Dict[str, Any], max_p99: Optional[float] = None,
+                     max_error_rate: Optional[float] = None) -> List[str]:
+    """
+    集計結果がしきい値を超えていないか確認する
+
+    Args:
+        summary: summarize の戻り値
+        max_p99: p99の上限の秒数
+        max_error_rate: エラーの割合の上限（0〜1）
+
+    Returns:
+        List: しきい値を超えた項目の説明（超えていない場合は空）
+    """
+    violations = []
+    if max_p99 is not None and summary["p99_seconds"] is not None and summary["p99_seconds"] > max_p99:
+        violations.append(f"p99 {_ms(summary['p99_seconds'])} > {_ms(max_p99)}")
+    if max_error_rate is not None and summary["error_rate"] > max_error_rate:
+        violations.append(f"エラーの割合 {summary['error_rate'] * 100:.2f}% > {max_error_rate * 100:.2f}%")
+    if summary["requests"] == 0:
+        violations.append("リクエストを送信できませんでした")
+    return violations
+
+
+def main(argv=None) -> int:
+    """
+    負荷試験のエントリーポイント
+
+    Returns:
+        int: 終了コード（しきい値を超えた場合は1）
+    """
+    arg_parser = argparse.ArgumentParser(description="/merge の負荷試験")
+    arg_parser.add_argument("--target", default=DEFAULT_TARGET, help="アプリケーションのURL")
+    arg_parser.add_argument("--mix", choices=sorted(MIXES), default="default", help="URLの組み合わせの構成")
+    arg_parser.add_argument("--url-sets", help="記録したURLの組み合わせのファイル（JSON Lines、指定時は --mix を使用しない）")
+    arg_parser.add_argument("--seed", type=int, default=0, help="URLの組み合わせを選ぶ乱数のシード値")
+    arg_parser.add_argument("--id-pool", type=int, default=100, help="シナリオごとの見積もりの件数")
+    arg_parser.add_argument("--concurrency", type=int, default=8, help="同時に送信するリクエスト数")
+    arg_parser.add_argument("--duration", type=float, default=30.0, help="計測する秒数")
+    arg_parser.add_argument("--requests", type=int, help="計測するリクエスト数の上限（指定時は --duration を使用しない）")
+    arg_parser.add_argument("--warmup", type=float, default=5.0, help="計測の前に送信を続ける秒数")
+    arg_parser.add_argument("--timeout", type=float, default=60.0, help="リクエストごとのタイムアウト秒数")
+    arg_parser.add_argument("--max-p99", type=float, help="p99の上限（ミリ秒）")
+    arg_parser.add_argument("--max-error-rate", type=float, help="エラーの割合の上限（0〜1）")
+    arg_parser.add_argument("--output", help="結果のJSONファイル（省略時は loadtest/results/<日時>.json）")
+    args = arg_parser.parse_args(argv)
+
+    if args.concurrency < 1 or args.id_pool < 1:
+        arg_parser.error("--concurrency と --id-pool は1以上を指定してください")
+    if args.url_sets:
+        try:
+            url_sets = itertools.cycle(read_url_sets(args.url_sets))
+        except (OSError, ValueError) as e:
+            arg_parser.error(f"URLの組み合わせを読み込めません: {e}")
+    else:
+        url_sets = iter_url_sets(MIXES[args.mix], args.seed, args.id_pool)
+
+    duration = None if args.requests is not None else args.duration
+    summary = asyncio.run(run_load_test(args.target, url_sets, args.concurrency, duration, args.requests,
+                                        args.warmup, args.timeout))
+    print(format_report(summary))
+
+    report = {
+        "version": RESULT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "target": args.target,
+            "mix": None if args.url_sets else args.mix,
+            "url_sets": args.url_sets,
+            "seed": args.seed,
+            "id_pool": args.id_pool,
+            "concurrency": args.concurrency,
+            "duration": duration,
+            "requests": args.requests,
+            "warmup": args.warmup
+        },
+        "summary": summary
+    }
+    output = args.output or os.path.join(DEFAULT_OUTPUT_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"結果を保存しました: {output}", file=sys.stderr)
+
+    max_p99 = args.max_p99 / 1000 if args.max_p99 is not None else None
+    violations = check_thresholds(summary, max_p99, args.max_error_rate)
+    for violation in violations:
+        print(f"しきい値を超えました: {violation}", file=sys.stderr)
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
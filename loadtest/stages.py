@@ -0,0 +1,113 @@
+"""
+処理段階ごとの内訳
+
+アプリケーションの /metrics（Prometheusのテキスト形式）を負荷の前後で取得し、
+merger_stage_duration_seconds ヒストグラムの差分から、負荷の間の処理段階ごとの
+呼び出し回数、合計時間、分位数（バケットの線形補間）を計算します。
+"""
+
+import re
+import math
+from typing import Dict, List, Optional, Tuple
+
+STAGE_DURATION = "merger_stage_duration_seconds"
+STAGE_ERRORS = "merger_stage_errors_total"
+
+_SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)')
+_LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_stage_metrics(text: str) -> Dict[str, Dict]:
+    """
+    /metrics の応答から処理段階ごとのヒストグラムとエラー数を取り出す
+
+    Args:
+        text: Prometheusのテキスト形式のメトリクス
+
+    Returns:
+        Dict: 処理段階ごとの {"buckets": {上限: 累積回数}, "sum": 合計秒数, "count": 回数, "errors": エラー数}
+    """
+    stages: Dict[str, Dict] = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        match = _SAMPLE.match(line)
+        if match is None:
+            continue
+        name, label_text, value = match.groups()
+        labels = dict(_LABEL.findall(label_text or ''))
+        stage = labels.get('stage')
+        if stage is None:
+            continue
+        entry = stages.setdefault(stage, {"buckets": {}, "sum": 0.0, "count": 0.0, "errors": 0.0})
+        if name == STAGE_DURATION + '_bucket':
+            entry["buckets"][float(labels['le'])] = float(value)
+        elif name == STAGE_DURATION + '_sum':
+            entry["sum"] = float(value)
+        elif name == STAGE_DURATION + '_count':
+            entry["count"] = float(value)
+        elif name == STAGE_ERRORS:
+            entry["errors"] = float(value)
+    return stages
+
+
+def histogram_quantile(quantile: float, buckets: List[Tuple[float, float]]) -> Optional[float]:
+    """
+    累積ヒストグラムから分位数を求める（Prometheusの histogram_quantile と同じく、バケット内を線形補間する）
+
+    Args:
+        quantile: 分位（0〜1）
+        buckets: (上限, 累積回数) のリスト（上限の昇順、最後は +Inf）
+
+    Returns:
+        Optional[float]: 分位数の秒数（回数が0の場合はNone）
+    """
+    if not buckets or buckets[-1][1] <= 0:
+        return None
+    rank = quantile * buckets[-1][1]
+    lower_bound, lower_count = 0.0, 0.0
+    for upper_bound, count in buckets:
+        if count >= rank:
+            if math.isinf(upper_bound):
+                # 最後の有限の上限を超えた分は推定できないため、その上限を返す
+                return lower_bound
+            if count == lower_count:
+                return upper_bound
+            return lower_bound + (upper_bound - lower_bound) * (rank - lower_count) / (count - lower_count)
+        lower_bound, lower_count = upper_bound, count
+    return lower_bound
+
+
+def stage_breakdown(before: Dict[str, Dict], after: Dict[str, Dict], requests: int) -> Dict[str, Dict]:
+    """
+    負荷の前後のメトリクスの差分から、処理段階ごとの内訳を計算する
+
+    Args:
+        before: 負荷の前の parse_stage_metrics の戻り値
+        after: 負荷の後の parse_stage_metrics の戻り値
+        requests: 負荷の間に送信した /merge のリクエスト数
+
+    Returns:
+        Dict: 処理段階ごとの {"count", "errors", "total_seconds", "mean_seconds", "per_request_seconds",
+              "p50_seconds", "p99_seconds"}（負荷の間に呼ばれなかった段階は含めない）
+    """
+    breakdown = {}
+    for stage, current in after.items():
+        previous = before.get(stage, {"buckets": {}, "sum": 0.0, "count": 0.0, "errors": 0.0})
+        count = current["count"] - previous["count"]
+        if count <= 0:
+            continue
+        total = current["sum"] - previous["sum"]
+        buckets = sorted(
+            (bound, value - previous["buckets"].get(bound, 0.0)) for bound, value in current["buckets"].items()
+        )
+        breakdown[stage] = {
+            "count": int(count),
+            "errors": int(current["errors"] - previous["errors"]),
+            "total_seconds": total,
+            "mean_seconds": total / count,
+            "per_request_seconds": total / requests if requests else None,
+            "p50_seconds": histogram_quantile(0.50, buckets),
+            "p99_seconds": histogram_quantile(0.99, buckets)
+        }
+    return breakdown
@@ -0,0 +1,174 @@
+"""
+見積もり取得元スタブモジュール
+
+テストと負荷試験専用です（アプリケーションのイメージには含めません）。
+CALCULATOR_ESTIMATE_SOURCE_URL に指定して、見積もりの取得を伴う合算をローカルで検証するための
+HTTPサーバーを提供します。応答を指定した秒数だけ遅らせて、応答の遅い取得元を再現できます。
+応答時間のばらつき（--jitter）とサーバーエラーの割合（--error-rate）も指定できます。
+
+見積もりIDが synthetic-<サービス数>-<番号> の場合は、src.data.synthetic の合成見積もりデータ
+（エクスポート形式）を返します。内容は見積もりIDごとに一定です。
+
+使用例:
+    python -m loadtest.stub_calculator --port 8081 --delay 2
+    python -m loadtest.stub_calculator --port 8081 --delay 0.05 --jitter 0.2 --error-rate 0.01
+    CALCULATOR_ESTIMATE_SOURCE_URL='http://localhost:8081/estimates/{id}' \\
+        uvicorn --factory src.ui.asgi:create_asgi_app --port 5000
+"""
+
+import random
+import asyncio
+import hashlib
+import argparse
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+from src.data.synthetic import SyntheticEstimateGenerator
+
+# 見つからない見積もりとして404を返す見積もりIDの接頭辞
+MISSING_PREFIX = 'missing'
+
+# 合成見積もりデータを返す見積もりIDの接頭辞（synthetic-<サービス数>-<番号>）
+SYNTHETIC_PREFIX = 'synthetic'
+
+# 合成見積もりデータのサービス数の上限
+MAX_SYNTHETIC_SERVICES = 1000000
+
+
+def stub_estimate(estimate_id: str) -> Dict[str, Any]:
+    """
+    見積もりIDから一定の内容の見積もりデータを作成する
+
+    Args:
+        estimate_id: 見積もりID
+
+    Returns:
+        Dict: 内部形式の見積もりデータ
+    """
+    seed = int(hashlib.sha256(estimate_id.encode('utf-8')).hexdigest()[:8], 16)
+    regions = ['us-east-1', 'us-west-2', 'ap-northeast-1', 'eu-central-1']
+    services = []
+    for index, service_type in enumerate(['EC2', 'S3', 'RDS', 'Lambda', 'DynamoDB'][:seed % 5 + 1]):
+        services.append({
+            'name': f"Amazon {service_type}",
+            'region': regions[(seed >> index) % len(regions)],
+            'monthlyCost': float((seed >> (index * 3)) % 1000 + 10),
+            'upfrontCost': float(seed % 200) if service_type == 'EC2' else 0.0,
+            'description': f"{service_type} service",
+            'config': {'serviceCode': service_type.lower()}
+        })
+    return {'name': f"Estimate-{estimate_id[:8]}", 'currency': 'USD', 'services': services}
+
+
+def synthetic_service_count(estimate_id: str) -> Optional[int]:
+    """
+    合成見積もりデータの見積もりIDからサービス数を取り出す
+
+    Args:
+        estimate_id: 見積もりID
+
+    Returns:
+        Optional[int]: サービス数（合成見積もりデータの見積もりIDでない場合はNone）
+    """
+    parts = estimate_id.split('-')
+    if len(parts) != 3 or parts[0] != SYNTHETIC_PREFIX or not parts[1].isdigit():
+        return None
+    service_count = int(parts[1])
+    return service_count if service_count <= MAX_SYNTHETIC_SERVICES else None
+
+
+@lru_cache(maxsize=256)
+def synthetic_body(estimate_id: str, service_count: int) -> bytes:
+    """
+    合成見積もりデータの応答本文を作成する（見積もりIDごとに一定の内容）
+
+    Args:
+        estimate_id: 見積もりID
+        service_count: サービス数
+
+    Returns:
+        bytes: エクスポート形式の見積もりJSON
+    """
+    seed = int(hashlib.sha256(estimate_id.encode('utf-8')).hexdigest()[:8], 16)
+    generator = SyntheticEstimateGenerator(seed)
+    return "".join(generator.iter_chunks(service_count, f"Estimate-{estimate_id}")).encode('utf-8')
+
+
+class StubCalculator:
+    """
+    見積もりJSONを返すスタブサーバー
+
+    GET /estimates/{estimate_id} に、delay 秒（と 0〜jitter 秒のばらつき）待ってから見積もりデータを返します。
+    error_rate の割合のリクエストには500を返します。
+    統計情報（stats）で、処理中のリクエスト数の最大値と、返したエラーの数を確認できます。
+    """
+
+    def __init__(self, delay: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None):
+        """
+        初期化
+
+        Args:
+            delay: 応答を遅らせる秒数
+            jitter: 応答を遅らせる秒数に加える、ばらつきの上限の秒数
+            error_rate: 500を返すリクエストの割合（0〜1）
+            seed: ばらつきとエラーの乱数のシード値
+        """
+        if not 0 <= error_rate <= 1:
+            raise ValueError("エラーの割合は0〜1で指定してください")
+        self.delay = delay
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self.stats = {'requests': 0, 'in_flight': 0, 'max_in_flight': 0, 'errors': 0}
+        self.app = web.Application()
+        self.app.router.add_get('/estimates/{estimate_id}', self._get_estimate)
+
+    async def _get_estimate(self, request: web.Request) -> web.Response:
+        estimate_id = request.match_info['estimate_id']
+        self.stats['requests'] += 1
+        self.stats['in_flight'] += 1
+        self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.stats['in_flight'])
+        try:
+            delay = self.delay + (self._random.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        finally:
+            self.stats['in_flight'] -= 1
+
+        if self.error_rate > 0 and self._random.random() < self.error_rate:
+            self.stats['errors'] += 1
+            return web.json_response({'error': 'internal server error'}, status=500)
+        if estimate_id.startswith(MISSING_PREFIX):
+            return web.json_response({'error': 'not found'}, status=404)
+
+        service_count = synthetic_service_count(estimate_id)
+        if service_count is not None:
+            # 大きな見積もりの生成でイベントループを止めない
+            loop = asyncio.get_running_loop()
+            body = await loop.run_in_executor(None, synthetic_body, estimate_id, service_count)
+            return web.Response(body=body, content_type='application/json')
+        return web.json_response(stub_estimate(estimate_id))
+
+
+def main(argv=None) -> None:
+    """スタブサーバーのエントリーポイント"""
+    arg_parser = argparse.ArgumentParser(description="見積もり取得元スタブ")
+    arg_parser.add_argument("--host", default="127.0.0.1", help="待ち受けるアドレス")
+    arg_parser.add_argument("--port", type=int, default=8081, help="待ち受けるポート")
+    arg_parser.add_argument("--delay", type=float, default=0.0, help="応答を遅らせる秒数")
+    arg_parser.add_argument("--jitter", type=float, default=0.0, help="応答を遅らせる秒数に加える、ばらつきの上限の秒数")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="500を返すリクエストの割合（0〜1）")
+    arg_parser.add_argument("--seed", type=int, default=None, help="ばらつきとエラーの乱数のシード値")
+    args = arg_parser.parse_args(argv)
+
+    try:
+        stub = StubCalculator(args.delay, args.jitter, args.error_rate, args.seed)
+    except ValueError as e:
+        arg_parser.error(str(e))
+    web.run_app(stub.app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
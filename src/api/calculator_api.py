@@ -5,14 +5,18 @@ AWS Pricing Calculatorとの連携を行うためのAPIクラスを提供しま
 """
 
 import os
-import json
-import uuid
 import base64
 import zlib
 import csv
-from typing import Dict, List, Any, Optional
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any
 import logging
-import requests
+
+from src import metrics
+from src.data.canonical import canonical_json
+from src.data.native_writer import NativeExportWriter
 
 logger = logging.getLogger(__name__)
 
@@ -23,17 +27,36 @@ class CalculatorAPI:
     このクラスは、以下の機能を提供します：
     - 見積もりデータからAWS Pricing Calculator URLの生成
     - 見積もりデータからの総コスト計算
-    - 各種形式へのエクスポート（CSV, PDF）
+    - 各種形式へのエクスポート（CSV, PDF, AWS Pricing Calculator形式）
     """
     
-    def __init__(self):
-        """初期化"""
+    # 共有URLの長さ上限（ブラウザやプロキシで安全に扱える長さ）
+    DEFAULT_MAX_URL_LENGTH = 8000
+    # 速度優先から圧縮率優先の順に試す圧縮レベル
+    COMPRESSION_LEVELS = (1, 6, 9)
+    
+    def __init__(self, max_url_length: int = DEFAULT_MAX_URL_LENGTH, url_cache_size: int = 256):
+        """
+        初期化
+        
+        Args:
+            max_url_length: 生成する共有URLの長さ上限
+            url_cache_size: 生成済みURLをメモ化する件数
+        """
         self.base_url = "https://calculator.aws/"
+        self.max_url_length = max_url_length
+        self.url_cache_size = url_cache_size
+        self._url_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._url_cache_lock = threading.Lock()
         
     def generate_calculator_url(self, estimate_data: Dict[str, Any]) -> str:
         """
         見積もりデータからAWS Pricing Calculator URLを生成する
         
+        見積もりデータを正規化された最小JSONに変換し、zlib圧縮とURLセーフな
+        Base64エンコードを行ってURLに埋め込みます。圧縮レベルはURLが上限長に
+        収まる最も高速なレベルを選択し、結果は内容ハッシュごとにメモ化します。
+        
         Args:
             estimate_data: 見積もりデータ
             
@@ -41,24 +64,55 @@ class CalculatorAPI:
             str: 生成されたAWS Pricing Calculator URL
         """
         try:
-            # 実際のAWS Pricing CalculatorはデータをBase64エンコードし、
-            # クエリパラメータとして渡す仕組みになっています
-            # ここではシミュレーションとして一意のIDを生成します
-            
-            # 本番実装では実際のデータをエンコードしてURLを生成します
-            # data_json = json.dumps(estimate_data)
-            # compressed = zlib.compress(data_json.encode('utf-8'))
-            # encoded = base64.b64encode(compressed).decode('ascii')
-            
-            # シミュレーション用にUUIDを生成
-            estimate_id = str(uuid.uuid4()).replace('-', '')[:16]
+            with metrics.stage(metrics.STAGE_URL):
+                data_json = canonical_json(estimate_data)
+                digest = hashlib.sha256(data_json.encode('utf-8')).hexdigest()
+                
+                with self._url_cache_lock:
+                    cached_url = self._url_cache.get(digest)
+                    if cached_url is not None:
+                        self._url_cache.move_to_end(digest)
+                metrics.record_cache("url", cached_url is not None)
+                if cached_url is not None:
+                    return cached_url
+                
+                url = self._encode_calculator_url(data_json, digest[:16])
+                
+                with self._url_cache_lock:
+                    self._url_cache[digest] = url
+                    while len(self._url_cache) > self.url_cache_size:
+                        self._url_cache.popitem(last=False)
             
-            return f"{self.base_url}#/estimate?id={estimate_id}"
+            return url
             
         except Exception as e:
             logger.error(f"URL生成中にエラーが発生: {str(e)}", exc_info=True)
             return f"{self.base_url}#/estimate"
     
+    def _encode_calculator_url(self, data_json: str, estimate_id: str) -> str:
+        """
+        正規化済みJSONを圧縮・エンコードしてURLを組み立てる
+        
+        Args:
+            data_json: 正規化された見積もりJSON
+            estimate_id: URLに含める見積もりID
+            
+        Returns:
+            str: 生成されたURL
+        """
+        raw = data_json.encode('utf-8')
+        url = f"{self.base_url}#/estimate?id={estimate_id}"
+        
+        for level in self.COMPRESSION_LEVELS:
+            compressed = zlib.compress(raw, level)
+            encoded = base64.urlsafe_b64encode(compressed).decode('ascii').rstrip('=')
+            url = f"{self.base_url}#/estimate?id={estimate_id}&data={encoded}"
+            if len(url) <= self.max_url_length:
+                return url
+        
+        logger.warning(f"共有URLが上限長を超えています: {len(url)} > {self.max_url_length}")
+        return url
+    
     def calculate_total_cost(self, estimate_data: Dict[str, Any]) -> Dict[str, str]:
         """
         見積もりデータから総コストを計算する
@@ -70,23 +124,24 @@ class CalculatorAPI:
             Dict: 月額、初期、年間コスト
         """
         try:
-            # 実際の実装では見積もりデータから総コストを計算します
-            # ここではサンプル実装としてモック値を返します
+            with metrics.stage(metrics.STAGE_TOTAL_COST):
+                # 実際の実装では見積もりデータから総コストを計算します
+                # ここではサンプル実装としてモック値を返します
             
-            # サービスごとのコスト集計
-            monthly_total = 0.0
-            upfront_total = 0.0
+                # サービスごとのコスト集計
+                monthly_total = 0.0
+                upfront_total = 0.0
             
-            # モック実装
-            if 'services' in estimate_data:
-                for service in estimate_data['services']:
-                    if 'monthlyCost' in service:
-                        monthly_total += float(service['monthlyCost'])
-                    if 'upfrontCost' in service:
-                        upfront_total += float(service['upfrontCost'])
+                # モック実装
+                if 'services' in estimate_data:
+                    for service in estimate_data['services']:
+                        if 'monthlyCost' in service:
+                            monthly_total += float(service['monthlyCost'])
+                        if 'upfrontCost' in service:
+                            upfront_total += float(service['upfrontCost'])
             
-            # 12ヶ月分の計算
-            annual_total = monthly_total * 12 + upfront_total
+                # 12ヶ月分の計算
+                annual_total = monthly_total * 12 + upfront_total
             
             return {
                 'monthly': f"{monthly_total:,.2f} USD",
@@ -184,6 +239,28 @@ class CalculatorAPI:
                 
             return output_path
     
+    def export_to_native(self, estimate_data: Dict[str, Any], estimate_id: str, output_dir: str) -> str:
+        """
+        見積もりデータをAWS Pricing Calculatorのエクスポート形式で出力する
+        
+        Args:
+            estimate_data: 見積もりデータ
+            estimate_id: 見積もりID
+            output_dir: 出力ディレクトリ
+            
+        Returns:
+            str: 出力ファイルのパス
+        """
+        output_path = os.path.join(output_dir, f"{estimate_id}.json")
+        
+        writer = NativeExportWriter()
+        share_url = self.generate_calculator_url(estimate_data)
+        
+        with open(output_path, 'w', encoding='utf-8') as file:
+            writer.write(estimate_data, file, share_url=share_url)
+            
+        return output_path
+    
     def export_to_pdf(self, estimate_data: Dict[str, Any], estimate_id: str, output_dir: str) -> str:
         """
         見積もりデータをPDF形式にエクスポートする
@@ -1,102 +1,450 @@
 """
 AWS Pricing Calculator 見積もり合算ツール
 
-このツールは複数のAWS Pricing Calculatorの見積もりURLを入力として受け取り、
-すべての見積もりを合算した結果を表示します。
+複数のAWS Pricing Calculator見積もりURLを入力として受け取り、
+それらを合算した結果を表示するウェブアプリケーションのファクトリを提供します。
+
+gunicorn からは --preload で読み込み、サンプル見積もりなど読み取り専用のデータを
+フォーク前に一度だけ読み込んでワーカー間で共有します。バックグラウンドのスレッドは
+フォーク後に各ワーカーで開始します（gunicorn.conf.py を参照）。
+
+使用例:
+    gunicorn --config gunicorn.conf.py "src.app:create_app()"
 """
 
-import json
 import os
-from flask import Flask, request, render_template, jsonify
+import atexit
+import logging
+import threading
+from collections import ChainMap
+from typing import Any, Dict, List, Mapping, Optional
+
+from flask import Flask
+from dotenv import load_dotenv
 
+from src import metrics
 from src.data.parser import EstimateParser
-from src.merger.cost_merger import EstimateMerger
+from src.merger.estimate_merger import EstimateMerger
 from src.api.calculator_api import CalculatorAPI
+from src.storage.factory import create_estimate_store
+from src.storage.catalog import EstimateCatalog
+from src.storage.retention import RetentionWorker, migrate_to_sharded_layout
+from src.storage.write_behind import WriteBehindQueue
+from src.data.canonical import content_hash
+from src.data.sample_catalog import SampleCatalog
+from src.data.single_flight import SingleFlight
+from src.merger.merge_pipeline import MergePipeline
+from src.jobs.job_manager import JobManager
+from src.jobs.job_queue import LocalJobQueue
+from src.jobs.factory import check_shared_backends, create_job_queue, create_job_status_store
+from src.jobs.dispatcher import QueuedJobDispatcher
+from src.jobs.worker import MergeWorker
+from src.ui.compression import CompressionMiddleware
+from src.ui.admission import AdmissionController, TokenBucketLimiter
+from src.ui.health import ReadinessChecker, install_probe_log_filter
+from src.ui.assets import StaticAssets
+from src.ui.progress import ProgressBroker
+from src.ui.routes import ui_blueprint, SERVICES_EXTENSION
+
+logger = logging.getLogger(__name__)
+
+# アプリケーションのルートディレクトリ（templates と json_samples の基準）
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_config(environ: Optional[Mapping[str, str]] = None) -> Dict[str, Any]:
+    """
+    環境変数からアプリケーションの設定を作成する
+
+    Args:
+        environ: 参照する環境変数（省略時は os.environ）
+
+    Returns:
+        Dict: Flaskの設定値
+    """
+    environ = os.environ if environ is None else environ
+    merged_estimates_dir = environ.get("MERGED_ESTIMATES_DIR", "merged_estimates")
+    return {
+        "SECRET_KEY": environ.get("SECRET_KEY", os.urandom(24).hex()),
+        "JSON_AS_ASCII": False,
+        "MAX_CONTENT_LENGTH": 16 * 1024 * 1024,  # 16MB
+
+        # 見積もりファイルのアップロード（/merge/upload）の上限
+        "UPLOAD_MAX_FILE_SIZE": int(environ.get("UPLOAD_MAX_FILE_SIZE", str(8 * 1024 * 1024))),
+        "UPLOAD_MAX_FILES": int(environ.get("UPLOAD_MAX_FILES", "20")),
+
+        # 出力ディレクトリ
+        "MERGED_ESTIMATES_DIR": merged_estimates_dir,
+        "JSON_SAMPLES_DIR": environ.get("JSON_SAMPLES_DIR", os.path.join(PROJECT_ROOT, "json_samples")),
+        "STATIC_DIR": os.path.join(PROJECT_ROOT, "static"),
+        "LOG_DIR": environ.get("LOG_DIR", "logs"),
+        # 未設定（空を含む）の場合は MERGED_ESTIMATES_DIR 配下（catalog_db_path() で解決する）
+        "CATALOG_DB_PATH": environ.get("CATALOG_DB_PATH") or None,
+
+        # 見積もりの保存先、合算ジョブのキューとジョブ状態の保存先（詳細な設定は各生成関数が環境変数から読む）
+        "ESTIMATE_STORAGE_BACKEND": (environ.get("ESTIMATE_STORAGE_BACKEND") or "filesystem").lower(),
+        "JOB_QUEUE_BACKEND": (environ.get("JOB_QUEUE_BACKEND") or "inprocess").lower(),
+        "JOB_STATUS_BACKEND": (environ.get("JOB_STATUS_BACKEND") or "sqlite").lower(),
+        # キュー経由のワーカーが1つのジョブを実行する回数の上限
+        "JOB_MAX_ATTEMPTS": int(environ.get("JOB_MAX_ATTEMPTS", "3")),
+
+        # 見積もりIDから見積もりJSONを取得するURL（省略時はモックデータ）と取得のタイムアウト秒数
+        "CALCULATOR_ESTIMATE_SOURCE_URL": environ.get("CALCULATOR_ESTIMATE_SOURCE_URL") or None,
+        "CALCULATOR_FETCH_TIMEOUT": float(environ.get("CALCULATOR_FETCH_TIMEOUT", "30")),
+
+        # 同じ見積もりの取得と、同じ組み合わせの合算が同時に要求された場合に1回にまとめる
+        "SINGLE_FLIGHT_ENABLED": environ.get("SINGLE_FLIGHT_ENABLED", "true").lower() == "true",
+
+        # 合算の進捗配信（SSE）。購読者数の上限、無通信時にコメントを送る間隔、チャネルを保持する秒数
+        "PROGRESS_MAX_SUBSCRIBERS": int(environ.get("PROGRESS_MAX_SUBSCRIBERS", "1000")),
+        "PROGRESS_HEARTBEAT_SECONDS": float(environ.get("PROGRESS_HEARTBEAT_SECONDS", "15")),
+        "PROGRESS_TTL_SECONDS": float(environ.get("PROGRESS_TTL_SECONDS", "300")),
+        # WSGI版の購読者数の上限（スレッドを占有するため、ワーカーのスレッド数より十分小さくする）と、
+        # 合算が始まらないチャネルを待つ秒数。画面から購読するのは単一プロセスのASGI版で有効にした場合だけ
+        "PROGRESS_WSGI_MAX_SUBSCRIBERS": int(environ.get("PROGRESS_WSGI_MAX_SUBSCRIBERS", "2")),
+        "PROGRESS_WSGI_CHANNEL_WAIT_SECONDS": float(environ.get("PROGRESS_WSGI_CHANNEL_WAIT_SECONDS", "2")),
+        "PROGRESS_SSE_ENABLED": environ.get("PROGRESS_SSE_ENABLED", "false").lower() == "true",
+
+        # 非同期版（ASGI）の見積もり取得の同時接続数の上限と、合算を実行するスレッド数
+        "ASYNC_FETCH_CONNECTIONS": int(environ.get("ASYNC_FETCH_CONNECTIONS", "256")),
+        "ASYNC_MERGE_WORKERS": int(environ.get("ASYNC_MERGE_WORKERS", str(min(32, (os.cpu_count() or 1) + 4)))),
+
+        # 保存済み見積もりの保持期間と合計サイズの上限（0の場合は無制限）
+        "RETENTION_TTL_DAYS": float(environ.get("RETENTION_TTL_DAYS", "90")),
+        "RETENTION_MAX_TOTAL_MB": float(environ.get("RETENTION_MAX_TOTAL_MB", "5120")),
+        "RETENTION_INTERVAL_SECONDS": float(environ.get("RETENTION_INTERVAL_SECONDS", "600")),
+
+        # 合算見積もりの遅延書き込みキューの上限件数と、1回にまとめて書き込む件数。
+        # 書き込み待ちのデータはプロセスのメモリにだけあるため、複数のプロセスでダウンロードを処理する場合は無効にする
+        "WRITE_QUEUE_ENABLED": environ.get("WRITE_QUEUE_ENABLED", "true").lower() == "true",
+        "WRITE_QUEUE_MAX_SIZE": int(environ.get("WRITE_QUEUE_MAX_SIZE", "256")),
+        "WRITE_QUEUE_BATCH_SIZE": int(environ.get("WRITE_QUEUE_BATCH_SIZE", "32")),
+
+        # 非同期合算ジョブの同時実行数、実行待ちの上限、完了したジョブの保持秒数
+        "JOB_MAX_WORKERS": int(environ.get("JOB_MAX_WORKERS", "4")),
+        "JOB_MAX_QUEUED": int(environ.get("JOB_MAX_QUEUED", "100")),
+        "JOB_RESULT_TTL_SECONDS": float(environ.get("JOB_RESULT_TTL_SECONDS", "3600")),
+
+        # 一括合算で受け付けるグループ数と、全グループ合計の見積もり数の上限
+        "BATCH_MAX_GROUPS": int(environ.get("BATCH_MAX_GROUPS", "100")),
+        "BATCH_MAX_SOURCES": int(environ.get("BATCH_MAX_SOURCES", "1000")),
+
+        # /merge の受付制御（同時に処理するコストの上限、待ち行列、クライアントごとのトークンバケット）
+        "ADMISSION_ENABLED": environ.get("ADMISSION_ENABLED", "true").lower() == "true",
+        "ADMISSION_MAX_COST": float(environ.get("ADMISSION_MAX_COST", "64")),
+        "ADMISSION_MAX_QUEUE": int(environ.get("ADMISSION_MAX_QUEUE", "64")),
+        "ADMISSION_QUEUE_TIMEOUT": float(environ.get("ADMISSION_QUEUE_TIMEOUT", "10")),
+        "ADMISSION_CLIENT_RATE": float(environ.get("ADMISSION_CLIENT_RATE", "5")),
+        "ADMISSION_CLIENT_BURST": float(environ.get("ADMISSION_CLIENT_BURST", "50")),
+        "ADMISSION_URL_COST": float(environ.get("ADMISSION_URL_COST", "1")),
+        "ADMISSION_UPLOAD_COST_PER_MB": float(environ.get("ADMISSION_UPLOAD_COST_PER_MB", "4")),
+        # X-Forwarded-For の末尾から数えて信頼するプロキシの数（ALBの背後では1）
+        "TRUSTED_PROXY_COUNT": int(environ.get("TRUSTED_PROXY_COUNT", "0")),
+
+        # トップページのキャッシュ有効期間（静的ファイルは内容ハッシュ付きのURLで無期限にキャッシュする）
+        "INDEX_CACHE_MAX_AGE": int(environ.get("INDEX_CACHE_MAX_AGE", "300")),
+
+        # /metrics（Prometheus形式のメトリクス）を公開するか
+        "METRICS_ENABLED": environ.get("METRICS_ENABLED", "true").lower() == "true",
+
+        # /readyz の判定結果を再利用する秒数
+        "READINESS_CACHE_SECONDS": float(environ.get("READINESS_CACHE_SECONDS", "5")),
+
+        # レスポンス圧縮（gzip / brotli）。COMPRESSION_MIN_SIZE 未満のレスポンスは圧縮しない
+        "COMPRESSION_ENABLED": environ.get("COMPRESSION_ENABLED", "true").lower() == "true",
+        "COMPRESSION_MIN_SIZE": int(environ.get("COMPRESSION_MIN_SIZE", "1024")),
+        "COMPRESSION_GZIP_LEVEL": int(environ.get("COMPRESSION_GZIP_LEVEL", "6")),
+        "COMPRESSION_BROTLI_QUALITY": int(environ.get("COMPRESSION_BROTLI_QUALITY", "4")),
+
+        # バックグラウンドのスレッドを create_app() の中で開始するか
+        # （gunicorn の --preload ではフォーク後に AppServices.start() を呼ぶため false にする）
+        "START_BACKGROUND_SERVICES": environ.get("START_BACKGROUND_SERVICES", "true").lower() == "true",
+    }
+
+
+def catalog_db_path(config: Mapping[str, Any]) -> str:
+    """
+    見積もりカタログのSQLiteデータベースのパスを返す
+
+    Args:
+        config: アプリケーションの設定（load_config() の戻り値）
+
+    Returns:
+        str: CATALOG_DB_PATH（未設定の場合は MERGED_ESTIMATES_DIR 配下の catalog.sqlite3）
+    """
+    return config.get("CATALOG_DB_PATH") or os.path.join(config["MERGED_ESTIMATES_DIR"], "catalog.sqlite3")
+
+
+def backend_settings(config: Mapping[str, Any], environ: Optional[Mapping[str, str]] = None) -> Mapping[str, Any]:
+    """
+    保存先とキューの生成、および共有できる設定かの確認に渡す設定を返す
+
+    アプリケーションの設定（create_app() の上書きを含む）を優先し、設定にない項目（S3バケット名など）は
+    環境変数から読みます。確認と生成に同じ設定を渡し、異なる値で確認してしまわないようにします。
+
+    Args:
+        config: アプリケーションの設定（load_config() の戻り値）
+        environ: 参照する環境変数（省略時は os.environ）
+
+    Returns:
+        Mapping: 設定
+    """
+    return ChainMap(config, os.environ if environ is None else environ)
+
+
+class AppServices:
+    """
+    アプリケーションが使用するコンポーネントをまとめたクラス
+
+    このクラスは、以下の機能を提供します：
+    - パーサー、合算、保存先、カタログ、静的ファイル、ジョブ、受付制御、進捗配信などのコンポーネントの生成（プロセスごとに1回）
+    - バックグラウンドのスレッド（保持期間管理、書き込みキュー、ローカルのジョブワーカー）の開始と停止
+    - 合算された見積もりの保存
+    """
+
+    def __init__(self, config: Mapping[str, Any]):
+        """
+        初期化
+
+        コンポーネントの生成とサンプル見積もりの読み込みのみ行い、スレッドは開始しません。
+
+        Args:
+            config: アプリケーションの設定（load_config() の戻り値）
+        """
+        merged_estimates_dir = config["MERGED_ESTIMATES_DIR"]
+        settings = backend_settings(config)
+
+        self.parser = EstimateParser(
+            estimate_source_url=config["CALCULATOR_ESTIMATE_SOURCE_URL"],
+            fetch_timeout=config["CALCULATOR_FETCH_TIMEOUT"],
+            coalesce_fetches=config["SINGLE_FLIGHT_ENABLED"]
+        )
+        self.merger = EstimateMerger()
+        self.calculator_api = CalculatorAPI()
+        self.estimate_store = create_estimate_store(merged_estimates_dir, settings)
+        self.sample_catalog = SampleCatalog(config["JSON_SAMPLES_DIR"], self.parser)
+        self.assets = StaticAssets(config["STATIC_DIR"])
+        self.estimate_catalog = EstimateCatalog(catalog_db_path(config))
+        self.retention_worker = RetentionWorker(
+            self.estimate_store,
+            self.estimate_catalog,
+            ttl_seconds=config["RETENTION_TTL_DAYS"] * 24 * 60 * 60,
+            max_total_bytes=int(config["RETENTION_MAX_TOTAL_MB"] * 1024 * 1024),
+            interval_seconds=config["RETENTION_INTERVAL_SECONDS"]
+        )
+
+        # 合算見積もりの保存はバックグラウンドでまとめて行う（無効の場合は登録時に書き込む）
+        self.write_queue = WriteBehindQueue(
+            self.estimate_store,
+            self.estimate_catalog,
+            maxsize=config["WRITE_QUEUE_MAX_SIZE"],
+            batch_size=config["WRITE_QUEUE_BATCH_SIZE"],
+            synchronous=not config["WRITE_QUEUE_ENABLED"]
+        )
+
+        # 非同期合算ジョブ（ワーカースレッドは最初のジョブの登録時に作成される）
+        self.job_manager = JobManager(
+            max_workers=config["JOB_MAX_WORKERS"],
+            max_queued=config["JOB_MAX_QUEUED"],
+            result_ttl_seconds=config["JOB_RESULT_TTL_SECONDS"]
+        )
+
+        # /merge の受付制御（プロセスごとの上限）
+        self.admission: Optional[AdmissionController] = None
+        if config["ADMISSION_ENABLED"]:
+            rate_limiter = None
+            if config["ADMISSION_CLIENT_RATE"] > 0:
+                rate_limiter = TokenBucketLimiter(config["ADMISSION_CLIENT_RATE"], config["ADMISSION_CLIENT_BURST"])
+            self.admission = AdmissionController(
+                max_cost=config["ADMISSION_MAX_COST"],
+                max_queue=config["ADMISSION_MAX_QUEUE"],
+                queue_timeout=config["ADMISSION_QUEUE_TIMEOUT"],
+                rate_limiter=rate_limiter,
+                url_cost=config["ADMISSION_URL_COST"],
+                upload_cost_per_mb=config["ADMISSION_UPLOAD_COST_PER_MB"]
+            )
+
+        # 同じ組み合わせの /merge の同時実行を1回にまとめる
+        self.merge_flight: Optional[SingleFlight] = SingleFlight() if config["SINGLE_FLIGHT_ENABLED"] else None
+
+        # 合算の進捗配信（SSE）
+        self.progress = ProgressBroker(
+            ttl_seconds=config["PROGRESS_TTL_SECONDS"],
+            max_subscribers=config["PROGRESS_MAX_SUBSCRIBERS"]
+        )
+
+        # 見積もり合算パイプライン（同期の合算、逐次応答、ジョブで共通）
+        self.merge_pipeline = MergePipeline(
+            self.parser,
+            self.merger,
+            self.calculator_api,
+            self.save_merged_estimate
+        )
+
+        # JOB_QUEUE_BACKEND を設定した場合、合算ジョブはキュー経由で別プロセスのワーカーが実行する
+        check_shared_backends(settings)
+        self.job_queue = create_job_queue(settings)
+        self.job_dispatcher: Optional[QueuedJobDispatcher] = None
+        self.local_job_worker: Optional[MergeWorker] = None
+        if self.job_queue is not None:
+            self.job_dispatcher = QueuedJobDispatcher(
+                self.job_queue,
+                create_job_status_store(merged_estimates_dir, settings),
+                result_ttl_seconds=config["JOB_RESULT_TTL_SECONDS"],
+                backend=config["JOB_QUEUE_BACKEND"]
+            )
+            if isinstance(self.job_queue, LocalJobQueue):
+                # local は開発・テスト用のキューのため、同じプロセス内でワーカーを動かす
+                self.local_job_worker = MergeWorker(self.job_queue, self.job_dispatcher.status_store, self.merge_pipeline)
+
+        # /readyz のレディネス判定
+        self.readiness = ReadinessChecker(self, cache_seconds=config["READINESS_CACHE_SECONDS"])
+
+        self._lock = threading.Lock()
+        self._started = False
+        self._stopped = False
+
+    @property
+    def started(self) -> bool:
+        """バックグラウンドのスレッドを開始済みか"""
+        return self._started and not self._stopped
+
+    def start(self) -> None:
+        """
+        バックグラウンドのスレッドを開始する
+
+        スレッドはフォークで引き継がれないため、gunicorn ではワーカーの起動後に呼び出します。
+        2回目以降の呼び出しは何もしません。終了時には書き込み待ちのデータを書き出します。
+        """
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        self.retention_worker.start()
+        self.write_queue.start()
+        if self.local_job_worker is not None:
+            threading.Thread(target=self.local_job_worker.run, args=(1,), name="merge-worker", daemon=True).start()
+        atexit.register(self.shutdown)
+        logger.info(f"バックグラウンド処理を開始しました: pid={os.getpid()}")
+
+    def shutdown(self) -> None:
+        """
+        バックグラウンドのスレッドを停止する
+
+        ジョブを書き込みキューより先に停止し、ジョブで保存された見積もりも書き出します。
+        2回目以降の呼び出しは何もしません。
+        """
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+
+        if self.local_job_worker is not None:
+            self.local_job_worker.stop()
+        self.job_manager.shutdown()
+        self.write_queue.stop()
+        self.retention_worker.stop()
+
+    def save_merged_estimate(self, merged_estimate: Dict[str, Any], urls: List[str],
+                             source_ids: Optional[List[str]] = None) -> str:
+        """
+        合算された見積もりデータの保存とカタログへの記録を書き込みキューに登録する
+
+        同じ内容の見積もりは同じIDになり、保存済みのファイルを再利用します。
+        書き込みが完了するまでは、ダウンロードとエクスポートはメモリ上のデータを返します。
+
+        Args:
+            merged_estimate: 合算された見積もりデータ
+            urls: 合算元の見積もりURLのリスト
+            source_ids: 合算元の見積もりIDのリスト（省略時はURLから取り出す）
+
+        Returns:
+            str: 見積もりID
+        """
+        with metrics.stage(metrics.STAGE_PERSIST):
+            estimate_id = content_hash(merged_estimate)
+            if source_ids is None:
+                source_ids = [self.parser.extract_estimate_id(url) for url in urls]
+            self.write_queue.submit(estimate_id, merged_estimate, source_ids)
+        return estimate_id
+
+
+def _configure_logging(log_dir: str) -> None:
+    """ロギングを設定する（設定済みの場合は何もしない）"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.FileHandler(os.path.join(log_dir, "app.log")),
+            logging.StreamHandler(),
+        ],
+    )
+
+
+def create_app(config: Optional[Mapping[str, Any]] = None) -> Flask:
+    """
+    Flaskアプリケーションを作成する
+
+    コンポーネントはこの関数の中で1回だけ生成し、app.extensions["merger"] に
+    AppServices として登録します。ルートは ui_blueprint から参照します。
+
+    Args:
+        config: 環境変数の設定を上書きする設定値
+
+    Returns:
+        Flask: Flaskアプリケーション
+    """
+    load_dotenv()
+
+    app = Flask(
+        __name__,
+        template_folder=os.path.join(PROJECT_ROOT, "templates"),
+        static_folder=os.path.join(PROJECT_ROOT, "static")
+    )
+    app.config.update(load_config())
+    if config:
+        app.config.update(config)
+
+    # ディレクトリの作成
+    os.makedirs(app.config["MERGED_ESTIMATES_DIR"], exist_ok=True)
+    os.makedirs(app.config["JSON_SAMPLES_DIR"], exist_ok=True)
+    os.makedirs(app.config["LOG_DIR"], exist_ok=True)
+    _configure_logging(app.config["LOG_DIR"])
+    # 開発サーバーのアクセスログにヘルスチェックを記録しない
+    install_probe_log_filter("werkzeug")
+
+    services = AppServices(app.config)
+    app.extensions[SERVICES_EXTENSION] = services
+
+    # 直下に置かれた以前の見積もりファイルを分割レイアウトに移動する（フォーク前に1回だけ）
+    migrate_to_sharded_layout(services.estimate_store, services.estimate_catalog)
+
+    app.register_blueprint(ui_blueprint)
+    # テンプレートからは内容ハッシュ付きのURLで静的ファイルを参照する
+    app.add_template_global(services.assets.url, "asset_url")
+
+    if app.config["COMPRESSION_ENABLED"]:
+        app.wsgi_app = CompressionMiddleware(
+            app.wsgi_app,
+            min_size=app.config["COMPRESSION_MIN_SIZE"],
+            gzip_level=app.config["COMPRESSION_GZIP_LEVEL"],
+            brotli_quality=app.config["COMPRESSION_BROTLI_QUALITY"]
+        )
+
+    if app.config["START_BACKGROUND_SERVICES"]:
+        services.start()
+    return app
+
+
+def get_services(app: Flask) -> AppServices:
+    """
+    アプリケーションに登録された AppServices を返す
+
+    Args:
+        app: create_app() で作成したFlaskアプリケーション
 
-app = Flask(__name__, template_folder='../templates')
-parser = EstimateParser()
-merger = EstimateMerger()
-calculator_api = CalculatorAPI()
-
-@app.route('/')
-def index():
-    """インデックスページを表示"""
-    return render_template('index.html')
-
-@app.route('/merge', methods=['POST'])
-def merge_estimates():
-    """見積もりを合算して結果を返す"""
-    try:
-        data = request.get_json()
-        urls = data.get('urls', [])
-        
-        if not urls:
-            return jsonify({
-                'success': False,
-                'error': '見積もりURLが提供されていません。'
-            })
-        
-        # 重複したURLを削除
-        unique_urls = list(set(urls))
-        
-        # URLの検証
-        valid_urls = []
-        for url in unique_urls:
-            if parser.validate_calculator_url(url):
-                valid_urls.append(url)
-            else:
-                return jsonify({
-                    'success': False,
-                    'error': f'無効なAWS Pricing Calculator URL: {url}'
-                })
-        
-        # 見積もりデータの取得
-        estimate_data_list = []
-        
-        # テスト実装: サンプルJSONを使用
-        for i, url in enumerate(valid_urls):
-            if i == 0:
-                with open('json_samples/sample1.json', 'r', encoding='utf-8') as file:
-                    raw_data = json.load(file)
-                    estimate_data = parser._structure_estimate_data(raw_data)
-                    estimate_data_list.append(estimate_data)
-            else:
-                with open('json_samples/sample2.json', 'r', encoding='utf-8') as file:
-                    raw_data = json.load(file)
-                    estimate_data = parser._structure_estimate_data(raw_data)
-                    estimate_data_list.append(estimate_data)
-            
-        # 見積もりの合算
-        merged_data = merger.merge_estimates(estimate_data_list)
-        
-        if not merged_data:
-            return jsonify({
-                'success': False,
-                'error': '見積もりデータの合算に失敗しました。'
-            })
-        
-        # 合算された見積もりの新しいURLを生成
-        merged_url_data = calculator_api.create_merged_estimate(merged_data)
-        
-        # 応答の作成
-        response = {
-            'success': True,
-            'message': f'{len(valid_urls)}件の見積もりを合算しました。',
-            'merged_url': merged_url_data['url'],
-            'instructions': merged_url_data['instructions'],
-            'data': {
-                'name': merged_data['name'],
-                'total_cost': merged_data['total_cost']
-            }
-        }
-        
-        return jsonify(response)
-        
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': f'見積もりの合算中にエラーが発生しました: {str(e)}'
-        })
-
-if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    Returns:
+        AppServices: アプリケーションのコンポーネント
+    """
+    return app.extensions[SERVICES_EXTENSION]
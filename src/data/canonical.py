@@ -0,0 +1,38 @@
+"""
+見積もりデータ正規形モジュール
+
+見積もりデータを一意な最小JSON表現に変換し、内容ハッシュを計算する関数を提供します。
+"""
+
+import json
+import hashlib
+from typing import Any
+
+
+def canonical_json(data: Any) -> str:
+    """
+    見積もりデータを正規化された最小JSON文字列に変換する
+
+    キーをソートし、区切り文字の空白を除去するため、
+    同じ内容のデータは常に同じ文字列になります。
+
+    Args:
+        data: 見積もりデータ
+
+    Returns:
+        str: 正規化されたJSON文字列
+    """
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+
+def content_hash(data: Any) -> str:
+    """
+    見積もりデータの内容ハッシュ（SHA-256）を計算する
+
+    Args:
+        data: 見積もりデータ
+
+    Returns:
+        str: 16進数のハッシュ文字列
+    """
+    return hashlib.sha256(canonical_json(data).encode('utf-8')).hexdigest()
@@ -0,0 +1,166 @@
+"""
+AWS Pricing Calculator エクスポート形式出力モジュール
+
+見積もりデータをAWS Pricing Calculatorのエクスポート形式
+（Name / Total Cost / Metadata / Groups.Services）で出力するクラスを提供します。
+"""
+
+import json
+from datetime import date
+from typing import Dict, Any, Iterator, IO
+
+LEGAL_DISCLAIMER = (
+    "AWS Pricing Calculator provides only an estimate of your AWS fees and doesn't include "
+    "any taxes that might apply. Your actual fees depend on a variety of factors, "
+    "including your actual usage of AWS services."
+)
+
+
+class NativeExportWriter:
+    """
+    AWS Pricing Calculatorエクスポート形式の書き出しを行うクラス
+
+    サービスは1件ずつシリアライズして出力するため、
+    ドキュメント全体をメモリ上に構築せずに書き出せます。
+    出力は EstimateParser.parse_from_json で元の見積もりデータに戻せます。
+    """
+
+    def __init__(self, locale: str = 'en_US', indent: int = 2):
+        """
+        初期化
+
+        Args:
+            locale: Metadataに記録するロケール
+            indent: インデント幅
+        """
+        self.locale = locale
+        self.indent = indent
+
+    def write(self, estimate_data: Dict[str, Any], fp: IO[str], share_url: str = '') -> None:
+        """
+        見積もりデータをファイルに書き出す
+
+        Args:
+            estimate_data: 見積もりデータ
+            fp: 書き込み先のテキストファイルオブジェクト
+            share_url: Metadataに記録する共有URL
+        """
+        for chunk in self.iter_chunks(estimate_data, share_url):
+            fp.write(chunk)
+
+    def iter_chunks(self, estimate_data: Dict[str, Any], share_url: str = '') -> Iterator[str]:
+        """
+        見積もりデータをエクスポート形式の文字列断片として順に生成する
+
+        Args:
+            estimate_data: 見積もりデータ
+            share_url: Metadataに記録する共有URL
+
+        Yields:
+            str: 出力するJSONの断片
+        """
+        services = estimate_data.get('services', [])
+
+        # 合計コストはサービスを1回走査して計算する
+        monthly_total = 0.0
+        upfront_total = 0.0
+        for service in services:
+            monthly_total += float(service.get('monthlyCost', 0))
+            upfront_total += float(service.get('upfrontCost', 0))
+
+        metadata = {
+            'Currency': estimate_data.get('currency', 'USD'),
+            'Locale': self.locale,
+            'Created On': self._format_date(date.today()),
+            'Legal Disclaimer': LEGAL_DISCLAIMER,
+            'Share Url': share_url
+        }
+
+        yield '{\n'
+        yield self._field('Name', estimate_data.get('name', 'Unnamed Estimate'), 1) + ',\n'
+        yield self._field('Total Cost', self._cost_block(monthly_total, upfront_total), 1) + ',\n'
+        yield self._field('Metadata', metadata, 1) + ',\n'
+        yield self._pad(1) + '"Groups": {\n'
+        yield self._pad(2) + '"Services": ['
+
+        for index, service in enumerate(services):
+            yield (',\n' if index else '\n') + self._pad(3) + self._dump(self._convert_service(service), 3)
+
+        yield ('\n' + self._pad(2) if services else '') + ']\n'
+        yield self._pad(1) + '}\n'
+        yield '}\n'
+
+    def _convert_service(self, service: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        サービスデータをエクスポート形式に変換する
+
+        Args:
+            service: サービスデータ
+
+        Returns:
+            Dict: エクスポート形式のサービスデータ
+        """
+        monthly_cost = float(service.get('monthlyCost', 0))
+        upfront_cost = float(service.get('upfrontCost', 0))
+
+        native_service = {'Service Name': service.get('name', 'Unknown Service')}
+        if 'description' in service:
+            native_service['Description'] = service['description']
+        native_service['Region'] = service.get('region', 'us-east-1')
+        native_service['Service Cost'] = self._cost_block(monthly_cost, upfront_cost)
+        if 'config' in service:
+            native_service['Properties'] = service['config']
+
+        return native_service
+
+    def _cost_block(self, monthly: float, upfront: float) -> Dict[str, str]:
+        """
+        コスト情報をエクスポート形式に変換する
+
+        Args:
+            monthly: 月額コスト
+            upfront: 初期コスト
+
+        Returns:
+            Dict: monthly / upfront / 12 months のコスト文字列
+        """
+        return {
+            'monthly': self._format_cost(monthly),
+            'upfront': self._format_cost(upfront),
+            '12 months': self._format_cost(monthly * 12 + upfront)
+        }
+
+    @staticmethod
+    def _format_cost(value: float) -> str:
+        """
+        コストを文字列化する
+
+        小数点以下2桁で表せる値はエクスポート形式と同じ表記にし、
+        それ以外は読み戻したときに値が変わらないよう完全な精度で出力します。
+
+        Args:
+            value: コスト
+
+        Returns:
+            str: コスト文字列
+        """
+        formatted = f"{value:.2f}"
+        return formatted if float(formatted) == value else repr(value)
+
+    @staticmethod
+    def _format_date(value: date) -> str:
+        """日付をエクスポート形式（M/D/YYYY）に変換する"""
+        return f"{value.month}/{value.day}/{value.year}"
+
+    def _pad(self, level: int) -> str:
+        """指定レベルのインデント文字列を返す"""
+        return ' ' * (self.indent * level)
+
+    def _dump(self, value: Any, level: int) -> str:
+        """値をJSONにシリアライズし、2行目以降を指定レベルでインデントする"""
+        text = json.dumps(value, ensure_ascii=False, indent=self.indent)
+        return text.replace('\n', '\n' + self._pad(level))
+
+    def _field(self, key: str, value: Any, level: int) -> str:
+        """オブジェクトのフィールド1つをシリアライズする"""
+        return f"{self._pad(level)}{json.dumps(key)}: {self._dump(value, level)}"
@@ -7,33 +7,73 @@ AWS Pricing CalculatorのURLやJSONデータから必要なデータを抽出す
 import re
 import json
 import base64
+import binascii
 import zlib
+import hashlib
+import asyncio
 import logging
 import requests
-from typing import Dict, Any, List
-from urllib.parse import urlparse, parse_qs
+from typing import Dict, Any, List, AsyncIterator, Callable, Iterator, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse, parse_qs, quote
+
+from src import metrics
+from src.data.single_flight import SingleFlight
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - aiohttpは非同期版（ASGI）でのみ使用する
+    aiohttp = None
 
 logger = logging.getLogger(__name__)
 
+# 進捗イベントを受け取る関数
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+# 見積もりデータの入手方法（fetch イベントの source）
+SOURCE_EMBEDDED = "embedded"  # URLに埋め込まれたデータを展開した
+SOURCE_FETCHED = "fetched"    # 取得元から取得した
+SOURCE_SHARED = "shared"      # 実行中の同じ見積もりの取得結果を共有した
+SOURCE_MOCK = "mock"          # 取得元が未設定のためモックデータを作成した
+
 class EstimateParser:
     """
     AWS Pricing Calculator見積もりデータの解析を行うクラス
     
     このクラスは、以下の機能を提供します：
-    - URLからの見積もりデータ抽出
+    - URLからの見積もりデータ抽出（同期・非同期）
+    - 見積もりの取得元（estimate_source_url）からの見積もりデータ取得（同じ見積もりの同時取得は1回にまとめる）
     - JSONデータの解析と正規化
+    - 見積もりの取得完了の通知（on_progress）
     """
     
-    def __init__(self):
-        """初期化"""
+    # 共有URLに埋め込まれた見積もりデータの展開後サイズ上限
+    MAX_PAYLOAD_BYTES = 16 * 1024 * 1024
+    
+    def __init__(self, estimate_source_url: Optional[str] = None, fetch_timeout: float = 30.0,
+                 coalesce_fetches: bool = True):
+        """
+        初期化
+        
+        Args:
+            estimate_source_url: 見積もりIDから見積もりJSONを取得するURL。{id} を見積もりIDに置き換える
+                                 （{id} を含まない場合は末尾に /<見積もりID> を付ける）。
+                                 省略時は見積もりIDからモックデータを作成する
+            fetch_timeout: 見積もりの取得のタイムアウト秒数
+            coalesce_fetches: 同じ見積もりIDの取得が同時に要求された場合に、取得を1回にまとめて結果を共有する
+        """
         self.calculator_base_url = "https://calculator.aws/"
+        self.estimate_source_url = estimate_source_url or None
+        self.fetch_timeout = fetch_timeout
+        self.fetch_flight = SingleFlight() if coalesce_fetches else None
         
-    def parse_from_url(self, url: str) -> Dict[str, Any]:
+    def parse_from_url(self, url: str, on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
         """
         AWS Pricing Calculator URLから見積もりデータを抽出する
         
         Args:
             url: AWS Pricing Calculator見積もりURL
+            on_progress: 抽出が完了したときに fetch イベントを受け取る関数
             
         Returns:
             Dict: 抽出された見積もりデータ
@@ -41,38 +81,355 @@ class EstimateParser:
         Raises:
             ValueError: URLが無効な場合
         """
-        # URLの検証
-        if not url.startswith(self.calculator_base_url):
-            raise ValueError(f"無効なAWS Pricing Calculator URL: {url}")
+        query_params = self._parse_url_params(url)
+        
+        estimate_id = query_params['id'][0]
+        logger.info(f"見積もりID: {estimate_id}")
+        
+        # URLに見積もりデータが埋め込まれている場合はネットワークを使わずに展開する
+        if 'data' in query_params and query_params['data']:
+            estimate_data = self.decode_estimate_payload(query_params['data'][0])
+            source = SOURCE_EMBEDDED
         
-        # URLからIDを抽出
-        parsed_url = urlparse(url)
+        # 取得元が設定されている場合は、見積もりIDで見積もりJSONを取得する
+        elif self.estimate_source_url:
+            if self.fetch_flight is not None:
+                fetched = []
+                
+                def fetch():
+                    fetched.append(True)
+                    return self._fetch_estimate(estimate_id)
+                
+                estimate_data = self.fetch_flight.do(estimate_id, fetch)
+                source = SOURCE_FETCHED if fetched else SOURCE_SHARED
+                metrics.record_cache("fetch", source == SOURCE_SHARED)
+            else:
+                estimate_data = self._fetch_estimate(estimate_id)
+                source = SOURCE_FETCHED
         
-        # URLフォーマットの検証
-        if not parsed_url.fragment or 'estimate' not in parsed_url.fragment:
-            raise ValueError(f"無効なAWS Pricing Calculator URL形式: {url}")
+        # 取得元が設定されていない場合はモックデータを返します
+        else:
+            estimate_data = self._create_mock_data(estimate_id)
+            source = SOURCE_MOCK
         
-        # フラグメント部分からクエリパラメータを抽出
-        fragment = parsed_url.fragment.split('?')
-        if len(fragment) != 2:
-            raise ValueError(f"URLにIDパラメータがありません: {url}")
+        self._notify_fetched(on_progress, url, estimate_id, source, estimate_data)
+        return estimate_data
+    
+    async def parse_from_url_async(self, url: str, session: Optional['aiohttp.ClientSession'] = None,
+                                   on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """
+        AWS Pricing Calculator URLから見積もりデータを非同期に抽出する
         
-        # クエリパラメータからIDを抽出
-        query_params = parse_qs(fragment[1])
-        if 'id' not in query_params or not query_params['id']:
-            raise ValueError(f"URLにIDパラメータがありません: {url}")
+        見積もりの取得はイベントループを止めずに待ち、埋め込みデータの展開は
+        CPUを使うためスレッドで実行します。
         
+        Args:
+            url: AWS Pricing Calculator見積もりURL
+            session: 見積もりの取得に使用するHTTPセッション（省略時は1回限りのセッションを作成）
+            on_progress: 抽出が完了したときに fetch イベントを受け取る関数
+            
+        Returns:
+            Dict: 抽出された見積もりデータ
+            
+        Raises:
+            ValueError: URLが無効な場合
+        """
+        query_params = self._parse_url_params(url)
         estimate_id = query_params['id'][0]
-        logger.info(f"見積もりID: {estimate_id}")
         
-        # 通常、このIDを使用してAWS Pricing CalculatorのAPIから
-        # 見積もりデータをフェッチします
-        # ここではモックデータを返します
+        if 'data' in query_params and query_params['data']:
+            loop = asyncio.get_running_loop()
+            estimate_data = await loop.run_in_executor(None, self.decode_estimate_payload, query_params['data'][0])
+            source = SOURCE_EMBEDDED
+        elif self.estimate_source_url:
+            if self.fetch_flight is not None:
+                fetched = []
+                
+                def fetch():
+                    fetched.append(True)
+                    return self._fetch_estimate_with_session(session, estimate_id)
+                
+                estimate_data = await self.fetch_flight.do_async(estimate_id, fetch)
+                source = SOURCE_FETCHED if fetched else SOURCE_SHARED
+                metrics.record_cache("fetch", source == SOURCE_SHARED)
+            else:
+                estimate_data = await self._fetch_estimate_with_session(session, estimate_id)
+                source = SOURCE_FETCHED
+        else:
+            estimate_data = self._create_mock_data(estimate_id)
+            source = SOURCE_MOCK
         
-        # モックデータの作成
-        mock_data = self._create_mock_data(estimate_id)
+        self._notify_fetched(on_progress, url, estimate_id, source, estimate_data)
+        return estimate_data
+    
+    @staticmethod
+    def _notify_fetched(on_progress: Optional[ProgressCallback], url: str, estimate_id: str, source: str,
+                        estimate_data: Dict[str, Any]) -> None:
+        """
+        見積もりの抽出の完了を通知する
         
-        return mock_data
+        通知先の例外は抽出の結果に影響させず、ログに記録するだけにします。
+        
+        Args:
+            on_progress: イベントを受け取る関数
+            url: AWS Pricing Calculator見積もりURL
+            estimate_id: 見積もりID
+            source: 見積もりデータの入手方法（SOURCE_*）
+            estimate_data: 抽出された見積もりデータ
+        """
+        if on_progress is None:
+            return
+        try:
+            on_progress({
+                "type": "fetch",
+                "url": url,
+                "estimate_id": estimate_id,
+                "source": source,
+                "cached": source == SOURCE_SHARED,
+                "name": estimate_data.get("name", ""),
+                "service_count": len(estimate_data.get("services", []))
+            })
+        except Exception:
+            logger.exception("進捗の通知中にエラーが発生")
+    
+    async def _fetch_estimate_with_session(self, session: Optional['aiohttp.ClientSession'],
+                                           estimate_id: str) -> Dict[str, Any]:
+        """HTTPセッション（省略時は1回限りのセッション）で見積もりJSONを非同期に取得する"""
+        if session is not None:
+            return await self._fetch_estimate_async(session, estimate_id)
+        async with aiohttp.ClientSession() as own_session:
+            return await self._fetch_estimate_async(own_session, estimate_id)
+    
+    def _estimate_source(self, estimate_id: str) -> str:
+        """見積もりIDから見積もりJSONの取得先URLを作成する"""
+        quoted_id = quote(estimate_id, safe='')
+        if '{id}' in self.estimate_source_url:
+            return self.estimate_source_url.replace('{id}', quoted_id)
+        return f"{self.estimate_source_url.rstrip('/')}/{quoted_id}"
+    
+    def _fetch_estimate(self, estimate_id: str) -> Dict[str, Any]:
+        """
+        取得元から見積もりJSONを取得して正規化する
+        
+        見つからない場合やJSONが不正な場合はValueErrorを送出します。
+        通信エラーやサーバーエラーは再試行で解消する可能性があるため、requestsの例外をそのまま送出します。
+        
+        Args:
+            estimate_id: 見積もりID
+            
+        Returns:
+            Dict: 正規化された見積もりデータ
+        """
+        with metrics.stage(metrics.STAGE_FETCH):
+            response = requests.get(self._estimate_source(estimate_id), timeout=self.fetch_timeout)
+            if response.status_code == 404:
+                raise ValueError(f"見積もりが見つかりません: {estimate_id}")
+            response.raise_for_status()
+            try:
+                json_data = response.json()
+            except ValueError:
+                raise ValueError(f"見積もりデータがJSON形式ではありません: {estimate_id}")
+        return self.parse_from_json(json_data)
+    
+    async def _fetch_estimate_async(self, session: 'aiohttp.ClientSession', estimate_id: str) -> Dict[str, Any]:
+        """
+        取得元から見積もりJSONを非同期に取得して正規化する
+        
+        エラーの扱いは _fetch_estimate と同じです（通信エラーはaiohttpの例外をそのまま送出）。
+        
+        Args:
+            session: HTTPセッション
+            estimate_id: 見積もりID
+            
+        Returns:
+            Dict: 正規化された見積もりデータ
+        """
+        timeout = aiohttp.ClientTimeout(total=self.fetch_timeout)
+        with metrics.stage(metrics.STAGE_FETCH):
+            async with session.get(self._estimate_source(estimate_id), timeout=timeout) as response:
+                if response.status == 404:
+                    raise ValueError(f"見積もりが見つかりません: {estimate_id}")
+                response.raise_for_status()
+                try:
+                    json_data = await response.json(content_type=None)
+                except ValueError:
+                    raise ValueError(f"見積もりデータがJSON形式ではありません: {estimate_id}")
+        return self.parse_from_json(json_data)
+    
+    def extract_estimate_id(self, url: str) -> str:
+        """
+        AWS Pricing Calculator URLから見積もりIDを取り出す
+        
+        Args:
+            url: AWS Pricing Calculator見積もりURL
+            
+        Returns:
+            str: 見積もりID
+            
+        Raises:
+            ValueError: URLが無効な場合
+        """
+        return self._parse_url_params(url)['id'][0]
+    
+    def source_key(self, url: str) -> str:
+        """
+        URLが指す見積もりを識別するキーを作成する
+        
+        取得元から取得する見積もりは見積もりID、データが埋め込まれている場合は
+        見積もりIDとデータのハッシュ値をキーにします。
+        
+        Args:
+            url: AWS Pricing Calculator見積もりURL
+            
+        Returns:
+            str: 見積もりを識別するキー
+            
+        Raises:
+            ValueError: URLが無効な場合
+        """
+        query_params = self._parse_url_params(url)
+        estimate_id = query_params['id'][0]
+        if 'data' in query_params and query_params['data']:
+            digest = hashlib.sha256(query_params['data'][0].encode('utf-8')).hexdigest()
+            return f"{estimate_id}:{digest}"
+        return estimate_id
+    
+    def _parse_url_params(self, url: str) -> Dict[str, List[str]]:
+        """
+        AWS Pricing Calculator URLを検証し、フラグメント内のクエリパラメータを取り出す
+        
+        Args:
+            url: AWS Pricing Calculator見積もりURL
+            
+        Returns:
+            Dict: クエリパラメータ（id を必ず含む）
+            
+        Raises:
+            ValueError: URLが無効な場合
+        """
+        with metrics.stage(metrics.STAGE_VALIDATE):
+            # URLの検証
+            if not url.startswith(self.calculator_base_url):
+                raise ValueError(f"無効なAWS Pricing Calculator URL: {url}")
+        
+            # URLからIDを抽出
+            parsed_url = urlparse(url)
+        
+            # URLフォーマットの検証
+            if not parsed_url.fragment or 'estimate' not in parsed_url.fragment:
+                raise ValueError(f"無効なAWS Pricing Calculator URL形式: {url}")
+        
+            # フラグメント部分からクエリパラメータを抽出
+            fragment = parsed_url.fragment.split('?')
+            if len(fragment) != 2:
+                raise ValueError(f"URLにIDパラメータがありません: {url}")
+        
+            # クエリパラメータからIDを抽出
+            query_params = parse_qs(fragment[1])
+            if 'id' not in query_params or not query_params['id']:
+                raise ValueError(f"URLにIDパラメータがありません: {url}")
+
+        return query_params
+    
+    def parse_many(self, urls: List[str], max_workers: int = 8,
+                   on_progress: Optional[ProgressCallback] = None) -> Iterator[Tuple[int, str, Dict[str, Any], Optional[Exception]]]:
+        """
+        複数のURLから見積もりデータを並列に抽出し、完了した順に返す
+        
+        Args:
+            urls: AWS Pricing Calculator見積もりURLのリスト
+            max_workers: 並列数の上限
+            on_progress: URLごとの抽出の完了時に fetch イベントを受け取る関数
+            
+        Yields:
+            Tuple: (URLのインデックス, URL, 見積もりデータ, 発生した例外)
+                   抽出に失敗した場合、見積もりデータは空の辞書になります
+        """
+        if not urls:
+            return
+        
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(urls)))
+        try:
+            futures = {executor.submit(self.parse_from_url, url, on_progress): (index, url)
+                       for index, url in enumerate(urls)}
+            for future in as_completed(futures):
+                index, url = futures[future]
+                try:
+                    yield index, url, future.result(), None
+                except Exception as e:
+                    yield index, url, {}, e
+        finally:
+            # 呼び出し側が途中で打ち切った場合は未着手の抽出を取り消す
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    async def parse_many_async(self, urls: List[str], session: Optional['aiohttp.ClientSession'] = None,
+                               max_concurrency: int = 8,
+                               on_progress: Optional[ProgressCallback] = None) -> AsyncIterator[Tuple[int, str, Dict[str, Any], Optional[Exception]]]:
+        """
+        複数のURLから見積もりデータを非同期に並列に抽出し、完了した順に返す
+        
+        Args:
+            urls: AWS Pricing Calculator見積もりURLのリスト
+            session: 見積もりの取得に使用するHTTPセッション
+            max_concurrency: 並列数の上限
+            on_progress: URLごとの抽出の完了時に fetch イベントを受け取る関数
+            
+        Yields:
+            Tuple: parse_many と同じ (URLのインデックス, URL, 見積もりデータ, 発生した例外)
+        """
+        if not urls:
+            return
+        
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def parse(index, url):
+            async with semaphore:
+                try:
+                    return index, url, await self.parse_from_url_async(url, session, on_progress), None
+                except Exception as e:
+                    return index, url, {}, e
+        
+        tasks = [asyncio.ensure_future(parse(index, url)) for index, url in enumerate(urls)]
+        try:
+            for future in asyncio.as_completed(tasks):
+                yield await future
+        finally:
+            # 呼び出し側が途中で打ち切った場合は未完了の取得を取り消す
+            for task in tasks:
+                task.cancel()
+    
+    def decode_estimate_payload(self, payload: str) -> Dict[str, Any]:
+        """
+        共有URLに埋め込まれた見積もりデータを展開する
+        
+        CalculatorAPI.generate_calculator_url が生成する
+        「正規化JSON → zlib圧縮 → URLセーフBase64」形式を逆変換します。
+        
+        Args:
+            payload: URLの data パラメータの値
+            
+        Returns:
+            Dict: 正規化された見積もりデータ
+            
+        Raises:
+            ValueError: データが不正な場合
+        """
+        with metrics.stage(metrics.STAGE_DECODE):
+            # 展開後のサイズを制限して圧縮爆弾を防ぐ
+            decompressor = zlib.decompressobj()
+            try:
+                padded = payload + '=' * (-len(payload) % 4)
+                compressed = base64.urlsafe_b64decode(padded.encode('ascii'))
+                raw = decompressor.decompress(compressed, self.MAX_PAYLOAD_BYTES)
+                truncated = bool(decompressor.unconsumed_tail)
+                json_data = None if truncated else json.loads(raw.decode('utf-8'))
+            except (binascii.Error, zlib.error, UnicodeError, json.JSONDecodeError) as e:
+                raise ValueError(f"URLの見積もりデータを展開できません: {str(e)}")
+        
+            if truncated:
+                raise ValueError("URLの見積もりデータが大きすぎます")
+        
+        return self.parse_from_json(json_data)
     
     def parse_from_json(self, json_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -84,18 +441,113 @@ class EstimateParser:
         Returns:
             Dict: 正規化された見積もりデータ
         """
-        if not isinstance(json_data, dict):
-            raise ValueError("無効なJSON形式です")
+        with metrics.stage(metrics.STAGE_NORMALIZE):
+            if not isinstance(json_data, dict):
+                raise ValueError("無効なJSON形式です")
         
-        # データの検証
-        if 'services' not in json_data or not isinstance(json_data['services'], list):
-            raise ValueError("サービスデータが含まれていません")
+            # AWS Pricing Calculatorのエクスポート形式の場合は内部形式に変換
+            if 'Groups' in json_data:
+                json_data = self._convert_native_data(json_data)
         
-        # データの正規化
-        normalized_data = self._normalize_data(json_data)
+            # データの検証
+            if 'services' not in json_data or not isinstance(json_data['services'], list):
+                raise ValueError("サービスデータが含まれていません")
         
+            # データの正規化
+            normalized_data = self._normalize_data(json_data)
+
         return normalized_data
     
+    def _convert_native_data(self, json_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        AWS Pricing Calculatorのエクスポート形式を内部形式に変換する
+        
+        Args:
+            json_data: Name / Total Cost / Metadata / Groups を含むエクスポートデータ
+            
+        Returns:
+            Dict: 内部形式の見積もりデータ
+        """
+        metadata = json_data.get('Metadata') or {}
+        services = [self._convert_native_service(service)
+                    for service in self._iter_native_services(json_data.get('Groups'))]
+        
+        return {
+            'name': json_data.get('Name', ''),
+            'currency': metadata.get('Currency', 'USD'),
+            'services': services
+        }
+    
+    def _iter_native_services(self, group: Any):
+        """
+        エクスポート形式のグループ（入れ子を含む）からサービスを順に取り出す
+        
+        Args:
+            group: Services と子グループ（Groups）を持つグループ、またはグループのリスト
+            
+        Yields:
+            Dict: エクスポート形式のサービスデータ
+        """
+        if isinstance(group, list):
+            for child in group:
+                yield from self._iter_native_services(child)
+            return
+        
+        if not isinstance(group, dict):
+            return
+        
+        for service in group.get('Services') or []:
+            if isinstance(service, dict):
+                yield service
+        
+        if 'Groups' in group:
+            yield from self._iter_native_services(group['Groups'])
+    
+    def _convert_native_service(self, native_service: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        エクスポート形式のサービスデータを内部形式に変換する
+        
+        Args:
+            native_service: エクスポート形式のサービスデータ
+            
+        Returns:
+            Dict: 内部形式のサービスデータ
+        """
+        service_cost = native_service.get('Service Cost') or {}
+        service = {
+            'name': str(native_service.get('Service Name', '')).strip(),
+            'region': native_service.get('Region', 'us-east-1'),
+            'monthlyCost': self._parse_cost(service_cost.get('monthly', 0)),
+            'upfrontCost': self._parse_cost(service_cost.get('upfront', 0))
+        }
+        
+        if 'Description' in native_service:
+            service['description'] = native_service['Description']
+        if 'Properties' in native_service:
+            service['config'] = native_service['Properties']
+        
+        return service
+    
+    @staticmethod
+    def _parse_cost(value: Any) -> Any:
+        """
+        エクスポート形式のコスト文字列を数値に変換する
+        
+        変換できない値はそのまま返し、_normalize_data の変換に任せます。
+        
+        Args:
+            value: コスト値
+            
+        Returns:
+            数値に変換したコスト、または元の値
+        """
+        if isinstance(value, str):
+            try:
+                return float(value.replace(',', ''))
+            except ValueError:
+                return value
+        return value
+    
     def _normalize_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         見積もりデータを正規化する
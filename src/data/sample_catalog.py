@@ -0,0 +1,167 @@
+"""
+サンプル見積もりカタログモジュール
+
+json_samples ディレクトリのサンプル見積もりを起動時に一度だけ読み込んで検証し、
+レスポンス用のバイト列とETagを事前に作成してメモリ上に保持します。
+ファイルが変更された場合は、一定間隔の確認で検出して読み込み直します。
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, Tuple
+
+from src.data.parser import EstimateParser
+
+logger = logging.getLogger(__name__)
+
+
+class Sample:
+    """
+    読み込み済みのサンプル見積もり（変更不可）
+
+    Attributes:
+        sample_id: サンプルID（ファイル名から拡張子を除いたもの）
+        estimate: 正規化された見積もりデータ（合算に使用する）
+        body: /sample/<sample_id> のレスポンス本文（JSONのバイト列）
+        etag: レスポンス本文のETag
+    """
+
+    __slots__ = ('sample_id', 'estimate', 'body', 'etag')
+
+    def __init__(self, sample_id: str, estimate: Dict[str, Any], body: bytes):
+        object.__setattr__(self, 'sample_id', sample_id)
+        object.__setattr__(self, 'estimate', estimate)
+        object.__setattr__(self, 'body', body)
+        object.__setattr__(self, 'etag', hashlib.sha256(body).hexdigest()[:32])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("サンプルは変更できません")
+
+
+class SampleCatalog:
+    """
+    サンプル見積もりをメモリ上に保持するクラス
+
+    このクラスは、以下の機能を提供します：
+    - サンプル見積もりの読み込みと検証（不正なファイルは警告を記録して除外する）
+    - レスポンス本文とETagの事前作成
+    - ファイルの追加・変更・削除の検出と読み込み直し（確認は check_interval 秒に1回まで）
+    """
+
+    def __init__(self, directory: str, parser: Optional[EstimateParser] = None, check_interval: float = 5.0):
+        """
+        初期化
+
+        Args:
+            directory: サンプル見積もりのディレクトリ
+            parser: 検証と正規化に使用するパーサー
+            check_interval: ファイルの変更を確認する間隔の秒数（0の場合は毎回確認する）
+        """
+        self.directory = directory
+        self.parser = parser or EstimateParser()
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._samples: Mapping[str, Sample] = MappingProxyType({})
+        self._signature: Tuple = ()
+        self._checked_at = 0.0
+        self.reload()
+
+    def get(self, sample_id: str) -> Optional[Sample]:
+        """
+        サンプル見積もりを取得する
+
+        Args:
+            sample_id: サンプルID
+
+        Returns:
+            Sample: サンプル見積もり。存在しない場合はNone
+        """
+        self._reload_if_changed()
+        return self._samples.get(sample_id)
+
+    def ids(self):
+        """
+        サンプルIDの一覧を返す
+
+        Returns:
+            List[str]: 名前順のサンプルID
+        """
+        self._reload_if_changed()
+        return sorted(self._samples)
+
+    def reload(self) -> None:
+        """ディレクトリのサンプル見積もりをすべて読み込み直す"""
+        signature = self._scan_signature()
+        samples = {}
+        for sample_id, path in self._iter_sample_files():
+            sample = self._load_sample(sample_id, path)
+            if sample is not None:
+                samples[sample_id] = sample
+
+        with self._lock:
+            # 読み込み済みのカタログは置き換えのみ行い、参照中のリクエストには影響させない
+            self._samples = MappingProxyType(samples)
+            self._signature = signature
+            self._checked_at = time.monotonic()
+        logger.info(f"サンプル見積もりを読み込みました: {len(samples)}件")
+
+    def _reload_if_changed(self) -> None:
+        """前回の確認から一定時間が過ぎていれば、ファイルの変更を確認して読み込み直す"""
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return
+            self._checked_at = time.monotonic()
+            changed = self._scan_signature() != self._signature
+        if changed:
+            self.reload()
+
+    def _iter_sample_files(self):
+        """サンプル見積もりのファイルを (サンプルID, パス) の組で列挙する"""
+        try:
+            names = sorted(os.listdir(self.directory))
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name.endswith('.json') and not name.startswith('.'):
+                yield name[:-len('.json')], os.path.join(self.directory, name)
+
+    def _scan_signature(self) -> Tuple:
+        """ファイル名・更新日時・サイズから変更検出用の値を作成する"""
+        signature = []
+        for sample_id, path in self._iter_sample_files():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            signature.append((sample_id, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _load_sample(self, sample_id: str, path: str) -> Optional[Sample]:
+        """
+        サンプル見積もりを1件読み込んで検証する
+
+        Args:
+            sample_id: サンプルID
+            path: ファイルパス
+
+        Returns:
+            Sample: 読み込んだサンプル。不正な場合はNone
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                raw_data = json.load(f)
+            estimate = self.parser.parse_from_json(raw_data)
+        except (OSError, UnicodeError, json.JSONDecodeError, ValueError) as e:
+            logger.warning(f"サンプル見積もりを読み込めません: {sample_id}, {str(e)}")
+            return None
+
+        body = json.dumps({"success": True, "data": raw_data}, ensure_ascii=False).encode('utf-8')
+        return Sample(sample_id, estimate, body)
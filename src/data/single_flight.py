@@ -0,0 +1,155 @@
+"""
+同時実行の集約モジュール
+
+同じキーの処理が同時に要求された場合に、最初の呼び出しだけが処理を実行し、
+実行中に届いた呼び出しはその結果（または例外）を共有するクラスを提供します。
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    """実行中の処理"""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _AsyncCall:
+    """イベントループ上で実行中の処理"""
+
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: 'asyncio.Task'):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    同じキーの同時実行を1回にまとめるクラス
+
+    このクラスは、以下の機能を提供します：
+    - スレッドからの呼び出しの集約（do）
+    - イベントループ上の呼び出しの集約（do_async）
+    - 実行回数と結果を共有した回数の統計情報
+    結果はキャッシュしません。処理が終わった後の呼び出しは新たに実行します。
+    共有した結果は呼び出し側で変更しないでください。
+    """
+
+    def __init__(self):
+        """初期化"""
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Tuple[int, Hashable], _AsyncCall] = {}
+        self._stats = {'executed': 0, 'shared': 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        処理を実行する（同じキーの処理が実行中の場合は、その結果を待って返す）
+
+        Args:
+            key: 処理を識別するキー
+            fn: 処理を実行する関数
+
+        Returns:
+            fn の戻り値
+
+        Raises:
+            fn が送出した例外（結果を共有した呼び出しにも同じ例外を送出する）
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._stats['executed'] += 1
+            else:
+                self._stats['shared'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        処理を非同期に実行する（同じキーの処理が実行中の場合は、その結果を待って返す）
+
+        処理は呼び出し側とは別のタスクで実行し、待っている呼び出しがすべて取り消された場合にだけ取り消します。
+        集約はイベントループごとに行います。
+
+        Args:
+            key: 処理を識別するキー
+            fn: 処理を実行するコルーチンを返す関数
+
+        Returns:
+            fn が返したコルーチンの結果
+
+        Raises:
+            処理が送出した例外（結果を共有した呼び出しにも同じ例外を送出する）
+        """
+        loop = asyncio.get_running_loop()
+        call_key = (id(loop), key)
+        with self._lock:
+            call = self._async_calls.get(call_key)
+            if call is not None:
+                self._stats['shared'] += 1
+            else:
+                call = _AsyncCall(loop.create_task(fn()))
+                self._async_calls[call_key] = call
+                self._stats['executed'] += 1
+
+                def forget(_):
+                    with self._lock:
+                        if self._async_calls.get(call_key) is call:
+                            del self._async_calls[call_key]
+
+                call.task.add_done_callback(forget)
+            call.waiters += 1
+
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.task.cancelled():
+                raise
+            with self._lock:
+                call.waiters -= 1
+                abandoned = call.waiters == 0
+                if abandoned and self._async_calls.get(call_key) is call:
+                    # 以降の呼び出しは取り消した処理を待たずに新たに実行する
+                    del self._async_calls[call_key]
+            if abandoned:
+                call.task.cancel()
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        統計情報を返す
+
+        Returns:
+            Dict: 実行中の処理の数（in_flight）、実行した回数（executed）、結果を共有した回数（shared）
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls) + len(self._async_calls)
+        return stats
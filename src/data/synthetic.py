@@ -0,0 +1,540 @@
+"""
+合成見積もりデータ生成モジュール
+
+シード値から毎回同じ内容の、AWS Pricing Calculatorのエクスポート形式（Name / Metadata / Groups）の
+見積もりを生成するクラスを提供します。約200種類のサービスと全リージョンを利用頻度に偏りを持たせて選び、
+実際のエクスポートに近い Properties の文字列と、対数正規分布に従うコストを持たせます。
+サービスは入れ子のグループ（Groups）に分けて出力します。
+
+出力はサービスを1件ずつ文字列にして書き出すため、サービス数によらずメモリ使用量は一定です。
+ベンチマーク（benchmarks）、負荷試験（loadtest）、見積もり取得元スタブ、CLIから使用します。
+
+使用例:
+    python -m src.data.synthetic --services 100000 --seed 42 --output estimate.json
+    python -m src.data.synthetic --services 1000 --estimates 5 --output out/
+"""
+
+import os
+import sys
+import json
+import math
+import random
+import hashlib
+import argparse
+import itertools
+from bisect import bisect
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Tuple
+
+from src.data.native_writer import LEGAL_DISCLAIMER
+
+# リージョン（コード, エクスポートでの表示名）。利用頻度の高い順
+REGIONS: List[Tuple[str, str]] = [
+    ('us-east-1', 'US East (N. Virginia)'),
+    ('us-west-2', 'US West (Oregon)'),
+    ('ap-northeast-1', 'Asia Pacific (Tokyo)'),
+    ('eu-west-1', 'Europe (Ireland)'),
+    ('eu-central-1', 'Europe (Frankfurt)'),
+    ('us-east-2', 'US East (Ohio)'),
+    ('ap-southeast-1', 'Asia Pacific (Singapore)'),
+    ('ap-southeast-2', 'Asia Pacific (Sydney)'),
+    ('eu-west-2', 'Europe (London)'),
+    ('ap-northeast-2', 'Asia Pacific (Seoul)'),
+    ('ap-south-1', 'Asia Pacific (Mumbai)'),
+    ('ca-central-1', 'Canada (Central)'),
+    ('sa-east-1', 'South America (Sao Paulo)'),
+    ('us-west-1', 'US West (N. California)'),
+    ('eu-north-1', 'Europe (Stockholm)'),
+    ('eu-west-3', 'Europe (Paris)'),
+    ('ap-northeast-3', 'Asia Pacific (Osaka)'),
+    ('eu-south-1', 'Europe (Milan)'),
+    ('ap-east-1', 'Asia Pacific (Hong Kong)'),
+    ('me-south-1', 'Middle East (Bahrain)'),
+    ('af-south-1', 'Africa (Cape Town)'),
+    ('ap-southeast-3', 'Asia Pacific (Jakarta)'),
+    ('eu-central-2', 'Europe (Zurich)'),
+    ('eu-south-2', 'Europe (Spain)'),
+    ('ap-south-2', 'Asia Pacific (Hyderabad)'),
+    ('me-central-1', 'Middle East (UAE)'),
+    ('ap-southeast-4', 'Asia Pacific (Melbourne)'),
+    ('il-central-1', 'Israel (Tel Aviv)'),
+    ('ca-west-1', 'Canada West (Calgary)'),
+    ('ap-southeast-5', 'Asia Pacific (Malaysia)'),
+    ('ap-southeast-7', 'Asia Pacific (Thailand)'),
+    ('mx-central-1', 'Mexico (Central)'),
+    ('us-gov-west-1', 'AWS GovCloud (US-West)'),
+    ('us-gov-east-1', 'AWS GovCloud (US-East)')
+]
+
+# サービスの分類ごとのサービス名（分類の中は利用頻度の高い順）
+SERVICE_FAMILIES: Dict[str, List[str]] = {
+    'compute': [
+        'Amazon EC2', 'Amazon EKS', 'Amazon ECS', 'AWS Fargate', 'Amazon Lightsail', 'AWS Batch',
+        'AWS Elastic Beanstalk', 'Amazon EC2 Dedicated Hosts', 'Amazon WorkSpaces', 'Amazon AppStream 2.0',
+        'Amazon GameLift', 'AWS Outposts rack', 'AWS Outposts servers', 'VMware Cloud on AWS', 'AWS Wavelength',
+        'Amazon EMR', 'AWS ParallelCluster', 'Amazon WorkSpaces Web', 'AWS Local Zones', 'Red Hat OpenShift Service on AWS'
+    ],
+    'serverless': [
+        'AWS Lambda', 'Amazon API Gateway', 'Amazon SQS', 'Amazon SNS', 'AWS Step Functions', 'Amazon EventBridge',
+        'AWS App Runner', 'AWS AppSync', 'Amazon MQ', 'Amazon Kinesis Data Streams', 'Amazon Data Firehose',
+        'AWS Amplify', 'Amazon Cognito', 'Amazon SES', 'Amazon Pinpoint', 'Amazon Simple Workflow Service',
+        'AWS IoT Core', 'AWS IoT Events', 'AWS IoT Greengrass', 'AWS IoT SiteWise', 'AWS IoT Analytics',
+        'AWS IoT Device Defender', 'AWS IoT Device Management', 'AWS IoT TwinMaker', 'AWS IoT FleetWise',
+        'Amazon Location Service', 'Amazon Connect', 'Amazon Chime SDK', 'AWS Device Farm', 'AWS Ground Station'
+    ],
+    'storage': [
+        'Amazon Simple Storage Service (S3)', 'Amazon Elastic Block Store (EBS)', 'Amazon Elastic File System (EFS)',
+        'S3 Glacier Flexible Retrieval', 'S3 Glacier Deep Archive', 'Amazon FSx for Windows File Server',
+        'Amazon FSx for Lustre', 'Amazon FSx for NetApp ONTAP', 'Amazon FSx for OpenZFS', 'AWS Backup',
+        'AWS Storage Gateway', 'AWS DataSync', 'AWS Transfer Family', 'AWS Snowball', 'Amazon File Cache',
+        'AWS Elastic Disaster Recovery', 'Amazon S3 on Outposts', 'AWS Snowcone'
+    ],
+    'database': [
+        'Amazon RDS for MySQL', 'Amazon RDS for PostgreSQL', 'Amazon Aurora MySQL-Compatible',
+        'Amazon Aurora PostgreSQL-Compatible', 'Amazon DynamoDB', 'Amazon ElastiCache', 'Amazon RDS for SQL Server',
+        'Amazon RDS for Oracle', 'Amazon RDS for MariaDB', 'Amazon DocumentDB (with MongoDB compatibility)',
+        'Amazon MemoryDB', 'Amazon Neptune', 'Amazon Keyspaces (for Apache Cassandra)', 'Amazon Timestream',
+        'Amazon RDS for Db2', 'Amazon Aurora DSQL', 'Amazon RDS Proxy', 'AWS Database Migration Service',
+        'Amazon Quantum Ledger Database (QLDB)', 'Amazon RDS Custom for SQL Server'
+    ],
+    'network': [
+        'Amazon CloudFront', 'Elastic Load Balancing', 'Amazon Virtual Private Cloud (VPC)', 'Amazon Route 53',
+        'AWS Direct Connect', 'AWS Transit Gateway', 'AWS Global Accelerator', 'AWS PrivateLink', 'NAT Gateway',
+        'AWS Site-to-Site VPN', 'AWS Client VPN', 'Amazon VPC Lattice', 'AWS Cloud Map', 'AWS App Mesh',
+        'AWS Verified Access', 'AWS Cloud WAN', 'Data Transfer', 'Amazon VPC IP Address Manager'
+    ],
+    'security': [
+        'AWS WAF', 'Amazon GuardDuty', 'AWS Key Management Service', 'AWS Secrets Manager', 'AWS Security Hub',
+        'AWS Shield', 'Amazon Inspector', 'Amazon Macie', 'AWS Certificate Manager', 'AWS Network Firewall',
+        'AWS Firewall Manager', 'Amazon Detective', 'AWS CloudHSM', 'AWS Directory Service', 'AWS Audit Manager',
+        'Amazon Verified Permissions', 'AWS Private Certificate Authority', 'AWS Payment Cryptography',
+        'Amazon Security Lake', 'AWS IAM Access Analyzer'
+    ],
+    'management': [
+        'Amazon CloudWatch', 'AWS CloudTrail', 'AWS Config', 'AWS Systems Manager', 'AWS X-Ray',
+        'Amazon Managed Grafana', 'Amazon Managed Service for Prometheus', 'AWS CodeBuild', 'AWS CodePipeline',
+        'AWS CodeArtifact', 'AWS CodeDeploy', 'AWS CloudShell', 'AWS Service Catalog', 'AWS Proton',
+        'AWS Resilience Hub', 'AWS Fault Injection Service', 'Amazon DevOps Guru', 'Amazon CodeGuru',
+        'AWS Application Migration Service', 'AWS Mainframe Modernization', 'AWS Support (Business)',
+        'AWS Support (Enterprise On-Ramp)', 'AWS Support (Enterprise)', 'AWS Control Tower', 'AWS License Manager'
+    ],
+    'analytics': [
+        'Amazon Redshift', 'Amazon Athena', 'AWS Glue', 'Amazon OpenSearch Service', 'Amazon Managed Streaming for Apache Kafka',
+        'Amazon QuickSight', 'AWS Lake Formation', 'Amazon Managed Service for Apache Flink',
+        'Amazon Managed Workflows for Apache Airflow', 'Amazon Redshift Serverless', 'Amazon EMR Serverless',
+        'Amazon DataZone', 'AWS Data Exchange', 'AWS Clean Rooms', 'AWS Entity Resolution', 'Amazon FinSpace',
+        'AWS Glue DataBrew', 'Amazon CloudSearch', 'Amazon OpenSearch Serverless', 'AWS Data Pipeline'
+    ],
+    'ml': [
+        'Amazon SageMaker', 'Amazon Bedrock', 'Amazon Rekognition', 'Amazon Textract', 'Amazon Comprehend',
+        'Amazon Transcribe', 'Amazon Translate', 'Amazon Polly', 'Amazon Lex', 'Amazon Kendra', 'Amazon Personalize',
+        'Amazon Forecast', 'Amazon Fraud Detector', 'Amazon Q Business', 'Amazon Q Developer',
+        'Amazon Augmented AI', 'Amazon Comprehend Medical', 'Amazon Transcribe Medical', 'AWS HealthLake',
+        'AWS HealthOmics', 'Amazon Lookout for Equipment', 'Amazon Lookout for Vision', 'Amazon Monitron',
+        'AWS Panorama', 'AWS DeepRacer', 'Amazon SageMaker Ground Truth', 'Amazon Braket'
+    ],
+    'media': [
+        'AWS Elemental MediaConvert', 'AWS Elemental MediaLive', 'AWS Elemental MediaPackage',
+        'AWS Elemental MediaTailor', 'Amazon Interactive Video Service', 'Amazon Kinesis Video Streams',
+        'AWS Elemental MediaConnect', 'AWS Deadline Cloud', 'Amazon WorkMail', 'Amazon WorkDocs'
+    ]
+}
+
+# 分類ごとの月額コストの分布（対数正規分布の平均と標準偏差）と、前払いの料金プランがある割合
+_COST_PROFILES: Dict[str, Tuple[float, float, float]] = {
+    'compute': (5.5, 1.6, 0.25),
+    'serverless': (3.0, 1.8, 0.0),
+    'storage': (4.0, 1.7, 0.0),
+    'database': (5.8, 1.4, 0.2),
+    'network': (4.2, 1.6, 0.0),
+    'security': (3.2, 1.3, 0.0),
+    'management': (3.0, 1.5, 0.0),
+    'analytics': (5.0, 1.7, 0.1),
+    'ml': (4.5, 2.0, 0.0),
+    'media': (4.0, 1.8, 0.0)
+}
+
+# 無料枠などで月額コストが0になる割合
+ZERO_COST_RATE = 0.03
+
+# サービスとリージョンの利用頻度の偏り（順位の累乗の逆数に比例させる）
+SERVICE_SKEW = 1.1
+REGION_SKEW = 1.2
+
+# グループ名
+_GROUP_NAMES = ['Production', 'Staging', 'Development', 'Shared Services', 'Data Platform', 'Security',
+                'Disaster Recovery', 'Analytics', 'Sandbox', 'Corporate IT']
+_SUBGROUP_NAMES = ['Web tier', 'API tier', 'Batch', 'Data', 'Networking', 'Observability', 'Edge', 'Internal tools']
+
+_INSTANCE_TYPES = ['t3.micro', 't3.medium', 'm5.large', 'm6i.xlarge', 'm7g.large', 'c5.2xlarge', 'c6g.xlarge',
+                   'r5.large', 'r6i.2xlarge', 'g5.xlarge', 'i4i.large', 'm5.4xlarge']
+_DB_INSTANCE_TYPES = ['db.t3.medium', 'db.t4g.large', 'db.m5.large', 'db.m6g.xlarge', 'db.r5.large',
+                      'db.r6g.2xlarge', 'db.r7g.xlarge']
+_CACHE_NODE_TYPES = ['cache.t3.small', 'cache.m6g.large', 'cache.r6g.xlarge', 'cache.r7g.large']
+_OPERATING_SYSTEMS = ['Linux', 'Linux', 'Linux', 'Windows Server', 'Red Hat Enterprise Linux',
+                      'SUSE Linux Enterprise Server', 'Ubuntu Pro']
+_PRICING_STRATEGIES = ['On-Demand Utilization: 100 %Utilized/Month', 'Compute Savings Plans 1 Year No Upfront',
+                       'EC2 Instance Savings Plans 3 Year No Upfront', 'Standard Reserved Instances 1 Year Partial Upfront',
+                       'Spot Instances: Historical average discount 70%']
+_DESCRIPTIONS = ['frontend', 'backend', 'batch jobs', 'reporting', 'customer portal', 'internal API', 'ETL pipeline',
+                 'logging', 'CI/CD', 'media processing', 'search', 'recommendation engine', 'payments', 'auth']
+
+
+def _amount(rng: random.Random, low: int, high: int) -> int:
+    """low から high の範囲で小さい値ほど多く選ばれる整数を返す"""
+    if high <= low:
+        return low
+    return min(high, int(math.exp(rng.uniform(math.log(low + 1), math.log(high + 2)))) - 1)
+
+
+def _compute_properties(rng: random.Random, name: str) -> Dict[str, str]:
+    instances = _amount(rng, 1, 200)
+    return {
+        'Tenancy': rng.choice(['Shared Instances', 'Shared Instances', 'Dedicated Instances']),
+        'Operating system': rng.choice(_OPERATING_SYSTEMS),
+        'Workload': f"{rng.choice(['Consistent', 'Daily spike traffic', 'Constant usage'])}, Number of instances: {instances}",
+        'Advance EC2 instance': rng.choice(_INSTANCE_TYPES),
+        'Pricing strategy': rng.choice(_PRICING_STRATEGIES),
+        'Enable monitoring': rng.choice(['disabled', 'enabled']),
+        'EBS Storage amount': f"{_amount(rng, 8, 16000)} GB",
+        'DT Inbound: Not selected': '0 TB per month',
+        'DT Outbound: Internet': f"{_amount(rng, 1, 500)} GB per month",
+        'DT Intra-Region:': f"{_amount(rng, 0, 50)} TB per month"
+    }
+
+
+def _serverless_properties(rng: random.Random, name: str) -> Dict[str, str]:
+    return {
+        'Architecture': rng.choice(['x86', 'Arm']),
+        'Number of requests': f"{_amount(rng, 1, 5000)} million per month",
+        'Duration of each request (in ms)': str(_amount(rng, 10, 30000)),
+        'Amount of memory allocated': f"{rng.choice([128, 256, 512, 1024, 2048, 4096, 10240])} MB",
+        'Amount of ephemeral storage allocated': f"{rng.choice([512, 512, 1024, 10240])} MB",
+        'Free Tier': rng.choice(['Include Free Tier', 'Do not include Free Tier'])
+    }
+
+
+def _storage_properties(rng: random.Random, name: str) -> Dict[str, str]:
+    return {
+        'Storage class': rng.choice(['Standard', 'Standard - Infrequent Access', 'Intelligent-Tiering', 'One Zone-IA']),
+        'Storage amount': f"{_amount(rng, 1, 500000)} GB per month",
+        'PUT, COPY, POST, LIST requests': str(_amount(rng, 1000, 100000000)),
+        'GET, SELECT, and all other requests': str(_amount(rng, 1000, 1000000000)),
+        'Data returned by S3 Select': f"{_amount(rng, 0, 1000)} GB per month",
+        'Snapshot Frequency': rng.choice(['No snapshot storage', 'Daily', 'Weekly', '2x Daily'])
+    }
+
+
+def _database_properties(rng: random.Random, name: str) -> Dict[str, str]:
+    if 'ElastiCache' in name or 'MemoryDB' in name:
+        return {
+            'Nodes': str(_amount(rng, 1, 30)),
+            'Instance type': rng.choice(_CACHE_NODE_TYPES),
+            'Utilization (On-Demand only)': '100 %Utilized/Month',
+            'Cache Engine': rng.choice(['Redis OSS', 'Valkey', 'Memcached']),
+            'Pricing strategy': rng.choice(['OnDemand', 'Reserved 1 Year No Upfront'])
+        }
+    if 'DynamoDB' in name or 'Keyspaces' in name or 'Timestream' in name:
+        return {
+            'Table class': rng.choice(['Standard', 'Standard-Infrequent Access']),
+            'Average item size (all attributes)': f"{_amount(rng, 1, 400)} KB",
+            'Data storage size': f"{_amount(rng, 1, 50000)} GB",
+            'Provisioned write capacity units': str(_amount(rng, 5, 40000)),
+            'Provisioned read capacity units': str(_amount(rng, 5, 40000)),
+            'Capacity mode': rng.choice(['On-demand', 'Provisioned'])
+        }
+    return {
+        'Nodes': str(_amount(rng, 1, 16)),
+        'Instance type': rng.choice(_DB_INSTANCE_TYPES),
+        'Utilization (On-Demand only)': '100 %Utilized/Month',
+        'Deployment option': rng.choice(['Single-AZ', 'Multi-AZ', 'Multi-AZ (readable standbys)']),
+        'Pricing strategy': rng.choice(['OnDemand', 'Reserved 1 Year No Upfront', 'Reserved 3 Years All Upfront']),
+        'Storage amount': f"{_amount(rng, 20, 64000)} GB",
+        'Storage volume': rng.choice(['General Purpose SSD (gp3)', 'General Purpose SSD (gp2)', 'Provisioned IOPS SSD (io1)']),
+        'Backup Storage': f"{_amount(rng, 0, 10000)} GB"
+    }
+
+
+def _network_properties(rng: random.Random, name: str) -> Dict[str, str]:
+    return {
+        'Number of endpoints or load balancers': str(_amount(rng, 1, 100)),
+        'Processed bytes': f"{_amount(rng, 1, 100000)} GB per month",
+        'Average number of new connections': f"{_amount(rng, 1, 5000)} per second",
+        'Data transfer out to internet': f"{_amount(rng, 1, 500)} TB per month",
+        'Number of requests (HTTPS)': f"{_amount(rng, 1, 10000)} million per month",
+        'Hosted zones': str(_amount(rng, 0, 500))
+    }
+
+
+def _generic_properties(rng: random.Random, name: str) -> Dict[str, str]:
+    return {
+        'Usage': f"{_amount(rng, 1, 744)} hours per month",
+        'Number of requests': f"{_amount(rng, 1, 100000)} thousand per month",
+        'Data processed': f"{_amount(rng, 1, 100000)} GB per month",
+        'Number of resources': str(_amount(rng, 1, 10000))
+    }
+
+
+_PROPERTY_BUILDERS: Dict[str, Callable[[random.Random, str], Dict[str, str]]] = {
+    'compute': _compute_properties,
+    'serverless': _serverless_properties,
+    'storage': _storage_properties,
+    'database': _database_properties,
+    'network': _network_properties
+}
+
+
+def _cumulative_weights(count: int, skew: float) -> List[float]:
+    """順位の累乗の逆数による累積の重みを返す"""
+    return list(itertools.accumulate(1.0 / (rank + 1) ** skew for rank in range(count)))
+
+
+def _service_catalog() -> List[Tuple[str, str]]:
+    """(サービス名, 分類) のリストを利用頻度の高い順に返す（各分類の上位から順に交互に並べる）"""
+    catalog = []
+    for services in itertools.zip_longest(*SERVICE_FAMILIES.values()):
+        for family, name in zip(SERVICE_FAMILIES, services):
+            if name is not None:
+                catalog.append((name, family))
+    return catalog
+
+
+SERVICE_CATALOG: List[Tuple[str, str]] = _service_catalog()
+
+
+class SyntheticEstimateGenerator:
+    """
+    合成見積もりデータを生成するクラス
+
+    このクラスは、以下の機能を提供します：
+    - シード値とサービス数から毎回同じ内容の見積もりの生成（generate、iter_chunks、write）
+    - 利用頻度に偏りのあるサービスとリージョン、対数正規分布のコスト、実際の形式に近い Properties
+    - 入れ子のグループ（最上位のグループと、その下のサブグループ）へのサービスの振り分け
+    出力は EstimateParser.parse_from_json で内部形式に変換できます。
+    大きな見積もりは write でファイルに書き出してください（generate はメモリ上に構築します）。
+    """
+
+    def __init__(self, seed: int = 0, group_count: int = 4, subgroup_count: int = 2, currency: str = "USD"):
+        """
+        初期化
+
+        Args:
+            seed: シード値
+            group_count: 最上位のグループ数（0の場合はグループに分けない）
+            subgroup_count: 最上位のグループごとのサブグループ数
+            currency: 通貨コード
+        """
+        self.seed = seed
+        self.group_count = group_count
+        self.subgroup_count = subgroup_count
+        self.currency = currency
+        self._service_weights = _cumulative_weights(len(SERVICE_CATALOG), SERVICE_SKEW)
+        self._region_weights = _cumulative_weights(len(REGIONS), REGION_SKEW)
+
+    def generate(self, service_count: int, name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        見積もりをメモリ上に生成する
+
+        Args:
+            service_count: サービス数
+            name: 見積もりの名前（省略時はシード値から作成）
+
+        Returns:
+            Dict: エクスポート形式の見積もりデータ
+        """
+        return json.loads("".join(self.iter_chunks(service_count, name)))
+
+    def write(self, service_count: int, fp: IO[str], name: Optional[str] = None) -> Dict[str, str]:
+        """
+        見積もりをファイルに書き出す（サービスを1件ずつ書き出すため、メモリ使用量はサービス数によらない）
+
+        Args:
+            service_count: サービス数
+            fp: 書き込み先のテキストファイルオブジェクト
+            name: 見積もりの名前（省略時はシード値から作成）
+
+        Returns:
+            Dict: 見積もりの合計コスト（monthly / upfront / 12 months）
+        """
+        totals: Dict[str, str] = {}
+        for chunk in self.iter_chunks(service_count, name, totals):
+            fp.write(chunk)
+        return totals
+
+    def iter_chunks(self, service_count: int, name: Optional[str] = None,
+                    totals: Optional[Dict[str, str]] = None) -> Iterator[str]:
+        """
+        見積もりをJSONの文字列断片として順に生成する
+
+        合計コスト（Total Cost）はサービスを生成し終えてから計算するため、最後のフィールドとして出力します。
+
+        Args:
+            service_count: サービス数
+            name: 見積もりの名前（省略時はシード値から作成）
+            totals: 指定すると生成し終えた後に合計コストを格納する
+
+        Yields:
+            str: 出力するJSONの断片
+        """
+        if service_count < 0:
+            raise ValueError("サービス数は0以上を指定してください")
+
+        rng = random.Random(self.seed)
+        sums = [0.0, 0.0]
+        layout = self._layout(rng, service_count)
+
+        yield "{\n"
+        yield f'"Name": {json.dumps(name or f"Synthetic Estimate {self.seed}")},\n'
+        yield f'"Metadata": {json.dumps(self._metadata(service_count), ensure_ascii=False)},\n'
+        yield '"Groups": '
+        yield from self._iter_group(rng, layout, sums)
+        monthly, upfront = round(sums[0], 2), round(sums[1], 2)
+        total_cost = {
+            "monthly": f"{monthly:.2f}",
+            "upfront": f"{upfront:.2f}",
+            "12 months": f"{monthly * 12 + upfront:.2f}"
+        }
+        if totals is not None:
+            totals.update(total_cost)
+        yield f',\n"Total Cost": {json.dumps(total_cost)}\n}}\n'
+
+    def iter_services(self, service_count: int) -> Iterator[Dict[str, Any]]:
+        """
+        グループに分けずにサービスを順に生成する
+
+        Args:
+            service_count: サービス数
+
+        Yields:
+            Dict: エクスポート形式のサービスデータ
+        """
+        rng = random.Random(self.seed)
+        for _ in range(service_count):
+            yield self._service(rng)
+
+    def _layout(self, rng: random.Random, service_count: int) -> Dict[str, Any]:
+        """
+        グループの構成と、グループごとのサービス数を決める
+
+        Returns:
+            Dict: {"count": グループ直下のサービス数, "name": グループ名, "children": 子グループのリスト}
+        """
+        nodes: List[Dict[str, Any]] = []
+        root = {"name": None, "count": 0, "children": []}
+        nodes.append(root)
+        group_names = rng.sample(_GROUP_NAMES, min(self.group_count, len(_GROUP_NAMES)))
+        for group_name in group_names:
+            group = {"name": group_name, "count": 0, "children": []}
+            root["children"].append(group)
+            nodes.append(group)
+            for subgroup_name in rng.sample(_SUBGROUP_NAMES, min(self.subgroup_count, len(_SUBGROUP_NAMES))):
+                subgroup = {"name": f"{group_name} / {subgroup_name}", "count": 0, "children": []}
+                group["children"].append(subgroup)
+                nodes.append(subgroup)
+
+        # グループごとの割合にも偏りを持たせ、最大剰余法でサービス数を割り当てる
+        shares = [rng.lognormvariate(0, 0.8) for _ in nodes]
+        total_share = sum(shares)
+        quotas = [service_count * share / total_share for share in shares]
+        counts = [int(quota) for quota in quotas]
+        remainders = sorted(range(len(nodes)), key=lambda index: counts[index] - quotas[index])
+        for index in remainders[:service_count - sum(counts)]:
+            counts[index] += 1
+        for node, count in zip(nodes, counts):
+            node["count"] = count
+        return root
+
+    def _iter_group(self, rng: random.Random, group: Dict[str, Any], sums: List[float]) -> Iterator[str]:
+        """グループ（サービスと子グループ）をJSONの断片として生成する"""
+        yield "{"
+        if group["name"] is not None:
+            yield f'"Group Name": {json.dumps(group["name"])}, '
+        yield '"Services": ['
+        for index in range(group["count"]):
+            service = self._service(rng)
+            cost = service["Service Cost"]
+            sums[0] += float(cost["monthly"])
+            sums[1] += float(cost["upfront"])
+            yield (",\n" if index else "\n") + json.dumps(service, ensure_ascii=False)
+        yield "\n]" if group["count"] else "]"
+        if group["children"]:
+            yield ', "Groups": ['
+            for index, child in enumerate(group["children"]):
+                if index:
+                    yield ",\n"
+                yield from self._iter_group(rng, child, sums)
+            yield "]"
+        yield "}"
+
+    def _service(self, rng: random.Random) -> Dict[str, Any]:
+        """エクスポート形式のサービスを1件生成する"""
+        name, family = SERVICE_CATALOG[bisect(self._service_weights, rng.random() * self._service_weights[-1])]
+        _, region_name = REGIONS[bisect(self._region_weights, rng.random() * self._region_weights[-1])]
+        mu, sigma, upfront_rate = _COST_PROFILES[family]
+
+        if rng.random() < ZERO_COST_RATE:
+            monthly = 0.0
+        else:
+            monthly = round(min(rng.lognormvariate(mu, sigma), 2000000.0), 2)
+        upfront = round(monthly * rng.uniform(3, 18), 2) if rng.random() < upfront_rate else 0.0
+
+        service: Dict[str, Any] = {"Service Name": name}
+        if rng.random() < 0.6:
+            service["Description"] = rng.choice(_DESCRIPTIONS)
+        service["Region"] = region_name
+        service["Service Cost"] = {
+            "monthly": f"{monthly:.2f}",
+            "upfront": f"{upfront:.2f}",
+            "12 months": f"{monthly * 12 + upfront:.2f}"
+        }
+        service["Properties"] = _PROPERTY_BUILDERS.get(family, _generic_properties)(rng, name)
+        return service
+
+    def _metadata(self, service_count: int) -> Dict[str, str]:
+        """シード値とサービス数から決まる Metadata を作成する（実行日によらない）"""
+        created_on = date(2024, 1, 1) + timedelta(days=self.seed % 365)
+        digest = hashlib.sha1(f"{self.seed}:{service_count}".encode("utf-8")).hexdigest()
+        return {
+            "Currency": self.currency,
+            "Locale": "en_US",
+            "Created On": f"{created_on.month}/{created_on.day}/{created_on.year}",
+            "Legal Disclaimer": LEGAL_DISCLAIMER,
+            "Share Url": f"https://calculator.aws/#/estimate?id={digest}"
+        }
+
+
+def main(argv=None) -> None:
+    """合成見積もりデータ生成のエントリーポイント"""
+    arg_parser = argparse.ArgumentParser(description="合成見積もりデータ（エクスポート形式）の生成")
+    arg_parser.add_argument("--services", type=int, default=1000, help="見積もりごとのサービス数")
+    arg_parser.add_argument("--seed", type=int, default=0, help="シード値（複数の場合は1つ目の見積もりのシード値）")
+    arg_parser.add_argument("--estimates", type=int, default=1, help="生成する見積もりの数")
+    arg_parser.add_argument("--groups", type=int, default=4, help="最上位のグループ数")
+    arg_parser.add_argument("--subgroups", type=int, default=2, help="グループごとのサブグループ数")
+    arg_parser.add_argument("--output", default="-",
+                            help="出力先のファイル（- で標準出力）。複数の見積もりの場合はディレクトリ")
+    args = arg_parser.parse_args(argv)
+
+    if args.services < 0 or args.estimates < 1:
+        arg_parser.error("サービス数は0以上、見積もりの数は1以上を指定してください")
+    if args.estimates > 1 and args.output == "-":
+        arg_parser.error("複数の見積もりを生成する場合は --output にディレクトリを指定してください")
+
+    for offset in range(args.estimates):
+        seed = args.seed + offset
+        generator = SyntheticEstimateGenerator(seed, args.groups, args.subgroups)
+        if args.output == "-":
+            generator.write(args.services, sys.stdout)
+            continue
+
+        path = args.output
+        if args.estimates > 1:
+            os.makedirs(args.output, exist_ok=True)
+            path = os.path.join(args.output, f"synthetic-{seed}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            totals = generator.write(args.services, f)
+        print(f"{path}: {args.services} services, monthly {totals['monthly']} {generator.currency}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+見積もりファイルのアップロード解析モジュール
+
+multipart/form-data のリクエスト本文を断片ごとに受け取り、AWS Pricing Calculatorから
+エクスポートした見積もりJSONファイルを正規化された見積もりデータに順に変換するクラスを提供します。
+本文全体をメモリに読み込まず、保持するのは解析中の1ファイル分だけです。
+不正なファイルは見つけた時点で拒否し、残りの本文は読み込みません。
+"""
+
+import json
+import codecs
+import logging
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+from src.data.parser import EstimateParser
+
+logger = logging.getLogger(__name__)
+
+# 見積もりファイルのフィールド名
+UPLOAD_FIELD_NAME = "files"
+
+# リクエスト本文を読み込む単位
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class UploadError(ValueError):
+    """
+    アップロードされた本文やファイルが不正な場合の例外
+
+    Attributes:
+        status: 返すHTTPステータス（400: 不正な形式、413: 上限超過）
+        filename: 不正なファイルの名前（ファイルによらない場合はNone）
+    """
+
+    def __init__(self, message: str, status: int = 400, filename: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.filename = filename
+
+
+def multipart_boundary(content_type: Optional[str]) -> bytes:
+    """
+    Content-Type から multipart/form-data の境界文字列を取り出す
+
+    Args:
+        content_type: リクエストの Content-Type
+
+    Returns:
+        bytes: 境界文字列
+
+    Raises:
+        UploadError: multipart/form-data でない場合、または境界文字列がない場合
+    """
+    mimetype, options = parse_options_header(content_type or "")
+    boundary = options.get("boundary")
+    if mimetype != "multipart/form-data" or not boundary:
+        raise UploadError("multipart/form-data 形式で見積もりファイルを送信してください")
+    return boundary.encode("latin-1")
+
+
+class MultipartEstimateReader:
+    """
+    multipart/form-data の本文から見積もりファイルを逐次解析するクラス
+
+    このクラスは、以下の機能を提供します：
+    - 本文の断片の受け取り（feed）と、解析が終わった見積もりの返却
+    - ファイルごとのサイズ上限とファイル数上限の確認（超えた時点で拒否）
+    - 先頭の文字とUTF-8の確認による不正なファイルの早期の拒否
+    files 以外のフィールドは読み飛ばします。本文の読み込みは行わないため、
+    WSGIの入力ストリームにもASGIの受信メッセージにも使用できます。
+    """
+
+    def __init__(self, parser: EstimateParser, boundary: bytes, max_file_size: int = 8 * 1024 * 1024,
+                 max_files: int = 20):
+        """
+        初期化
+
+        Args:
+            parser: 見積もりデータパーサー
+            boundary: multipart/form-data の境界文字列
+            max_file_size: 1ファイルあたりのバイト数の上限
+            max_files: ファイル数の上限
+        """
+        self.parser = parser
+        self.max_file_size = max_file_size
+        self.max_files = max_files
+        # 解析待ちのバッファも1ファイル分を上限にする
+        self._decoder = MultipartDecoder(boundary, max_form_memory_size=max_file_size + READ_CHUNK_SIZE)
+        self._part: Optional[_FilePart] = None
+        self._file_count = 0
+        self._completed = False
+
+    @property
+    def file_count(self) -> int:
+        """解析を始めたファイルの数"""
+        return self._file_count
+
+    def feed(self, data: bytes) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        本文の断片を受け取り、解析が終わった見積もりを返す
+
+        Args:
+            data: 本文の断片
+
+        Returns:
+            List: 解析が終わった (ファイル名, 正規化された見積もりデータ) のリスト
+
+        Raises:
+            UploadError: 本文やファイルが不正な場合、または上限を超えた場合
+        """
+        try:
+            self._decoder.receive_data(data)
+        except RequestEntityTooLarge:
+            raise UploadError("アップロードの区切りが見つかりません", 413)
+        return self._drain()
+
+    def close(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        本文の終わりを通知し、残りの見積もりを返す
+
+        Returns:
+            List: 解析が終わった (ファイル名, 正規化された見積もりデータ) のリスト
+
+        Raises:
+            UploadError: 本文が途中で終わっている場合、またはファイルが1つもない場合
+        """
+        self._decoder.receive_data(None)
+        estimates = self._drain()
+        if not self._completed:
+            raise UploadError("アップロードが途中で終わっています")
+        if self._file_count == 0:
+            raise UploadError("見積もりファイルが提供されていません")
+        return estimates
+
+    def _drain(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """デコーダーのイベントを処理し、解析が終わった見積もりを返す"""
+        estimates = []
+        try:
+            event = self._decoder.next_event()
+            while not isinstance(event, NeedData):
+                if isinstance(event, File) and event.name == UPLOAD_FIELD_NAME:
+                    self._file_count += 1
+                    if self._file_count > self.max_files:
+                        raise UploadError(f"見積もりファイルは{self.max_files}件までです", 413)
+                    self._part = _FilePart(event.filename or f"file{self._file_count}", self.max_file_size)
+                elif isinstance(event, (File, Field)):
+                    # files 以外のフィールドは読み飛ばす
+                    self._part = None
+                elif isinstance(event, Data):
+                    if self._part is not None:
+                        self._part.write(event.data)
+                        if not event.more_data:
+                            estimates.append(self._part.finish(self.parser))
+                            self._part = None
+                elif isinstance(event, Epilogue):
+                    self._completed = True
+                    break
+                event = self._decoder.next_event()
+        except ValueError as e:
+            if isinstance(e, UploadError):
+                raise
+            raise UploadError(f"multipart/form-data の形式が不正です: {str(e)}")
+        return estimates
+
+
+class _FilePart:
+    """解析中の見積もりファイル"""
+
+    def __init__(self, filename: str, max_size: int):
+        self.filename = filename
+        self.max_size = max_size
+        self.size = 0
+        self.chunks: List[str] = []
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._started = False
+
+    def write(self, data: bytes) -> None:
+        """ファイルの断片を追加する（不正な内容は見つけた時点で拒否する）"""
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise UploadError(f"見積もりファイルが大きすぎます（上限 {self.max_size} バイト）: {self.filename}",
+                              413, self.filename)
+        try:
+            text = self._decoder.decode(data)
+        except UnicodeDecodeError:
+            raise UploadError(f"見積もりファイルがUTF-8ではありません: {self.filename}", 400, self.filename)
+
+        if not self._started:
+            stripped = text.lstrip()
+            if stripped:
+                self._started = True
+                if not stripped.startswith("{"):
+                    raise UploadError(f"見積もりファイルがJSONオブジェクトではありません: {self.filename}",
+                                      400, self.filename)
+        self.chunks.append(text)
+
+    def finish(self, parser: EstimateParser) -> Tuple[str, Dict[str, Any]]:
+        """ファイルを解析し、正規化された見積もりデータを返す"""
+        try:
+            text = "".join(self.chunks) + self._decoder.decode(b"", final=True)
+            self.chunks = []
+            estimate = parser.parse_from_json(json.loads(text))
+        except UnicodeDecodeError:
+            raise UploadError(f"見積もりファイルがUTF-8ではありません: {self.filename}", 400, self.filename)
+        except ValueError as e:
+            # json.JSONDecodeError も ValueError
+            raise UploadError(f"見積もりファイルを解析できません: {self.filename}: {str(e)}", 400, self.filename)
+        return self.filename, estimate
+
+
+def iter_uploaded_estimates(stream: BinaryIO, content_type: Optional[str], parser: EstimateParser,
+                            max_file_size: int = 8 * 1024 * 1024, max_files: int = 20,
+                            max_body_size: Optional[int] = None,
+                            chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    リクエスト本文のストリームから見積もりファイルを順に解析する
+
+    ファイルを1つ解析し終えるたびに返すため、不正なファイルがあった場合は残りの本文を読み込みません。
+
+    Args:
+        stream: リクエスト本文のストリーム
+        content_type: リクエストの Content-Type
+        parser: 見積もりデータパーサー
+        max_file_size: 1ファイルあたりのバイト数の上限
+        max_files: ファイル数の上限
+        max_body_size: 本文全体のバイト数の上限（Content-Length がない場合に使用）
+        chunk_size: 一度に読み込むバイト数
+
+    Yields:
+        Tuple: (ファイル名, 正規化された見積もりデータ)
+
+    Raises:
+        UploadError: 本文やファイルが不正な場合、または上限を超えた場合
+    """
+    reader = MultipartEstimateReader(parser, multipart_boundary(content_type), max_file_size, max_files)
+    total = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        total += len(chunk)
+        if max_body_size is not None and total > max_body_size:
+            raise UploadError("リクエストが大きすぎます", 413)
+        yield from reader.feed(chunk)
+    yield from reader.close()
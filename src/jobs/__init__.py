@@ -0,0 +1,3 @@
+"""
+非同期ジョブパッケージ
+"""
@@ -0,0 +1,134 @@
+"""
+キュー経由ジョブ登録モジュール
+
+合算ジョブをジョブキューに登録し、ワーカーが更新した状態を参照するクラスを提供します。
+"""
+
+import time
+import uuid
+import logging
+from typing import Dict, Any, Optional
+
+from src.jobs.job_manager import JOB_QUEUED, JOB_CANCELLED, FINISHED_STATUSES
+from src.jobs.job_queue import JobQueue
+from src.jobs.status_store import JobStatusStore
+
+logger = logging.getLogger(__name__)
+
+
+class QueuedJobDispatcher:
+    """
+    ジョブキュー経由で合算ジョブを登録・参照するクラス
+
+    このクラスは、以下の機能を提供します：
+    - ジョブの記録の作成とキューへの送信
+    - ワーカーが更新したジョブの状態・進捗・結果の参照
+    - ジョブの取り消し要求
+    - キューの滞留件数とワーカーの処理件数の集計
+    """
+
+    def __init__(self, queue: JobQueue, status_store: JobStatusStore, result_ttl_seconds: float = 3600,
+                 backend: str = 'sqs'):
+        """
+        初期化
+
+        Args:
+            queue: ジョブキュー
+            status_store: ジョブ状態の保存先
+            result_ttl_seconds: 完了したジョブを保持する秒数
+            backend: キューの種類（統計情報に表示する）
+        """
+        self.queue = queue
+        self.status_store = status_store
+        self.result_ttl_seconds = result_ttl_seconds
+        self.backend = backend
+
+    def submit(self, kind: str, payload: Dict[str, Any], progress: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        ジョブを登録する
+
+        Args:
+            kind: ジョブの種類
+            payload: ワーカーに渡すジョブの内容
+            progress: 進捗の初期値
+
+        Returns:
+            Dict: ジョブの記録
+        """
+        record = {
+            'id': uuid.uuid4().hex,
+            'kind': kind,
+            'status': JOB_QUEUED,
+            'progress': dict(progress or {}),
+            'result': None,
+            'error': None,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'attempts': 0
+        }
+        # 記録を先に作成し、ワーカーが受信した時点で必ず参照できるようにする
+        self.status_store.put(record)
+        self.queue.send({'job_id': record['id'], 'kind': kind, 'payload': payload})
+        return record
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        ジョブの記録を取得する
+
+        Args:
+            job_id: ジョブID
+
+        Returns:
+            Dict: ジョブの記録。存在しないか期限切れの場合はNone
+        """
+        record = self.status_store.get(job_id)
+        if record is None:
+            return None
+        finished_at = record.get('finished_at')
+        if finished_at is not None and time.time() - finished_at >= self.result_ttl_seconds:
+            return None
+        return record
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        ジョブの取り消しを要求する
+
+        実行待ちのジョブはすぐに取り消し済みとし、実行中のジョブはワーカーが次の区切りで停止します。
+        完了済みのジョブは変更しません。
+
+        Args:
+            job_id: ジョブID
+
+        Returns:
+            Dict: 取り消し要求後のジョブの記録。存在しない場合はNone
+        """
+        record = self.get(job_id)
+        if record is None or record['status'] in FINISHED_STATUSES:
+            return record
+
+        self.status_store.request_cancel(job_id)
+        if record['status'] == JOB_QUEUED:
+            # ワーカーは受信時に取り消し要求を確認し、メッセージを破棄する
+            record.update(status=JOB_CANCELLED, finished_at=time.time())
+            self.status_store.put(record)
+        return record
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        統計情報を返す
+
+        期限切れのジョブの記録もあわせて削除します。
+
+        Returns:
+            Dict: キューの滞留件数と、ワーカーごとの処理件数・スループット
+        """
+        self.status_store.purge_expired(time.time() - self.result_ttl_seconds)
+        workers = self.status_store.list_workers()
+        return {
+            'backend': self.backend,
+            'depth': self.queue.depth(),
+            'workers': workers,
+            'active_workers': len(workers),
+            'completed_last_minute': sum(worker.get('completed_last_minute', 0) for worker in workers)
+        }
@@ -0,0 +1,124 @@
+"""
+ジョブキュー生成モジュール
+
+環境変数の設定に応じてジョブキューとジョブ状態の保存先を生成します。
+"""
+
+import os
+from typing import Any, Optional, Mapping
+
+from src.jobs.job_queue import JobQueue, LocalJobQueue
+from src.jobs.status_store import JobStatusStore, SQLiteJobStatusStore
+
+
+def create_job_queue(environ: Optional[Mapping[str, str]] = None) -> Optional[JobQueue]:
+    """
+    環境変数の設定に応じてジョブキューを生成する
+
+    環境変数:
+        JOB_QUEUE_BACKEND: inprocess（既定、キューを使用しない）, local, sqs
+        JOB_QUEUE_SQS_URL: SQSキューのURL
+        JOB_QUEUE_SQS_ENDPOINT_URL: SQS互換キューのエンドポイント
+        JOB_QUEUE_VISIBILITY_TIMEOUT: 可視性タイムアウトの秒数
+
+    Args:
+        environ: 参照する設定（省略時は os.environ。アプリケーションからは src.app.backend_settings() の戻り値を渡す）
+
+    Returns:
+        JobQueue: ジョブキュー。inprocess の場合はNone
+
+    Raises:
+        ValueError: 設定が不正な場合
+    """
+    environ = os.environ if environ is None else environ
+    backend = environ.get("JOB_QUEUE_BACKEND", "inprocess").lower()
+    visibility_timeout = environ.get("JOB_QUEUE_VISIBILITY_TIMEOUT")
+
+    if backend == "inprocess":
+        return None
+
+    if backend == "local":
+        return LocalJobQueue(visibility_timeout=float(visibility_timeout or 300))
+
+    if backend == "sqs":
+        from src.jobs.job_queue import SQSJobQueue
+        queue_url = environ.get("JOB_QUEUE_SQS_URL")
+        if not queue_url:
+            raise ValueError("JOB_QUEUE_SQS_URL が設定されていません")
+        return SQSJobQueue(
+            queue_url,
+            endpoint_url=environ.get("JOB_QUEUE_SQS_ENDPOINT_URL") or None,
+            visibility_timeout=int(visibility_timeout) if visibility_timeout else None
+        )
+
+    raise ValueError(f"サポートされていないジョブキューです: {backend}")
+
+
+def check_shared_backends(config: Mapping[str, Any]) -> None:
+    """
+    キュー経由のジョブで、Webアプリケーションとワーカーが保存先を共有できる設定か確認する
+
+    JOB_QUEUE_BACKEND=sqs の場合、ワーカーは別のタスクで実行されるため、合算結果（ESTIMATE_STORAGE_BACKEND）と
+    ジョブ状態（JOB_STATUS_BACKEND）をタスクの外（s3）に保存しないと、Webアプリケーションから参照できません。
+
+    Args:
+        config: 保存先とキューの生成に渡す設定（src.app.backend_settings() の戻り値）
+
+    Raises:
+        ValueError: 共有できない保存先が設定されている場合
+    """
+    if config["JOB_QUEUE_BACKEND"].lower() != "sqs":
+        return
+
+    required = []
+    if config["ESTIMATE_STORAGE_BACKEND"].lower() != "s3":
+        required.append("ESTIMATE_STORAGE_BACKEND=s3")
+    if config["JOB_STATUS_BACKEND"].lower() != "s3":
+        required.append("JOB_STATUS_BACKEND=s3")
+    if required:
+        raise ValueError(
+            "JOB_QUEUE_BACKEND=sqs の場合はWebアプリケーションとワーカーで共有できる保存先が必要です: "
+            + ", ".join(required)
+        )
+
+
+def create_job_status_store(default_directory: str, environ: Optional[Mapping[str, str]] = None) -> JobStatusStore:
+    """
+    環境変数の設定に応じてジョブ状態の保存先を生成する
+
+    環境変数:
+        JOB_STATUS_BACKEND: sqlite（既定）, s3
+        JOB_STATUS_SQLITE_PATH: SQLiteデータベースのパス
+        JOB_STATUS_S3_BUCKET: S3バケット名（省略時は ESTIMATE_STORAGE_S3_BUCKET）
+        JOB_STATUS_S3_PREFIX: S3オブジェクトキーの接頭辞
+        JOB_STATUS_S3_ENDPOINT_URL: S3互換ストレージのエンドポイント
+
+    Args:
+        default_directory: SQLiteデータベースを置くディレクトリ
+        environ: 参照する設定（省略時は os.environ。アプリケーションからは src.app.backend_settings() の戻り値を渡す）
+
+    Returns:
+        JobStatusStore: ジョブ状態の保存先
+
+    Raises:
+        ValueError: 設定が不正な場合
+    """
+    environ = os.environ if environ is None else environ
+    backend = environ.get("JOB_STATUS_BACKEND", "sqlite").lower()
+
+    if backend == "sqlite":
+        db_path = environ.get("JOB_STATUS_SQLITE_PATH", os.path.join(default_directory, "jobs.sqlite3"))
+        return SQLiteJobStatusStore(db_path)
+
+    if backend == "s3":
+        from src.jobs.status_store import S3JobStatusStore
+        bucket = environ.get("JOB_STATUS_S3_BUCKET") or environ.get("ESTIMATE_STORAGE_S3_BUCKET")
+        if not bucket:
+            raise ValueError("JOB_STATUS_S3_BUCKET が設定されていません")
+        return S3JobStatusStore(
+            bucket,
+            prefix=environ.get("JOB_STATUS_S3_PREFIX", "jobs/"),
+            endpoint_url=environ.get("JOB_STATUS_S3_ENDPOINT_URL") or None
+        )
+
+    raise ValueError(f"サポートされていないジョブ状態の保存先です: {backend}")
@@ -0,0 +1,304 @@
+"""
+非同期ジョブ管理モジュール
+
+時間のかかる処理をリクエスト処理から切り離し、上限付きのワーカープールで実行して、
+ジョブIDで状態・進捗・結果を参照できるようにします。
+"""
+
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# ジョブの状態
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+
+class JobCancelled(Exception):
+    """ジョブの取り消しが要求されたことを示す例外"""
+
+
+class JobQueueFullError(RuntimeError):
+    """実行待ちのジョブが上限に達していることを示す例外"""
+
+
+class Job:
+    """
+    1件の非同期ジョブ
+
+    実行する関数はこのオブジェクトを受け取り、update_progress で進捗を更新し、
+    区切りのよいところで check_cancelled を呼び出して取り消しに応じます。
+    """
+
+    def __init__(self, kind: str, progress: Optional[Dict[str, Any]] = None):
+        """
+        初期化
+
+        Args:
+            kind: ジョブの種類
+            progress: 進捗の初期値
+        """
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = JOB_QUEUED
+        self.progress = dict(progress or {})
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancel_requested(self) -> bool:
+        """取り消しが要求されているか"""
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        """
+        取り消しが要求されていれば例外を送出する
+
+        Raises:
+            JobCancelled: 取り消しが要求されている場合
+        """
+        if self._cancel_event.is_set():
+            raise JobCancelled(self.id)
+
+    def update_progress(self, **values: Any) -> None:
+        """
+        進捗を更新する
+
+        Args:
+            values: 更新する進捗の項目と値
+        """
+        with self._lock:
+            self.progress.update(values)
+
+    def increment_progress(self, key: str, amount: int = 1) -> None:
+        """
+        進捗の数値項目を加算する
+
+        Args:
+            key: 進捗の項目
+            amount: 加算する値
+        """
+        with self._lock:
+            self.progress[key] = self.progress.get(key, 0) + amount
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        ジョブの状態を辞書で返す
+
+        Returns:
+            Dict: ID、状態、進捗、結果、エラー、各日時を含む辞書
+        """
+        with self._lock:
+            return {
+                'id': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'progress': dict(self.progress),
+                'result': self.result,
+                'error': self.error,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at
+            }
+
+
+class JobManager:
+    """
+    非同期ジョブを管理するクラス
+
+    このクラスは、以下の機能を提供します：
+    - 上限付きワーカープールでのジョブ実行（実行待ちの件数にも上限を設ける）
+    - ジョブの状態・進捗・結果の参照
+    - ジョブの取り消し
+    - 完了から一定時間が過ぎたジョブの破棄
+    """
+
+    def __init__(self, max_workers: int = 4, max_queued: int = 100, result_ttl_seconds: float = 3600):
+        """
+        初期化
+
+        Args:
+            max_workers: 同時に実行するジョブ数の上限
+            max_queued: 実行待ちのジョブ数の上限
+            result_ttl_seconds: 完了したジョブを保持する秒数
+        """
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.result_ttl_seconds = result_ttl_seconds
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='merge-job')
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'submitted': 0,
+            'rejected': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'expired': 0
+        }
+
+    def submit(self, kind: str, func: Callable[[Job], Any], progress: Optional[Dict[str, Any]] = None) -> Job:
+        """
+        ジョブを登録する
+
+        Args:
+            kind: ジョブの種類
+            func: ジョブを受け取って実行し、結果を返す関数
+            progress: 進捗の初期値
+
+        Returns:
+            Job: 登録したジョブ
+
+        Raises:
+            JobQueueFullError: 実行待ちのジョブが上限に達している場合
+        """
+        self.purge_expired()
+
+        job = Job(kind, progress)
+        with self._lock:
+            queued = sum(1 for existing in self._jobs.values() if existing.status == JOB_QUEUED)
+            if queued >= self.max_queued:
+                self._stats['rejected'] += 1
+                raise JobQueueFullError("実行待ちのジョブが上限に達しています")
+            self._jobs[job.id] = job
+            self._stats['submitted'] += 1
+
+        job.future = self._executor.submit(self._run, job, func)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        ジョブを取得する
+
+        Args:
+            job_id: ジョブID
+
+        Returns:
+            Job: ジョブ。存在しないか期限切れの場合はNone
+        """
+        self.purge_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        ジョブの取り消しを要求する
+
+        実行待ちのジョブはすぐに取り消し、実行中のジョブは次の区切りで停止します。
+        完了済みのジョブは変更しません。
+
+        Args:
+            job_id: ジョブID
+
+        Returns:
+            Job: 対象のジョブ。存在しない場合はNone
+        """
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return job
+
+        job._cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            self._finish(job, JOB_CANCELLED)
+        return job
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """
+        完了から保持期間を過ぎたジョブを破棄する
+
+        Args:
+            now: 基準日時（UNIX時間、省略時は現在時刻）
+
+        Returns:
+            int: 破棄したジョブ数
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            expired_ids = [
+                job.id for job in self._jobs.values()
+                if job.finished_at is not None and now - job.finished_at >= self.result_ttl_seconds
+            ]
+            for job_id in expired_ids:
+                del self._jobs[job_id]
+            self._stats['expired'] += len(expired_ids)
+        return len(expired_ids)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        実行待ちのジョブを取り消し、ワーカープールを停止する
+
+        Args:
+            wait: 実行中のジョブの終了を待つか
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            if job.status not in FINISHED_STATUSES:
+                self.cancel(job.id)
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, func: Callable[[Job], Any]) -> None:
+        """ジョブを実行し、結果または例外を記録する"""
+        if job.cancel_requested:
+            self._finish(job, JOB_CANCELLED)
+            return
+
+        with job._lock:
+            job.status = JOB_RUNNING
+            job.started_at = time.time()
+
+        try:
+            result = func(job)
+        except JobCancelled:
+            logger.info(f"ジョブを取り消しました: {job.id}")
+            self._finish(job, JOB_CANCELLED)
+        except Exception as e:
+            logger.exception(f"ジョブの実行中にエラーが発生: {job.id}")
+            self._finish(job, JOB_FAILED, error=str(e))
+        else:
+            self._finish(job, JOB_SUCCEEDED, result=result)
+
+    def _finish(self, job: Job, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        """ジョブを完了状態にする"""
+        with job._lock:
+            if job.status in FINISHED_STATUSES:
+                return
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished_at = time.time()
+        with self._lock:
+            self._stats[status] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        統計情報を返す
+
+        Returns:
+            Dict: 状態ごとのジョブ数と、登録・拒否・完了などの累計件数
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            jobs = list(self._jobs.values())
+        stats['queued'] = sum(1 for job in jobs if job.status == JOB_QUEUED)
+        stats['running'] = sum(1 for job in jobs if job.status == JOB_RUNNING)
+        stats['max_workers'] = self.max_workers
+        stats['max_queued'] = self.max_queued
+        return stats
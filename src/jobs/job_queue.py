@@ -0,0 +1,224 @@
+"""
+ジョブキューモジュール
+
+Webアプリケーションとワーカーの間で合算ジョブを受け渡すキューを提供します。
+キューは少なくとも1回の配信を保証し、確認応答（ack）されなかったメッセージは
+可視性タイムアウトの経過後に再配信されます。
+"""
+
+import json
+import time
+import uuid
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Dict, Any, Optional
+
+try:
+    import boto3
+    from botocore.config import Config
+except ImportError:  # pragma: no cover - boto3は任意の依存関係
+    boto3 = None
+
+logger = logging.getLogger(__name__)
+
+
+class QueueMessage:
+    """キューから受信したメッセージ"""
+
+    __slots__ = ('body', 'receipt', 'receive_count')
+
+    def __init__(self, body: Dict[str, Any], receipt: str, receive_count: int = 1):
+        """
+        初期化
+
+        Args:
+            body: メッセージ本文
+            receipt: 確認応答に使用する受信ハンドル
+            receive_count: このメッセージを受信した回数
+        """
+        self.body = body
+        self.receipt = receipt
+        self.receive_count = receive_count
+
+
+class JobQueue(ABC):
+    """
+    ジョブキューの基底クラス
+
+    受信したメッセージは ack するまで他のワーカーから見えなくなり、
+    可視性タイムアウトまでに ack されなければ再配信されます。
+    """
+
+    @abstractmethod
+    def send(self, body: Dict[str, Any]) -> None:
+        """
+        メッセージを送信する
+
+        Args:
+            body: メッセージ本文（JSONに変換できる辞書）
+        """
+
+    @abstractmethod
+    def receive(self, wait_seconds: float = 0) -> Optional[QueueMessage]:
+        """
+        メッセージを1件受信する
+
+        Args:
+            wait_seconds: メッセージが届くまで待つ秒数
+
+        Returns:
+            QueueMessage: 受信したメッセージ。届かなかった場合はNone
+        """
+
+    @abstractmethod
+    def ack(self, message: QueueMessage) -> None:
+        """
+        処理を終えたメッセージをキューから削除する
+
+        Args:
+            message: 受信したメッセージ
+        """
+
+    @abstractmethod
+    def depth(self) -> Dict[str, int]:
+        """
+        キューに残っているメッセージ数を返す
+
+        Returns:
+            Dict: visible（受信待ち）と in_flight（処理中）の件数
+        """
+
+
+class LocalJobQueue(JobQueue):
+    """
+    プロセス内で完結するジョブキュー
+
+    テストと単一プロセスでの開発用です。SQSと同じく可視性タイムアウトを過ぎた
+    未確認のメッセージを再配信します。
+    """
+
+    def __init__(self, visibility_timeout: float = 300):
+        """
+        初期化
+
+        Args:
+            visibility_timeout: 受信後、ackされずに再配信されるまでの秒数
+        """
+        self.visibility_timeout = visibility_timeout
+        self._visible = deque()
+        self._in_flight: Dict[str, tuple] = {}
+        self._receive_counts: Dict[str, int] = {}
+        self._condition = threading.Condition()
+
+    def send(self, body: Dict[str, Any]) -> None:
+        with self._condition:
+            self._visible.append((uuid.uuid4().hex, json.dumps(body)))
+            self._condition.notify()
+
+    def receive(self, wait_seconds: float = 0) -> Optional[QueueMessage]:
+        deadline = time.monotonic() + wait_seconds
+        with self._condition:
+            while True:
+                self._requeue_expired()
+                if self._visible:
+                    message_id, payload = self._visible.popleft()
+                    receipt = uuid.uuid4().hex
+                    self._in_flight[receipt] = (message_id, payload, time.monotonic() + self.visibility_timeout)
+                    self._receive_counts[message_id] = self._receive_counts.get(message_id, 0) + 1
+                    return QueueMessage(json.loads(payload), receipt, self._receive_counts[message_id])
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(min(remaining, 0.1))
+
+    def ack(self, message: QueueMessage) -> None:
+        with self._condition:
+            entry = self._in_flight.pop(message.receipt, None)
+            if entry is not None:
+                self._receive_counts.pop(entry[0], None)
+
+    def depth(self) -> Dict[str, int]:
+        with self._condition:
+            self._requeue_expired()
+            return {'visible': len(self._visible), 'in_flight': len(self._in_flight)}
+
+    def _requeue_expired(self) -> None:
+        """可視性タイムアウトを過ぎた処理中のメッセージを受信待ちに戻す"""
+        now = time.monotonic()
+        for receipt, (message_id, payload, visible_at) in list(self._in_flight.items()):
+            if visible_at <= now:
+                del self._in_flight[receipt]
+                self._visible.append((message_id, payload))
+
+
+class SQSJobQueue(JobQueue):
+    """
+    Amazon SQS（またはSQS互換のキュー）を使用するジョブキュー
+
+    Webアプリケーションとワーカーを別のタスクで実行し、ワーカー数を
+    Webアプリケーションとは独立に増減できます。
+    """
+
+    def __init__(self, queue_url: str, endpoint_url: Optional[str] = None, region_name: Optional[str] = None,
+                 visibility_timeout: Optional[int] = None, client=None):
+        """
+        初期化
+
+        Args:
+            queue_url: キューのURL
+            endpoint_url: SQS互換キューのエンドポイント
+            region_name: リージョン
+            visibility_timeout: 受信時に指定する可視性タイムアウトの秒数（省略時はキューの設定）
+            client: 使用するSQSクライアント（省略時は作成する）
+        """
+        if client is None:
+            if boto3 is None:
+                raise RuntimeError("SQSキューを使用するにはboto3をインストールしてください")
+            client = boto3.client(
+                'sqs',
+                endpoint_url=endpoint_url,
+                region_name=region_name,
+                config=Config(retries={'mode': 'standard'})
+            )
+
+        self.queue_url = queue_url
+        self.visibility_timeout = visibility_timeout
+        self.client = client
+
+    def send(self, body: Dict[str, Any]) -> None:
+        self.client.send_message(QueueUrl=self.queue_url, MessageBody=json.dumps(body, ensure_ascii=False))
+
+    def receive(self, wait_seconds: float = 0) -> Optional[QueueMessage]:
+        options = {
+            'QueueUrl': self.queue_url,
+            'MaxNumberOfMessages': 1,
+            # SQSのロングポーリングは最大20秒
+            'WaitTimeSeconds': min(int(wait_seconds), 20),
+            'AttributeNames': ['ApproximateReceiveCount']
+        }
+        if self.visibility_timeout is not None:
+            options['VisibilityTimeout'] = self.visibility_timeout
+
+        messages = self.client.receive_message(**options).get('Messages', [])
+        if not messages:
+            return None
+
+        message = messages[0]
+        receive_count = int(message.get('Attributes', {}).get('ApproximateReceiveCount', 1))
+        return QueueMessage(json.loads(message['Body']), message['ReceiptHandle'], receive_count)
+
+    def ack(self, message: QueueMessage) -> None:
+        self.client.delete_message(QueueUrl=self.queue_url, ReceiptHandle=message.receipt)
+
+    def depth(self) -> Dict[str, int]:
+        attributes = self.client.get_queue_attributes(
+            QueueUrl=self.queue_url,
+            AttributeNames=['ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesNotVisible']
+        )['Attributes']
+        return {
+            'visible': int(attributes.get('ApproximateNumberOfMessages', 0)),
+            'in_flight': int(attributes.get('ApproximateNumberOfMessagesNotVisible', 0))
+        }
@@ -0,0 +1,309 @@
+"""
+ジョブ状態保存モジュール
+
+キュー経由で実行する合算ジョブの状態・進捗・結果と、ワーカーの稼働状況を
+Webアプリケーションとワーカーの間で共有する保存先を提供します。
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional
+
+try:
+    import boto3
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+except ImportError:  # pragma: no cover - boto3は任意の依存関係
+    boto3 = None
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatusStore(ABC):
+    """
+    ジョブ状態の保存先の基底クラス
+
+    ジョブの記録は登録時はWebアプリケーションが、受信後はワーカーが書き込みます。
+    取り消し要求は記録とは別に保存し、ワーカーの書き込みで失われないようにします。
+    """
+
+    @abstractmethod
+    def put(self, record: Dict[str, Any]) -> None:
+        """
+        ジョブの記録を保存する（同じIDの記録は置き換える）
+
+        Args:
+            record: ジョブの記録（id を含む辞書）
+        """
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        ジョブの記録を取得する
+
+        Args:
+            job_id: ジョブID
+
+        Returns:
+            Dict: ジョブの記録。存在しない場合はNone
+        """
+
+    @abstractmethod
+    def request_cancel(self, job_id: str) -> None:
+        """
+        ジョブの取り消しを要求する
+
+        Args:
+            job_id: ジョブID
+        """
+
+    @abstractmethod
+    def cancel_requested(self, job_id: str) -> bool:
+        """
+        ジョブの取り消しが要求されているか確認する
+
+        Args:
+            job_id: ジョブID
+
+        Returns:
+            bool: 取り消しが要求されている場合はTrue
+        """
+
+    @abstractmethod
+    def put_worker(self, worker_id: str, stats: Dict[str, Any]) -> None:
+        """
+        ワーカーの統計情報を保存する
+
+        Args:
+            worker_id: ワーカーID
+            stats: 統計情報
+        """
+
+    @abstractmethod
+    def list_workers(self, active_within: float = 300) -> List[Dict[str, Any]]:
+        """
+        最近統計情報を報告したワーカーの一覧を返す
+
+        Args:
+            active_within: 何秒以内に報告したワーカーを対象とするか
+
+        Returns:
+            List[Dict]: ワーカーの統計情報のリスト
+        """
+
+    def purge_expired(self, finished_before: float) -> int:
+        """
+        指定日時より前に完了したジョブの記録を削除する
+
+        既定の実装は何もしません（S3ではライフサイクルルールで削除します）。
+
+        Args:
+            finished_before: 基準日時（UNIX時間）
+
+        Returns:
+            int: 削除した記録の数
+        """
+        return 0
+
+
+class SQLiteJobStatusStore(JobStatusStore):
+    """
+    ジョブ状態をSQLiteデータベースに保存するクラス
+
+    同じホスト（または共有ボリューム）上のWebアプリケーションとワーカーで使用します。
+    """
+
+    def __init__(self, db_path: str, timeout: float = 30.0):
+        """
+        初期化
+
+        Args:
+            db_path: データベースファイルのパス
+            timeout: ロック待ちのタイムアウト秒数
+        """
+        self.db_path = db_path
+        self.timeout = timeout
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS jobs ("
+                    " id TEXT PRIMARY KEY,"
+                    " record TEXT NOT NULL,"
+                    " finished_at REAL,"
+                    " cancel_requested INTEGER NOT NULL DEFAULT 0)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_finished_at ON jobs (finished_at)")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS workers ("
+                    " id TEXT PRIMARY KEY,"
+                    " stats TEXT NOT NULL,"
+                    " updated_at REAL NOT NULL)"
+                )
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """データベース接続を作成する（接続はスレッドごと・操作ごとに作成する）"""
+        return sqlite3.connect(self.db_path, timeout=self.timeout)
+
+    def put(self, record: Dict[str, Any]) -> None:
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO jobs (id, record, finished_at) VALUES (?, ?, ?)"
+                    " ON CONFLICT(id) DO UPDATE SET record = excluded.record, finished_at = excluded.finished_at",
+                    (record['id'], json.dumps(record, ensure_ascii=False), record.get('finished_at'))
+                )
+        finally:
+            conn.close()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT record FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row else None
+
+    def request_cancel(self, job_id: str) -> None:
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+        finally:
+            conn.close()
+
+    def cancel_requested(self, job_id: str) -> bool:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return bool(row and row[0])
+
+    def put_worker(self, worker_id: str, stats: Dict[str, Any]) -> None:
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO workers (id, stats, updated_at) VALUES (?, ?, ?)",
+                    (worker_id, json.dumps(stats, ensure_ascii=False), time.time())
+                )
+        finally:
+            conn.close()
+
+    def list_workers(self, active_within: float = 300) -> List[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT stats FROM workers WHERE updated_at >= ? ORDER BY id",
+                (time.time() - active_within,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [json.loads(row[0]) for row in rows]
+
+    def purge_expired(self, finished_before: float) -> int:
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                    (finished_before,)
+                )
+                return cursor.rowcount
+        finally:
+            conn.close()
+
+
+class S3JobStatusStore(JobStatusStore):
+    """
+    ジョブ状態をS3互換オブジェクトストレージに保存するクラス
+
+    Webアプリケーションとワーカーを別のタスクで実行する場合に使用します。
+    完了したジョブの記録は、接頭辞に対するライフサイクルルールで削除してください。
+    """
+
+    def __init__(self, bucket: str, prefix: str = 'jobs/', endpoint_url: Optional[str] = None,
+                 region_name: Optional[str] = None, client=None):
+        """
+        初期化
+
+        Args:
+            bucket: バケット名
+            prefix: オブジェクトキーの接頭辞
+            endpoint_url: S3互換ストレージのエンドポイント（MinIOなど）
+            region_name: リージョン
+            client: 使用するS3クライアント（省略時は作成する）
+        """
+        if client is None:
+            if boto3 is None:
+                raise RuntimeError("S3ストレージを使用するにはboto3をインストールしてください")
+            client = boto3.client(
+                's3',
+                endpoint_url=endpoint_url,
+                region_name=region_name,
+                config=Config(retries={'mode': 'standard'})
+            )
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = client
+
+    def _put_json(self, key: str, data: Dict[str, Any]) -> None:
+        """JSONオブジェクトを保存する"""
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=json.dumps(data, ensure_ascii=False).encode('utf-8'),
+            ContentType='application/json'
+        )
+
+    def _get_json(self, key: str) -> Optional[Dict[str, Any]]:
+        """JSONオブジェクトを取得する（存在しない場合はNone）"""
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        with response['Body'] as body:
+            return json.loads(body.read().decode('utf-8'))
+
+    def put(self, record: Dict[str, Any]) -> None:
+        self._put_json(f"{self.prefix}records/{record['id']}.json", record)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._get_json(f"{self.prefix}records/{job_id}.json")
+
+    def request_cancel(self, job_id: str) -> None:
+        self._put_json(f"{self.prefix}cancel/{job_id}.json", {'requested_at': time.time()})
+
+    def cancel_requested(self, job_id: str) -> bool:
+        return self._get_json(f"{self.prefix}cancel/{job_id}.json") is not None
+
+    def put_worker(self, worker_id: str, stats: Dict[str, Any]) -> None:
+        self._put_json(f"{self.prefix}workers/{worker_id}.json", dict(stats, updated_at=time.time()))
+
+    def list_workers(self, active_within: float = 300) -> List[Dict[str, Any]]:
+        workers = []
+        threshold = time.time() - active_within
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=f"{self.prefix}workers/"):
+            for item in page.get('Contents', []):
+                stats = self._get_json(item['Key'])
+                if stats and stats.get('updated_at', 0) >= threshold:
+                    workers.append(stats)
+        return sorted(workers, key=lambda stats: stats.get('worker_id', ''))
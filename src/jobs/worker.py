@@ -0,0 +1,313 @@
+"""
+合算ジョブワーカーモジュール
+
+ジョブキューから合算ジョブを受信して実行するワーカーと、Webアプリケーションとは
+別のプロセスとして起動するためのエントリーポイントを提供します。
+
+使用例:
+    python -m src.jobs.worker
+"""
+
+import os
+import time
+import socket
+import signal
+import logging
+import argparse
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+
+from dotenv import load_dotenv
+
+from src.jobs.job_manager import JobCancelled, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED, FINISHED_STATUSES
+from src.jobs.job_queue import JobQueue, QueueMessage
+from src.jobs.status_store import JobStatusStore
+from src.merger.merge_pipeline import MergePipeline
+
+logger = logging.getLogger(__name__)
+
+
+class MergeWorker:
+    """
+    ジョブキューから合算ジョブを受信して実行するクラス
+
+    メッセージは少なくとも1回配信されるため、完了済みのジョブを再受信した場合は
+    何もせずに確認応答します。合算結果は内容ハッシュで保存されるため、
+    同じジョブを再実行しても同じ結果になります。
+    想定外の例外で中断したジョブは確認応答せず、可視性タイムアウト後に再実行されます。
+    """
+
+    def __init__(self, queue: JobQueue, status_store: JobStatusStore, pipeline: MergePipeline,
+                 worker_id: Optional[str] = None, max_attempts: int = 3, progress_interval: float = 1.0,
+                 report_interval: float = 10.0):
+        """
+        初期化
+
+        Args:
+            queue: ジョブキュー
+            status_store: ジョブ状態の保存先
+            pipeline: 見積もり合算パイプライン
+            worker_id: ワーカーID（省略時はホスト名とプロセスIDから作成）
+            max_attempts: 1つのジョブを実行する回数の上限
+            progress_interval: 進捗を保存し、取り消し要求を確認する間隔の秒数
+            report_interval: ワーカーの統計情報を保存する間隔の秒数
+        """
+        self.queue = queue
+        self.status_store = status_store
+        self.pipeline = pipeline
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.max_attempts = max_attempts
+        self.progress_interval = progress_interval
+        self.report_interval = report_interval
+
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._completed_at = deque()
+        self._last_report = 0.0
+        self._stats = {
+            'worker_id': self.worker_id,
+            'started_at': time.time(),
+            'processed': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'duplicates': 0,
+            'retried': 0,
+            'busy_seconds': 0.0
+        }
+
+    def run(self, wait_seconds: float = 20) -> None:
+        """
+        停止するまでジョブを受信して実行する
+
+        Args:
+            wait_seconds: 1回の受信でメッセージを待つ秒数
+        """
+        logger.info(f"合算ジョブワーカーを開始しました: {self.worker_id}")
+        while not self._stop_event.is_set():
+            try:
+                self.run_once(wait_seconds)
+            except Exception:
+                logger.exception("ジョブの受信中にエラーが発生")
+                self._stop_event.wait(1)
+            self._report()
+        self._report(force=True)
+        logger.info(f"合算ジョブワーカーを停止しました: {self.worker_id}")
+
+    def stop(self) -> None:
+        """実行中のジョブを終えたところで停止する"""
+        self._stop_event.set()
+
+    def run_once(self, wait_seconds: float = 0) -> bool:
+        """
+        ジョブを1件受信して実行する
+
+        Args:
+            wait_seconds: メッセージを待つ秒数
+
+        Returns:
+            bool: メッセージを受信した場合はTrue
+        """
+        message = self.queue.receive(wait_seconds)
+        if message is None:
+            return False
+
+        started = time.monotonic()
+        try:
+            self.process(message)
+        finally:
+            with self._lock:
+                self._stats['busy_seconds'] += time.monotonic() - started
+        return True
+
+    def process(self, message: QueueMessage) -> None:
+        """
+        受信したメッセージのジョブを実行する
+
+        Args:
+            message: 受信したメッセージ
+        """
+        job_id = message.body.get('job_id')
+        record = self.status_store.get(job_id) if job_id else None
+
+        if record is None or record['status'] in FINISHED_STATUSES:
+            # 期限切れまたは完了済みのジョブの再配信
+            logger.info(f"処理済みのジョブを破棄します: {job_id}")
+            self._count('duplicates')
+            self.queue.ack(message)
+            return
+
+        if self.status_store.cancel_requested(job_id):
+            self._finish(record, JOB_CANCELLED)
+            self.queue.ack(message)
+            return
+
+        if message.receive_count > self.max_attempts:
+            self._finish(record, JOB_FAILED, error="ジョブの実行回数が上限に達しました")
+            self.queue.ack(message)
+            return
+
+        if message.body.get('kind') != 'merge':
+            self._finish(record, JOB_FAILED, error=f"サポートされていないジョブです: {message.body.get('kind')}")
+            self.queue.ack(message)
+            return
+
+        if message.receive_count > 1:
+            self._count('retried')
+
+        record.update(status=JOB_RUNNING, started_at=time.time(), attempts=message.receive_count)
+        self.status_store.put(record)
+
+        try:
+            result = self.pipeline.run(message.body['payload']['urls'], self._progress_handler(record))
+        except JobCancelled:
+            logger.info(f"ジョブを取り消しました: {job_id}")
+            self._finish(record, JOB_CANCELLED)
+        except ValueError as e:
+            # URLの不正など、再実行しても結果が変わらない失敗
+            self._finish(record, JOB_FAILED, error=str(e))
+        except Exception:
+            # 確認応答せず、可視性タイムアウト後に再実行させる
+            logger.exception(f"ジョブの実行中にエラーが発生したため再実行を待ちます: {job_id}")
+            return
+        else:
+            self._finish(record, JOB_SUCCEEDED, result=result)
+
+        self.queue.ack(message)
+
+    def _progress_handler(self, record: Dict[str, Any]):
+        """パイプラインのイベントから進捗を更新し、一定間隔で保存する関数を作成する"""
+        progress = record['progress']
+        last_saved = [time.monotonic()]
+
+        def on_event(event):
+            if event['type'] == 'fetch' and event['success']:
+                progress['urls_fetched'] = progress.get('urls_fetched', 0) + 1
+            elif event['type'] == 'service':
+                progress['services_merged'] = progress.get('services_merged', 0) + 1
+
+            if time.monotonic() - last_saved[0] >= self.progress_interval:
+                last_saved[0] = time.monotonic()
+                if self.status_store.cancel_requested(record['id']):
+                    raise JobCancelled(record['id'])
+                self.status_store.put(record)
+
+        return on_event
+
+    def _finish(self, record: Dict[str, Any], status: str, result: Any = None, error: Optional[str] = None) -> None:
+        """ジョブを完了状態にして保存する"""
+        record.update(status=status, result=result, error=error, finished_at=time.time())
+        self.status_store.put(record)
+
+        now = time.time()
+        with self._lock:
+            self._stats['processed'] += 1
+            self._stats[status] += 1
+            self._completed_at.append(now)
+
+    def _count(self, key: str) -> None:
+        """統計情報の件数を加算する"""
+        with self._lock:
+            self._stats[key] += 1
+
+    def _report(self, force: bool = False) -> None:
+        """一定間隔で統計情報を保存先に報告する"""
+        if not force and time.monotonic() - self._last_report < self.report_interval:
+            return
+        self._last_report = time.monotonic()
+        try:
+            self.status_store.put_worker(self.worker_id, self.stats())
+        except Exception:
+            logger.exception("ワーカーの統計情報を保存できません")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        統計情報を返す
+
+        Returns:
+            Dict: 処理件数、成功・失敗件数、直近1分間の完了件数、稼働率などの統計情報
+        """
+        now = time.time()
+        with self._lock:
+            while self._completed_at and self._completed_at[0] < now - 60:
+                self._completed_at.popleft()
+            stats = dict(self._stats)
+            stats['completed_last_minute'] = len(self._completed_at)
+        uptime = max(now - stats['started_at'], 1e-9)
+        stats['utilization'] = round(min(stats['busy_seconds'] / uptime, 1.0), 3)
+        stats['busy_seconds'] = round(stats['busy_seconds'], 3)
+        return stats
+
+
+def _create_worker(environ) -> MergeWorker:
+    """
+    環境変数の設定に応じてワーカーを作成する
+
+    設定はWebアプリケーションと同じ load_config() で読み込みます。
+
+    Raises:
+        ValueError: キューが設定されていない場合や、保存先をWebアプリケーションと共有できない場合
+    """
+    from src.app import backend_settings, catalog_db_path, load_config
+    from src.data.parser import EstimateParser
+    from src.merger.estimate_merger import EstimateMerger
+    from src.api.calculator_api import CalculatorAPI
+    from src.storage.factory import create_estimate_store
+    from src.storage.catalog import EstimateCatalog
+    from src.jobs.factory import check_shared_backends, create_job_queue, create_job_status_store
+
+    config = load_config(environ)
+    settings = backend_settings(config, environ)
+    check_shared_backends(settings)
+    queue = create_job_queue(settings)
+    if queue is None:
+        raise ValueError("JOB_QUEUE_BACKEND にワーカーが受信できるキュー（sqs）を設定してください")
+
+    merged_estimates_dir = config["MERGED_ESTIMATES_DIR"]
+    estimate_store = create_estimate_store(merged_estimates_dir, settings)
+    estimate_catalog = EstimateCatalog(catalog_db_path(config))
+    parser = EstimateParser(
+        estimate_source_url=config["CALCULATOR_ESTIMATE_SOURCE_URL"],
+        fetch_timeout=config["CALCULATOR_FETCH_TIMEOUT"]
+    )
+
+    def save_estimate(merged_estimate, urls):
+        # 確認応答の前に保存を完了させ、再配信時にも結果が失われないようにする
+        estimate_id = estimate_store.save(merged_estimate)
+        source_ids = [parser.extract_estimate_id(url) for url in urls]
+        estimate_catalog.record(estimate_id, merged_estimate, source_ids, size_bytes=estimate_store.size(estimate_id))
+        return estimate_id
+
+    return MergeWorker(
+        queue,
+        create_job_status_store(merged_estimates_dir, settings),
+        MergePipeline(parser, EstimateMerger(), CalculatorAPI(), save_estimate),
+        max_attempts=config["JOB_MAX_ATTEMPTS"]
+    )
+
+
+def main(argv=None) -> None:
+    """ワーカーのエントリーポイント"""
+    load_dotenv()
+
+    arg_parser = argparse.ArgumentParser(description="見積もり合算ジョブワーカー")
+    arg_parser.add_argument("--wait-seconds", type=float, default=20, help="1回の受信でメッセージを待つ秒数")
+    args = arg_parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+    worker = _create_worker(os.environ)
+
+    # SIGTERM（ECSタスクの停止など）を受けたら実行中のジョブを終えてから停止する
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: worker.stop())
+
+    worker.run(args.wait_seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,11 @@
 """
 
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Callable, Iterator, Optional
 from collections import defaultdict
 
+from src import metrics
+
 logger = logging.getLogger(__name__)
 
 class EstimateMerger:
@@ -18,18 +20,21 @@ class EstimateMerger:
     - 複数の見積もりデータの合算
     - 同一サービス間でのコストの合算
     - サービス設定の統合
+    - 合算の進捗の通知（on_progress）
     """
     
     def __init__(self):
         """初期化"""
         pass
         
-    def merge_estimates(self, estimate_data_list: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def merge_estimates(self, estimate_data_list: List[Dict[str, Any]],
+                        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """
         複数の見積もりデータを合算する
         
         Args:
             estimate_data_list: 見積もりデータのリスト
+            on_progress: サービスグループを合算するたびに merge イベントを受け取る関数
             
         Returns:
             Dict: 合算された見積もりデータ
@@ -37,16 +42,18 @@ class EstimateMerger:
         if not estimate_data_list:
             raise ValueError("見積もりデータが提供されていません")
         
-        if len(estimate_data_list) == 1:
-            # 1つだけの場合はそのまま返す
-            return estimate_data_list[0]
-        
-        # マージ処理
-        merged_data = {
-            'name': self._generate_merged_name(estimate_data_list),
-            'currency': self._get_common_currency(estimate_data_list),
-            'services': self._merge_services(estimate_data_list)
-        }
+        with metrics.stage(metrics.STAGE_MERGE):
+            if len(estimate_data_list) == 1:
+                # 1つだけの場合はそのまま返す（サービス数の記録と進捗の通知のためにサービスを順に処理する）
+                self._merge_services(estimate_data_list, on_progress)
+                return estimate_data_list[0]
+            
+            # マージ処理
+            merged_data = {
+                'name': self._generate_merged_name(estimate_data_list),
+                'currency': self._get_common_currency(estimate_data_list),
+                'services': self._merge_services(estimate_data_list, on_progress)
+            }
         
         return merged_data
     
@@ -87,22 +94,52 @@ class EstimateMerger:
             logger.warning(f"複数の通貨が使用されています: {currencies}、USDに統一します")
             return "USD"
     
-    def _merge_services(self, estimate_data_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _merge_services(self, estimate_data_list: List[Dict[str, Any]],
+                        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
         """
         サービスデータをマージする
         
         Args:
             estimate_data_list: 見積もりデータのリスト
+            on_progress: サービスグループを合算するたびに merge イベントを受け取る関数
             
         Returns:
             List[Dict]: マージされたサービスデータのリスト
         """
+        return list(self.iter_merged_services(estimate_data_list, on_progress))
+    
+    def iter_merged_services(self, estimate_data_list: List[Dict[str, Any]],
+                             on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        サービスグループごとにマージしたサービスデータを順に生成する
+        
+        見積もりが1つだけの場合は merge_estimates と同様にサービスをそのまま返します。
+        すべてのサービスを生成し終えると、合算元と合算後のサービス数をメトリクスに記録します。
+        
+        Args:
+            estimate_data_list: 見積もりデータのリスト
+            on_progress: サービスグループを合算するたびに merge イベント
+                         （merged: 合算済みのグループ数、total: グループ数、service: サービス名）を受け取る関数
+            
+        Yields:
+            Dict: マージされたサービスデータ
+        """
+        if len(estimate_data_list) == 1:
+            services = estimate_data_list[0].get('services', [])
+            for index, service in enumerate(services):
+                self._notify_merged(on_progress, index + 1, len(services), service)
+                yield service
+            metrics.record_services(len(services), len(services))
+            return
+        
         # サービスをキーでグループ化する
         # キーは「サービス名_リージョン」形式
         service_groups = defaultdict(list)
         
+        input_count = 0
         for estimate in estimate_data_list:
             for service in estimate.get('services', []):
+                input_count += 1
                 service_name = service.get('name', 'Unknown Service')
                 region = service.get('region', 'us-east-1')
                 key = f"{service_name}_{region}"
@@ -110,12 +147,28 @@ class EstimateMerger:
                 service_groups[key].append(service)
         
         # グループごとにマージ
-        merged_services = []
-        for key, services in service_groups.items():
+        for index, services in enumerate(service_groups.values()):
             merged_service = self._merge_service_group(services)
-            merged_services.append(merged_service)
-        
-        return merged_services
+            self._notify_merged(on_progress, index + 1, len(service_groups), merged_service)
+            yield merged_service
+        metrics.record_services(input_count, len(service_groups))
+    
+    @staticmethod
+    def _notify_merged(on_progress: Optional[Callable[[Dict[str, Any]], None]], merged: int, total: int,
+                       service: Dict[str, Any]) -> None:
+        """サービスグループの合算を通知する（通知先の例外は合算に影響させない）"""
+        if on_progress is None:
+            return
+        try:
+            on_progress({
+                "type": "merge",
+                "merged": merged,
+                "total": total,
+                "service": service.get('name', 'Unknown Service'),
+                "region": service.get('region', 'us-east-1')
+            })
+        except Exception:
+            logger.exception("進捗の通知中にエラーが発生")
     
     def _merge_service_group(self, services: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
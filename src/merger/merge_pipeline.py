@@ -0,0 +1,328 @@
+"""
+見積もり合算パイプラインモジュール
+
+見積もりURLの取得から合算、保存までの一連の処理を、進行状況のイベントとして
+逐次生成するクラスを提供します。Webアプリケーションとワーカーの両方から使用します。
+"""
+
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import Dict, Any, AsyncIterator, Callable, Iterator, List, Mapping, Optional, Tuple
+
+from src import metrics
+from src.data.parser import EstimateParser
+from src.merger.estimate_merger import EstimateMerger
+from src.api.calculator_api import CalculatorAPI
+
+logger = logging.getLogger(__name__)
+
+
+class MergePipeline:
+    """
+    見積もりを合算し、処理の進行をイベントとして生成するクラス
+
+    イベントの種類は fetch（URLごとの取得結果）、service（合算したサービス）、
+    total（合算結果）、error（処理の中断）です。
+    """
+
+    def __init__(self, parser: EstimateParser, merger: EstimateMerger, calculator_api: CalculatorAPI,
+                 save_estimate: Callable[[Dict[str, Any], List[str]], str]):
+        """
+        初期化
+
+        Args:
+            parser: 見積もりデータパーサー
+            merger: 見積もり合算クラス
+            calculator_api: 合算URLの生成と合計コストの計算に使用するクラス
+            save_estimate: 合算結果と元のURLのリストを受け取って保存し、見積もりIDを返す関数
+        """
+        self.parser = parser
+        self.merger = merger
+        self.calculator_api = calculator_api
+        self.save_estimate = save_estimate
+
+    def merge_key(self, urls: List[str], options: Optional[Mapping[str, Any]] = None) -> Tuple:
+        """
+        同じ合算を識別するキーを作成する
+
+        URLの順序によらず、合算する見積もり（同じ見積もりを複数回含む場合はその回数も）と
+        オプションが同じであれば同じキーになります。
+
+        Args:
+            urls: 見積もりURLのリスト
+            options: 合算結果に影響するオプション
+
+        Returns:
+            Tuple: 見積もりのキーを並べ替えたタプルとオプションのタプル
+
+        Raises:
+            ValueError: URLが無効な場合
+        """
+        sources = tuple(sorted(self.parser.source_key(url) for url in urls))
+        return sources, tuple(sorted((options or {}).items()))
+
+    def iter_events(self, urls: List[str],
+                    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        見積もりを合算し、処理の進行をイベントとして逐次生成する
+
+        各URLの取得結果を完了順に、続いて合算したサービスをグループごとに、
+        最後に合計コストを生成します。
+
+        Args:
+            urls: 見積もりURLのリスト
+            on_progress: パーサーと合算クラスの進捗イベント（fetch、merge）を受け取る関数
+
+        Yields:
+            Dict: イベント
+        """
+        try:
+            # 各URLからデータを並列に抽出し、完了した順に送信
+            estimates_by_index = {}
+            for index, url, estimate_data, error in self.parser.parse_many(urls, on_progress=on_progress):
+                if error is not None:
+                    logger.error(f"URLの解析エラー: {str(error)}")
+                    yield {"type": "fetch", "url": url, "success": False, "error": str(error)}
+                    yield {"type": "error", "success": False, "error": f"URLの解析エラー: {str(error)}"}
+                    return
+
+                estimates_by_index[index] = estimate_data
+                yield {
+                    "type": "fetch",
+                    "url": url,
+                    "success": True,
+                    "name": estimate_data.get("name", ""),
+                    "service_count": len(estimate_data.get("services", []))
+                }
+
+            estimate_data_list = [estimates_by_index[index] for index in range(len(urls))]
+
+            # サービスグループごとに合算して送信
+            merged_services = []
+            for service in self.merger.iter_merged_services(estimate_data_list, on_progress):
+                merged_services.append(service)
+                yield {"type": "service", "service": service}
+
+            yield self._total_event(estimate_data_list, merged_services, urls)
+
+        except Exception as e:
+            logger.exception("見積もり合算中にエラーが発生")
+            yield {"type": "error", "success": False, "error": f"処理中にエラーが発生しました: {str(e)}"}
+
+    async def iter_events_async(self, urls: List[str], session=None, executor: Optional[Executor] = None,
+                                on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        見積もりを合算し、処理の進行をイベントとして非同期に逐次生成する
+
+        URLの取得はイベントループ上で待ち、CPUを使う合算・URL生成・保存は executor で実行します。
+        イベントは iter_events と同じです。
+
+        Args:
+            urls: 見積もりURLのリスト
+            session: 見積もりの取得に使用するHTTPセッション（aiohttp.ClientSession）
+            executor: 合算を実行するエグゼキューター（省略時はイベントループの既定）
+            on_progress: パーサーと合算クラスの進捗イベント（fetch、merge）を受け取る関数
+                         （merge イベントは executor のスレッドから呼び出す）
+
+        Yields:
+            Dict: イベント
+        """
+        try:
+            estimates_by_index = {}
+            results = self.parser.parse_many_async(urls, session, on_progress=on_progress)
+            try:
+                async for index, url, estimate_data, error in results:
+                    if error is not None:
+                        logger.error(f"URLの解析エラー: {str(error)}")
+                        yield {"type": "fetch", "url": url, "success": False, "error": str(error)}
+                        yield {"type": "error", "success": False, "error": f"URLの解析エラー: {str(error)}"}
+                        return
+
+                    estimates_by_index[index] = estimate_data
+                    yield {
+                        "type": "fetch",
+                        "url": url,
+                        "success": True,
+                        "name": estimate_data.get("name", ""),
+                        "service_count": len(estimate_data.get("services", []))
+                    }
+            finally:
+                await results.aclose()
+
+            estimate_data_list = [estimates_by_index[index] for index in range(len(urls))]
+
+            loop = asyncio.get_running_loop()
+            merged_services, total_event = await loop.run_in_executor(
+                executor, self._merge_and_save, estimate_data_list, urls, on_progress
+            )
+            for service in merged_services:
+                yield {"type": "service", "service": service}
+            yield total_event
+
+        except Exception as e:
+            logger.exception("見積もり合算中にエラーが発生")
+            yield {"type": "error", "success": False, "error": f"処理中にエラーが発生しました: {str(e)}"}
+
+    def _merge_and_save(self, estimate_data_list: List[Dict[str, Any]], urls: List[str],
+                        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+                        ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        取得済みの見積もりを合算して保存し、合算したサービスと total イベントを返す
+
+        Args:
+            estimate_data_list: URLと同じ順序の見積もりデータ
+            urls: 見積もりURLのリスト
+            on_progress: 合算の進捗イベント（merge）を受け取る関数
+
+        Returns:
+            Tuple: (合算したサービスのリスト, total イベント)
+        """
+        with metrics.stage(metrics.STAGE_MERGE):
+            merged_services = list(self.merger.iter_merged_services(estimate_data_list, on_progress))
+        return merged_services, self._total_event(estimate_data_list, merged_services, urls)
+
+    def _total_event(self, estimate_data_list: List[Dict[str, Any]], merged_services: List[Dict[str, Any]],
+                     urls: List[str]) -> Dict[str, Any]:
+        """
+        合算したサービスから合算結果を作成して保存し、total イベントを返す
+
+        Args:
+            estimate_data_list: URLと同じ順序の見積もりデータ
+            merged_services: 合算したサービスのリスト
+            urls: 見積もりURLのリスト
+
+        Returns:
+            Dict: total イベント
+        """
+        if len(estimate_data_list) == 1:
+            merged_estimate = estimate_data_list[0]
+        else:
+            merged_estimate = {
+                "name": self.merger._generate_merged_name(estimate_data_list),
+                "currency": self.merger._get_common_currency(estimate_data_list),
+                "services": merged_services
+            }
+
+        merged_url = self.calculator_api.generate_calculator_url(merged_estimate)
+        total_cost = self.calculator_api.calculate_total_cost(merged_estimate)
+        estimate_id = self.save_estimate(merged_estimate, urls)
+
+        return {
+            "type": "total",
+            "success": True,
+            "merged_url": merged_url,
+            "download_url": f"/download/{estimate_id}",
+            "data": {
+                "name": merged_estimate.get("name", "合算見積もり"),
+                "total_cost": total_cost,
+                "service_count": len(merged_services)
+            }
+        }
+
+    def run(self, urls: List[str], on_event: Callable[[Dict[str, Any]], None] = None) -> Dict[str, Any]:
+        """
+        見積もりを合算し、合算結果を返す
+
+        Args:
+            urls: 見積もりURLのリスト
+            on_event: 各イベントを受け取る関数（例外を送出すると処理を中断する）
+
+        Returns:
+            Dict: 合算URL、ダウンロードURL、合算結果の概要
+
+        Raises:
+            ValueError: URLの解析や合算に失敗した場合
+        """
+        events = self.iter_events(urls)
+        try:
+            for event in events:
+                if on_event is not None:
+                    on_event(event)
+                if event["type"] == "error":
+                    raise ValueError(event["error"])
+                if event["type"] == "total":
+                    return {
+                        "merged_url": event["merged_url"],
+                        "download_url": event["download_url"],
+                        "data": event["data"]
+                    }
+        finally:
+            # 中断時に実行中のURL取得を打ち切る
+            events.close()
+
+        raise ValueError("合算結果が得られませんでした")
+
+    def merge_batch(self, groups: List[Dict[str, Any]], max_workers: int = 8) -> List[Dict[str, Any]]:
+        """
+        複数の合算グループをまとめて処理する
+
+        すべてのグループのURLを重複なく1回ずつ取得してから、各グループを順に合算します。
+        合算はCPU処理のため、スレッドで並列にしてもGILにより速くならず、処理枠を余分に占有するだけです。
+        グループごとの失敗は他のグループに影響しません。
+
+        Args:
+            groups: 合算グループのリスト。各グループは name、urls（見積もりURLのリスト）、
+                    estimates（アップロードされた見積もりJSONのリスト）を含む
+            max_workers: 取得の並列数の上限
+
+        Returns:
+            List[Dict]: グループと同じ順序の合算結果。成功時は merged_url、download_url、data を、
+                        失敗時は error を含む
+        """
+        # 取得フェーズ: 複数のグループで使われるURLも1回だけ取得する
+        unique_urls = list(dict.fromkeys(url for group in groups for url in group.get('urls', [])))
+        fetched = {}
+        for _, url, estimate_data, error in self.parser.parse_many(unique_urls, max_workers=max_workers):
+            fetched[url] = (estimate_data, error)
+
+        # 合算フェーズ: グループごとに順に合算する
+        return [self._merge_group(group, fetched) for group in groups]
+
+    def _merge_group(self, group: Dict[str, Any], fetched: Dict[str, tuple]) -> Dict[str, Any]:
+        """
+        取得済みの見積もりデータを使って1つのグループを合算する
+
+        Args:
+            group: 合算グループ
+            fetched: URLごとの (見積もりデータ, 発生した例外)
+
+        Returns:
+            Dict: グループの合算結果
+        """
+        name = group.get('name')
+        try:
+            estimate_data_list = []
+            for url in group.get('urls', []):
+                estimate_data, error = fetched[url]
+                if error is not None:
+                    raise ValueError(f"URLの解析エラー: {url}: {str(error)}")
+                estimate_data_list.append(estimate_data)
+            for index, estimate_json in enumerate(group.get('estimates', [])):
+                try:
+                    estimate_data_list.append(self.parser.parse_from_json(estimate_json))
+                except ValueError as e:
+                    raise ValueError(f"アップロードされた見積もり（{index + 1}件目）の解析エラー: {str(e)}")
+
+            merged_estimate = self.merger.merge_estimates(estimate_data_list)
+            merged_url = self.calculator_api.generate_calculator_url(merged_estimate)
+            total_cost = self.calculator_api.calculate_total_cost(merged_estimate)
+            estimate_id = self.save_estimate(merged_estimate, group.get('urls', []))
+        except ValueError as e:
+            logger.error(f"合算グループの処理エラー: {name}: {str(e)}")
+            return {"name": name, "success": False, "error": str(e)}
+        except Exception as e:
+            logger.exception(f"合算グループの処理中にエラーが発生: {name}")
+            return {"name": name, "success": False, "error": f"処理中にエラーが発生しました: {str(e)}"}
+
+        return {
+            "name": name,
+            "success": True,
+            "merged_url": merged_url,
+            "download_url": f"/download/{estimate_id}",
+            "data": {
+                "name": merged_estimate.get("name", "合算見積もり"),
+                "total_cost": total_cost,
+                "service_count": len(merged_estimate.get("services", []))
+            }
+        }
@@ -0,0 +1,177 @@
+"""
+メトリクスモジュール
+
+見積もりの合算の処理段階ごとの所要時間とエラー件数、合算したサービス数、キャッシュの利用件数を
+Prometheusのメトリクスとして記録し、/metrics で公開する形式に変換する関数を提供します。
+gunicorn の複数のワーカーで記録した値は、環境変数 PROMETHEUS_MULTIPROC_DIR のディレクトリに
+プロセスごとのファイルとして書き込み、/metrics の応答時に集計します。
+prometheus_client がインストールされていない場合は何も記録しません。
+"""
+
+import os
+import time
+import logging
+from contextlib import contextmanager
+from typing import Iterator, Tuple
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:  # pragma: no cover - prometheus_clientは任意の依存関係
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+# 複数プロセスの値を集計するディレクトリを指定する環境変数（prometheus_client の読み込み前に設定する）
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# 処理段階（stage ラベルの値）
+STAGE_VALIDATE = "validate"      # URLの検証
+STAGE_DECODE = "decode"          # URLに埋め込まれた見積もりデータの展開
+STAGE_FETCH = "fetch"            # 取得元からの見積もりJSONの取得
+STAGE_NORMALIZE = "normalize"    # 見積もりデータの変換と正規化
+STAGE_MERGE = "merge"            # サービスの合算
+STAGE_URL = "url"                # 共有URLの生成
+STAGE_TOTAL_COST = "total_cost"  # 総コストの計算
+STAGE_PERSIST = "persist"        # 合算結果の保存の登録
+STAGE_EXPORT = "export"          # CSV・PDFなどへのエクスポート
+
+# 所要時間のヒストグラムの区切り（秒）
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+if prometheus_client is not None:
+    STAGE_DURATION = prometheus_client.Histogram(
+        "merger_stage_duration_seconds",
+        "見積もりの合算の処理段階ごとの所要時間",
+        ["stage"],
+        buckets=DURATION_BUCKETS
+    )
+    STAGE_ERRORS = prometheus_client.Counter(
+        "merger_stage_errors_total",
+        "見積もりの合算の処理段階ごとのエラー件数",
+        ["stage"]
+    )
+    SERVICES = prometheus_client.Counter(
+        "merger_services_total",
+        "合算したサービス数（input: 合算元の見積もりのサービス、merged: 合算後のサービス）",
+        ["kind"]
+    )
+    CACHE_REQUESTS = prometheus_client.Counter(
+        "merger_cache_requests_total",
+        "キャッシュの利用件数（fetch: 同時取得の共有、url: 共有URLのメモ化）",
+        ["cache", "result"]
+    )
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    処理段階の所要時間を記録する（例外が発生した場合はエラー件数も記録する）
+
+    使用例:
+        with metrics.stage(metrics.STAGE_MERGE):
+            merged = merger.merge_estimates(estimates)
+
+    Args:
+        name: 処理段階（STAGE_*）
+    """
+    if prometheus_client is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.labels(name).inc()
+        raise
+    finally:
+        STAGE_DURATION.labels(name).observe(time.perf_counter() - start)
+
+
+def record_error(name: str) -> None:
+    """
+    例外を送出せずに処理した処理段階のエラーを記録する
+
+    Args:
+        name: 処理段階（STAGE_*）
+    """
+    if prometheus_client is not None:
+        STAGE_ERRORS.labels(name).inc()
+
+
+def record_services(input_count: int, merged_count: int) -> None:
+    """
+    合算したサービス数を記録する
+
+    Args:
+        input_count: 合算元の見積もりのサービス数の合計
+        merged_count: 合算後のサービス数
+    """
+    if prometheus_client is not None:
+        SERVICES.labels("input").inc(input_count)
+        SERVICES.labels("merged").inc(merged_count)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """
+    キャッシュの利用を記録する
+
+    Args:
+        cache: キャッシュの種類（fetch または url）
+        hit: キャッシュを利用できた場合はTrue
+    """
+    if prometheus_client is not None:
+        CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def is_available() -> bool:
+    """prometheus_client がインストールされているか"""
+    return prometheus_client is not None
+
+
+def render() -> Tuple[bytes, str]:
+    """
+    記録したメトリクスをPrometheusのテキスト形式にする
+
+    PROMETHEUS_MULTIPROC_DIR が設定されている場合は、全プロセスの値を集計します。
+
+    Returns:
+        Tuple: (本文, Content-Type)
+
+    Raises:
+        RuntimeError: prometheus_client がインストールされていない場合
+    """
+    if prometheus_client is None:
+        raise RuntimeError("prometheus_client がインストールされていません")
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def prepare_multiprocess_dir(directory: str) -> None:
+    """
+    複数プロセスの値を書き込むディレクトリを作成し、前回の起動で残ったファイルを削除する
+
+    ワーカーの起動前（gunicorn の設定ファイルの読み込み時）に呼び出します。
+
+    Args:
+        directory: ディレクトリのパス
+    """
+    os.makedirs(directory, exist_ok=True)
+    for filename in os.listdir(directory):
+        if filename.endswith(".db"):
+            os.remove(os.path.join(directory, filename))
+
+
+def mark_process_dead(pid: int) -> None:
+    """
+    終了したワーカーの値を集計から除く（カウンターとヒストグラムの値は残す）
+
+    Args:
+        pid: 終了したワーカーのプロセスID
+    """
+    if prometheus_client is not None and os.environ.get(MULTIPROC_DIR_ENV):
+        multiprocess.mark_process_dead(pid)
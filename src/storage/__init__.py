@@ -0,0 +1,3 @@
+"""
+見積もりデータ保存パッケージ
+"""
@@ -0,0 +1,380 @@
+"""
+合算見積もりカタログモジュール
+
+保存した合算見積もりの概要をSQLiteのインデックスに記録し、
+JSONファイルを開かずに一覧・検索できるようにするクラスを提供します。
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 一覧の並び替えに使用できる項目と対応するカラム
+SORT_COLUMNS = {
+    'created_at': 'created_at',
+    'name': 'name',
+    'monthly': 'monthly_cost',
+    'upfront': 'upfront_cost',
+    '12_months': 'annual_cost',
+    'service_count': 'service_count'
+}
+
+# 1ページあたりの件数の上限
+MAX_PER_PAGE = 100
+
+
+class EstimateCatalog:
+    """
+    合算見積もりのカタログを管理するクラス
+
+    このクラスは、以下の機能を提供します：
+    - 保存した合算見積もりの概要（名前、合計コスト、サービス数、元の見積もりID、作成日時）の記録
+    - ページ分割・並び替えに対応した一覧
+    - 名前と元の見積もりIDによる検索
+    """
+
+    def __init__(self, db_path: str, timeout: float = 30.0):
+        """
+        初期化
+
+        Args:
+            db_path: データベースファイルのパス
+            timeout: ロック待ちのタイムアウト秒数
+        """
+        self.db_path = db_path
+        self.timeout = timeout
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS merges ("
+                    " id TEXT PRIMARY KEY,"
+                    " name TEXT NOT NULL,"
+                    " monthly_cost REAL NOT NULL,"
+                    " upfront_cost REAL NOT NULL,"
+                    " annual_cost REAL NOT NULL,"
+                    " service_count INTEGER NOT NULL,"
+                    " source_ids TEXT NOT NULL,"
+                    " created_at REAL NOT NULL,"
+                    " size_bytes INTEGER NOT NULL DEFAULT 0,"
+                    " last_accessed_at REAL)"
+                )
+                # 以前のバージョンで作成したテーブルにカラムを追加する
+                columns = {row['name'] for row in conn.execute("PRAGMA table_info(merges)")}
+                if 'size_bytes' not in columns:
+                    conn.execute("ALTER TABLE merges ADD COLUMN size_bytes INTEGER NOT NULL DEFAULT 0")
+                if 'last_accessed_at' not in columns:
+                    conn.execute("ALTER TABLE merges ADD COLUMN last_accessed_at REAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS merge_sources ("
+                    " merge_id TEXT NOT NULL,"
+                    " source_id TEXT NOT NULL,"
+                    " PRIMARY KEY (merge_id, source_id))"
+                )
+                for column in set(SORT_COLUMNS.values()):
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_merges_{column} ON merges ({column})")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_merge_sources_source_id ON merge_sources (source_id)")
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_merges_last_access"
+                    " ON merges (COALESCE(last_accessed_at, created_at))"
+                )
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """データベース接続を作成する（接続はスレッドごと・操作ごとに作成する）"""
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def record(self, estimate_id: str, estimate_data: Dict[str, Any], source_ids: Optional[List[str]] = None,
+               created_at: Optional[float] = None, size_bytes: int = 0) -> None:
+        """
+        合算見積もりの概要を記録する
+
+        同じ見積もりが既に記録されている場合は、元の見積もりIDを追加し、最終アクセス日時を更新します
+        （同じ内容を合算し直して返したダウンロードURLが、保持期間の管理で削除されないようにする）。
+
+        Args:
+            estimate_id: 見積もりID
+            estimate_data: 見積もりデータ
+            source_ids: 合算元の見積もりIDのリスト
+            created_at: 作成日時（UNIX時間、省略時は現在時刻）。記録済みの場合は最終アクセス日時として使う
+            size_bytes: 保存された見積もりデータのバイト数
+        """
+        recorded_at = time.time() if created_at is None else created_at
+        services = estimate_data.get('services', [])
+        monthly_cost = sum(float(service.get('monthlyCost', 0)) for service in services)
+        upfront_cost = sum(float(service.get('upfrontCost', 0)) for service in services)
+        source_ids = list(dict.fromkeys(source_ids or []))
+
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO merges"
+                    " (id, name, monthly_cost, upfront_cost, annual_cost, service_count, source_ids, created_at,"
+                    " size_bytes)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        estimate_id,
+                        estimate_data.get('name', ''),
+                        monthly_cost,
+                        upfront_cost,
+                        monthly_cost * 12 + upfront_cost,
+                        len(services),
+                        json.dumps(source_ids),
+                        recorded_at,
+                        size_bytes
+                    )
+                )
+                if cursor.rowcount == 0:
+                    # 記録済みの見積もりは合算し直した時点をアクセスとして扱い、元の見積もりIDを追加する
+                    row = conn.execute("SELECT source_ids FROM merges WHERE id = ?", (estimate_id,)).fetchone()
+                    merged_ids = list(dict.fromkeys(json.loads(row['source_ids']) + source_ids))
+                    conn.execute(
+                        "UPDATE merges SET source_ids = ?,"
+                        " last_accessed_at = MAX(COALESCE(last_accessed_at, created_at), ?) WHERE id = ?",
+                        (json.dumps(merged_ids), recorded_at, estimate_id)
+                    )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO merge_sources (merge_id, source_id) VALUES (?, ?)",
+                    [(estimate_id, source_id) for source_id in source_ids]
+                )
+        finally:
+            conn.close()
+
+    def touch(self, estimate_id: str, accessed_at: Optional[float] = None) -> None:
+        """
+        合算見積もりの最終アクセス日時を更新する
+
+        Args:
+            estimate_id: 見積もりID
+            accessed_at: アクセス日時（UNIX時間、省略時は現在時刻）
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "UPDATE merges SET last_accessed_at = ? WHERE id = ?",
+                    (time.time() if accessed_at is None else accessed_at, estimate_id)
+                )
+        finally:
+            conn.close()
+
+    def remove(self, estimate_id: str) -> None:
+        """
+        合算見積もりをカタログから削除する
+
+        Args:
+            estimate_id: 見積もりID
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM merge_sources WHERE merge_id = ?", (estimate_id,))
+                conn.execute("DELETE FROM merges WHERE id = ?", (estimate_id,))
+        finally:
+            conn.close()
+
+    def contains(self, estimate_id: str) -> bool:
+        """
+        合算見積もりが記録されているか確認する
+
+        Args:
+            estimate_id: 見積もりID
+
+        Returns:
+            bool: 記録されている場合はTrue
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT 1 FROM merges WHERE id = ?", (estimate_id,)).fetchone()
+        finally:
+            conn.close()
+        return row is not None
+
+    def total_size(self) -> int:
+        """
+        記録されているすべての合算見積もりの合計バイト数を返す
+
+        Returns:
+            int: 合計バイト数
+        """
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM merges").fetchone()[0]
+        finally:
+            conn.close()
+
+    def last_used_before(self, timestamp: float, limit: int = 1000) -> List[Tuple[str, int]]:
+        """
+        最終アクセス日時（未アクセスの場合は作成日時）が指定日時より前の合算見積もりを古い順に返す
+
+        Args:
+            timestamp: 基準日時（UNIX時間）
+            limit: 取得件数の上限
+
+        Returns:
+            List[Tuple]: (見積もりID, バイト数) のリスト
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT id, size_bytes FROM merges WHERE COALESCE(last_accessed_at, created_at) < ?"
+                " ORDER BY COALESCE(last_accessed_at, created_at) LIMIT ?",
+                (timestamp, limit)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [(row['id'], row['size_bytes']) for row in rows]
+
+    def least_recently_used(self, limit: int = 1000) -> List[Tuple[str, int]]:
+        """
+        最終アクセス日時（未アクセスの場合は作成日時）が古い順に合算見積もりを返す
+
+        Args:
+            limit: 取得件数の上限
+
+        Returns:
+            List[Tuple]: (見積もりID, バイト数) のリスト
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT id, size_bytes FROM merges ORDER BY COALESCE(last_accessed_at, created_at) LIMIT ?",
+                (limit,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [(row['id'], row['size_bytes']) for row in rows]
+
+    def get(self, estimate_id: str) -> Optional[Dict[str, Any]]:
+        """
+        合算見積もりの概要を取得する
+
+        Args:
+            estimate_id: 見積もりID
+
+        Returns:
+            Dict: 見積もりの概要。記録されていない場合はNone
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM merges WHERE id = ?", (estimate_id,)).fetchone()
+        finally:
+            conn.close()
+        return self._row_to_item(row) if row else None
+
+    def list(self, page: int = 1, per_page: int = 20, sort: str = 'created_at', order: str = 'desc') -> Dict[str, Any]:
+        """
+        合算見積もりの一覧を取得する
+
+        Args:
+            page: ページ番号（1始まり）
+            per_page: 1ページあたりの件数
+            sort: 並び替えの項目（created_at, name, monthly, upfront, 12_months, service_count）
+            order: 並び順（asc, desc）
+
+        Returns:
+            Dict: items, page, per_page, total, has_next を含む一覧
+
+        Raises:
+            ValueError: パラメータが不正な場合
+        """
+        return self._query("", (), page, per_page, sort, order)
+
+    def search(self, query: str, page: int = 1, per_page: int = 20, sort: str = 'created_at',
+               order: str = 'desc') -> Dict[str, Any]:
+        """
+        名前の部分一致、または元の見積もりIDの完全一致で合算見積もりを検索する
+
+        Args:
+            query: 検索文字列
+            page: ページ番号（1始まり）
+            per_page: 1ページあたりの件数
+            sort: 並び替えの項目
+            order: 並び順（asc, desc）
+
+        Returns:
+            Dict: items, page, per_page, total, has_next を含む検索結果
+
+        Raises:
+            ValueError: パラメータが不正な場合
+        """
+        escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        where = (
+            " WHERE name LIKE ? ESCAPE '\\'"
+            " OR id IN (SELECT merge_id FROM merge_sources WHERE source_id = ?)"
+        )
+        return self._query(where, (f"%{escaped}%", query), page, per_page, sort, order)
+
+    def _query(self, where: str, params: tuple, page: int, per_page: int, sort: str, order: str) -> Dict[str, Any]:
+        """
+        条件に一致する合算見積もりをページ単位で取得する
+
+        Args:
+            where: WHERE句
+            params: WHERE句のパラメータ
+            page: ページ番号（1始まり）
+            per_page: 1ページあたりの件数
+            sort: 並び替えの項目
+            order: 並び順
+
+        Returns:
+            Dict: items, page, per_page, total, has_next を含む結果
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"並び替えできない項目です: {sort}")
+        if order.lower() not in ('asc', 'desc'):
+            raise ValueError(f"無効な並び順です: {order}")
+        if page < 1 or not 1 <= per_page <= MAX_PER_PAGE:
+            raise ValueError(f"無効なページ指定です: page={page}, per_page={per_page}")
+
+        order_by = f"{SORT_COLUMNS[sort]} {order.upper()}, id {order.upper()}"
+
+        conn = self._connect()
+        try:
+            total = conn.execute(f"SELECT COUNT(*) FROM merges{where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT * FROM merges{where} ORDER BY {order_by} LIMIT ? OFFSET ?",
+                params + (per_page, (page - 1) * per_page)
+            ).fetchall()
+        finally:
+            conn.close()
+
+        return {
+            'items': [self._row_to_item(row) for row in rows],
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'has_next': page * per_page < total
+        }
+
+    @staticmethod
+    def _row_to_item(row: sqlite3.Row) -> Dict[str, Any]:
+        """データベースの行をレスポンス用の辞書に変換する"""
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'total_cost': {
+                'monthly': row['monthly_cost'],
+                'upfront': row['upfront_cost'],
+                '12_months': row['annual_cost']
+            },
+            'service_count': row['service_count'],
+            'source_ids': json.loads(row['source_ids']),
+            'created_at': datetime.fromtimestamp(row['created_at'], tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        }
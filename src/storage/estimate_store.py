@@ -0,0 +1,366 @@
+"""
+見積もりデータ保存モジュール
+
+合算された見積もりデータを内容ハッシュをキーとして保存するクラスを提供します。
+保存先ごとの実装は EstimateStore を継承して作成します。
+"""
+
+import os
+import re
+import json
+import logging
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Iterable, Iterator, List, Tuple
+
+from src.data.canonical import content_hash
+
+logger = logging.getLogger(__name__)
+
+# 内容ハッシュ（SHA-256）と、従来のUUID形式の見積もりIDを許可する
+ESTIMATE_ID_PATTERN = re.compile(r'[0-9a-f]{64}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+# ストリーミング読み書きの既定チャンクサイズ
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class EstimateStore(ABC):
+    """
+    見積もりデータの保存先の基底クラス
+
+    見積もりIDは正規化した内容のハッシュであるため、同じ内容の見積もりは
+    1件に集約され、保存済みのデータは書き換えずに再利用します。
+    各実装は書き込みを原子的に行い、途中の状態が読み出されないようにします。
+    """
+
+    def save(self, estimate_data: Dict[str, Any]) -> str:
+        """
+        見積もりデータを保存する
+
+        Args:
+            estimate_data: 見積もりデータ
+
+        Returns:
+            str: 見積もりID（内容ハッシュ）
+        """
+        estimate_id = content_hash(estimate_data)
+
+        if self.exists(estimate_id):
+            logger.info(f"保存済みの見積もりを再利用します: {estimate_id}")
+            return estimate_id
+
+        self.write_stream(estimate_id, self.serialize(estimate_data))
+        return estimate_id
+
+    def load(self, estimate_id: str) -> Dict[str, Any]:
+        """
+        見積もりデータを読み込む
+
+        Args:
+            estimate_id: 見積もりID
+
+        Returns:
+            Dict: 見積もりデータ
+
+        Raises:
+            ValueError: 見積もりIDの形式が不正な場合
+            FileNotFoundError: 見積もりが存在しない場合
+        """
+        return json.loads(b''.join(self.open_stream(estimate_id)).decode('utf-8'))
+
+    @staticmethod
+    def serialize(estimate_data: Dict[str, Any], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        見積もりデータをJSONのバイト列として断片ごとに生成する
+
+        Args:
+            estimate_data: 見積もりデータ
+            chunk_size: 断片の目安サイズ
+
+        Yields:
+            bytes: JSONの断片
+        """
+        encoder = json.JSONEncoder(ensure_ascii=False, indent=2)
+        buffer = []
+        buffered = 0
+        for fragment in encoder.iterencode(estimate_data):
+            buffer.append(fragment)
+            buffered += len(fragment)
+            if buffered >= chunk_size:
+                yield ''.join(buffer).encode('utf-8')
+                buffer = []
+                buffered = 0
+        if buffer:
+            yield ''.join(buffer).encode('utf-8')
+
+    @staticmethod
+    def validate_id(estimate_id: str) -> str:
+        """
+        見積もりIDの形式を検証する
+
+        Args:
+            estimate_id: 見積もりID
+
+        Returns:
+            str: 検証済みの見積もりID
+
+        Raises:
+            ValueError: 見積もりIDの形式が不正な場合
+        """
+        if not ESTIMATE_ID_PATTERN.fullmatch(estimate_id):
+            raise ValueError(f"無効な見積もりID: {estimate_id}")
+        return estimate_id
+
+    @abstractmethod
+    def exists(self, estimate_id: str) -> bool:
+        """
+        見積もりが保存されているか確認する
+
+        Args:
+            estimate_id: 見積もりID
+
+        Returns:
+            bool: 保存されている場合はTrue（IDの形式が不正な場合はFalse）
+        """
+
+    @abstractmethod
+    def open_stream(self, estimate_id: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        保存された見積もりデータを断片ごとに読み出す
+
+        Args:
+            estimate_id: 見積もりID
+            chunk_size: 断片のサイズ
+
+        Returns:
+            Iterator[bytes]: JSONの断片
+
+        Raises:
+            ValueError: 見積もりIDの形式が不正な場合
+            FileNotFoundError: 見積もりが存在しない場合
+        """
+
+    @abstractmethod
+    def write_stream(self, estimate_id: str, chunks: Iterable[bytes]) -> None:
+        """
+        見積もりデータを断片ごとに書き込む
+
+        すべての断片を書き終えた時点で原子的に公開します。
+
+        Args:
+            estimate_id: 見積もりID
+            chunks: JSONの断片
+        """
+
+    def write_batch(self, items: List[Tuple[str, Iterable[bytes]]]) -> None:
+        """
+        複数の見積もりデータをまとめて書き込む
+
+        既定の実装は1件ずつ write_stream を呼び出します。
+        永続化のコストをまとめられる保存先はこのメソッドを上書きします。
+
+        Args:
+            items: (見積もりID, JSONの断片) のリスト
+        """
+        for estimate_id, chunks in items:
+            self.write_stream(estimate_id, chunks)
+
+    def check_writable(self) -> None:
+        """
+        保存先に書き込めるか確認する（レディネスチェックで使用する）
+
+        既定の実装は何も確認しません。確認の方法がある保存先はこのメソッドを上書きします。
+
+        Raises:
+            OSError などの例外: 書き込めない場合
+        """
+
+    @abstractmethod
+    def size(self, estimate_id: str) -> int:
+        """
+        保存された見積もりデータのバイト数を返す
+
+        Args:
+            estimate_id: 見積もりID
+
+        Returns:
+            int: バイト数
+
+        Raises:
+            ValueError: 見積もりIDの形式が不正な場合
+            FileNotFoundError: 見積もりが存在しない場合
+        """
+
+    @abstractmethod
+    def delete(self, estimate_id: str) -> None:
+        """
+        見積もりデータを削除する（存在しない場合は何もしない）
+
+        Args:
+            estimate_id: 見積もりID
+        """
+
+
+class FileSystemEstimateStore(EstimateStore):
+    """
+    見積もりデータをローカルファイルシステムに保存するクラス
+
+    1つのディレクトリに大量のファイルが集中しないよう、見積もりIDの先頭から
+    取り出した文字列ごとにサブディレクトリを分けて保存します
+    （例: ab/cd/abcd....json）。
+    """
+
+    def __init__(self, directory: str, shard_depth: int = 2, shard_width: int = 2):
+        """
+        初期化
+
+        Args:
+            directory: 保存先ディレクトリ
+            shard_depth: サブディレクトリの階層数（0の場合は分割しない）
+            shard_width: 各階層のディレクトリ名に使う文字数
+        """
+        self.directory = directory
+        self.shard_depth = shard_depth
+        self.shard_width = shard_width
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path_for(self, estimate_id: str) -> str:
+        """
+        見積もりIDに対応するファイルパスを返す
+
+        Args:
+            estimate_id: 見積もりID
+
+        Returns:
+            str: ファイルパス
+
+        Raises:
+            ValueError: 見積もりIDの形式が不正な場合
+        """
+        self.validate_id(estimate_id)
+        shards = [estimate_id[i * self.shard_width:(i + 1) * self.shard_width] for i in range(self.shard_depth)]
+        return os.path.join(self.directory, *shards, f"{estimate_id}.json")
+
+    def exists(self, estimate_id: str) -> bool:
+        try:
+            return os.path.exists(self.path_for(estimate_id))
+        except ValueError:
+            return False
+
+    def open_stream(self, estimate_id: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        # ファイルはジェネレーターの外で開き、存在しない場合はすぐに例外を送出する
+        f = open(self.path_for(estimate_id), 'rb')
+        return self._iter_file(f, chunk_size)
+
+    @staticmethod
+    def _iter_file(f, chunk_size: int) -> Iterator[bytes]:
+        """開いたファイルを断片ごとに読み出し、読み終えたら閉じる"""
+        with f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def write_stream(self, estimate_id: str, chunks: Iterable[bytes]) -> None:
+        path = self.path_for(estimate_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def write_batch(self, items: List[Tuple[str, Iterable[bytes]]]) -> None:
+        # すべての一時ファイルを書き終えてからまとめて fsync し、
+        # 置き換え後のディレクトリも重複なく1回ずつ fsync する
+        written = []
+        try:
+            for estimate_id, chunks in items:
+                path = self.path_for(estimate_id)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-', suffix='.json')
+                written.append((temp_path, path))
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in chunks:
+                        f.write(chunk)
+
+            for temp_path, _ in written:
+                self._fsync_path(temp_path)
+            for temp_path, path in written:
+                os.replace(temp_path, path)
+        except BaseException:
+            for temp_path, _ in written:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            raise
+
+        for directory in {os.path.dirname(path) for _, path in written}:
+            self._fsync_path(directory)
+
+    @staticmethod
+    def _fsync_path(path: str) -> None:
+        """ファイルまたはディレクトリの内容をディスクに書き出す"""
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def check_writable(self) -> None:
+        # 一時ファイルを作成して削除する（読み取り専用のマウントやディスクの空き不足を検出する）
+        with tempfile.NamedTemporaryFile(dir=self.directory, prefix='.readyz-'):
+            pass
+
+    def size(self, estimate_id: str) -> int:
+        return os.path.getsize(self.path_for(estimate_id))
+
+    def delete(self, estimate_id: str) -> None:
+        try:
+            os.remove(self.path_for(estimate_id))
+        except FileNotFoundError:
+            pass
+
+    def migrate_flat_layout(self) -> List[str]:
+        """
+        保存先ディレクトリ直下に置かれた見積もりファイルを分割レイアウトに移動する
+
+        移動先に同じ見積もりが既にある場合は、直下のファイルを削除します。
+        ファイルの更新日時は移動後も保持されます。
+
+        Returns:
+            List[str]: 移動した見積もりIDのリスト
+        """
+        if self.shard_depth == 0:
+            return []
+
+        migrated_ids = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or not entry.name.endswith('.json'):
+                    continue
+
+                estimate_id = entry.name[:-len('.json')]
+                if not ESTIMATE_ID_PATTERN.fullmatch(estimate_id):
+                    continue
+
+                path = self.path_for(estimate_id)
+                if os.path.exists(path):
+                    os.remove(entry.path)
+                    continue
+
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(entry.path, path)
+                migrated_ids.append(estimate_id)
+
+        if migrated_ids:
+            logger.info(f"見積もりファイルを分割レイアウトに移動しました: {len(migrated_ids)}件")
+        return migrated_ids
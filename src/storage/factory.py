@@ -0,0 +1,58 @@
+"""
+見積もりデータ保存先生成モジュール
+
+環境変数の設定に応じて見積もりデータの保存先を生成します。
+"""
+
+import os
+from typing import Optional, Mapping
+
+from src.storage.estimate_store import EstimateStore, FileSystemEstimateStore
+
+
+def create_estimate_store(default_directory: str, environ: Optional[Mapping[str, str]] = None) -> EstimateStore:
+    """
+    環境変数の設定に応じて見積もりデータの保存先を生成する
+
+    環境変数:
+        ESTIMATE_STORAGE_BACKEND: filesystem（既定）, sqlite, s3
+        ESTIMATE_STORAGE_SQLITE_PATH: SQLiteデータベースのパス
+        ESTIMATE_STORAGE_S3_BUCKET: S3バケット名
+        ESTIMATE_STORAGE_S3_PREFIX: S3オブジェクトキーの接頭辞
+        ESTIMATE_STORAGE_S3_ENDPOINT_URL: S3互換ストレージのエンドポイント
+        ESTIMATE_STORAGE_S3_MAX_POOL_CONNECTIONS: S3接続プールの上限
+
+    Args:
+        default_directory: ファイルシステム保存時の保存先ディレクトリ
+        environ: 参照する設定（省略時は os.environ。アプリケーションからは src.app.backend_settings() の戻り値を渡す）
+
+    Returns:
+        EstimateStore: 見積もりデータの保存先
+
+    Raises:
+        ValueError: 設定が不正な場合
+    """
+    environ = os.environ if environ is None else environ
+    backend = environ.get("ESTIMATE_STORAGE_BACKEND", "filesystem").lower()
+
+    if backend == "filesystem":
+        return FileSystemEstimateStore(default_directory)
+
+    if backend == "sqlite":
+        from src.storage.sqlite_store import SQLiteEstimateStore
+        db_path = environ.get("ESTIMATE_STORAGE_SQLITE_PATH", os.path.join(default_directory, "estimates.sqlite3"))
+        return SQLiteEstimateStore(db_path)
+
+    if backend == "s3":
+        from src.storage.s3_store import S3EstimateStore
+        bucket = environ.get("ESTIMATE_STORAGE_S3_BUCKET")
+        if not bucket:
+            raise ValueError("ESTIMATE_STORAGE_S3_BUCKET が設定されていません")
+        return S3EstimateStore(
+            bucket,
+            prefix=environ.get("ESTIMATE_STORAGE_S3_PREFIX", "merged_estimates/"),
+            endpoint_url=environ.get("ESTIMATE_STORAGE_S3_ENDPOINT_URL") or None,
+            max_pool_connections=int(environ.get("ESTIMATE_STORAGE_S3_MAX_POOL_CONNECTIONS", "50"))
+        )
+
+    raise ValueError(f"サポートされていない保存先です: {backend}")
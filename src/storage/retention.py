@@ -0,0 +1,211 @@
+"""
+見積もりデータ保持期間管理モジュール
+
+保存された合算見積もりに保持期間（TTL）と合計サイズの上限を適用し、
+上限を超えた分を最終アクセスの古い順に削除するバックグラウンド処理を提供します。
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, Any, List
+
+from src.storage.catalog import EstimateCatalog
+from src.storage.estimate_store import EstimateStore, FileSystemEstimateStore
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionWorker:
+    """
+    保存された合算見積もりの保持期間と合計サイズを管理するクラス
+
+    このクラスは、以下の機能を提供します：
+    - 最後の利用（作成、合算し直し、ダウンロード・エクスポート）から保持期間を過ぎた見積もりの削除
+    - 合計サイズが上限を超えた場合の、最終アクセスが古い見積もりからの削除
+    - 削除件数などの統計情報の提供
+    """
+
+    def __init__(self, store: EstimateStore, catalog: EstimateCatalog, ttl_seconds: float = 0,
+                 max_total_bytes: int = 0, interval_seconds: float = 600, batch_size: int = 500):
+        """
+        初期化
+
+        Args:
+            store: 見積もりデータの保存先
+            catalog: 合算見積もりのカタログ
+            ttl_seconds: 保持期間の秒数（0の場合は無期限）
+            max_total_bytes: 合計サイズの上限バイト数（0の場合は無制限）
+            interval_seconds: 実行間隔の秒数
+            batch_size: 1回の問い合わせで取得する件数
+        """
+        self.store = store
+        self.catalog = catalog
+        self.ttl_seconds = ttl_seconds
+        self.max_total_bytes = max_total_bytes
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {
+            'runs': 0,
+            'evicted_expired': 0,
+            'evicted_size': 0,
+            'evicted_bytes': 0,
+            'errors': 0,
+            'total_bytes': 0,
+            'last_run_at': None,
+            'last_run_seconds': None
+        }
+
+    @property
+    def enabled(self) -> bool:
+        """保持期間または合計サイズの上限が設定されているか"""
+        return self.ttl_seconds > 0 or self.max_total_bytes > 0
+
+    def start(self) -> None:
+        """バックグラウンドスレッドで定期実行を開始する"""
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='estimate-retention', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        定期実行を停止する
+
+        Args:
+            timeout: スレッドの終了を待つ秒数
+        """
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        """停止するまで一定間隔で run_once を実行する"""
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("見積もりデータの保持期間管理中にエラーが発生")
+                with self._lock:
+                    self._stats['errors'] += 1
+            self._stop_event.wait(self.interval_seconds)
+
+    def run_once(self, now: float = None) -> Dict[str, int]:
+        """
+        保持期間と合計サイズの上限を1回適用する
+
+        Args:
+            now: 基準日時（UNIX時間、省略時は現在時刻）
+
+        Returns:
+            Dict: 今回の削除件数とバイト数
+        """
+        started = time.monotonic()
+        now = time.time() if now is None else now
+        expired = 0
+        evicted = 0
+        evicted_bytes = 0
+
+        # 保持期間を過ぎた見積もりを削除
+        if self.ttl_seconds > 0:
+            while not self._stop_event.is_set():
+                batch = self.catalog.last_used_before(now - self.ttl_seconds, self.batch_size)
+                if not batch:
+                    break
+                for estimate_id, size_bytes in batch:
+                    self._evict(estimate_id)
+                    expired += 1
+                    evicted_bytes += size_bytes
+
+        # 合計サイズが上限を超えている間、最終アクセスが古い順に削除
+        total_bytes = self.catalog.total_size()
+        if self.max_total_bytes > 0:
+            while total_bytes > self.max_total_bytes and not self._stop_event.is_set():
+                batch = self.catalog.least_recently_used(self.batch_size)
+                if not batch:
+                    break
+                for estimate_id, size_bytes in batch:
+                    if total_bytes <= self.max_total_bytes:
+                        break
+                    self._evict(estimate_id)
+                    evicted += 1
+                    evicted_bytes += size_bytes
+                    total_bytes -= size_bytes
+
+        if expired or evicted:
+            logger.info(f"見積もりデータを削除しました: 期限切れ {expired}件, 容量超過 {evicted}件, {evicted_bytes}バイト")
+
+        with self._lock:
+            self._stats['runs'] += 1
+            self._stats['evicted_expired'] += expired
+            self._stats['evicted_size'] += evicted
+            self._stats['evicted_bytes'] += evicted_bytes
+            self._stats['total_bytes'] = total_bytes
+            self._stats['last_run_at'] = now
+            self._stats['last_run_seconds'] = round(time.monotonic() - started, 3)
+
+        return {'evicted_expired': expired, 'evicted_size': evicted, 'evicted_bytes': evicted_bytes}
+
+    def _evict(self, estimate_id: str) -> None:
+        """見積もりデータを保存先とカタログから削除する"""
+        self.store.delete(estimate_id)
+        self.catalog.remove(estimate_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        統計情報を返す
+
+        Returns:
+            Dict: 実行回数、削除件数、削除バイト数、合計バイト数などの統計情報
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({
+            'enabled': self.enabled,
+            'ttl_seconds': self.ttl_seconds,
+            'max_total_bytes': self.max_total_bytes
+        })
+        return stats
+
+
+def migrate_to_sharded_layout(store: EstimateStore, catalog: EstimateCatalog) -> List[str]:
+    """
+    直下に置かれた見積もりファイルを分割レイアウトに移動し、カタログに登録する
+
+    カタログに記録されていない見積もりは、ファイルの更新日時を作成日時として登録します。
+    ファイルシステム以外の保存先では何もしません。
+
+    Args:
+        store: 見積もりデータの保存先
+        catalog: 合算見積もりのカタログ
+
+    Returns:
+        List[str]: 移動した見積もりIDのリスト
+    """
+    if not isinstance(store, FileSystemEstimateStore):
+        return []
+
+    migrated_ids = store.migrate_flat_layout()
+    for estimate_id in migrated_ids:
+        if catalog.contains(estimate_id):
+            continue
+        try:
+            path = store.path_for(estimate_id)
+            catalog.record(
+                estimate_id,
+                store.load(estimate_id),
+                created_at=os.path.getmtime(path),
+                size_bytes=os.path.getsize(path)
+            )
+        except (ValueError, OSError) as e:
+            logger.warning(f"移動した見積もりをカタログに登録できません: {estimate_id}, {str(e)}")
+
+    return migrated_ids
@@ -0,0 +1,141 @@
+"""
+S3互換見積もりデータ保存モジュール
+
+合算された見積もりデータをS3互換オブジェクトストレージ（Amazon S3, MinIOなど）に
+保存するクラスを提供します。
+"""
+
+import io
+import logging
+from typing import Iterable, Iterator, Optional
+
+from src.storage.estimate_store import EstimateStore, DEFAULT_CHUNK_SIZE
+
+try:
+    import boto3
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+except ImportError:  # pragma: no cover - boto3は任意の依存関係
+    boto3 = None
+
+logger = logging.getLogger(__name__)
+
+
+class _ChunkReader(io.RawIOBase):
+    """断片のイテレーターを読み出し可能なファイルオブジェクトとして扱うアダプター"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._pending = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            try:
+                self._pending = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+class S3EstimateStore(EstimateStore):
+    """
+    見積もりデータをS3互換オブジェクトストレージに保存するクラス
+
+    複数のタスクから同じバケットを参照できるため、どのタスクでも
+    保存済みの見積もりをダウンロードできます。クライアントはスレッド間で共有し、
+    接続プールの上限は max_pool_connections で指定します。
+    """
+
+    def __init__(self, bucket: str, prefix: str = 'merged_estimates/', endpoint_url: Optional[str] = None,
+                 region_name: Optional[str] = None, max_pool_connections: int = 50, client=None):
+        """
+        初期化
+
+        Args:
+            bucket: バケット名
+            prefix: オブジェクトキーの接頭辞
+            endpoint_url: S3互換ストレージのエンドポイント（MinIOなど）
+            region_name: リージョン
+            max_pool_connections: 接続プールの上限
+            client: 使用するS3クライアント（省略時は作成する）
+        """
+        if client is None:
+            if boto3 is None:
+                raise RuntimeError("S3ストレージを使用するにはboto3をインストールしてください")
+            client = boto3.client(
+                's3',
+                endpoint_url=endpoint_url,
+                region_name=region_name,
+                config=Config(max_pool_connections=max_pool_connections, retries={'mode': 'standard'})
+            )
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = client
+
+    def key_for(self, estimate_id: str) -> str:
+        """
+        見積もりIDに対応するオブジェクトキーを返す
+
+        Args:
+            estimate_id: 見積もりID
+
+        Returns:
+            str: オブジェクトキー
+        """
+        return f"{self.prefix}{self.validate_id(estimate_id)}.json"
+
+    def exists(self, estimate_id: str) -> bool:
+        try:
+            self.size(estimate_id)
+            return True
+        except (ValueError, FileNotFoundError):
+            return False
+
+    def size(self, estimate_id: str) -> int:
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=self.key_for(estimate_id))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                raise FileNotFoundError(f"見積もりが見つかりません: {estimate_id}")
+            raise
+        return response['ContentLength']
+
+    def open_stream(self, estimate_id: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self.key_for(estimate_id))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                raise FileNotFoundError(f"見積もりが見つかりません: {estimate_id}")
+            raise
+        return self._iter_body(response['Body'], chunk_size)
+
+    @staticmethod
+    def _iter_body(body, chunk_size: int) -> Iterator[bytes]:
+        """レスポンス本文を断片ごとに読み出し、読み終えたら接続をプールに戻す"""
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def write_stream(self, estimate_id: str, chunks: Iterable[bytes]) -> None:
+        # upload_fileobj は大きなデータをマルチパートで送信し、完了時に原子的に公開する
+        self.client.upload_fileobj(
+            io.BufferedReader(_ChunkReader(chunks), buffer_size=DEFAULT_CHUNK_SIZE),
+            self.bucket,
+            self.key_for(estimate_id),
+            ExtraArgs={'ContentType': 'application/json'}
+        )
+
+    def delete(self, estimate_id: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.key_for(estimate_id))
+
+    def check_writable(self) -> None:
+        # 書き込みのたびに課金されないよう、バケットに到達でき認証が通ることだけを確認する
+        self.client.head_bucket(Bucket=self.bucket)
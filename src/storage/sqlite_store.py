@@ -0,0 +1,141 @@
+"""
+SQLite見積もりデータ保存モジュール
+
+合算された見積もりデータをSQLiteデータベースに保存するクラスを提供します。
+"""
+
+import os
+import sqlite3
+import time
+from typing import Iterable, Iterator
+
+from src.storage.estimate_store import EstimateStore, DEFAULT_CHUNK_SIZE
+
+
+class SQLiteEstimateStore(EstimateStore):
+    """
+    見積もりデータをSQLiteデータベースに保存するクラス
+
+    データは断片ごとに estimate_chunks テーブルへ格納し、1トランザクションで
+    コミットするため、読み書きのどちらも見積もり全体をメモリに載せません。
+    """
+
+    def __init__(self, db_path: str, timeout: float = 30.0):
+        """
+        初期化
+
+        Args:
+            db_path: データベースファイルのパス
+            timeout: ロック待ちのタイムアウト秒数
+        """
+        self.db_path = db_path
+        self.timeout = timeout
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS estimates ("
+                " id TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS estimate_chunks ("
+                " estimate_id TEXT NOT NULL,"
+                " seq INTEGER NOT NULL,"
+                " data BLOB NOT NULL,"
+                " PRIMARY KEY (estimate_id, seq))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """データベース接続を作成する（接続はスレッドごと・操作ごとに作成する）"""
+        return sqlite3.connect(self.db_path, timeout=self.timeout)
+
+    def exists(self, estimate_id: str) -> bool:
+        try:
+            self.validate_id(estimate_id)
+        except ValueError:
+            return False
+
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT 1 FROM estimates WHERE id = ?", (estimate_id,)).fetchone()
+        finally:
+            conn.close()
+        return row is not None
+
+    def open_stream(self, estimate_id: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        if not self.exists(self.validate_id(estimate_id)):
+            raise FileNotFoundError(f"見積もりが見つかりません: {estimate_id}")
+        return self._iter_chunks(estimate_id)
+
+    def _iter_chunks(self, estimate_id: str) -> Iterator[bytes]:
+        """保存された断片を順に読み出す"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "SELECT data FROM estimate_chunks WHERE estimate_id = ? ORDER BY seq",
+                (estimate_id,)
+            )
+            for (data,) in cursor:
+                yield bytes(data)
+        finally:
+            conn.close()
+
+    def write_stream(self, estimate_id: str, chunks: Iterable[bytes]) -> None:
+        self.validate_id(estimate_id)
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM estimate_chunks WHERE estimate_id = ?", (estimate_id,))
+                size = 0
+                for seq, chunk in enumerate(chunks):
+                    conn.execute(
+                        "INSERT INTO estimate_chunks (estimate_id, seq, data) VALUES (?, ?, ?)",
+                        (estimate_id, seq, sqlite3.Binary(chunk))
+                    )
+                    size += len(chunk)
+                conn.execute(
+                    "INSERT OR REPLACE INTO estimates (id, size, created_at) VALUES (?, ?, ?)",
+                    (estimate_id, size, time.time())
+                )
+        finally:
+            conn.close()
+
+    def size(self, estimate_id: str) -> int:
+        self.validate_id(estimate_id)
+
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT size FROM estimates WHERE id = ?", (estimate_id,)).fetchone()
+        finally:
+            conn.close()
+
+        if row is None:
+            raise FileNotFoundError(f"見積もりが見つかりません: {estimate_id}")
+        return row[0]
+
+    def delete(self, estimate_id: str) -> None:
+        self.validate_id(estimate_id)
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM estimate_chunks WHERE estimate_id = ?", (estimate_id,))
+                conn.execute("DELETE FROM estimates WHERE id = ?", (estimate_id,))
+        finally:
+            conn.close()
+
+    def check_writable(self) -> None:
+        # 書き込みロックを取得して解放する（読み取り専用のファイルやロックの競合を検出する）
+        conn = sqlite3.connect(self.db_path, timeout=1.0, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("ROLLBACK")
+        finally:
+            conn.close()
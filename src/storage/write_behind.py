@@ -0,0 +1,365 @@
+"""
+見積もりデータ遅延書き込みモジュール
+
+合算された見積もりデータの保存をリクエスト処理から切り離し、
+バックグラウンドでまとめて書き込むキューを提供します。
+"""
+
+import time
+import queue
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+from src.storage.catalog import EstimateCatalog
+from src.storage.estimate_store import EstimateStore
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingWrite:
+    """書き込み待ちの見積もりデータ"""
+
+    __slots__ = ('estimate_id', 'estimate_data', 'source_ids', 'attempts', 'retry_at')
+
+    def __init__(self, estimate_id: str, estimate_data: Dict[str, Any], source_ids: List[str]):
+        self.estimate_id = estimate_id
+        self.estimate_data = estimate_data
+        self.source_ids = source_ids
+        self.attempts = 0
+        self.retry_at = 0.0
+
+
+# キューから取り出すデータがなく、再試行の時刻になったことを表す
+_RETRY_DUE = object()
+
+
+class WriteBehindQueue:
+    """
+    見積もりデータを遅延書き込みするキュー
+
+    このクラスは、以下の機能を提供します：
+    - 上限付きキューへの見積もりデータの登録（満杯の場合は呼び出し元で同期的に書き込む）
+    - バックグラウンドスレッドによるまとめ書き込みと fsync
+    - 書き込み完了前の見積もりデータのメモリからの参照
+    - 書き込みに失敗したデータの保持と、間隔を空けた再試行
+    - 停止時の書き込み待ちデータの書き出し
+
+    書き込み待ちのデータはこのプロセスのメモリにだけあるため、複数のプロセスが
+    ダウンロードを処理する場合は synchronous=True で登録時に書き込みます。
+    """
+
+    def __init__(self, store: EstimateStore, catalog: Optional[EstimateCatalog] = None, maxsize: int = 256,
+                 batch_size: int = 32, put_timeout: float = 0.5, synchronous: bool = False,
+                 retry_backoff: float = 1.0, retry_max_backoff: float = 60.0):
+        """
+        初期化
+
+        Args:
+            store: 見積もりデータの保存先
+            catalog: 合算見積もりのカタログ（書き込み時に記録する）
+            maxsize: キューの上限件数
+            batch_size: 1回にまとめて書き込む件数の上限
+            put_timeout: キューが満杯の場合に空きを待つ秒数
+            synchronous: Trueの場合はキューを使わず、登録時に呼び出し元のスレッドで書き込む
+            retry_backoff: 書き込みに失敗したデータを再試行するまでの初回の秒数（失敗するたびに倍にする）
+            retry_max_backoff: 再試行するまでの秒数の上限
+        """
+        self.store = store
+        self.catalog = catalog
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.synchronous = synchronous
+        self.retry_backoff = retry_backoff
+        self.retry_max_backoff = retry_max_backoff
+
+        self._queue: "queue.Queue[Optional[_PendingWrite]]" = queue.Queue(maxsize=maxsize)
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._pending_lock = threading.Lock()
+        # 書き込みに失敗し、再試行を待っているデータ（_pending_lock で保護する）
+        self._retry: List[_PendingWrite] = []
+        # 再試行のために取り出し、書き込み中のデータの件数（_pending_lock で保護する）
+        self._retries_in_flight = 0
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'written': 0,
+            'reused': 0,
+            'batches': 0,
+            'sync_writes': 0,
+            'errors': 0,
+            'retries': 0,
+            'last_batch_size': 0,
+            'last_batch_seconds': None
+        }
+
+    def start(self) -> None:
+        """バックグラウンドの書き込みスレッドを開始する"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='estimate-write-behind', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """
+        書き込み待ちのデータをすべて書き出してからスレッドを停止する
+
+        Args:
+            timeout: スレッドの終了を待つ秒数
+        """
+        if not self._thread:
+            self._drain_synchronously()
+            return
+
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+        # 停止処理と並行して登録されたデータも書き出す
+        self._drain_synchronously()
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """
+        現時点で登録されているデータの書き込み完了を待つ
+
+        Args:
+            timeout: 待機する秒数
+
+        Returns:
+            bool: 時間内にすべて書き込まれた場合はTrue（再試行を待っているデータがある場合はFalse）
+        """
+        if not self._thread:
+            self._drain_synchronously()
+            return not self._has_retries()
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._queue.unfinished_tasks == 0 and not self._has_retries():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def submit(self, estimate_id: str, estimate_data: Dict[str, Any], source_ids: Optional[List[str]] = None) -> None:
+        """
+        見積もりデータの書き込みを登録する
+
+        キューが満杯で put_timeout 秒以内に空かない場合と、synchronous=True の場合は、
+        呼び出し元のスレッドで同期的に書き込みます。書き込みに失敗したデータは書き込み待ちとして保持し、
+        書き込みスレッドが再試行します。
+
+        Args:
+            estimate_id: 見積もりID
+            estimate_data: 見積もりデータ
+            source_ids: 合算元の見積もりIDのリスト
+        """
+        item = _PendingWrite(estimate_id, estimate_data, list(source_ids or []))
+
+        with self._pending_lock:
+            self._pending[estimate_id] = estimate_data
+
+        if not self.synchronous:
+            try:
+                self._queue.put(item, timeout=self.put_timeout)
+                return
+            except queue.Full:
+                logger.warning(f"書き込みキューが満杯のため同期的に保存します: {estimate_id}")
+
+        with self._stats_lock:
+            self._stats['sync_writes'] += 1
+        self._write_batch([item])
+
+    def get_pending(self, estimate_id: str) -> Optional[Dict[str, Any]]:
+        """
+        書き込み待ちの見積もりデータを取得する
+
+        Args:
+            estimate_id: 見積もりID
+
+        Returns:
+            Dict: 見積もりデータ。書き込み待ちでない場合はNone
+        """
+        with self._pending_lock:
+            return self._pending.get(estimate_id)
+
+    def _run(self) -> None:
+        """キューから取り出したデータと、再試行の時刻になったデータをまとめて書き込む"""
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self._retry_wait())
+            except queue.Empty:
+                item = _RETRY_DUE
+            if item is None:
+                self._queue.task_done()
+                break
+
+            queued = [] if item is _RETRY_DUE else [item]
+            while len(queued) < self.batch_size:
+                try:
+                    next_item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if next_item is None:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                queued.append(next_item)
+
+            retries = self._take_retries()
+            try:
+                if retries or queued:
+                    self._write_batch(retries + queued)
+            finally:
+                self._finish_retries(retries)
+                for _ in queued:
+                    self._queue.task_done()
+
+    def _drain_synchronously(self) -> None:
+        """キューに残っているデータと再試行を待っているデータを呼び出し元のスレッドで書き込む"""
+        retries = self._take_retries(due_only=False)
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            if item is not None:
+                batch.append(item)
+        try:
+            if retries or batch:
+                self._write_batch(retries + batch)
+        finally:
+            self._finish_retries(retries)
+
+        with self._pending_lock:
+            remaining = len(self._retry)
+        if remaining:
+            logger.error(f"保存できない見積もりデータが残っています: {remaining}件")
+
+    def _has_retries(self) -> bool:
+        """再試行を待っているデータ、または再試行の書き込み中のデータがあるか"""
+        with self._pending_lock:
+            return bool(self._retry) or self._retries_in_flight > 0
+
+    def _retry_wait(self) -> float:
+        """次の再試行までの秒数（再試行を待っているデータがない場合は retry_max_backoff）"""
+        with self._pending_lock:
+            if not self._retry:
+                return self.retry_max_backoff
+            return max(0.0, min(item.retry_at for item in self._retry) - time.monotonic())
+
+    def _take_retries(self, due_only: bool = True) -> List[_PendingWrite]:
+        """
+        再試行を待っているデータを取り出す
+
+        Args:
+            due_only: Trueの場合は再試行の時刻になったデータだけを取り出す
+
+        Returns:
+            List[_PendingWrite]: 取り出したデータ
+        """
+        now = time.monotonic()
+        with self._pending_lock:
+            taken = [item for item in self._retry if not due_only or item.retry_at <= now]
+            self._retry = [item for item in self._retry if due_only and item.retry_at > now]
+            # 書き込みを終えるまで flush() が完了と判定しないよう、書き込み中として数える
+            self._retries_in_flight += len(taken)
+        return taken
+
+    def _finish_retries(self, retries: List[_PendingWrite]) -> None:
+        """
+        再試行の書き込みの終了を記録する（失敗したデータは _write_batch で再試行待ちに戻されている）
+
+        Args:
+            retries: _take_retries で取り出したデータ
+        """
+        if retries:
+            with self._pending_lock:
+                self._retries_in_flight -= len(retries)
+
+    def _write_batch(self, batch: List[_PendingWrite]) -> None:
+        """
+        まとめて保存先に書き込み、カタログに記録する
+
+        Args:
+            batch: 書き込み待ちデータのリスト
+        """
+        started = time.monotonic()
+        to_write = []
+        reused = 0
+        seen = set()
+        for item in batch:
+            if item.estimate_id in seen or self._exists(item.estimate_id):
+                reused += 1
+            else:
+                to_write.append(item)
+            seen.add(item.estimate_id)
+
+        failed = set()
+        try:
+            self.store.write_batch([(item.estimate_id, self.store.serialize(item.estimate_data)) for item in to_write])
+        except Exception:
+            logger.exception("見積もりデータのまとめ書き込みに失敗したため1件ずつ書き込みます")
+            for item in to_write:
+                try:
+                    self.store.write_stream(item.estimate_id, self.store.serialize(item.estimate_data))
+                except Exception:
+                    logger.exception(f"見積もりデータを保存できません: {item.estimate_id}")
+                    failed.add(item.estimate_id)
+
+        for item in batch:
+            if item.estimate_id in failed:
+                continue
+            if self.catalog is not None:
+                try:
+                    self.catalog.record(item.estimate_id, item.estimate_data, item.source_ids,
+                                        size_bytes=self.store.size(item.estimate_id))
+                except Exception:
+                    logger.exception(f"見積もりをカタログに記録できません: {item.estimate_id}")
+
+        # 失敗したデータは書き込み待ちのまま残し（返したダウンロードURLが404にならないように）、間隔を空けて再試行する
+        now = time.monotonic()
+        with self._pending_lock:
+            for item in batch:
+                if item.estimate_id not in failed:
+                    self._pending.pop(item.estimate_id, None)
+            for item in to_write:
+                if item.estimate_id in failed:
+                    item.attempts += 1
+                    item.retry_at = now + min(self.retry_backoff * 2 ** (item.attempts - 1), self.retry_max_backoff)
+                    self._retry.append(item)
+
+        with self._stats_lock:
+            self._stats['written'] += len(to_write) - len(failed)
+            self._stats['reused'] += reused
+            self._stats['errors'] += len(failed)
+            self._stats['retries'] += len(failed)
+            self._stats['batches'] += 1
+            self._stats['last_batch_size'] = len(batch)
+            self._stats['last_batch_seconds'] = round(time.monotonic() - started, 3)
+
+    def _exists(self, estimate_id: str) -> bool:
+        """保存済みか確認する（確認できない場合は書き込みを試みる）"""
+        try:
+            return self.store.exists(estimate_id)
+        except Exception:
+            logger.exception(f"見積もりデータの保存状況を確認できません: {estimate_id}")
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        統計情報を返す
+
+        Returns:
+            Dict: キューの件数、書き込み件数、まとめ書き込み回数、再試行を待っている件数、
+                  書き込みスレッドの稼働状況などの統計情報
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        with self._pending_lock:
+            stats['pending'] = len(self._pending)
+            stats['retrying'] = len(self._retry)
+        stats['queued'] = self._queue.qsize()
+        stats['capacity'] = self._queue.maxsize
+        stats['running'] = self._thread is not None and self._thread.is_alive()
+        return stats
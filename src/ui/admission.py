@@ -0,0 +1,394 @@
+"""
+受付制御モジュール
+
+合算リクエストのコストを見積もり、同時に処理するコストの上限と待ち行列の上限、
+クライアントごとのトークンバケットで受付を制御するクラスを提供します。
+上限を超えたリクエストはすぐに拒否し、再試行までの秒数を返します。
+"""
+
+import math
+import time
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, Optional
+
+# アップロードサイズからコストを見積もる単位
+_MB = 1024 * 1024
+
+
+class AdmissionRejected(Exception):
+    """
+    リクエストを受け付けなかった場合の例外
+
+    Attributes:
+        status: 返すHTTPステータス（429: クライアントごとの上限、503: 全体の上限）
+        reason: 拒否の理由（rate_limited, queue_full, timeout）
+        retry_after: 再試行までの秒数
+    """
+
+    def __init__(self, status: int, reason: str, retry_after: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def client_address(remote_addr: Optional[str], forwarded_for: Optional[str], trusted_proxies: int = 0) -> str:
+    """
+    クライアントのアドレスを決める
+
+    ロードバランサーが X-Forwarded-For の末尾に接続元を追加するため、信頼するプロキシの数だけ
+    末尾から数えたアドレスを使用します。クライアントが付けた値で上限を回避できないようにするためです。
+
+    Args:
+        remote_addr: 接続元のアドレス
+        forwarded_for: X-Forwarded-For ヘッダーの値
+        trusted_proxies: 信頼するプロキシの数（0の場合は X-Forwarded-For を使用しない）
+
+    Returns:
+        str: クライアントのアドレス
+    """
+    if trusted_proxies > 0 and forwarded_for:
+        addresses = [address.strip() for address in forwarded_for.split(',') if address.strip()]
+        if len(addresses) >= trusted_proxies:
+            return addresses[-trusted_proxies]
+    return remote_addr or 'unknown'
+
+
+class TokenBucketLimiter:
+    """
+    クライアントごとのトークンバケット
+
+    各クライアントのバケットは毎秒 rate トークンずつ、最大 burst トークンまで回復します。
+    長時間使われていないバケットは、クライアント数が max_clients を超えたときに古い順に破棄します。
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        """
+        初期化
+
+        Args:
+            rate: 1秒あたりに回復するトークン数
+            burst: バケットの容量
+            max_clients: 保持するバケットの数の上限
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: 'OrderedDict[str, list]' = OrderedDict()
+
+    def try_consume(self, client_id: str, cost: float, now: Optional[float] = None) -> float:
+        """
+        トークンを消費する（呼び出し側で排他制御すること）
+
+        Args:
+            client_id: クライアントID
+            cost: 消費するトークン数（容量を超える場合は容量まで）
+            now: 現在時刻（単調増加の秒数）
+
+        Returns:
+            float: 消費した場合は0。不足する場合は消費せず、必要なトークンが貯まるまでの秒数
+        """
+        now = time.monotonic() if now is None else now
+        cost = min(cost, self.burst)
+
+        bucket = self._buckets.pop(client_id, None)
+        if bucket is None:
+            bucket = [self.burst, now]
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        elif self.rate > 0:
+            wait = (cost - tokens) / self.rate
+        else:
+            wait = math.inf
+        bucket[0] = tokens
+
+        self._buckets[client_id] = bucket
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class _Waiter:
+    """待ち行列に並んでいるリクエスト"""
+
+    __slots__ = ('cost', 'granted', 'notify', 'enqueued_at')
+
+    def __init__(self, cost: float, notify):
+        self.cost = cost
+        self.granted = False
+        self.notify = notify
+        self.enqueued_at = time.monotonic()
+
+
+class AdmissionTicket:
+    """
+    受け付けたリクエストの処理枠
+
+    処理が終わったら release() で枠を返します（2回目以降の呼び出しは何もしない）。
+    """
+
+    def __init__(self, controller: 'AdmissionController', cost: float):
+        self._controller = controller
+        self.cost = cost
+        self._acquired_at = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        """処理枠を返す"""
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(self.cost, time.monotonic() - self._acquired_at)
+
+    def __enter__(self) -> 'AdmissionTicket':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.release()
+
+
+class AdmissionController:
+    """
+    リクエストの受付を制御するクラス
+
+    このクラスは、以下の機能を提供します：
+    - URL数とアップロードサイズからのリクエストのコストの見積もり
+    - 同時に処理するコストの合計の上限（超えた分は上限付きの待ち行列に先着順で並ぶ）
+    - クライアントごとのトークンバケットによるコストの消費速度の上限（超えた場合は429）
+    - 待ち行列が満杯、または待ち時間が上限を超えた場合の拒否（503）
+    - 待ち行列の長さと拒否件数などの統計情報
+    待機はスレッド（acquire）とイベントループ（acquire_async）の両方に対応します。
+    """
+
+    def __init__(self, max_cost: float = 64, max_queue: int = 64, queue_timeout: float = 10.0,
+                 rate_limiter: Optional[TokenBucketLimiter] = None, base_cost: float = 1.0,
+                 url_cost: float = 1.0, upload_cost_per_mb: float = 4.0):
+        """
+        初期化
+
+        Args:
+            max_cost: 同時に処理するコストの合計の上限
+            max_queue: 待ち行列に並べるリクエスト数の上限（0の場合は待たずに拒否する）
+            queue_timeout: 待ち行列で待つ秒数の上限
+            rate_limiter: クライアントごとのトークンバケット（Noneの場合は制限しない）
+            base_cost: 1リクエストあたりのコスト
+            url_cost: 見積もりURL 1件あたりのコスト
+            upload_cost_per_mb: アップロード1MBあたりのコスト
+        """
+        self.max_cost = max_cost
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rate_limiter = rate_limiter
+        self.base_cost = base_cost
+        self.url_cost = url_cost
+        self.upload_cost_per_mb = upload_cost_per_mb
+
+        self._lock = threading.Lock()
+        self._waiters = deque()
+        self._in_use = 0.0
+        self._in_flight = 0
+        self._avg_hold_seconds = 1.0
+        self._avg_wait_seconds = 0.0
+        self._stats = {
+            'admitted': 0,
+            'queued_total': 0,
+            'rejected_rate_limited': 0,
+            'rejected_queue_full': 0,
+            'rejected_timeout': 0
+        }
+
+    def estimate_cost(self, url_count: int, upload_bytes: int = 0) -> float:
+        """
+        リクエストのコストを見積もる
+
+        Args:
+            url_count: 見積もりURLの数
+            upload_bytes: リクエスト本文のバイト数
+
+        Returns:
+            float: コスト
+        """
+        return self.base_cost + url_count * self.url_cost + max(upload_bytes, 0) / _MB * self.upload_cost_per_mb
+
+    def acquire(self, client_id: str, cost: float, timeout: Optional[float] = None) -> AdmissionTicket:
+        """
+        処理枠を取得する（空きがない場合は待ち行列で待つ）
+
+        Args:
+            client_id: クライアントID
+            cost: リクエストのコスト
+            timeout: 待つ秒数の上限（省略時は queue_timeout）
+
+        Returns:
+            AdmissionTicket: 処理枠
+
+        Raises:
+            AdmissionRejected: 受け付けなかった場合
+        """
+        event = threading.Event()
+        waiter = self._reserve(client_id, cost, event.set)
+        if waiter is None:
+            return AdmissionTicket(self, min(cost, self.max_cost))
+
+        event.wait(self.queue_timeout if timeout is None else timeout)
+        return self._finish_wait(waiter)
+
+    async def acquire_async(self, client_id: str, cost: float, timeout: Optional[float] = None) -> AdmissionTicket:
+        """
+        処理枠を非同期に取得する（待っている間もイベントループを止めない）
+
+        Args:
+            client_id: クライアントID
+            cost: リクエストのコスト
+            timeout: 待つ秒数の上限（省略時は queue_timeout）
+
+        Returns:
+            AdmissionTicket: 処理枠
+
+        Raises:
+            AdmissionRejected: 受け付けなかった場合
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def notify():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(True))
+
+        waiter = self._reserve(client_id, cost, notify)
+        if waiter is None:
+            return AdmissionTicket(self, min(cost, self.max_cost))
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # クライアントが切断した場合は、割り当て済みの枠も返す
+            ticket = self._cancel_wait(waiter)
+            if ticket is not None:
+                ticket.release()
+            raise
+        return self._finish_wait(waiter)
+
+    def _reserve(self, client_id: str, cost: float, notify) -> Optional[_Waiter]:
+        """
+        受付を判定する
+
+        Returns:
+            _Waiter: 待ち行列に並んだ場合は待機中のリクエスト。すぐに処理できる場合はNone
+
+        Raises:
+            AdmissionRejected: 受け付けなかった場合
+        """
+        cost = min(cost, self.max_cost)
+        with self._lock:
+            can_run = not self._waiters and self._in_use + cost <= self.max_cost
+            if not can_run and len(self._waiters) >= self.max_queue:
+                self._stats['rejected_queue_full'] += 1
+                raise AdmissionRejected(503, 'queue_full', self._retry_after_locked(),
+                                        "混み合っているため受け付けられません。しばらくしてから再度お試しください")
+
+            if self.rate_limiter is not None:
+                wait = self.rate_limiter.try_consume(client_id, cost)
+                if wait > 0:
+                    self._stats['rejected_rate_limited'] += 1
+                    retry_after = max(1, math.ceil(wait)) if math.isfinite(wait) else 60
+                    raise AdmissionRejected(429, 'rate_limited', retry_after,
+                                            "リクエストが多すぎます。しばらくしてから再度お試しください")
+
+            if can_run:
+                self._grant_locked(cost)
+                self._stats['admitted'] += 1
+                return None
+
+            waiter = _Waiter(cost, notify)
+            self._waiters.append(waiter)
+            self._stats['queued_total'] += 1
+            return waiter
+
+    def _finish_wait(self, waiter: _Waiter) -> AdmissionTicket:
+        """待機の終了後、枠が割り当てられていれば返し、そうでなければ待ち行列から外して拒否する"""
+        with self._lock:
+            if waiter.granted:
+                self._stats['admitted'] += 1
+                self._record_wait_locked(waiter)
+                return AdmissionTicket(self, waiter.cost)
+            self._remove_waiter_locked(waiter)
+            self._stats['rejected_timeout'] += 1
+            retry_after = self._retry_after_locked()
+        raise AdmissionRejected(503, 'timeout', retry_after,
+                                "混み合っているため処理を開始できませんでした。しばらくしてから再度お試しください")
+
+    def _cancel_wait(self, waiter: _Waiter) -> Optional[AdmissionTicket]:
+        """待機を取り消す。すでに枠が割り当てられていた場合はその枠を返す"""
+        with self._lock:
+            if waiter.granted:
+                return AdmissionTicket(self, waiter.cost)
+            self._remove_waiter_locked(waiter)
+            return None
+
+    def _remove_waiter_locked(self, waiter: _Waiter) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _grant_locked(self, cost: float) -> None:
+        self._in_use += cost
+        self._in_flight += 1
+
+    def _release(self, cost: float, held_seconds: float) -> None:
+        """処理枠を返し、空いた分を待ち行列の先頭から順に割り当てる"""
+        notifications = []
+        with self._lock:
+            self._in_use = max(0.0, self._in_use - cost)
+            self._in_flight -= 1
+            self._avg_hold_seconds = 0.9 * self._avg_hold_seconds + 0.1 * held_seconds
+            # 先着順を守るため、先頭が入らない場合は後ろのリクエストも割り当てない
+            while self._waiters and self._in_use + self._waiters[0].cost <= self.max_cost:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                self._grant_locked(waiter.cost)
+                notifications.append(waiter.notify)
+        for notify in notifications:
+            notify()
+
+    def _record_wait_locked(self, waiter: _Waiter) -> None:
+        waited = time.monotonic() - waiter.enqueued_at
+        self._avg_wait_seconds = 0.9 * self._avg_wait_seconds + 0.1 * waited
+
+    def _retry_after_locked(self) -> int:
+        """待ち行列が空くまでの見込み秒数（処理時間の平均と待ち行列の長さから見積もる）"""
+        queued_cost = sum(waiter.cost for waiter in self._waiters)
+        rounds = 1 + queued_cost / max(self.max_cost, 1e-9)
+        return max(1, math.ceil(self._avg_hold_seconds * rounds))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        統計情報を返す
+
+        Returns:
+            Dict: 処理中のリクエスト数とコスト、待ち行列の長さ、受付・拒否件数、平均の待ち時間など
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'in_flight': self._in_flight,
+                'in_use_cost': round(self._in_use, 3),
+                'max_cost': self.max_cost,
+                'queued': len(self._waiters),
+                'max_queue': self.max_queue,
+                'avg_wait_seconds': round(self._avg_wait_seconds, 3),
+                'avg_hold_seconds': round(self._avg_hold_seconds, 3),
+                'clients': len(self.rate_limiter) if self.rate_limiter is not None else 0
+            })
+        return stats
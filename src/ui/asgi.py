@@ -0,0 +1,501 @@
+"""
+ASGIアプリケーションモジュール
+
+見積もりの取得をイベントループ上で非同期に待つASGI版のエントリーポイントを提供します。
+POST /merge は見積もりの取得中にスレッドを占有せず、CPUを使う合算はスレッドプールで実行します。
+GET /merge/progress/<進捗ID>（SSE）もイベントループ上で待つため、多数の購読者を開いたままにできます。
+その他のルートは create_app() で作成したFlaskアプリケーションをスレッドプールで呼び出し、
+WSGI版と同じ応答を返します。
+
+使用例:
+    uvicorn --factory src.ui.asgi:create_asgi_app --host 0.0.0.0 --port 5000
+"""
+
+import io
+import sys
+import json
+import asyncio
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import parse_qs
+
+import aiohttp
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+from src.app import create_app, get_services
+from src.ui.routes import NDJSON_MIMETYPE
+from src.ui.admission import AdmissionRejected, client_address
+from src.ui.health import install_probe_log_filter
+from src.ui.progress import SSE_MIMETYPE, ProgressSubscriptionLimit, format_sse, is_valid_progress_id
+
+logger = logging.getLogger(__name__)
+
+# 反復の終了を表す値
+_END = object()
+
+# 進捗配信（SSE）のパスの接頭辞
+PROGRESS_PATH_PREFIX = '/merge/progress/'
+
+
+class WsgiBridge:
+    """
+    WSGIアプリケーションをASGIから呼び出すクラス
+
+    アプリケーションの呼び出しと本文の断片の生成はスレッドプールで実行し、
+    イベントループを止めません。1つのリクエストの処理は同じコンテキスト（contextvars）で行うため、
+    stream_with_context による逐次応答もそのまま動作します。
+    """
+
+    def __init__(self, wsgi_app, executor: ThreadPoolExecutor):
+        """
+        初期化
+
+        Args:
+            wsgi_app: 呼び出すWSGIアプリケーション
+            executor: WSGIアプリケーションを実行するスレッドプール
+        """
+        self.wsgi_app = wsgi_app
+        self.executor = executor
+
+    async def __call__(self, scope: Dict[str, Any], body: bytes, send) -> None:
+        """
+        WSGIアプリケーションを呼び出して応答を送信する
+
+        Args:
+            scope: ASGIのスコープ
+            body: 読み込み済みのリクエスト本文
+            send: ASGIの送信関数
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        started = {}
+
+        def run(func, *args):
+            return loop.run_in_executor(self.executor, context.run, func, *args)
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info is not None and started.get('sent'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            started['status'] = status
+            started['headers'] = headers
+            return self._unsupported_write
+
+        app_iter = await run(self.wsgi_app, self._environ(scope, body), start_response)
+        try:
+            iterator = iter(app_iter)
+            # start_response は最初の断片を生成するまで呼ばれない場合がある
+            chunk = await run(next, iterator, _END)
+            await send({
+                'type': 'http.response.start',
+                'status': int(started['status'].split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                            for name, value in started['headers']]
+            })
+            started['sent'] = True
+            while chunk is not _END:
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await run(next, iterator, _END)
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            if hasattr(app_iter, 'close'):
+                await run(app_iter.close)
+
+    @staticmethod
+    def _unsupported_write(data: bytes) -> None:
+        raise RuntimeError("ASGI版は write() による本文の書き込みに対応していません")
+
+    @staticmethod
+    def _environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+        """ASGIのスコープからWSGIの環境変数を作成する"""
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client')
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': str(server[0]),
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0] if client else '',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False
+        }
+        for raw_name, raw_value in scope.get('headers', []):
+            name = raw_name.decode('latin-1').upper().replace('-', '_')
+            value = raw_value.decode('latin-1')
+            if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                environ[name] = value
+                continue
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        if 'CONTENT_LENGTH' not in environ and body:
+            environ['CONTENT_LENGTH'] = str(len(body))
+        return environ
+
+
+class AsgiMergeApp:
+    """
+    見積もり合算ツールのASGIアプリケーション
+
+    このクラスは、以下の機能を提供します：
+    - POST /merge（フォーム送信）の非同期処理。受付制御の後、見積もりの取得は接続プールを共有する
+      HTTPセッションで待ち、合算・保存はスレッドプールで実行する
+    - GET /merge/progress/<進捗ID>（SSE）の非同期配信。購読者ごとにスレッドを使わない
+    - その他のルートのFlaskアプリケーションへの委譲
+    - 起動・終了（lifespan）時のHTTPセッションとバックグラウンド処理の管理
+    """
+
+    def __init__(self, flask_app):
+        """
+        初期化
+
+        Args:
+            flask_app: create_app() で作成したFlaskアプリケーション
+        """
+        config = flask_app.config
+        self.flask_app = flask_app
+        self.services = get_services(flask_app)
+        self.fetch_connections = config["ASYNC_FETCH_CONNECTIONS"]
+        self.max_body_size = config.get("MAX_CONTENT_LENGTH")
+        self.trusted_proxy_count = config["TRUSTED_PROXY_COUNT"]
+        self.progress_heartbeat = config["PROGRESS_HEARTBEAT_SECONDS"]
+
+        # 合算とWSGIの呼び出しを別のスレッドプールにし、遅いルートが合算を待たせないようにする
+        self.merge_executor = ThreadPoolExecutor(max_workers=config["ASYNC_MERGE_WORKERS"],
+                                                 thread_name_prefix="asgi-merge")
+        self.wsgi_executor = ThreadPoolExecutor(max_workers=config["ASYNC_MERGE_WORKERS"],
+                                                thread_name_prefix="asgi-wsgi")
+        self.wsgi = WsgiBridge(flask_app, self.wsgi_executor)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            # WebSocketには対応しない
+            await send({'type': 'websocket.close', 'code': 1003})
+            return
+
+        body = await self._read_body(receive)
+        if body is None:
+            await self._send_json(send, 413, {"success": False, "error": "リクエストが大きすぎます"})
+            return
+
+        headers = self._headers(scope)
+        content_type = headers.get('content-type', '').split(';', 1)[0].strip().lower()
+        if (scope['method'] == 'POST' and scope['path'] == '/merge'
+                and content_type == 'application/x-www-form-urlencoded'):
+            await self._merge(scope, headers, body, send)
+        elif scope['method'] == 'GET' and scope['path'].startswith(PROGRESS_PATH_PREFIX):
+            await self._progress(scope['path'][len(PROGRESS_PATH_PREFIX):], headers, receive, send)
+        else:
+            await self.wsgi(scope, body, send)
+
+    async def session(self) -> aiohttp.ClientSession:
+        """
+        見積もりの取得に使用するHTTPセッションを返す（初回の呼び出し時に作成する）
+
+        Returns:
+            aiohttp.ClientSession: 接続プールを共有するHTTPセッション
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.fetch_connections)
+            )
+        return self._session
+
+    async def aclose(self) -> None:
+        """HTTPセッションとスレッドプールを閉じ、バックグラウンド処理を停止する"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.services.shutdown)
+        self.merge_executor.shutdown(wait=False)
+        self.wsgi_executor.shutdown(wait=False)
+
+    async def _lifespan(self, receive, send) -> None:
+        """起動時にHTTPセッションを作成し、終了時に閉じる"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.session()
+                logger.info("ASGIアプリケーションを開始しました")
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, receive) -> Optional[bytes]:
+        """リクエスト本文を読み込む。上限を超えた場合はNone"""
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if self.max_body_size is not None and size > self.max_body_size:
+                return None
+            chunks.append(chunk)
+            if not message.get('more_body', False):
+                break
+        return b''.join(chunks)
+
+    @staticmethod
+    def _headers(scope) -> Dict[str, str]:
+        """リクエストヘッダーを小文字の名前の辞書にする"""
+        return {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope.get('headers', [])}
+
+    @staticmethod
+    def _wants_ndjson(values: Mapping[str, List[str]], headers: Mapping[str, str]) -> bool:
+        """リクエストがNDJSONによる逐次応答を求めているか判定する（WSGI版と同じ条件）"""
+        if values.get('stream', [''])[0].lower() == 'ndjson':
+            return True
+        accept = parse_accept_header(headers.get('accept'), MIMEAccept)
+        return accept.best_match(["application/json", NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+    async def _merge(self, scope, headers: Mapping[str, str], body: bytes, send) -> None:
+        """
+        複数の見積もりURLを非同期に合算する（WSGI版の POST /merge と同じ応答）
+
+        Args:
+            scope: ASGIのスコープ
+            headers: リクエストヘッダー
+            body: フォームデータ
+            send: ASGIの送信関数
+        """
+        values = parse_qs(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True)
+        for key, items in parse_qs(body.decode('utf-8', 'replace'), keep_blank_values=True).items():
+            values.setdefault(key, []).extend(items)
+
+        urls = values.get('urls', [])
+        progress_id = values.get('progress_id', [''])[0] or None
+        if progress_id is not None and not is_valid_progress_id(progress_id):
+            await self._send_json(send, 400, {"success": False, "error": "進捗IDが不正です"})
+            return
+        if not urls:
+            payload = {"success": False, "error": "URLが提供されていません"}
+            self._finish_progress(progress_id, payload)
+            await self._send_json(send, 400, payload)
+            return
+
+        # 受付制御（待ち行列で待つ間もイベントループは止めない）
+        ticket = None
+        admission = self.services.admission
+        if admission is not None:
+            client = scope.get('client')
+            client_id = client_address(client[0] if client else None, headers.get('x-forwarded-for'),
+                                       self.trusted_proxy_count)
+            try:
+                ticket = await admission.acquire_async(client_id, admission.estimate_cost(len(urls), len(body)))
+            except AdmissionRejected as e:
+                logger.warning(f"リクエストを受け付けませんでした: {e.reason}")
+                self._finish_progress(progress_id, {"success": False, "error": str(e)})
+                await self._send_json(send, e.status, {"success": False, "error": str(e)},
+                                      [(b'retry-after', str(e.retry_after).encode('latin-1'))])
+                return
+
+        on_progress = self.services.progress.publisher(progress_id) if progress_id else None
+        try:
+            if self._wants_ndjson(values, headers):
+                events = self.services.merge_pipeline.iter_events_async(urls, await self.session(),
+                                                                        self.merge_executor, on_progress)
+                try:
+                    await send({
+                        'type': 'http.response.start',
+                        'status': 200,
+                        'headers': [(b'content-type', NDJSON_MIMETYPE.encode('latin-1'))]
+                    })
+                    async for event in events:
+                        if on_progress is not None and event["type"] in ("total", "error"):
+                            on_progress(event)
+                        line = json.dumps(event, ensure_ascii=False) + "\n"
+                        await send({'type': 'http.response.body', 'body': line.encode('utf-8'), 'more_body': True})
+                    await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+                finally:
+                    await events.aclose()
+                    if progress_id is not None:
+                        self.services.progress.close(progress_id)
+                return
+
+            try:
+                status, payload = await self._shared_merge(urls, on_progress)
+            except BaseException:
+                self._finish_progress(progress_id, {"success": False, "error": "処理中にエラーが発生しました"})
+                raise
+            self._finish_progress(progress_id, payload)
+            await self._send_json(send, status, payload)
+        finally:
+            if ticket is not None:
+                ticket.release()
+
+    def _finish_progress(self, progress_id: Optional[str], payload: Dict[str, Any]) -> None:
+        """合算結果を進捗の total（失敗時は error）イベントとして配信し、進捗の配信を終了する（WSGI版と同じ）"""
+        if progress_id is None:
+            return
+        event = {"type": "total" if payload.get("success") else "error"}
+        event.update(payload)
+        self.services.progress.publish(progress_id, event)
+        self.services.progress.close(progress_id)
+
+    async def _shared_merge(self, urls: List[str], on_progress=None) -> Tuple[int, Dict[str, Any]]:
+        """
+        複数の見積もりURLを合算する（同じ組み合わせの合算が実行中の場合は、その結果を共有する）
+
+        Args:
+            urls: 見積もりURLのリスト
+            on_progress: 取得と合算の進捗イベントを受け取る関数（結果を共有した場合は呼び出さない）
+
+        Returns:
+            Tuple: (HTTPステータス, 応答データ)
+        """
+        merge_flight = self.services.merge_flight
+        if merge_flight is None:
+            return await self._merge_json(urls, on_progress)
+
+        try:
+            key = self.services.merge_pipeline.merge_key(urls, {"format": "json"})
+        except ValueError:
+            # 無効なURLを含む場合はまとめずに実行し、通常どおりエラーを返す
+            return await self._merge_json(urls, on_progress)
+        return await merge_flight.do_async(key, lambda: self._merge_json(urls, on_progress))
+
+    async def _merge_json(self, urls: List[str], on_progress=None) -> Tuple[int, Dict[str, Any]]:
+        """
+        複数の見積もりURLを合算し、応答データを作成する
+
+        Args:
+            urls: 見積もりURLのリスト
+            on_progress: 取得と合算の進捗イベントを受け取る関数
+
+        Returns:
+            Tuple: (HTTPステータス, 応答データ)
+        """
+        events = self.services.merge_pipeline.iter_events_async(urls, await self.session(), self.merge_executor,
+                                                                on_progress)
+        try:
+            fetch_failed = False
+            async for event in events:
+                if event["type"] == "fetch" and not event["success"]:
+                    fetch_failed = True
+                elif event["type"] == "error":
+                    # URLの解析エラーは400、それ以外は500（WSGI版と同じ）
+                    return 400 if fetch_failed else 500, {"success": False, "error": event["error"]}
+                elif event["type"] == "total":
+                    return 200, {key: value for key, value in event.items() if key != "type"}
+            return 500, {"success": False, "error": "合算結果が得られませんでした"}
+        finally:
+            await events.aclose()
+
+    async def _progress(self, progress_id: str, headers: Mapping[str, str], receive, send) -> None:
+        """
+        合算の進捗をSSEで配信する（WSGI版の GET /merge/progress/<進捗ID> と同じ応答）
+
+        イベントの待機と切断の検知をイベントループ上で行い、購読者ごとにスレッドを使いません。
+
+        Args:
+            progress_id: 進捗ID
+            headers: リクエストヘッダー
+            receive: ASGIの受信関数（切断の検知に使用する）
+            send: ASGIの送信関数
+        """
+        if not is_valid_progress_id(progress_id):
+            await self._send_json(send, 400, {"success": False, "error": "進捗IDが不正です"})
+            return
+        try:
+            last_event_id = int(headers.get('last-event-id', '0'))
+        except ValueError:
+            last_event_id = 0
+
+        try:
+            subscription = self.services.progress.subscribe(progress_id, last_event_id)
+        except ProgressSubscriptionLimit as e:
+            logger.warning(f"進捗の購読を受け付けませんでした: {str(e)}")
+            await self._send_json(send, 503, {"success": False, "error": str(e)})
+            return
+
+        disconnected = asyncio.ensure_future(self._wait_disconnect(receive))
+        try:
+            events, finished = await subscription.wait_async(0)
+            if finished and not events:
+                # 204 を返すとブラウザ（EventSource）は再接続をやめる
+                await send({'type': 'http.response.start', 'status': 204, 'headers': []})
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+                return
+
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [(b'content-type', f"{SSE_MIMETYPE}; charset=utf-8".encode('latin-1')),
+                            (b'cache-control', b'no-cache, no-transform'),
+                            (b'x-accel-buffering', b'no')]
+            })
+            await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+            while True:
+                chunk = ''.join(format_sse(event_id, event) for event_id, event in events)
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+                if finished:
+                    break
+                waiting = asyncio.ensure_future(subscription.wait_async(self.progress_heartbeat))
+                await asyncio.wait({waiting, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if disconnected.done():
+                    waiting.cancel()
+                    return
+                events, finished = waiting.result()
+                if not events and not finished:
+                    await send({'type': 'http.response.body', 'body': b': keepalive\n\n', 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            disconnected.cancel()
+            subscription.close()
+
+    @staticmethod
+    async def _wait_disconnect(receive) -> None:
+        """クライアントの切断を待つ"""
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+
+    @staticmethod
+    async def _send_json(send, status: int, payload: Dict[str, Any], extra_headers: List = ()) -> None:
+        """JSONの応答を送信する"""
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'),
+                        (b'content-length', str(len(body)).encode('latin-1')), *extra_headers]
+        })
+        await send({'type': 'http.response.body', 'body': body, 'more_body': False})
+
+
+def create_asgi_app(config: Optional[Mapping[str, Any]] = None) -> AsgiMergeApp:
+    """
+    ASGIアプリケーションを作成する
+
+    Args:
+        config: 環境変数の設定を上書きする設定値（create_app() と同じ）
+
+    Returns:
+        AsgiMergeApp: ASGIアプリケーション
+    """
+    # uvicorn のアクセスログにヘルスチェックを記録しない
+    install_probe_log_filter("uvicorn.access")
+    # 進捗の購読はイベントループ上で待ち、合算と同じプロセスに届くため、画面から購読する
+    return AsgiMergeApp(create_app(dict(config or {}, PROGRESS_SSE_ENABLED=True)))
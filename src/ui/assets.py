@@ -0,0 +1,155 @@
+"""
+静的ファイル管理モジュール
+
+static ディレクトリのCSS・JavaScriptを起動時に一度だけ読み込み、内容ハッシュを含む
+ファイル名（例: js/app.3f2a1b9c04d5.js）で配信するためのクラスを提供します。
+内容が変わるとURLも変わるため、ブラウザとCDNに無期限にキャッシュさせることができます。
+描画済みのページもデプロイごと（プロセスごと）に1回だけ作成して保持します。
+"""
+
+import os
+import hashlib
+import logging
+import mimetypes
+import threading
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# ファイル名に含める内容ハッシュの文字数
+FINGERPRINT_LENGTH = 12
+
+# 配信する静的ファイルの拡張子
+ASSET_EXTENSIONS = ('.css', '.js', '.svg', '.png', '.ico', '.woff2')
+
+
+class Asset:
+    """
+    読み込み済みの静的ファイル（変更不可）
+
+    Attributes:
+        path: static ディレクトリからの相対パス（例: js/app.js）
+        fingerprinted_path: 内容ハッシュを含む相対パス（例: js/app.3f2a1b9c04d5.js）
+        body: ファイルの内容
+        etag: ファイルの内容のETag
+        mimetype: MIMEタイプ
+    """
+
+    __slots__ = ('path', 'fingerprinted_path', 'body', 'etag', 'mimetype')
+
+    def __init__(self, path: str, body: bytes, mimetype: Optional[str] = None):
+        digest = hashlib.sha256(body).hexdigest()
+        stem, ext = os.path.splitext(path)
+        object.__setattr__(self, 'path', path)
+        object.__setattr__(self, 'fingerprinted_path', f"{stem}.{digest[:FINGERPRINT_LENGTH]}{ext}")
+        object.__setattr__(self, 'body', body)
+        object.__setattr__(self, 'etag', digest[:32])
+        object.__setattr__(self, 'mimetype', mimetype or mimetypes.guess_type(path)[0] or 'application/octet-stream')
+
+    def __setattr__(self, name, value):
+        raise AttributeError("静的ファイルは変更できません")
+
+
+class StaticAssets:
+    """
+    内容ハッシュ付きのURLで静的ファイルを配信するクラス
+
+    このクラスは、以下の機能を提供します：
+    - 静的ファイルの読み込みと内容ハッシュ付きのファイル名の作成（起動時に1回）
+    - テンプレートから使用するURLの作成（url）
+    - 内容ハッシュ付きのファイル名からのファイルの取得（get）
+    - 描画済みのページの保持（page）
+    """
+
+    def __init__(self, directory: str, url_prefix: str = "/assets"):
+        """
+        初期化
+
+        Args:
+            directory: 静的ファイルのディレクトリ
+            url_prefix: 配信するURLの接頭辞
+        """
+        self.directory = directory
+        self.url_prefix = url_prefix.rstrip('/')
+
+        self._lock = threading.Lock()
+        self._pages: Dict[str, Asset] = {}
+        self._assets: Mapping[str, Asset] = MappingProxyType({})
+        self._by_fingerprint: Mapping[str, Asset] = MappingProxyType({})
+        self.reload()
+
+    def reload(self) -> None:
+        """静的ファイルを読み込み直す（描画済みのページも破棄する）"""
+        assets = {}
+        if os.path.isdir(self.directory):
+            for root, _, names in os.walk(self.directory):
+                for name in sorted(names):
+                    if not name.endswith(ASSET_EXTENSIONS):
+                        continue
+                    full_path = os.path.join(root, name)
+                    path = os.path.relpath(full_path, self.directory).replace(os.sep, '/')
+                    try:
+                        with open(full_path, 'rb') as f:
+                            assets[path] = Asset(path, f.read())
+                    except OSError as e:
+                        logger.warning(f"静的ファイルを読み込めません: {path}: {str(e)}")
+
+        with self._lock:
+            self._assets = MappingProxyType(assets)
+            self._by_fingerprint = MappingProxyType({asset.fingerprinted_path: asset for asset in assets.values()})
+            self._pages = {}
+        logger.info(f"静的ファイルを読み込みました: {len(assets)}件")
+
+    def url(self, path: str) -> str:
+        """
+        静的ファイルのURLを返す
+
+        Args:
+            path: static ディレクトリからの相対パス（例: js/app.js）
+
+        Returns:
+            str: 内容ハッシュを含むURL
+
+        Raises:
+            KeyError: 静的ファイルが存在しない場合
+        """
+        asset = self._assets.get(path)
+        if asset is None:
+            raise KeyError(f"静的ファイルが見つかりません: {path}")
+        return f"{self.url_prefix}/{asset.fingerprinted_path}"
+
+    def get(self, fingerprinted_path: str) -> Optional[Asset]:
+        """
+        内容ハッシュを含むファイル名から静的ファイルを取得する
+
+        Args:
+            fingerprinted_path: 内容ハッシュを含む相対パス
+
+        Returns:
+            Asset: 静的ファイル。存在しない場合（以前のデプロイのハッシュを含む）はNone
+        """
+        return self._by_fingerprint.get(fingerprinted_path)
+
+    def page(self, name: str, render: Callable[[], str]) -> Asset:
+        """
+        描画済みのページを返す（初回のみ render を呼び出して保持する）
+
+        Args:
+            name: ページ名
+            render: ページのHTMLを作成する関数
+
+        Returns:
+            Asset: 描画済みのページ
+        """
+        page = self._pages.get(name)
+        if page is not None:
+            return page
+
+        page = Asset(name, render().encode('utf-8'), 'text/html')
+        with self._lock:
+            # 同時に描画した場合も同じ内容のため、先に保持したものを使う
+            return self._pages.setdefault(name, page)
+
+    def __len__(self) -> int:
+        return len(self._assets)
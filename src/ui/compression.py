@@ -0,0 +1,287 @@
+"""
+レスポンス圧縮モジュール
+
+Accept-Encoding に応じてレスポンス本文を gzip または brotli で圧縮する
+WSGIミドルウェアを提供します。ジェネレーターによる逐次応答にも対応します。
+"""
+
+import zlib
+import logging
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotliは任意の依存関係
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# 圧縮の対象とするMIMEタイプ（PDFやZIPなど圧縮済みの形式は対象外）
+COMPRESSIBLE_MIMETYPES = frozenset([
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'text/csv',
+    'text/css',
+    'text/event-stream',
+    'text/html',
+    'text/javascript',
+    'text/plain',
+    'text/xml'
+])
+
+# 本文を持たない、または圧縮してはならないステータスコード
+_SKIP_STATUSES = (204, 206, 304)
+
+
+class _GzipEncoder:
+    """gzip形式の逐次圧縮"""
+
+    name = 'gzip'
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        output = self._compressor.compress(data)
+        if flush:
+            output += self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return output
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    """brotli形式の逐次圧縮"""
+
+    name = 'br'
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        output = self._compressor.process(data)
+        if flush:
+            output += self._compressor.flush()
+        return output
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """
+    Accept-Encoding ヘッダーを解析する
+
+    Args:
+        header: Accept-Encoding ヘッダーの値
+
+    Returns:
+        dict: エンコーディング名（小文字）と品質値の辞書
+    """
+    encodings = {}
+    for item in header.split(','):
+        parts = item.strip().split(';')
+        name = parts[0].strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            key, _, value = param.strip().partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        encodings[name] = quality
+    return encodings
+
+
+class CompressionMiddleware:
+    """
+    レスポンスを圧縮するWSGIミドルウェア
+
+    このクラスは、以下の機能を提供します：
+    - Accept-Encoding に応じた brotli / gzip の選択（brotli が利用できない場合は gzip のみ）
+    - 最小サイズ未満のレスポンスは圧縮しない
+    - ジェネレーターによる長さが不明な逐次応答は、先読みで遅延させずに圧縮し、
+      断片ごとにフラッシュして受信側に遅延なく届ける
+    - Content-Encoding が設定済みのレスポンスや、圧縮済み形式のレスポンスはそのまま返す
+    """
+
+    def __init__(self, app, min_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4,
+                 mimetypes: Iterable[str] = COMPRESSIBLE_MIMETYPES):
+        """
+        初期化
+
+        Args:
+            app: 対象のWSGIアプリケーション
+            min_size: 圧縮する最小バイト数
+            gzip_level: gzipの圧縮レベル（1〜9）
+            brotli_quality: brotliの品質（0〜11、逐次応答の遅延を抑えるため既定は4）
+            mimetypes: 圧縮の対象とするMIMEタイプ
+        """
+        self.app = app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.mimetypes = frozenset(mimetypes)
+
+    def __call__(self, environ, start_response):
+        encoding = self._choose_encoding(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None or environ.get('REQUEST_METHOD') == 'HEAD':
+            # 圧縮しない場合も、キャッシュが圧縮前の応答を他のクライアントに返さないよう Vary を付ける
+            def vary_start_response(status, headers, exc_info=None):
+                if self._varies_by_encoding(status, headers):
+                    headers = self._add_vary(list(headers))
+                return start_response(status, headers, exc_info)
+
+            return self.app(environ, vary_start_response)
+
+        captured = {}
+
+        def capture_start_response(status, headers, exc_info=None):
+            if exc_info is not None and captured.get('sent'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            captured['status'] = status
+            captured['headers'] = headers
+            captured['exc_info'] = exc_info
+            # 本文を書き込む write() 呼び出しには対応しない（Flaskは使用しない）
+            return self._unsupported_write
+
+        app_iter = self.app(environ, capture_start_response)
+        return self._respond(app_iter, captured, start_response, encoding)
+
+    @staticmethod
+    def _unsupported_write(data: bytes) -> None:
+        raise RuntimeError("圧縮ミドルウェアは write() による本文の書き込みに対応していません")
+
+    def _choose_encoding(self, header: str) -> Optional[str]:
+        """クライアントが受け入れるエンコーディングから使用するものを選ぶ"""
+        if not header:
+            return None
+        accepted = parse_accept_encoding(header)
+        wildcard = accepted.get('*', 0.0)
+
+        candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+        best = None
+        best_quality = 0.0
+        for name in candidates:
+            quality = accepted.get(name, wildcard)
+            if quality > best_quality:
+                best, best_quality = name, quality
+        return best
+
+    def _varies_by_encoding(self, status: str, headers: List[Tuple[str, str]]) -> bool:
+        """
+        Accept-Encoding によって圧縮する可能性がある応答か判定する（本文の大きさは問わない）
+
+        該当する応答には、実際に圧縮したかどうかにかかわらず Vary: Accept-Encoding を付けます。
+        """
+        if int(status.split(' ', 1)[0]) in _SKIP_STATUSES:
+            return False
+
+        header_map = {name.lower(): value for name, value in headers}
+        if header_map.get('content-encoding', 'identity').lower() != 'identity':
+            return False
+        if 'no-transform' in header_map.get('cache-control', '').lower():
+            return False
+
+        mimetype = header_map.get('content-type', '').split(';', 1)[0].strip().lower()
+        return mimetype in self.mimetypes
+
+    def _is_compressible(self, status: str, headers: List[Tuple[str, str]]) -> bool:
+        """ステータスとヘッダーから圧縮の対象か判定する"""
+        if not self._varies_by_encoding(status, headers):
+            return False
+
+        header_map = {name.lower(): value for name, value in headers}
+        content_length = header_map.get('content-length')
+        if content_length is not None and content_length.isdigit() and int(content_length) < self.min_size:
+            return False
+        return True
+
+    def _respond(self, app_iter, captured, start_response, encoding: str) -> Iterator[bytes]:
+        """本文の先頭を読んで圧縮するか決め、レスポンスを返す"""
+        iterator = iter(app_iter)
+        try:
+            # start_response は最初の断片を生成するまで呼ばれない場合がある
+            buffered = []
+            buffered_size = 0
+            exhausted = False
+            while 'status' not in captured or not buffered:
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                if chunk:
+                    buffered.append(chunk)
+                    buffered_size += len(chunk)
+
+            status, headers = captured['status'], captured['headers']
+            compressible = self._is_compressible(status, headers)
+
+            has_length = any(name.lower() == 'content-length' for name, _ in headers)
+            if compressible and exhausted and buffered_size < self.min_size:
+                # 長さが不明でも、先頭を読んだ時点で本文が終わっていて最小サイズ未満の場合は圧縮しない
+                compressible = False
+                headers = [(name, value) for name, value in headers if name.lower() != 'content-length']
+                headers.append(('Content-Length', str(buffered_size)))
+
+            if not compressible:
+                if self._varies_by_encoding(status, headers):
+                    headers = self._add_vary(list(headers))
+                start_response(status, headers, captured.get('exc_info'))
+                captured['sent'] = True
+                yield from buffered
+                if not exhausted:
+                    yield from iterator
+                return
+
+            encoder = _BrotliEncoder(self.brotli_quality) if encoding == 'br' else _GzipEncoder(self.gzip_level)
+            start_response(status, self._compressed_headers(headers, encoder.name), captured.get('exc_info'))
+            captured['sent'] = True
+
+            # 長さが不明な逐次応答は断片ごとにフラッシュして遅延を防ぐ
+            streaming = not exhausted and not has_length
+            output = encoder.compress(b''.join(buffered), streaming)
+            if output:
+                yield output
+            if not exhausted:
+                for chunk in iterator:
+                    output = encoder.compress(chunk, streaming)
+                    if output:
+                        yield output
+            yield encoder.finish()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+    @staticmethod
+    def _add_vary(headers: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Vary ヘッダーに Accept-Encoding を追加する"""
+        for index, (name, value) in enumerate(headers):
+            if name.lower() == 'vary':
+                if 'accept-encoding' not in value.lower():
+                    headers[index] = (name, f"{value}, Accept-Encoding")
+                return headers
+        headers.append(('Vary', 'Accept-Encoding'))
+        return headers
+
+    def _compressed_headers(self, headers: List[Tuple[str, str]], encoding: str) -> List[Tuple[str, str]]:
+        """圧縮後のレスポンスヘッダーを作成する"""
+        result = []
+        for name, value in headers:
+            lower = name.lower()
+            if lower == 'content-length':
+                continue
+            if lower == 'etag' and not value.startswith('W/'):
+                # 圧縮後の本文はバイト単位で一致しないため弱いETagにする
+                value = f"W/{value}"
+            result.append((name, value))
+        result.append(('Content-Encoding', encoding))
+        return self._add_vary(result)
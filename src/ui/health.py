@@ -0,0 +1,163 @@
+"""
+ヘルスチェックモジュール
+
+コンテナやロードバランサーのヘルスチェック（/healthz, /readyz）で使用する
+レディネスの判定と、ヘルスチェックのリクエストをアクセスログから除外するフィルターを提供します。
+"""
+
+import re
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# ヘルスチェックのパス（アクセスログに記録しない）
+PROBE_PATHS = ("/healthz", "/readyz")
+
+# アクセスログのリクエスト行（"GET /healthz HTTP/1.1"）からヘルスチェックを判定する
+_PROBE_REQUEST_LINE = re.compile(
+    r'"[A-Z]+ (?:' + '|'.join(re.escape(path) for path in PROBE_PATHS) + r')(?:\?[^ "]*)? HTTP/'
+)
+
+
+def is_probe_path(path: Optional[str]) -> bool:
+    """
+    ヘルスチェックのパスか判定する
+
+    Args:
+        path: リクエストのパス
+
+    Returns:
+        bool: ヘルスチェックのパスの場合はTrue
+    """
+    return path in PROBE_PATHS
+
+
+class ProbeAccessLogFilter(logging.Filter):
+    """
+    ヘルスチェックのリクエストをアクセスログから除外するフィルター
+
+    werkzeug（開発サーバー）と uvicorn のアクセスログに使用します。
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        try:
+            message = record.getMessage()
+        except Exception:
+            return True
+        return _PROBE_REQUEST_LINE.search(message) is None
+
+
+def install_probe_log_filter(logger_name: str) -> None:
+    """
+    ロガーにヘルスチェックを除外するフィルターを追加する（追加済みの場合は何もしない）
+
+    Args:
+        logger_name: アクセスログのロガー名
+    """
+    target = logging.getLogger(logger_name)
+    if not any(isinstance(existing, ProbeAccessLogFilter) for existing in target.filters):
+        target.addFilter(ProbeAccessLogFilter())
+
+
+class ReadinessChecker:
+    """
+    リクエストを受け付けられる状態かを判定するクラス
+
+    このクラスは、以下の項目を確認します：
+    - storage: 見積もりの保存先に書き込めるか
+    - write_queue: 書き込みスレッドが動いていて、書き込みキューが満杯でないか
+    - jobs: 合算ジョブの実行待ちが上限に達していないか
+    - admission: /merge の受付制御の待ち行列が満杯でないか
+    結果は cache_seconds 秒のあいだ再利用し、ヘルスチェックのたびに保存先へアクセスしないようにします。
+    """
+
+    def __init__(self, services, cache_seconds: float = 5.0):
+        """
+        初期化
+
+        Args:
+            services: アプリケーションのコンポーネント（AppServices）
+            cache_seconds: 判定結果を再利用する秒数
+        """
+        self.services = services
+        self.cache_seconds = cache_seconds
+        self._lock = threading.Lock()
+        self._cached: Optional[Dict[str, Any]] = None
+        self._expires_at = 0.0
+
+    def check(self) -> Dict[str, Any]:
+        """
+        レディネスを判定する
+
+        判定中に届いたリクエストには、前回の結果がある場合はそれを返します。
+
+        Returns:
+            Dict: ready（受け付けられる場合はTrue）と、項目ごとの結果（checks）
+        """
+        now = time.monotonic()
+        cached = self._cached
+        if cached is not None and now < self._expires_at:
+            return cached
+
+        if not self._lock.acquire(blocking=cached is None):
+            return cached
+        try:
+            if self._cached is not None and time.monotonic() < self._expires_at:
+                return self._cached
+            checks = {
+                "storage": self._run(self._check_storage),
+                "write_queue": self._run(self._check_write_queue),
+                "jobs": self._run(self._check_jobs),
+                "admission": self._run(self._check_admission)
+            }
+            result = {"ready": all(check["ok"] for check in checks.values()), "checks": checks}
+            if not result["ready"]:
+                failed = [name for name, check in checks.items() if not check["ok"]]
+                logger.warning(f"レディネスチェックに失敗しました: {', '.join(failed)}")
+            self._cached = result
+            self._expires_at = time.monotonic() + self.cache_seconds
+            return result
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def _run(check: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """項目を確認し、例外は失敗として記録する"""
+        try:
+            return check()
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    def _check_storage(self) -> Dict[str, Any]:
+        self.services.estimate_store.check_writable()
+        return {"ok": True}
+
+    def _check_write_queue(self) -> Dict[str, Any]:
+        stats = self.services.write_queue.stats()
+        result = {"ok": True, "queued": stats["queued"], "capacity": stats["capacity"]}
+        if self.services.started and not stats["running"]:
+            result.update(ok=False, error="書き込みスレッドが停止しています")
+        elif stats["capacity"] > 0 and stats["queued"] >= stats["capacity"]:
+            result.update(ok=False, error="書き込みキューが満杯です")
+        return result
+
+    def _check_jobs(self) -> Dict[str, Any]:
+        stats = self.services.job_manager.stats()
+        result = {"ok": True, "queued": stats["queued"], "running": stats["running"],
+                  "max_queued": stats["max_queued"]}
+        if stats["queued"] >= stats["max_queued"]:
+            result.update(ok=False, error="合算ジョブの実行待ちが上限に達しています")
+        return result
+
+    def _check_admission(self) -> Dict[str, Any]:
+        admission = self.services.admission
+        if admission is None:
+            return {"ok": True}
+        stats = admission.stats()
+        result = {"ok": True, "queued": stats["queued"], "max_queue": stats["max_queue"]}
+        if stats["max_queue"] > 0 and stats["queued"] >= stats["max_queue"]:
+            result.update(ok=False, error="受付の待ち行列が満杯です")
+        return result
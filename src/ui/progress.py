@@ -0,0 +1,338 @@
+"""
+合算の進捗配信モジュール
+
+実行中の合算の進捗イベント（見積もりの取得、サービスの合算、合算結果）を進捗IDごとのチャネルに記録し、
+Server-Sent Events（SSE）で購読者に配信するためのクラスを提供します。
+購読者はチャネルのイベントを読み終えた位置だけを持ち、イベントはチャネルで1回だけ保持するため、
+多数の購読者を開いたままにできます。スレッドからの購読（WSGI版）とイベントループ上の購読（ASGI版）の
+両方に対応します。チャネルはプロセスごとに保持します。
+複数のワーカーで動くWSGI版では、購読が合算と別のワーカーに届くことがあるため、
+チャネルのない購読は短時間だけ待って拒否します。
+"""
+
+import re
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# SSEのMIMEタイプ
+SSE_MIMETYPE = "text/event-stream"
+
+# 進捗IDの形式（クライアントが作成する推測されにくい値）
+_PROGRESS_ID = re.compile(r"[A-Za-z0-9_-]{8,64}")
+
+def is_valid_progress_id(progress_id: Optional[str]) -> bool:
+    """
+    進捗IDの形式が正しいか判定する
+
+    Args:
+        progress_id: 進捗ID
+
+    Returns:
+        bool: 正しい場合はTrue
+    """
+    return bool(progress_id) and _PROGRESS_ID.fullmatch(progress_id) is not None
+
+
+def format_sse(event_id: int, event: Dict[str, Any]) -> str:
+    """
+    イベントをSSEの1件の形式にする
+
+    Args:
+        event_id: イベントの通し番号（再接続時の Last-Event-ID）
+        event: type を含むイベント
+
+    Returns:
+        str: SSEの1件（空行で終わる）
+    """
+    data = {key: value for key, value in event.items() if key != "type"}
+    return (f"id: {event_id}\n"
+            f"event: {event.get('type', 'message')}\n"
+            f"data: {json.dumps(data, ensure_ascii=False)}\n\n")
+
+
+class ProgressSubscriptionLimit(RuntimeError):
+    """購読者数が上限に達していることを示す例外"""
+
+
+class ProgressChannelNotFound(LookupError):
+    """進捗IDのチャネルがこのプロセスにないことを示す例外"""
+
+
+class _Channel:
+    """1つの合算の進捗イベント"""
+
+    __slots__ = ('events', 'next_id', 'closed', 'expires_at', 'condition', 'async_waiters', 'subscribers')
+
+    def __init__(self, lock: threading.Lock, max_events: int, expires_at: float):
+        self.events: Deque[Tuple[int, Dict[str, Any]]] = deque(maxlen=max_events)
+        self.next_id = 1
+        self.closed = False
+        self.expires_at = expires_at
+        self.condition = threading.Condition(lock)
+        self.async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self.subscribers = 0
+
+
+class ProgressSubscription:
+    """
+    チャネルの購読
+
+    読み終えたイベントの通し番号だけを持ちます。使い終わったら close を呼び出してください。
+    """
+
+    def __init__(self, broker: 'ProgressBroker', channel_id: str, channel: _Channel, last_event_id: int):
+        self.broker = broker
+        self.channel_id = channel_id
+        self._channel = channel
+        self.last_event_id = last_event_id
+        self._closed = False
+
+    def wait(self, timeout: float) -> Tuple[List[Tuple[int, Dict[str, Any]]], bool]:
+        """
+        新しいイベントを待つ
+
+        Args:
+            timeout: 待つ秒数の上限
+
+        Returns:
+            Tuple: (新しいイベントの (通し番号, イベント) のリスト, 合算が終了して読み終えた場合はTrue)
+        """
+        channel = self._channel
+        with channel.condition:
+            if not self._has_new_events() and not self._finished():
+                channel.condition.wait(timeout)
+            return self._take()
+
+    async def wait_async(self, timeout: float) -> Tuple[List[Tuple[int, Dict[str, Any]]], bool]:
+        """
+        新しいイベントをイベントループ上で待つ（スレッドを占有しない）
+
+        Args:
+            timeout: 待つ秒数の上限
+
+        Returns:
+            Tuple: wait と同じ
+        """
+        channel = self._channel
+        loop = asyncio.get_running_loop()
+        with channel.condition:
+            if self._has_new_events() or self._finished():
+                return self._take()
+            waiter = (loop, loop.create_future())
+            channel.async_waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter[1], timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with channel.condition:
+                if waiter in channel.async_waiters:
+                    channel.async_waiters.remove(waiter)
+        with channel.condition:
+            return self._take()
+
+    def close(self) -> None:
+        """購読を終了する"""
+        if not self._closed:
+            self._closed = True
+            self.broker._unsubscribe(self._channel)
+
+    def _has_new_events(self) -> bool:
+        return self._channel.next_id - 1 > self.last_event_id
+
+    def _finished(self) -> bool:
+        channel = self._channel
+        if channel.closed:
+            return not self._has_new_events()
+        # 合算が始まらないまま期限が過ぎた場合も終了する
+        return time.monotonic() >= channel.expires_at
+
+    def _take(self) -> Tuple[List[Tuple[int, Dict[str, Any]]], bool]:
+        """ロックを保持した状態で新しいイベントを取り出す"""
+        events = [(event_id, event) for event_id, event in self._channel.events if event_id > self.last_event_id]
+        if events:
+            self.last_event_id = events[-1][0]
+        return events, self._finished()
+
+
+class ProgressBroker:
+    """
+    合算の進捗イベントを配信するクラス
+
+    このクラスは、以下の機能を提供します：
+    - 進捗IDごとのイベントの記録（publish）と合算の終了（close）
+    - 購読（subscribe）と、再接続時の続きからの配信（last_event_id）
+    - 期限切れのチャネルの破棄と、チャネル数・購読者数の上限
+    購読が合算の開始より先でも、チャネルを作成して待ちます。
+    """
+
+    def __init__(self, max_channels: int = 1000, max_events: int = 1000, ttl_seconds: float = 300,
+                 max_subscribers: int = 1000):
+        """
+        初期化
+
+        Args:
+            max_channels: 保持するチャネル数の上限（超えた場合は期限の近いものから破棄する）
+            max_events: チャネルごとに保持するイベント数の上限（超えた場合は古いものから破棄する）
+            ttl_seconds: 最後のイベントから、またはまだ始まらない合算を待つ秒数
+            max_subscribers: 同時に購読できる数の上限（0で無制限）
+        """
+        self.max_channels = max_channels
+        self.max_events = max_events
+        self.ttl_seconds = ttl_seconds
+        self.max_subscribers = max_subscribers
+
+        self._lock = threading.Lock()
+        # チャネルの作成を待つ購読者を起こす
+        self._created = threading.Condition(self._lock)
+        self._channels: Dict[str, _Channel] = {}
+        self._subscribers = 0
+        self._stats = {'published': 0, 'rejected_subscriptions': 0, 'unknown_channels': 0, 'expired_channels': 0}
+
+    def publish(self, channel_id: str, event: Dict[str, Any]) -> None:
+        """
+        進捗イベントを記録し、購読者に通知する
+
+        Args:
+            channel_id: 進捗ID
+            event: type を含むイベント
+        """
+        with self._lock:
+            channel = self._channel(channel_id)
+            if channel.closed:
+                return
+            channel.events.append((channel.next_id, event))
+            channel.next_id += 1
+            channel.expires_at = time.monotonic() + self.ttl_seconds
+            self._stats['published'] += 1
+            self._notify(channel)
+
+    def close(self, channel_id: str) -> None:
+        """
+        合算の終了を記録する（購読者は残りのイベントを読み終えると終了する）
+
+        Args:
+            channel_id: 進捗ID
+        """
+        with self._lock:
+            channel = self._channel(channel_id)
+            channel.closed = True
+            # 再接続した購読者に残りのイベントを返せるよう、しばらく保持する
+            channel.expires_at = time.monotonic() + self.ttl_seconds
+            self._notify(channel)
+
+    def publisher(self, channel_id: str) -> Callable[[Dict[str, Any]], None]:
+        """
+        イベントを記録する関数を返す（パーサーと合算クラスの on_progress に渡す）
+
+        Args:
+            channel_id: 進捗ID
+
+        Returns:
+            Callable: イベントを受け取る関数
+        """
+        return lambda event: self.publish(channel_id, event)
+
+    def subscribe(self, channel_id: str, last_event_id: int = 0, max_subscribers: Optional[int] = None,
+                  channel_wait: Optional[float] = None) -> ProgressSubscription:
+        """
+        チャネルを購読する
+
+        Args:
+            channel_id: 進捗ID
+            last_event_id: 受信済みのイベントの通し番号（再接続時の Last-Event-ID）
+            max_subscribers: 同時に購読できる数の上限（省略時は初期化時の max_subscribers、0で無制限）
+            channel_wait: 指定した場合、チャネルがないときは作成せず、この秒数だけ合算の開始を待つ
+                          （合算が別のプロセスで行われる場合に購読者を待たせ続けないため）
+
+        Returns:
+            ProgressSubscription: 購読
+
+        Raises:
+            ProgressSubscriptionLimit: 購読者数が上限に達している場合
+            ProgressChannelNotFound: channel_wait 秒待ってもチャネルが作成されない場合
+        """
+        limit = self.max_subscribers if max_subscribers is None else max_subscribers
+        with self._lock:
+            if limit and self._subscribers >= limit:
+                self._stats['rejected_subscriptions'] += 1
+                raise ProgressSubscriptionLimit("進捗の購読者数が上限に達しています")
+            # 待つ間も上限に数える
+            self._subscribers += 1
+            if channel_wait is not None and not self._created.wait_for(
+                    lambda: channel_id in self._channels, channel_wait):
+                self._subscribers -= 1
+                self._stats['unknown_channels'] += 1
+                raise ProgressChannelNotFound(f"進捗IDの合算が見つかりません: {channel_id}")
+            channel = self._channel(channel_id)
+            channel.subscribers += 1
+        return ProgressSubscription(self, channel_id, channel, last_event_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        統計情報を返す
+
+        Returns:
+            Dict: チャネル数（channels）、購読者数（subscribers）、記録したイベント数（published）、
+                  上限により拒否した購読の数（rejected_subscriptions）、チャネルがなく拒否した購読の数（unknown_channels）、
+                  期限切れで破棄したチャネル数（expired_channels）
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['channels'] = len(self._channels)
+            stats['subscribers'] = self._subscribers
+        return stats
+
+    def _unsubscribe(self, channel: _Channel) -> None:
+        with self._lock:
+            channel.subscribers -= 1
+            self._subscribers -= 1
+
+    def _channel(self, channel_id: str) -> _Channel:
+        """ロックを保持した状態でチャネルを取得する（存在しない場合は作成する）"""
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            if len(self._channels) >= self.max_channels:
+                self._evict()
+            channel = _Channel(self._lock, self.max_events, time.monotonic() + self.ttl_seconds)
+            self._channels[channel_id] = channel
+            self._created.notify_all()
+        return channel
+
+    def _evict(self) -> None:
+        """期限切れのチャネルを破棄し、それでも上限の場合は期限の近いものから破棄する"""
+        now = time.monotonic()
+        expired = [channel_id for channel_id, channel in self._channels.items() if channel.expires_at <= now]
+        if not expired:
+            oldest = min(self._channels.items(), key=lambda item: item[1].expires_at)
+            expired = [oldest[0]]
+        for channel_id in expired:
+            channel = self._channels.pop(channel_id)
+            # 購読中の場合は終了させる
+            channel.closed = True
+            self._notify(channel)
+        self._stats['expired_channels'] += len(expired)
+
+    @staticmethod
+    def _notify(channel: _Channel) -> None:
+        """ロックを保持した状態で購読者を起こす"""
+        channel.condition.notify_all()
+        for loop, future in channel.async_waiters:
+            try:
+                loop.call_soon_threadsafe(_set_done, future)
+            except RuntimeError:
+                # イベントループが終了している
+                pass
+        channel.async_waiters.clear()
+
+
+def _set_done(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
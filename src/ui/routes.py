@@ -2,91 +2,1016 @@
 ウェブUIルーティングモジュール
 
 Flaskアプリケーションのルーティングを管理します。
+コンポーネントは create_app() が生成して app.extensions に登録したものを使用します。
 """
 
-from flask import render_template, request, jsonify, Blueprint
+import json
+import logging
+import tempfile
+from flask import Blueprint, Response, abort, current_app, render_template, request, jsonify, send_file, stream_with_context
 
-from src.data.parser import EstimateParser
-from src.merger.cost_merger import EstimateMerger
-from src.api.calculator_api import CalculatorAPI
+from src import metrics
+from src.data.canonical import content_hash
+from src.data.upload import UploadError, iter_uploaded_estimates, multipart_boundary
+from src.jobs.job_manager import JobQueueFullError
+from src.ui.admission import AdmissionRejected, client_address
+from src.ui.progress import (SSE_MIMETYPE, ProgressChannelNotFound, ProgressSubscriptionLimit, format_sse,
+                             is_valid_progress_id)
 
-ui_blueprint = Blueprint('ui', __name__)
-parser = EstimateParser()
-merger = EstimateMerger()
-calculator_api = CalculatorAPI()
+logger = logging.getLogger(__name__)
 
-@ui_blueprint.route('/')
+ui_blueprint = Blueprint("ui", __name__)
+
+# Flask の拡張機能として AppServices を登録するキー
+SERVICES_EXTENSION = "merger"
+
+# 保存済み見積もりと静的ファイルのキャッシュ有効期間（内容ハッシュで識別するため変化しない）
+ESTIMATE_CACHE_MAX_AGE = 365 * 24 * 60 * 60
+
+# サンプル見積もりのキャッシュ有効期間（ファイルの変更を反映するため短くし、ETagで再検証させる）
+SAMPLE_CACHE_MAX_AGE = 60
+
+# 逐次応答（NDJSON）のMIMEタイプ
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def _services():
+    """現在のアプリケーションのコンポーネント（AppServices）を返す"""
+    return current_app.extensions[SERVICES_EXTENSION]
+
+
+@ui_blueprint.route("/")
 def index():
-    """インデックスページを表示"""
-    return render_template('index.html')
+    """
+    ホームページ表示
+    
+    描画したページはプロセスごとに保持し、ETag付きでCDNにもキャッシュさせます。
+    静的ファイルのURLは内容ハッシュを含むため、ページの内容はデプロイごとに変わります。
+    """
+    page = _services().assets.page("index.html", lambda: render_template("index.html"))
+    response = Response(page.body, mimetype=page.mimetype)
+    response.set_etag(page.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config["INDEX_CACHE_MAX_AGE"]
+    return response.make_conditional(request)
+
 
-@ui_blueprint.route('/merge', methods=['POST'])
+@ui_blueprint.route("/assets/<path:filename>", methods=["GET"])
+def static_asset(filename):
+    """
+    内容ハッシュ付きのURLで静的ファイルを返す
+    
+    Args:
+        filename: 内容ハッシュを含む static ディレクトリからの相対パス
+        
+    Returns:
+        静的ファイル（無期限にキャッシュ可能）。以前のデプロイのハッシュなど、存在しない場合は404
+    """
+    asset = _services().assets.get(filename)
+    if asset is None:
+        abort(404)
+    response = Response(asset.body, mimetype=asset.mimetype)
+    return _make_cacheable(response, asset.etag)
+
+
+@ui_blueprint.route("/merge", methods=["POST"])
 def merge_estimates():
-    """見積もりを合算して結果を返す"""
+    """
+    複数の見積もりURLを合算する
+    
+    フォームデータ:
+        urls: 見積もりURLのリスト
+        stream: "ndjson" を指定すると結果を改行区切りJSONで逐次返す
+                （Acceptヘッダーに application/x-ndjson を指定しても同じ）
+        progress_id: 指定すると進捗を /merge/progress/<progress_id> にSSEで配信する
+        
+    Returns:
+        JSON: 合算結果データ
+    """
+    services = _services()
+    
+    # URLリスト取得
+    urls = request.form.getlist("urls")
+    
+    progress_id = request.form.get("progress_id") or None
+    if progress_id is not None and not is_valid_progress_id(progress_id):
+        return jsonify({"success": False, "error": "進捗IDが不正です"}), 400
+    
+    if not urls:
+        payload = {"success": False, "error": "URLが提供されていません"}
+        _finish_progress(services, progress_id, payload)
+        return jsonify(payload), 400
+    
+    # 受付制御（処理枠は応答の送信が終わるまで保持する）
+    try:
+        release = _admit(services, len(urls))
+    except AdmissionRejected as e:
+        _finish_progress(services, progress_id, {"success": False, "error": str(e)})
+        return _rejected_response(e)
+    
     try:
-        data = request.get_json()
-        urls = data.get('urls', [])
+        response = current_app.make_response(_merge_response(services, urls, progress_id))
+    except BaseException:
+        release()
+        raise
+    response.call_on_close(release)
+    return response
+
+
+def _merge_response(services, urls, progress_id=None):
+    """
+    複数の見積もりURLを合算し、応答を作成する
+    
+    Args:
+        services: アプリケーションのコンポーネント
+        urls: 見積もりURLのリスト
+        progress_id: 進捗を配信する進捗ID
         
-        if not urls:
-            return jsonify({
-                'success': False,
-                'error': '見積もりURLが提供されていません。'
-            })
-        
-        # 重複したURLを削除
-        unique_urls = list(set(urls))
-        
-        # URLの検証
-        valid_urls = []
-        for url in unique_urls:
-            if parser.validate_calculator_url(url):
-                valid_urls.append(url)
-            else:
-                return jsonify({
-                    'success': False,
-                    'error': f'無効なAWS Pricing Calculator URL: {url}'
-                })
-        
-        # 見積もりデータの取得
+    Returns:
+        JSON: 合算結果データ（NDJSONの逐次応答の場合はレスポンス）
+    """
+    if _wants_ndjson():
+        return Response(
+            stream_with_context(_stream_merge(urls, progress_id)),
+            mimetype=NDJSON_MIMETYPE
+        )
+    
+    on_progress = services.progress.publisher(progress_id) if progress_id else None
+    try:
+        payload, status = _shared_merge(services, urls, on_progress)
+    except BaseException:
+        _finish_progress(services, progress_id, {"success": False, "error": "処理中にエラーが発生しました"})
+        raise
+    _finish_progress(services, progress_id, payload)
+    return jsonify(payload), status
+
+
+def _finish_progress(services, progress_id, payload):
+    """
+    合算結果を進捗の total（失敗時は error）イベントとして配信し、進捗の配信を終了する
+    
+    Args:
+        services: アプリケーションのコンポーネント
+        progress_id: 進捗ID（Noneの場合は何もしない）
+        payload: /merge の応答データ
+    """
+    if progress_id is None:
+        return
+    event = {"type": "total" if payload.get("success") else "error"}
+    event.update(payload)
+    services.progress.publish(progress_id, event)
+    services.progress.close(progress_id)
+
+
+def _shared_merge(services, urls, on_progress=None):
+    """
+    複数の見積もりURLを合算する（同じ組み合わせの合算が実行中の場合は、その結果を共有する）
+    
+    URLの順序が異なっても、同じ見積もりの組み合わせであれば結果を共有します。
+    結果を共有した場合、取得と合算の進捗は実行中の合算にだけ通知されます。
+    
+    Args:
+        services: アプリケーションのコンポーネント
+        urls: 見積もりURLのリスト
+        on_progress: 取得と合算の進捗イベントを受け取る関数
+        
+    Returns:
+        Tuple: (応答データ, HTTPステータス)
+    """
+    if services.merge_flight is None:
+        return _merge_json(services, urls, on_progress)
+    
+    try:
+        key = services.merge_pipeline.merge_key(urls, {"format": "json"})
+    except ValueError:
+        # 無効なURLを含む場合はまとめずに実行し、通常どおりエラーを返す
+        return _merge_json(services, urls, on_progress)
+    return services.merge_flight.do(key, lambda: _merge_json(services, urls, on_progress))
+
+
+def _merge_json(services, urls, on_progress=None):
+    """
+    複数の見積もりURLを合算し、応答データを作成する
+    
+    Args:
+        services: アプリケーションのコンポーネント
+        urls: 見積もりURLのリスト
+        on_progress: 取得と合算の進捗イベントを受け取る関数
+        
+    Returns:
+        Tuple: (応答データ, HTTPステータス)
+    """
+    try:
+        # 各URLからデータを抽出
         estimate_data_list = []
-        for url in valid_urls:
+        for url in urls:
             try:
-                estimate_data = parser.parse_estimate_url(url)
+                estimate_data = services.parser.parse_from_url(url, on_progress)
                 estimate_data_list.append(estimate_data)
-            except Exception as e:
-                return jsonify({
-                    'success': False,
-                    'error': f'見積もりURLからデータを取得できませんでした: {url}, エラー: {str(e)}'
-                })
-            
-        # 見積もりの合算
-        merged_data = merger.merge_estimates(estimate_data_list)
+            except ValueError as e:
+                logger.error(f"URLの解析エラー: {str(e)}")
+                return {"success": False, "error": f"URLの解析エラー: {str(e)}"}, 400
+        
+        return _merged_payload(services, estimate_data_list, urls, on_progress=on_progress)
+    
+    except Exception as e:
+        logger.exception("見積もり合算中にエラーが発生")
+        return {
+            "success": False,
+            "error": f"処理中にエラーが発生しました: {str(e)}"
+        }, 500
+
+
+def _merged_payload(services, estimate_data_list, urls, source_ids=None, on_progress=None):
+    """
+    取得済みの見積もりを合算して保存し、応答データを作成する
+    
+    Args:
+        services: アプリケーションのコンポーネント
+        estimate_data_list: 正規化された見積もりデータのリスト
+        urls: 合算元の見積もりURLのリスト
+        source_ids: 合算元の見積もりIDのリスト（省略時はURLから取り出す）
+        on_progress: 合算の進捗イベントを受け取る関数
+        
+    Returns:
+        Tuple: (応答データ, HTTPステータス)
+    """
+    # データを合算
+    merged_estimate = services.merger.merge_estimates(estimate_data_list, on_progress)
+    
+    # 合算URLを生成
+    merged_url = services.calculator_api.generate_calculator_url(merged_estimate)
+    
+    # 総コスト計算
+    total_cost = services.calculator_api.calculate_total_cost(merged_estimate)
+    
+    # JSONファイル保存
+    estimate_id = services.save_merged_estimate(merged_estimate, urls, source_ids)
+    
+    # レスポンス作成
+    response_data = {
+        "success": True,
+        "merged_url": merged_url,
+        "download_url": f"/download/{estimate_id}",
+        "data": {
+            "name": merged_estimate.get("name", "合算見積もり"),
+            "total_cost": total_cost,
+            "service_count": len(merged_estimate.get("services", []))
+        }
+    }
+    
+    return response_data, 200
+
+
+@ui_blueprint.route("/merge/upload", methods=["POST"])
+def merge_uploaded_estimates():
+    """
+    アップロードされた見積もりファイルを合算する
+    
+    AWS Pricing Calculatorからエクスポートした見積もりJSONを multipart/form-data の
+    files フィールドで複数送信します。本文はストリームのまま1ファイルずつ解析し、
+    不正なファイルがあった場合は残りの本文を読み込まずに拒否します。
+    
+    フォームデータ:
+        files: 見積もりJSONファイル（複数可）
+        
+    Returns:
+        JSON: 合算結果データ（/merge と同じ形式）
+    """
+    services = _services()
+    config = current_app.config
+    
+    max_body_size = config.get("MAX_CONTENT_LENGTH")
+    if max_body_size is not None and (request.content_length or 0) > max_body_size:
+        return jsonify({"success": False, "error": "リクエストが大きすぎます"}), 413
+    
+    try:
+        multipart_boundary(request.content_type)
+    except UploadError as e:
+        return _upload_error_response(e)
+    
+    # 受付制御（コストは Content-Length から見積もる）
+    try:
+        release = _admit(services, 0)
+    except AdmissionRejected as e:
+        return _rejected_response(e)
+    
+    try:
+        # request.form は本文全体を読み込むため使用しない
+        uploads = iter_uploaded_estimates(
+            request.stream,
+            request.content_type,
+            services.parser,
+            max_file_size=config["UPLOAD_MAX_FILE_SIZE"],
+            max_files=config["UPLOAD_MAX_FILES"],
+            max_body_size=max_body_size
+        )
+        estimate_data_list = []
+        source_ids = []
+        for _, estimate_data in uploads:
+            estimate_data_list.append(estimate_data)
+            source_ids.append(f"upload:{content_hash(estimate_data)[:16]}")
+        payload, status = _merged_payload(services, estimate_data_list, [], source_ids)
+        return jsonify(payload), status
+    except UploadError as e:
+        return _upload_error_response(e)
+    except Exception as e:
+        logger.exception("見積もり合算中にエラーが発生")
+        return jsonify({
+            "success": False,
+            "error": f"処理中にエラーが発生しました: {str(e)}"
+        }), 500
+    finally:
+        release()
+
+
+def _upload_error_response(error):
+    """不正なアップロードの応答（400または413）を作成する"""
+    logger.warning(f"見積もりファイルのアップロードエラー: {str(error)}")
+    return jsonify({"success": False, "error": str(error)}), error.status
+
+
+@ui_blueprint.route("/jobs/merge", methods=["POST"])
+def submit_merge_job():
+    """
+    複数の見積もりURLの合算をジョブとして登録する
+    
+    合算はワーカープール（JOB_QUEUE_BACKEND を設定した場合はキュー経由のワーカー）で実行され、
+    すぐにジョブIDを返します。URL数が多い場合や見積もりが大きい場合に使用します。
+    
+    フォームデータ:
+        urls: 見積もりURLのリスト
+        
+    Returns:
+        JSON: ジョブIDと状態確認用URL（202）
+    """
+    services = _services()
+    urls = request.form.getlist("urls")
+    if not urls:
+        return jsonify({"success": False, "error": "URLが提供されていません"}), 400
+    
+    progress = {"urls_total": len(urls), "urls_fetched": 0, "services_merged": 0}
+    try:
+        if services.job_dispatcher is not None:
+            job = services.job_dispatcher.submit("merge", {"urls": urls}, progress)
+        else:
+            job = services.job_manager.submit("merge", lambda job: _run_merge_job(services.merge_pipeline, job, urls), progress).to_dict()
+    except JobQueueFullError as e:
+        logger.warning(f"合算ジョブを受け付けられません: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 503
+    except Exception as e:
+        logger.exception("合算ジョブの登録中にエラーが発生")
+        return jsonify({
+            "success": False,
+            "error": f"合算ジョブの登録中にエラーが発生: {str(e)}"
+        }), 500
+    
+    response = jsonify({
+        "success": True,
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/jobs/{job['id']}"
+    })
+    response.status_code = 202
+    response.headers["Location"] = f"/jobs/{job['id']}"
+    return response
+
+
+@ui_blueprint.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """
+    ジョブの状態、進捗、結果を取得する
+    
+    Args:
+        job_id: ジョブID
+        
+    Returns:
+        JSON: ジョブの状態（完了後は result に合算URLとダウンロードURLを含む）
+    """
+    services = _services()
+    if services.job_dispatcher is not None:
+        job = services.job_dispatcher.get(job_id)
+    else:
+        job = services.job_manager.get(job_id)
+        job = job.to_dict() if job is not None else None
+    
+    if job is None:
+        return jsonify({"success": False, "error": "ジョブが見つかりません"}), 404
+    return jsonify({"success": True, "job": job})
+
+
+@ui_blueprint.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    """
+    ジョブを取り消す
+    
+    実行待ちのジョブはすぐに取り消され、実行中のジョブは次の区切りで停止します。
+    
+    Args:
+        job_id: ジョブID
+        
+    Returns:
+        JSON: 取り消し要求後のジョブの状態
+    """
+    services = _services()
+    if services.job_dispatcher is not None:
+        job = services.job_dispatcher.cancel(job_id)
+    else:
+        job = services.job_manager.cancel(job_id)
+        job = job.to_dict() if job is not None else None
+    
+    if job is None:
+        return jsonify({"success": False, "error": "ジョブが見つかりません"}), 404
+    return jsonify({"success": True, "job": job})
+
+
+def _admit(services, url_count, group_count=1):
+    """
+    /merge のリクエストを受付制御にかける
+    
+    Args:
+        services: アプリケーションのコンポーネント
+        url_count: 見積もりURLの数
+        group_count: 合算の回数（一括合算ではグループ数。2回目以降は1回ごとに基本コストを加える）
+        
+    Returns:
+        Callable: 処理枠を返す関数（受付制御が無効の場合は何もしない関数）
+        
+    Raises:
+        AdmissionRejected: 受け付けなかった場合
+    """
+    if services.admission is None:
+        return lambda: None
+    
+    client_id = client_address(
+        request.remote_addr,
+        request.headers.get("X-Forwarded-For"),
+        current_app.config["TRUSTED_PROXY_COUNT"]
+    )
+    cost = services.admission.estimate_cost(url_count, request.content_length or 0)
+    cost += (group_count - 1) * services.admission.base_cost
+    return services.admission.acquire(client_id, cost).release
+
+
+def _rejected_response(error):
+    """受付制御で拒否したリクエストの応答（429または503、Retry-After付き）を作成する"""
+    logger.warning(f"リクエストを受け付けませんでした: {error.reason}")
+    response = jsonify({"success": False, "error": str(error)})
+    response.status_code = error.status
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+
+def _wants_ndjson():
+    """リクエストがNDJSONによる逐次応答を求めているか判定する"""
+    if request.values.get("stream", "").lower() == "ndjson":
+        return True
+    return request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def _ndjson_line(payload):
+    """1イベント分のNDJSON行を作成する"""
+    return json.dumps(payload, ensure_ascii=False) + "\n"
+
+
+def _make_cacheable(response, etag):
+    """内容で識別するレスポンス（保存済み見積もり、静的ファイル）を長期キャッシュ可能にする"""
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = ESTIMATE_CACHE_MAX_AGE
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
+
+def _stream_merge(urls, progress_id=None):
+    """
+    見積もりの合算結果をNDJSONで逐次生成する
+    
+    各URLの取得結果を完了順に、続いて合算したサービスをグループごとに、
+    最後に合計コストを送信します。
+    
+    Args:
+        urls: 見積もりURLのリスト
+        progress_id: 進捗を配信する進捗ID
+        
+    Yields:
+        str: NDJSONの1行
+    """
+    services = _services()
+    on_progress = services.progress.publisher(progress_id) if progress_id else None
+    try:
+        for event in services.merge_pipeline.iter_events(urls, on_progress):
+            if on_progress is not None and event["type"] in ("total", "error"):
+                on_progress(event)
+            yield _ndjson_line(event)
+    finally:
+        if progress_id is not None:
+            services.progress.close(progress_id)
+
+
+@ui_blueprint.route("/merge/progress/<progress_id>", methods=["GET"])
+def merge_progress(progress_id):
+    """
+    合算の進捗をServer-Sent Events（SSE）で配信する
+    
+    POST /merge に progress_id を指定した合算の進捗を、fetch（URLごとの取得の完了）、
+    merge（サービスグループの合算）、total（合算結果）、error（処理の中断）のイベントで送信します。
+    進捗はプロセスごとに保持するため、合算と同じプロセスで購読する必要があります。
+    gunicornの複数のワーカーでは購読が別のワーカーに届くことがあるため、合算の開始を
+    PROGRESS_WSGI_CHANNEL_WAIT_SECONDS 秒だけ待ち、始まらない場合は404を返します。
+    購読者はスレッドを占有するため、同時に購読できる数は PROGRESS_WSGI_MAX_SUBSCRIBERS までです。
+    
+    Args:
+        progress_id: 進捗ID
+        
+    Returns:
+        text/event-stream: 進捗イベント。配信済みの合算に再接続した場合は204、合算が見つからない場合は404
+    """
+    services = _services()
+    if not is_valid_progress_id(progress_id):
+        return jsonify({"success": False, "error": "進捗IDが不正です"}), 400
+    
+    try:
+        last_event_id = int(request.headers.get("Last-Event-ID", "0"))
+    except ValueError:
+        last_event_id = 0
+    
+    try:
+        subscription = services.progress.subscribe(
+            progress_id,
+            last_event_id,
+            max_subscribers=current_app.config["PROGRESS_WSGI_MAX_SUBSCRIBERS"],
+            channel_wait=current_app.config["PROGRESS_WSGI_CHANNEL_WAIT_SECONDS"]
+        )
+    except ProgressSubscriptionLimit as e:
+        logger.warning(f"進捗の購読を受け付けませんでした: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 503
+    except ProgressChannelNotFound as e:
+        # EventSource は200以外の応答で再接続をやめる
+        return jsonify({"success": False, "error": str(e)}), 404
+    
+    events, finished = subscription.wait(0)
+    if finished and not events:
+        # 204 を返すとブラウザ（EventSource）は再接続をやめる
+        subscription.close()
+        return Response(status=204)
+    
+    response = Response(
+        _progress_stream(subscription, events, finished, current_app.config["PROGRESS_HEARTBEAT_SECONDS"]),
+        mimetype=SSE_MIMETYPE
+    )
+    # 圧縮やプロキシのバッファリングで配信が遅れないようにする
+    response.headers["Cache-Control"] = "no-cache, no-transform"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _progress_stream(subscription, events, finished, heartbeat):
+    """
+    進捗イベントをSSEで逐次生成する
+    
+    イベントがない間は heartbeat 秒ごとにコメントを送り、切断を検知できるようにします。
+    
+    Args:
+        subscription: 進捗の購読
+        events: 購読時に取り出したイベント
+        finished: 購読時に合算が終了していた場合はTrue
+        heartbeat: コメントを送る間隔（秒）
         
-        if not merged_data:
+    Yields:
+        str: SSEのイベントまたはコメント
+    """
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            for event_id, event in events:
+                yield format_sse(event_id, event)
+            if finished:
+                return
+            events, finished = subscription.wait(heartbeat)
+            if not events and not finished:
+                yield ": keepalive\n\n"
+    finally:
+        subscription.close()
+
+
+def _run_merge_job(pipeline, job, urls):
+    """
+    見積もりの合算をジョブとして実行し、進捗を更新する
+    
+    ジョブはリクエストの外で実行されるため、パイプラインは登録時に渡します。
+    
+    Args:
+        pipeline: 見積もり合算パイプライン
+        job: 実行中のジョブ
+        urls: 見積もりURLのリスト
+        
+    Returns:
+        Dict: 合算URL、ダウンロードURL、合算結果の概要
+        
+    Raises:
+        JobCancelled: 取り消しが要求された場合
+        ValueError: URLの解析や合算に失敗した場合
+    """
+    def on_event(event):
+        job.check_cancelled()
+        if event["type"] == "fetch" and event["success"]:
+            job.increment_progress("urls_fetched")
+        elif event["type"] == "service":
+            job.increment_progress("services_merged")
+    
+    return pipeline.run(urls, on_event)
+
+
+@ui_blueprint.route("/download/<estimate_id>", methods=["GET"])
+def download_estimate(estimate_id):
+    """
+    合算された見積もりデータをダウンロードする
+    
+    Args:
+        estimate_id: 見積もりID
+        
+    Returns:
+        File: JSONファイル
+    """
+    services = _services()
+    try:
+        pending_data = services.write_queue.get_pending(estimate_id)
+        if pending_data is None and not services.estimate_store.exists(estimate_id):
+            logger.error(f"見積もりファイルが見つかりません: {estimate_id}")
             return jsonify({
-                'success': False,
-                'error': '見積もりデータの合算に失敗しました。'
-            })
-        
-        # 合算された見積もりの新しいURLを生成
-        merged_url_data = calculator_api.create_merged_estimate(merged_data)
-        
-        # 応答の作成
-        response = {
-            'success': True,
-            'message': f'{len(valid_urls)}件の見積もりを合算しました。',
-            'merged_url': merged_url_data['url'],
-            'instructions': merged_url_data['instructions'],
-            'data': {
-                'name': merged_data['name'],
-                'total_cost': merged_data['total_cost']
+                "success": False,
+                "error": "見積もりファイルが見つかりません"
+            }), 404
+        
+        if pending_data is not None:
+            # 書き込み待ちの場合はメモリ上のデータを保存時と同じ形式で送信する
+            chunks = services.estimate_store.serialize(pending_data)
+        else:
+            services.estimate_catalog.touch(estimate_id)
+            # 保存先から断片ごとに読み出して送信し、見積もり全体をメモリに載せない
+            chunks = services.estimate_store.open_stream(estimate_id)
+        
+        response = Response(
+            chunks,
+            mimetype="application/json",
+            headers={
+                "Content-Disposition": f"attachment; filename=aws-pricing-merged-{estimate_id[:8]}.json"
             }
-        }
+        )
+        return _make_cacheable(response, estimate_id)
+    
+    except Exception as e:
+        logger.exception("ファイルダウンロード中にエラーが発生")
+        return jsonify({
+            "success": False,
+            "error": f"ファイルダウンロード中にエラーが発生: {str(e)}"
+        }), 500
+
+
+@ui_blueprint.route("/export/<format>/<estimate_id>", methods=["GET"])
+def export_estimate(format, estimate_id):
+    """
+    見積もりデータを指定された形式でエクスポート
+    
+    Args:
+        format: エクスポート形式 (csv, pdf, native)
+        estimate_id: 見積もりID
         
-        return jsonify(response)
+    Returns:
+        File: エクスポートファイル
+    """
+    services = _services()
+    try:
+        estimate_data = services.write_queue.get_pending(estimate_id)
+        if estimate_data is None and not services.estimate_store.exists(estimate_id):
+            logger.error(f"見積もりファイルが見つかりません: {estimate_id}")
+            return jsonify({
+                "success": False,
+                "error": "見積もりファイルが見つかりません"
+            }), 404
+        
+        # JSONファイル読み込み（書き込み待ちの場合はメモリ上のデータを使う）
+        if estimate_data is None:
+            estimate_data = services.estimate_store.load(estimate_id)
+            services.estimate_catalog.touch(estimate_id)
+        
+        if format.lower() not in ("csv", "native", "pdf"):
+            return jsonify({
+                "success": False,
+                "error": "サポートされていない形式です"
+            }), 400
         
+        # 一時ディレクトリの作成
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with metrics.stage(metrics.STAGE_EXPORT):
+                if format.lower() == "csv":
+                    output_path = services.calculator_api.export_to_csv(estimate_data, estimate_id, temp_dir)
+                    mimetype = "text/csv"
+                    extension = "csv"
+                elif format.lower() == "native":
+                    output_path = services.calculator_api.export_to_native(estimate_data, estimate_id, temp_dir)
+                    mimetype = "application/json"
+                    extension = "json"
+                else:
+                    output_path = services.calculator_api.export_to_pdf(estimate_data, estimate_id, temp_dir)
+                    mimetype = "application/pdf"
+                    extension = "pdf"
+            
+            response = send_file(
+                output_path,
+                as_attachment=True,
+                download_name=f"aws-pricing-merged-{estimate_id[:8]}.{extension}",
+                mimetype=mimetype,
+                etag=False
+            )
+            return _make_cacheable(response, f"{format.lower()}-{estimate_id}")
+    
     except Exception as e:
+        logger.exception(f"エクスポート中にエラーが発生: {format}")
         return jsonify({
-            'success': False,
-            'error': f'見積もりの合算中にエラーが発生しました: {str(e)}'
+            "success": False,
+            "error": f"エクスポート中にエラーが発生: {str(e)}"
+        }), 500
+
+
+@ui_blueprint.route("/api/v1/estimates", methods=["GET"])
+def list_estimates():
+    """
+    保存済みの合算見積もりを一覧表示する
+    
+    クエリパラメータ:
+        page: ページ番号（既定: 1）
+        per_page: 1ページあたりの件数（既定: 20、最大: 100）
+        sort: 並び替えの項目（created_at, name, monthly, upfront, 12_months, service_count）
+        order: 並び順（asc, desc）
+        
+    Returns:
+        JSON: 合算見積もりの一覧
+    """
+    return _query_catalog(None)
+
+
+@ui_blueprint.route("/api/v1/estimates/search", methods=["GET"])
+def search_estimates():
+    """
+    保存済みの合算見積もりを名前または元の見積もりIDで検索する
+    
+    クエリパラメータ:
+        q: 検索文字列
+        page, per_page, sort, order: 一覧と同じ
+        
+    Returns:
+        JSON: 検索結果
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"success": False, "error": "検索文字列が指定されていません"}), 400
+    return _query_catalog(query)
+
+
+@ui_blueprint.route("/api/v1/merge/batch", methods=["POST"])
+def merge_batch():
+    """
+    複数の合算グループをまとめて合算する
+    
+    すべてのグループのURLは重複なく1回ずつ取得し、各グループは順に合算します。
+    一部のグループが失敗しても、他のグループの結果は返します。
+    受付制御は /merge と同じで、コストは重複を除いたURL数とグループ数から見積もります。
+    
+    リクエスト（JSON）:
+        groups: 合算グループのリスト。各グループは以下を含む
+            name: グループ名（省略時は group-1 のような連番）
+            urls: 見積もりURLのリスト
+            estimates: アップロードする見積もりJSON（内部形式またはエクスポート形式）のリスト
+        
+    Returns:
+        JSON: グループごとの合算結果またはエラー
+    """
+    services = _services()
+    max_groups = current_app.config["BATCH_MAX_GROUPS"]
+    max_sources = current_app.config["BATCH_MAX_SOURCES"]
+    body = request.get_json(silent=True)
+    groups = body.get("groups") if isinstance(body, dict) else None
+    if not isinstance(groups, list) or not groups:
+        return jsonify({"success": False, "error": "合算グループが指定されていません"}), 400
+    if len(groups) > max_groups:
+        return jsonify({"success": False, "error": f"合算グループは{max_groups}件までです"}), 400
+    
+    normalized_groups = []
+    source_count = 0
+    for index, group in enumerate(groups):
+        if not isinstance(group, dict):
+            return jsonify({"success": False, "error": f"{index + 1}件目の合算グループの形式が不正です"}), 400
+        urls = group.get("urls", [])
+        estimates = group.get("estimates", [])
+        if (not isinstance(urls, list) or not all(isinstance(url, str) for url in urls)
+                or not isinstance(estimates, list) or not (urls or estimates)):
+            return jsonify({"success": False, "error": f"{index + 1}件目の合算グループにURLまたは見積もりがありません"}), 400
+        source_count += len(urls) + len(estimates)
+        normalized_groups.append({
+            "name": str(group.get("name") or f"group-{index + 1}"),
+            "urls": urls,
+            "estimates": estimates
         })
+    
+    if source_count > max_sources:
+        return jsonify({"success": False, "error": f"見積もりは全グループ合計で{max_sources}件までです"}), 400
+    
+    unique_url_count = len({url for group in normalized_groups for url in group["urls"]})
+    try:
+        release = _admit(services, unique_url_count, len(normalized_groups))
+    except AdmissionRejected as e:
+        return _rejected_response(e)
+    
+    try:
+        results = services.merge_pipeline.merge_batch(normalized_groups)
+    except Exception as e:
+        logger.exception("一括合算中にエラーが発生")
+        return jsonify({
+            "success": False,
+            "error": f"処理中にエラーが発生しました: {str(e)}"
+        }), 500
+    finally:
+        release()
+    
+    succeeded = sum(1 for result in results if result["success"])
+    return jsonify({
+        "success": True,
+        "results": results,
+        "summary": {
+            "groups": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "unique_urls": unique_url_count
+        }
+    })
+
+
+def _query_catalog(query):
+    """
+    カタログを一覧または検索し、レスポンスを作成する
+    
+    Args:
+        query: 検索文字列（Noneの場合は一覧）
+        
+    Returns:
+        JSON: 一覧または検索結果
+    """
+    services = _services()
+    try:
+        options = {
+            "page": request.args.get("page", 1, type=int),
+            "per_page": request.args.get("per_page", 20, type=int),
+            "sort": request.args.get("sort", "created_at"),
+            "order": request.args.get("order", "desc")
+        }
+        if query is None:
+            result = services.estimate_catalog.list(**options)
+        else:
+            result = services.estimate_catalog.search(query, **options)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        logger.exception("見積もり一覧の取得中にエラーが発生")
+        return jsonify({
+            "success": False,
+            "error": f"見積もり一覧の取得中にエラーが発生: {str(e)}"
+        }), 500
+    
+    for item in result["items"]:
+        item["download_url"] = f"/download/{item['id']}"
+    
+    return jsonify({"success": True, **result})
+
+
+@ui_blueprint.route("/healthz", methods=["GET"])
+def healthz():
+    """
+    ライブネスチェック（プロセスが応答できるか）
+    
+    保存先などへのI/Oは行わず、常に200を返します。
+    
+    Returns:
+        JSON: {"success": true, "status": "ok"}
+    """
+    response = jsonify({"success": True, "status": "ok"})
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@ui_blueprint.route("/readyz", methods=["GET"])
+def readyz():
+    """
+    レディネスチェック（リクエストを受け付けられるか）
+    
+    保存先への書き込み、書き込みキュー、合算ジョブと受付制御の待ち行列を確認します。
+    判定結果は READINESS_CACHE_SECONDS 秒のあいだ再利用します。
+    
+    Returns:
+        JSON: 項目ごとの結果。受け付けられる場合は200、受け付けられない場合は503
+    """
+    result = _services().readiness.check()
+    response = jsonify({
+        "success": result["ready"],
+        "status": "ready" if result["ready"] else "unavailable",
+        "checks": result["checks"]
+    })
+    response.status_code = 200 if result["ready"] else 503
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@ui_blueprint.route("/admin/metrics", methods=["GET"])
+def admin_metrics():
+    """
+    運用向けの統計情報を取得する
+    
+    Returns:
+        JSON: 保持期間管理（削除件数、削除バイト数、合計バイト数など）、
+              書き込みキュー（書き込み待ち件数、書き込み件数など）と
+              合算ジョブ（実行待ち・実行中の件数など）の統計情報。
+              キュー経由の場合は job_queue にキューの滞留件数とワーカーごとの処理件数を含む。
+              admission に /merge の受付制御（処理中・待ち行列の件数、拒否件数など）を、
+              single_flight に同時実行をまとめた合算と見積もりの取得の件数を、
+              progress に進捗配信（チャネル数、購読者数など）を含む
+    """
+    services = _services()
+    return jsonify({
+        "success": True,
+        "retention": services.retention_worker.stats(),
+        "write_queue": services.write_queue.stats(),
+        "jobs": services.job_manager.stats(),
+        "job_queue": services.job_dispatcher.stats() if services.job_dispatcher is not None else None,
+        "admission": services.admission.stats() if services.admission is not None else None,
+        "single_flight": {
+            "merges": services.merge_flight.stats() if services.merge_flight is not None else None,
+            "fetches": services.parser.fetch_flight.stats() if services.parser.fetch_flight is not None else None
+        },
+        "progress": services.progress.stats()
+    })
+
+
+@ui_blueprint.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """
+    Prometheus形式のメトリクスを取得する
+    
+    gunicorn の複数のワーカーで運用する場合は、全ワーカーの値を集計して返します
+    （PROMETHEUS_MULTIPROC_DIR を設定した場合）。
+    
+    Returns:
+        text/plain: 処理段階ごとの所要時間（merger_stage_duration_seconds）とエラー件数
+                    （merger_stage_errors_total）、合算したサービス数（merger_services_total）、
+                    キャッシュの利用件数（merger_cache_requests_total）。
+                    無効な場合、または prometheus_client がない場合は404
+    """
+    if not current_app.config["METRICS_ENABLED"] or not metrics.is_available():
+        abort(404)
+    body, content_type = metrics.render()
+    response = Response(body, content_type=content_type)
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@ui_blueprint.route("/sample/<sample_id>", methods=["GET"])
+def get_sample(sample_id):
+    """
+    サンプルデータを取得する
+    
+    サンプルは起動時に読み込んだメモリ上のカタログから、事前に作成した本文とETagで返します。
+    
+    Args:
+        sample_id: サンプルID
+        
+    Returns:
+        JSON: サンプルデータ
+    """
+    services = _services()
+    sample = services.sample_catalog.get(sample_id)
+    if sample is None:
+        logger.error(f"サンプルファイルが見つかりません: {sample_id}")
+        return jsonify({
+            "success": False,
+            "error": "サンプルファイルが見つかりません"
+        }), 404
+    
+    response = Response(sample.body, mimetype="application/json")
+    response.set_etag(sample.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = SAMPLE_CACHE_MAX_AGE
+    return response.make_conditional(request)
+
+
+@ui_blueprint.app_errorhandler(404)
+def page_not_found(e):
+    """404エラーハンドラ"""
+    logger.info("404 Not Found: %s", request.path)
+    return render_template("404.html"), 404
+
+
+@ui_blueprint.app_errorhandler(500)
+def server_error(e):
+    """500エラーハンドラ"""
+    logger.error("500 Server Error: %s", str(e))
+    return render_template("500.html"), 500
@@ -0,0 +1,131 @@
+"""
+ワーカー数算出モジュール
+
+コンテナのCPU・メモリの上限（cgroup v1 / v2）を読み取り、
+gunicorn のワーカープロセス数とスレッド数を算出します。
+"""
+
+import os
+import math
+from typing import Optional, Tuple
+
+# cgroup のマウント先
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+# cgroup v1 でメモリの上限を設定していない場合の値（これ以上は上限なしとみなす）
+_UNLIMITED_MEMORY = 1 << 60
+
+
+def _read_first_line(path: str) -> Optional[str]:
+    """ファイルの1行目を読む。読めない場合はNone"""
+    try:
+        with open(path, 'r', encoding='ascii') as f:
+            return f.readline().strip()
+    except (OSError, UnicodeError):
+        return None
+
+
+def cpu_limit(cgroup_root: str = CGROUP_ROOT) -> float:
+    """
+    プロセスが使用できるCPU数を返す
+
+    cgroup のCPUクォータ、CPUアフィニティ、論理CPU数のうち最も小さい値を使用します。
+
+    Args:
+        cgroup_root: cgroup のマウント先
+
+    Returns:
+        float: 使用できるCPU数（クォータの場合は小数になる）
+    """
+    try:
+        cpus = float(len(os.sched_getaffinity(0)))
+    except (AttributeError, OSError):
+        cpus = float(os.cpu_count() or 1)
+
+    quota = None
+    # cgroup v2: "<quota> <period>"（上限なしは "max <period>"）
+    line = _read_first_line(os.path.join(cgroup_root, 'cpu.max'))
+    if line:
+        parts = line.split()
+        if len(parts) == 2 and parts[0] != 'max':
+            try:
+                quota = int(parts[0]) / int(parts[1])
+            except (ValueError, ZeroDivisionError):
+                quota = None
+    else:
+        # cgroup v1: cfs_quota_us が -1 の場合は上限なし
+        quota_us = _read_first_line(os.path.join(cgroup_root, 'cpu', 'cpu.cfs_quota_us'))
+        period_us = _read_first_line(os.path.join(cgroup_root, 'cpu', 'cpu.cfs_period_us'))
+        try:
+            if quota_us and period_us and int(quota_us) > 0:
+                quota = int(quota_us) / int(period_us)
+        except (ValueError, ZeroDivisionError):
+            quota = None
+
+    if quota is not None and quota > 0:
+        cpus = min(cpus, quota)
+    return cpus
+
+
+def memory_limit_bytes(cgroup_root: str = CGROUP_ROOT) -> Optional[int]:
+    """
+    プロセスが使用できるメモリのバイト数を返す
+
+    cgroup のメモリ上限と物理メモリのうち小さい値を使用します。
+
+    Args:
+        cgroup_root: cgroup のマウント先
+
+    Returns:
+        int: 使用できるバイト数。判定できない場合はNone
+    """
+    limit = None
+    for path in (os.path.join(cgroup_root, 'memory.max'),
+                 os.path.join(cgroup_root, 'memory', 'memory.limit_in_bytes')):
+        line = _read_first_line(path)
+        if line is None:
+            continue
+        if line.isdigit() and int(line) < _UNLIMITED_MEMORY:
+            limit = int(line)
+        break
+
+    try:
+        physical = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        physical = None
+
+    if limit is None:
+        return physical
+    if physical is None:
+        return limit
+    return min(limit, physical)
+
+
+def recommended_concurrency(cpus: float, memory_bytes: Optional[int], worker_memory_bytes: int,
+                            threads_per_worker: int = 4, max_threads: int = 16) -> Tuple[int, int]:
+    """
+    CPU数とメモリ量からワーカープロセス数とスレッド数を算出する
+
+    ワーカー数は (2 × CPU数 + 1) を基本とし、メモリに収まる数までに抑えます。
+    メモリの制約でワーカー数を減らした場合は、外部APIの応答待ちが多いことから
+    スレッド数を増やして同時に処理できるリクエスト数を保ちます。
+
+    Args:
+        cpus: 使用できるCPU数
+        memory_bytes: 使用できるメモリのバイト数（Noneの場合はメモリで制限しない）
+        worker_memory_bytes: ワーカー1つあたりに見込むメモリのバイト数
+        threads_per_worker: ワーカー1つあたりの基本のスレッド数
+        max_threads: ワーカー1つあたりのスレッド数の上限
+
+    Returns:
+        Tuple[int, int]: (ワーカープロセス数, ワーカーあたりのスレッド数)
+    """
+    # 1CPU未満のクォータでは、1つのワーカーが応答待ちの間も受け付けられるよう2つにする
+    cpu_workers = 2 * math.ceil(cpus) + 1 if cpus >= 1 else 2
+    workers = cpu_workers
+    if memory_bytes is not None and worker_memory_bytes > 0:
+        workers = min(workers, max(1, memory_bytes // worker_memory_bytes))
+
+    target = cpu_workers * threads_per_worker
+    threads = min(max_threads, max(threads_per_worker, math.ceil(target / workers)))
+    return int(workers), int(threads)
@@ -0,0 +1,173 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const urlInputs = document.getElementById('urlInputs');
+    const addUrlBtn = document.getElementById('addUrlBtn');
+    const mergeForm = document.getElementById('mergeForm');
+    const errorMessage = document.getElementById('errorMessage');
+    const loader = document.getElementById('loader');
+    const loaderMessage = document.getElementById('loaderMessage');
+    const resultContainer = document.getElementById('resultContainer');
+    const estimateName = document.getElementById('estimateName');
+    const monthlyCost = document.getElementById('monthlyCost');
+    const upfrontCost = document.getElementById('upfrontCost');
+    const annualCost = document.getElementById('annualCost');
+    const mergedUrl = document.getElementById('mergedUrl');
+    const copyUrlBtn = document.getElementById('copyUrlBtn');
+    const downloadLink = document.getElementById('downloadLink');
+    const newEstimateBtn = document.getElementById('newEstimateBtn');
+
+    // URLを追加
+    addUrlBtn.addEventListener('click', function() {
+        const container = document.createElement('div');
+        container.className = 'url-input-container';
+        container.innerHTML = `
+            <input type="url" class="form-control url-input" placeholder="https://calculator.aws/#/estimate?id=..." pattern="https://calculator\.aws/.*" required>
+            <button type="button" class="btn btn-outline-danger remove-url-btn">削除</button>
+        `;
+        urlInputs.appendChild(container);
+
+        // 最初の削除ボタンを有効化
+        const removeButtons = document.querySelectorAll('.remove-url-btn');
+        if (removeButtons.length > 1) {
+            removeButtons.forEach(btn => btn.disabled = false);
+        }
+
+        // 削除ボタンにイベントリスナーを追加
+        const removeBtn = container.querySelector('.remove-url-btn');
+        removeBtn.addEventListener('click', function() {
+            container.remove();
+            // 入力欄が1つだけになったら削除ボタンを無効化
+            const remainingRemoveBtns = document.querySelectorAll('.remove-url-btn');
+            if (remainingRemoveBtns.length === 1) {
+                remainingRemoveBtns[0].disabled = true;
+            }
+        });
+    });
+
+    // 進捗IDを作成
+    function createProgressId() {
+        const bytes = new Uint8Array(16);
+        window.crypto.getRandomValues(bytes);
+        return Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+    }
+
+    // 合算の進捗を購読（合算と同じプロセスで購読できるASGI版の場合だけ）
+    function watchProgress(progressId, total) {
+        if (mergeForm.dataset.progress !== 'sse' || !window.EventSource) {
+            return null;
+        }
+        const source = new EventSource(`/merge/progress/${progressId}`);
+        let fetched = 0;
+        source.addEventListener('fetch', function() {
+            fetched += 1;
+            loaderMessage.textContent = `見積もりを取得中... (${fetched}/${total})`;
+        });
+        source.addEventListener('merge', function(event) {
+            const data = JSON.parse(event.data);
+            loaderMessage.textContent = `サービスを合算中... (${data.merged}/${data.total})`;
+        });
+        // 合算の終了時と接続エラー時は購読を終了
+        source.addEventListener('total', () => source.close());
+        source.addEventListener('error', () => source.close());
+        return source;
+    }
+
+    // フォーム送信
+    mergeForm.addEventListener('submit', function(e) {
+        e.preventDefault();
+        
+        // 入力値を取得
+        const urls = Array.from(document.querySelectorAll('.url-input')).map(input => input.value);
+        
+        // バリデーション
+        if (urls.some(url => !url || !url.includes('calculator.aws'))) {
+            errorMessage.textContent = '有効なAWS Pricing Calculator URLを入力してください。';
+            return;
+        }
+        
+        errorMessage.textContent = '';
+        
+        // ローディング表示
+        loaderMessage.textContent = '見積もりを合算中...';
+        loader.style.display = 'block';
+        
+        // APIリクエスト
+        const progressId = createProgressId();
+        const progress = watchProgress(progressId, urls.length);
+        const formData = new FormData();
+        urls.forEach(url => formData.append('urls', url));
+        if (progress) {
+            formData.append('progress_id', progressId);
+        }
+        
+        fetch('/merge', {
+            method: 'POST',
+            body: formData
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (progress) {
+                progress.close();
+            }
+            loader.style.display = 'none';
+            
+            if (data.success) {
+                // 結果表示
+                resultContainer.style.display = 'block';
+                mergeForm.style.display = 'none';
+                
+                estimateName.textContent = data.data.name;
+                monthlyCost.textContent = data.data.total_cost.monthly;
+                upfrontCost.textContent = data.data.total_cost.upfront;
+                annualCost.textContent = data.data.total_cost['12_months'];
+                mergedUrl.value = data.merged_url;
+                downloadLink.href = data.download_url;
+            } else {
+                // エラー表示
+                errorMessage.textContent = data.error || 'エラーが発生しました。';
+                loader.style.display = 'none';
+            }
+        })
+        .catch(error => {
+            if (progress) {
+                progress.close();
+            }
+            console.error('Error:', error);
+            errorMessage.textContent = 'リクエスト処理中にエラーが発生しました。';
+            loader.style.display = 'none';
+        });
+    });
+
+    // URLコピー
+    copyUrlBtn.addEventListener('click', function() {
+        mergedUrl.select();
+        document.execCommand('copy');
+        copyUrlBtn.textContent = 'コピー完了！';
+        setTimeout(() => {
+            copyUrlBtn.textContent = 'コピー';
+        }, 2000);
+    });
+
+    // 新規見積もり作成
+    newEstimateBtn.addEventListener('click', function() {
+        resultContainer.style.display = 'none';
+        mergeForm.style.display = 'block';
+        
+        // フォームをリセット
+        const firstInput = document.querySelector('.url-input');
+        if (firstInput) {
+            firstInput.value = '';
+        }
+        
+        // 追加の入力欄を削除
+        const containers = document.querySelectorAll('.url-input-container');
+        for (let i = 1; i < containers.length; i++) {
+            containers[i].remove();
+        }
+        
+        // 最初の削除ボタンを無効化
+        const firstRemoveBtn = document.querySelector('.remove-url-btn');
+        if (firstRemoveBtn) {
+            firstRemoveBtn.disabled = true;
+        }
+    });
+});
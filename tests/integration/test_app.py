@@ -0,0 +1,468 @@
+import unittest
+import gzip
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+
+from unittest.mock import patch
+
+from src import metrics
+from src.app import create_app, get_services
+from src.jobs.dispatcher import QueuedJobDispatcher
+from src.jobs.job_queue import LocalJobQueue
+from src.jobs.status_store import SQLiteJobStatusStore
+from src.jobs.worker import MergeWorker
+from src.storage.sqlite_store import SQLiteEstimateStore
+
+# 出力先を一時ディレクトリに向けてアプリケーションを作成する
+_TEMP_ROOT = tempfile.mkdtemp()
+app = create_app({
+    'TESTING': True,
+    'MERGED_ESTIMATES_DIR': os.path.join(_TEMP_ROOT, 'merged_estimates'),
+    'LOG_DIR': os.path.join(_TEMP_ROOT, 'logs'),
+    'COMPRESSION_MIN_SIZE': 256,
+    # 同じクライアントから多数の合算を行うため、クライアントごとの上限は設けない
+    'ADMISSION_CLIENT_RATE': 0,
+    'READINESS_CACHE_SECONDS': 0,
+    # 別のワーカーの合算を想定した購読を待たせない
+    'PROGRESS_WSGI_CHANNEL_WAIT_SECONDS': 0.01
+})
+services = get_services(app)
+
+URLS = [
+    'https://calculator.aws/#/estimate?id=123456abcdef',
+    'https://calculator.aws/#/estimate?id=fedcba654321'
+]
+
+
+def tearDownModule():
+    shutil.rmtree(_TEMP_ROOT, ignore_errors=True)
+
+
+class TestMergeRoutes(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def _read_ndjson(self, response):
+        return [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+
+    def test_merge(self):
+        response = self.client.post('/merge', data={'urls': URLS})
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertTrue(body['success'])
+        self.assertTrue(body['download_url'].startswith('/download/'))
+
+        download = self.client.get(body['download_url'])
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(json.loads(download.get_data())['name'], body['data']['name'])
+
+    def test_merge_upload(self):
+        with open(os.path.join(os.path.dirname(__file__), '..', '..', 'json_samples', 'My-Estimate.json'), 'rb') as f:
+            exported = f.read()
+        response = self.client.post('/merge/upload', data={
+            'files': [(io.BytesIO(exported), 'a.json'), (io.BytesIO(exported), 'b.json')]
+        }, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertTrue(body['success'])
+
+        download = self.client.get(body['download_url'])
+        self.assertEqual(download.status_code, 200)
+
+    def test_merge_upload_invalid(self):
+        response = self.client.post('/merge/upload', data={
+            'files': [(io.BytesIO(b'not json'), 'bad.json')]
+        }, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('bad.json', response.get_json()['error'])
+
+        response = self.client.post('/merge/upload', data={'urls': URLS})
+        self.assertEqual(response.status_code, 400)
+
+    def test_merge_progress(self):
+        response = self.client.post('/merge', data={'urls': URLS, 'progress_id': 'progress-wsgi-1'})
+        self.assertEqual(response.status_code, 200)
+
+        # 合算の終了後も、しばらくは進捗を購読できる
+        progress = self.client.get('/merge/progress/progress-wsgi-1')
+        self.assertEqual(progress.status_code, 200)
+        self.assertEqual(progress.mimetype, 'text/event-stream')
+        self.assertIn('no-transform', progress.headers['Cache-Control'])
+        blocks = [block for block in progress.get_data(as_text=True).split('\n\n') if block.startswith('id: ')]
+        events = []
+        for block in blocks:
+            fields = dict(line.split(': ', 1) for line in block.splitlines())
+            events.append((fields['event'], json.loads(fields['data'])))
+        self.assertEqual([name for name, _ in events[:2]], ['fetch', 'fetch'])
+        self.assertEqual(events[-1][0], 'total')
+        self.assertEqual(events[-1][1]['download_url'], response.get_json()['download_url'])
+
+        last_event_id = blocks[-1].splitlines()[0].split(': ', 1)[1]
+        resumed = self.client.get('/merge/progress/progress-wsgi-1', headers={'Last-Event-ID': last_event_id})
+        self.assertEqual(resumed.status_code, 204)
+
+    def test_merge_progress_unknown_channel(self):
+        # 別のワーカーで行われている合算の購読は、待ち続けずに404を返す
+        response = self.client.get('/merge/progress/progress-other-worker')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(services.progress.stats()['subscribers'], 0)
+        # 画面はWSGI版では進捗を購読しない
+        self.assertNotIn(b'data-progress', self.client.get('/').data)
+
+    def test_merge_progress_invalid_id(self):
+        self.assertEqual(self.client.get('/merge/progress/bad').status_code, 400)
+        response = self.client.post('/merge', data={'urls': URLS, 'progress_id': '../bad'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_identical_merges_share_download_url(self):
+        first = self.client.post('/merge', data={'urls': URLS}).get_json()
+        second = self.client.post('/merge', data={'urls': URLS}).get_json()
+        self.assertEqual(first['download_url'], second['download_url'])
+
+    def test_download_cacheable(self):
+        body = self.client.post('/merge', data={'urls': URLS}).get_json()
+        download = self.client.get(body['download_url'])
+        self.assertIn('immutable', download.headers['Cache-Control'])
+        etag = download.headers['ETag']
+
+        revalidated = self.client.get(body['download_url'], headers={'If-None-Match': etag})
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_download_compressed(self):
+        body = self.client.post('/merge', data={'urls': URLS}).get_json()
+        download = self.client.get(body['download_url'], headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(download.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(download.get_data()))['name'], body['data']['name'])
+
+        revalidated = self.client.get(body['download_url'], headers={
+            'Accept-Encoding': 'gzip',
+            'If-None-Match': download.headers['ETag']
+        })
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_download_invalid_id(self):
+        response = self.client.get('/download/not-an-id')
+        self.assertEqual(response.status_code, 404)
+
+    def test_catalog_list_and_search(self):
+        body = self.client.post('/merge', data={'urls': URLS}).get_json()
+        estimate_id = body['download_url'].rsplit('/', 1)[1]
+        self.assertTrue(services.write_queue.flush())
+
+        listing = self.client.get('/api/v1/estimates?per_page=100').get_json()
+        self.assertTrue(listing['success'])
+        self.assertIn(estimate_id, [item['id'] for item in listing['items']])
+
+        found = self.client.get('/api/v1/estimates/search?q=fedcba654321').get_json()
+        self.assertIn(estimate_id, [item['id'] for item in found['items']])
+        self.assertEqual(found['items'][0]['download_url'], f'/download/{found["items"][0]["id"]}')
+
+    def test_catalog_invalid_sort(self):
+        response = self.client.get('/api/v1/estimates?sort=unknown')
+        self.assertEqual(response.status_code, 400)
+
+    def test_admin_metrics(self):
+        body = self.client.get('/admin/metrics').get_json()
+        self.assertTrue(body['success'])
+        self.assertIn('evicted_size', body['retention'])
+        self.assertIn('pending', body['write_queue'])
+        self.assertIn('running', body['jobs'])
+        self.assertIn('rejected_rate_limited', body['admission'])
+        self.assertIn('shared', body['single_flight']['merges'])
+
+    @unittest.skipIf(not metrics.is_available(), 'prometheus_client がインストールされていません')
+    def test_prometheus_metrics(self):
+        self.client.post('/merge', data={'urls': URLS})
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        text = response.get_data(as_text=True)
+        for stage in ('validate', 'merge', 'url', 'total_cost', 'persist'):
+            self.assertIn(f'merger_stage_duration_seconds_count{{stage="{stage}"}}', text)
+        self.assertIn('merger_services_total{kind="merged"}', text)
+
+        with patch.dict(app.config, {'METRICS_ENABLED': False}):
+            self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    def test_index_uses_fingerprinted_assets(self):
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age=', response.headers['Cache-Control'])
+        html = response.get_data(as_text=True)
+        urls = re.findall(r'(?:href|src)="(/assets/[^"]+)"', html)
+        self.assertEqual(len(urls), 2)
+
+        for url in urls:
+            asset = self.client.get(url)
+            self.assertEqual(asset.status_code, 200)
+            self.assertIn('immutable', asset.headers['Cache-Control'])
+            self.assertIn('max-age=31536000', asset.headers['Cache-Control'])
+
+        # 以前のデプロイのハッシュは404
+        self.assertEqual(self.client.get('/assets/js/app.000000000000.js').status_code, 404)
+
+    def test_index_not_modified(self):
+        etag = self.client.get('/').headers['ETag']
+        response = self.client.get('/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_healthz(self):
+        response = self.client.get('/healthz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['status'], 'ok')
+        self.assertEqual(response.headers['Cache-Control'], 'no-store')
+
+    def test_readyz(self):
+        response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertTrue(body['success'])
+        self.assertTrue(body['checks']['storage']['ok'])
+
+    def test_readyz_storage_not_writable(self):
+        with patch.object(services.estimate_store, 'check_writable', side_effect=OSError('Read-only file system')):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.get_json()['checks']['storage']['ok'])
+
+    def test_merge_job(self):
+        response = self.client.post('/jobs/merge', data={'urls': URLS})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()['job_id']
+        self.assertEqual(response.headers['Location'], f'/jobs/{job_id}')
+
+        services.job_manager.get(job_id).future.result(timeout=10)
+        job = self.client.get(f'/jobs/{job_id}').get_json()['job']
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['progress']['urls_fetched'], 2)
+        self.assertGreater(job['progress']['services_merged'], 0)
+
+        download = self.client.get(job['result']['download_url'])
+        self.assertEqual(download.status_code, 200)
+
+    def test_merge_job_invalid_url(self):
+        job_id = self.client.post('/jobs/merge', data={'urls': ['https://example.com/']}).get_json()['job_id']
+        services.job_manager.get(job_id).future.result(timeout=10)
+        job = self.client.get(f'/jobs/{job_id}').get_json()['job']
+        self.assertEqual(job['status'], 'failed')
+        self.assertIn('URLの解析エラー', job['error'])
+
+    def test_merge_job_not_found(self):
+        self.assertEqual(self.client.get('/jobs/missing').status_code, 404)
+        self.assertEqual(self.client.delete('/jobs/missing').status_code, 404)
+
+    def test_merge_job_no_urls(self):
+        self.assertEqual(self.client.post('/jobs/merge', data={}).status_code, 400)
+
+    def test_queued_merge_job(self):
+        queue = LocalJobQueue()
+        status_store = SQLiteJobStatusStore(os.path.join(_TEMP_ROOT, 'jobs.sqlite3'))
+        dispatcher = QueuedJobDispatcher(queue, status_store, backend='local')
+        worker = MergeWorker(queue, status_store, services.merge_pipeline)
+
+        with patch.object(services, 'job_dispatcher', dispatcher):
+            job_id = self.client.post('/jobs/merge', data={'urls': URLS}).get_json()['job_id']
+            self.assertEqual(self.client.get(f'/jobs/{job_id}').get_json()['job']['status'], 'queued')
+
+            self.assertTrue(worker.run_once())
+            worker._report(force=True)
+            job = self.client.get(f'/jobs/{job_id}').get_json()['job']
+            self.assertEqual(job['status'], 'succeeded')
+            self.assertEqual(self.client.get(job['result']['download_url']).status_code, 200)
+
+            metrics = self.client.get('/admin/metrics').get_json()
+            self.assertEqual(metrics['job_queue']['depth'], {'visible': 0, 'in_flight': 0})
+            self.assertEqual(metrics['job_queue']['completed_last_minute'], 1)
+
+    def test_merge_batch(self):
+        response = self.client.post('/api/v1/merge/batch', json={'groups': [
+            {'name': 'project-a', 'urls': URLS},
+            {'name': 'project-b', 'urls': [URLS[0], 'https://example.com/']},
+            {'urls': [URLS[1]]}
+        ]})
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual([result['name'] for result in body['results']], ['project-a', 'project-b', 'group-3'])
+        self.assertEqual([result['success'] for result in body['results']], [True, False, True])
+        self.assertEqual(body['summary'], {'groups': 3, 'succeeded': 2, 'failed': 1, 'unique_urls': 3})
+        self.assertEqual(self.client.get(body['results'][0]['download_url']).status_code, 200)
+
+    def test_merge_batch_invalid(self):
+        self.assertEqual(self.client.post('/api/v1/merge/batch', json={}).status_code, 400)
+        self.assertEqual(self.client.post('/api/v1/merge/batch', json={'groups': [{'name': 'empty'}]}).status_code, 400)
+        self.assertEqual(self.client.post('/api/v1/merge/batch', data='not json').status_code, 400)
+
+    def test_sample(self):
+        response = self.client.get('/sample/sample1')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()['success'])
+
+        revalidated = self.client.get('/sample/sample1', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(self.client.get('/sample/missing').status_code, 404)
+
+    def test_merge_no_urls(self):
+        response = self.client.post('/merge', data={})
+        self.assertEqual(response.status_code, 400)
+
+    def test_merge_ndjson_stream(self):
+        response = self.client.post('/merge', data={'urls': URLS, 'stream': 'ndjson'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+
+        events = self._read_ndjson(response)
+        types = [event['type'] for event in events]
+        self.assertEqual(types[:2], ['fetch', 'fetch'])
+        self.assertEqual(types[-1], 'total')
+        self.assertTrue(all(t == 'service' for t in types[2:-1]))
+
+        total = events[-1]
+        self.assertEqual(total['data']['service_count'], len(types) - 3)
+
+        # 通常の合算と同じ結果になる
+        expected = self.client.post('/merge', data={'urls': URLS}).get_json()
+        self.assertEqual(total['data'], expected['data'])
+
+    def test_merge_ndjson_accept_header(self):
+        response = self.client.post('/merge', data={'urls': URLS[:1]},
+                                    headers={'Accept': 'application/x-ndjson'})
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertEqual(self._read_ndjson(response)[-1]['type'], 'total')
+
+    def test_merge_ndjson_invalid_url(self):
+        response = self.client.post('/merge', data={'urls': ['https://example.com/'], 'stream': 'ndjson'})
+        events = self._read_ndjson(response)
+        self.assertFalse(events[0]['success'])
+        self.assertEqual(events[-1]['type'], 'error')
+
+
+class TestCreateApp(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.app = create_app({
+            'TESTING': True,
+            'MERGED_ESTIMATES_DIR': os.path.join(self.temp_dir, 'merged_estimates'),
+            'LOG_DIR': os.path.join(self.temp_dir, 'logs'),
+            'START_BACKGROUND_SERVICES': False
+        })
+        self.services = get_services(self.app)
+
+    def tearDown(self):
+        self.services.shutdown()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_background_services_deferred(self):
+        # フォーク前に作成する場合はスレッドを開始しない
+        self.assertIsNone(self.services.write_queue._thread)
+        self.services.start()
+        self.assertTrue(self.services.write_queue._thread.is_alive())
+        # 2回目の呼び出しは何もしない
+        self.services.start()
+
+    def test_merge_without_background_services(self):
+        client = self.app.test_client()
+        body = client.post('/merge', data={'urls': URLS}).get_json()
+        self.assertTrue(body['success'])
+        self.assertEqual(client.get(body['download_url']).status_code, 200)
+
+    def test_apps_do_not_share_services(self):
+        self.assertIsNot(self.services, services)
+        self.assertIsNot(self.services.estimate_store, services.estimate_store)
+
+    def test_backend_overrides(self):
+        # 保存先とキューは環境変数ではなく、上書きした設定から生成する
+        overrides = {
+            'TESTING': True,
+            'MERGED_ESTIMATES_DIR': os.path.join(self.temp_dir, 'overrides'),
+            'LOG_DIR': os.path.join(self.temp_dir, 'logs'),
+            'START_BACKGROUND_SERVICES': False,
+            'ESTIMATE_STORAGE_BACKEND': 'sqlite',
+            'JOB_QUEUE_BACKEND': 'local',
+            'JOB_STATUS_BACKEND': 'sqlite'
+        }
+        with patch.dict(os.environ, {'ESTIMATE_STORAGE_BACKEND': 's3', 'JOB_QUEUE_BACKEND': 'sqs'}):
+            app_services = get_services(create_app(overrides))
+        try:
+            self.assertIsInstance(app_services.estimate_store, SQLiteEstimateStore)
+            self.assertIsInstance(app_services.job_queue, LocalJobQueue)
+            self.assertIsInstance(app_services.job_dispatcher.status_store, SQLiteJobStatusStore)
+        finally:
+            app_services.shutdown()
+
+        # 共有できる保存先の確認も、生成に使う設定と同じ値で行う
+        with patch.dict(os.environ, {'ESTIMATE_STORAGE_BACKEND': 's3', 'JOB_STATUS_BACKEND': 's3'}):
+            with self.assertRaisesRegex(ValueError, 'ESTIMATE_STORAGE_BACKEND=s3'):
+                create_app(dict(overrides, JOB_QUEUE_BACKEND='sqs', JOB_QUEUE_SQS_URL='https://sqs.example.com/queue',
+                                ESTIMATE_STORAGE_BACKEND='filesystem', JOB_STATUS_BACKEND='s3'))
+
+
+class TestAdmission(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.app = create_app({
+            'TESTING': True,
+            'MERGED_ESTIMATES_DIR': os.path.join(self.temp_dir, 'merged_estimates'),
+            'LOG_DIR': os.path.join(self.temp_dir, 'logs'),
+            'START_BACKGROUND_SERVICES': False,
+            'ADMISSION_CLIENT_RATE': 0.1,
+            'ADMISSION_CLIENT_BURST': 7,
+            'TRUSTED_PROXY_COUNT': 1
+        })
+        self.services = get_services(self.app)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.services.shutdown()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _merge(self, forwarded_for):
+        # 処理枠はレスポンスを閉じたときに返される
+        response = self.client.post('/merge', data={'urls': URLS}, headers={'X-Forwarded-For': forwarded_for})
+        response.close()
+        return response
+
+    def test_rate_limited(self):
+        # 1回の合算のコストは 1 + 2件 = 3（と本文のサイズ分）のため、2回まで受け付ける
+        self.assertEqual(self._merge('1.2.3.4').status_code, 200)
+        self.assertEqual(self._merge('1.2.3.4').status_code, 200)
+        response = self._merge('1.2.3.4')
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(response.get_json()['success'])
+        self.assertGreaterEqual(int(response.headers['Retry-After']), 1)
+
+        # X-Forwarded-For の先頭を変えても同じクライアントとして扱う
+        self.assertEqual(self._merge('5.6.7.8, 1.2.3.4').status_code, 429)
+        self.assertEqual(self._merge('5.6.7.8').status_code, 200)
+
+        stats = self.client.get('/admin/metrics').get_json()['admission']
+        self.assertEqual(stats['rejected_rate_limited'], 2)
+        self.assertEqual(stats['admitted'], 3)
+        self.assertEqual(stats['in_flight'], 0)
+
+    def test_merge_batch_admitted(self):
+        # 一括合算のコストは 1 + 重複を除いた2件 + 追加の2グループ = 5 のため、2回目は受け付けない
+        groups = {'groups': [{'urls': URLS}, {'urls': [URLS[0]]}, {'urls': [URLS[1]]}]}
+        headers = {'X-Forwarded-For': '1.2.3.4'}
+        self.assertEqual(self.client.post('/api/v1/merge/batch', json=groups, headers=headers).status_code, 200)
+        response = self.client.post('/api/v1/merge/batch', json=groups, headers=headers)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response.headers)
+
+        stats = self.services.admission.stats()
+        self.assertEqual(stats['admitted'], 1)
+        self.assertEqual(stats['in_flight'], 0)
+
+    def test_ndjson_holds_ticket_until_closed(self):
+        response = self.client.post('/merge?stream=ndjson', data={'urls': URLS}, buffered=False)
+        self.assertEqual(self.services.admission.stats()['in_flight'], 1)
+        response.get_data()
+        response.close()
+        self.assertEqual(self.services.admission.stats()['in_flight'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
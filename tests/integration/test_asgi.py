@@ -0,0 +1,215 @@
+import unittest
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+from urllib.parse import urlencode
+
+from aiohttp import web
+
+from loadtest.stub_calculator import StubCalculator
+from src.ui.asgi import create_asgi_app
+
+
+async def call(app, method, path, body=b'', headers=()):
+    """ASGIアプリケーションを呼び出し、(ステータス, ヘッダー, 本文) を返す"""
+    scope = {
+        'type': 'http',
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path.split('?', 1)[0],
+        'root_path': '',
+        'query_string': path.split('?', 1)[1].encode('latin-1') if '?' in path else b'',
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 12345)
+    }
+    received = [False]
+
+    async def receive():
+        if received[0]:
+            await asyncio.sleep(3600)
+        received[0] = True
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    response = {'body': b''}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = {name.decode('latin-1'): value.decode('latin-1') for name, value in message['headers']}
+        elif message['type'] == 'http.response.body':
+            response['body'] += message.get('body', b'')
+
+    await app(scope, receive, send)
+    return response['status'], response['headers'], response['body']
+
+
+def form(urls, **extra):
+    return urlencode([('urls', url) for url in urls] + list(extra.items())).encode('ascii')
+
+
+FORM_HEADERS = [('Content-Type', 'application/x-www-form-urlencoded')]
+
+
+class TestAsgiApp(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        # デバッグモードの検査で同時実行の測定が遅くならないようにする
+        asyncio.get_running_loop().set_debug(False)
+        self.temp_dir = tempfile.mkdtemp()
+        self.stub = StubCalculator(delay=0.5)
+        self.runner = web.AppRunner(self.stub.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0, backlog=1024)
+        await site.start()
+        port = self.runner.addresses[0][1]
+
+        self.config = {
+            'TESTING': True,
+            'MERGED_ESTIMATES_DIR': os.path.join(self.temp_dir, 'merged_estimates'),
+            'LOG_DIR': os.path.join(self.temp_dir, 'logs'),
+            'CALCULATOR_ESTIMATE_SOURCE_URL': f'http://127.0.0.1:{port}/estimates/{{id}}',
+            'ASYNC_FETCH_CONNECTIONS': 256
+        }
+        self.app = create_asgi_app(self.config)
+
+    async def asyncTearDown(self):
+        await self.app.aclose()
+        await self.runner.cleanup()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _urls(self, *estimate_ids):
+        return [f'https://calculator.aws/#/estimate?id={estimate_id}' for estimate_id in estimate_ids]
+
+    async def test_merge_and_download(self):
+        status, _, body = await call(self.app, 'POST', '/merge', form(self._urls('aaa111', 'bbb222')), FORM_HEADERS)
+        self.assertEqual(status, 200)
+        result = json.loads(body)
+        self.assertTrue(result['success'])
+
+        # ダウンロードはFlaskアプリケーションに委譲される
+        status, headers, body = await call(self.app, 'GET', result['download_url'])
+        self.assertEqual(status, 200)
+        self.assertIn('immutable', headers['cache-control'])
+        self.assertEqual(json.loads(body)['name'], result['data']['name'])
+
+    async def test_merge_ndjson(self):
+        status, headers, body = await call(
+            self.app, 'POST', '/merge?stream=ndjson', form(self._urls('aaa111', 'bbb222')), FORM_HEADERS
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['content-type'], 'application/x-ndjson')
+        events = [json.loads(line) for line in body.decode('utf-8').splitlines()]
+        self.assertEqual([event['type'] for event in events[:2]], ['fetch', 'fetch'])
+        self.assertEqual(events[-1]['type'], 'total')
+
+    async def test_merge_missing_estimate(self):
+        status, _, body = await call(self.app, 'POST', '/merge', form(self._urls('aaa111', 'missing1')), FORM_HEADERS)
+        self.assertEqual(status, 400)
+        self.assertIn('見積もりが見つかりません', json.loads(body)['error'])
+
+    async def test_merge_no_urls(self):
+        status, _, _ = await call(self.app, 'POST', '/merge', b'', FORM_HEADERS)
+        self.assertEqual(status, 400)
+
+    async def test_other_routes(self):
+        status, headers, _ = await call(self.app, 'GET', '/sample/sample1')
+        self.assertEqual(status, 200)
+        self.assertIn('etag', headers)
+        status, _, _ = await call(self.app, 'GET', '/download/not-an-id')
+        self.assertEqual(status, 404)
+
+    async def test_merge_progress(self):
+        # 購読してから合算を開始し、取得・合算・合算結果のイベントを受け取る
+        subscriber = asyncio.ensure_future(call(self.app, 'GET', '/merge/progress/progress-abc123'))
+        await asyncio.sleep(0.05)
+        status, _, _ = await call(self.app, 'POST', '/merge',
+                                  form(self._urls('aaa111', 'bbb222'), progress_id='progress-abc123'), FORM_HEADERS)
+        self.assertEqual(status, 200)
+
+        status, headers, body = await asyncio.wait_for(subscriber, 5)
+        self.assertEqual(status, 200)
+        self.assertTrue(headers['content-type'].startswith('text/event-stream'))
+        event_types = [line.split(': ', 1)[1] for line in body.decode('utf-8').splitlines() if line.startswith('event: ')]
+        self.assertEqual(event_types[:2], ['fetch', 'fetch'])
+        self.assertIn('merge', event_types)
+        self.assertEqual(event_types[-1], 'total')
+        self.assertEqual(self.app.services.progress.stats()['subscribers'], 0)
+
+        # 配信済みの合算に再接続した場合は204
+        status, _, _ = await call(self.app, 'GET', '/merge/progress/progress-abc123',
+                                  headers=[('Last-Event-ID', '1000')])
+        self.assertEqual(status, 204)
+
+        # 画面はASGI版でだけ進捗を購読する
+        status, _, body = await call(self.app, 'GET', '/')
+        self.assertEqual(status, 200)
+        self.assertIn(b'data-progress="sse"', body)
+
+    async def test_identical_merges_coalesced(self):
+        # 同じ組み合わせの合算（順序違いを含む）を同時に実行すると、取得と合算は1回だけ行う
+        forward = form(self._urls('aaa111', 'bbb222'))
+        backward = form(self._urls('bbb222', 'aaa111'))
+        results = await asyncio.gather(*[
+            call(self.app, 'POST', '/merge', forward if index % 2 else backward, FORM_HEADERS)
+            for index in range(10)
+        ])
+        self.assertTrue(all(status == 200 for status, _, _ in results))
+        self.assertEqual(len({json.loads(body)['download_url'] for _, _, body in results}), 1)
+        self.assertEqual(self.stub.stats['requests'], 2)
+        stats = self.app.services.merge_flight.stats()
+        self.assertEqual(stats['executed'], 1)
+        self.assertEqual(stats['shared'], 9)
+
+    async def test_admission_queue_full(self):
+        await self.app.aclose()
+        self.app = create_asgi_app({**self.config, 'ADMISSION_MAX_COST': 3, 'ADMISSION_MAX_QUEUE': 0})
+
+        results = await asyncio.gather(*[
+            call(self.app, 'POST', '/merge', form(self._urls(f'{index:06x}a', f'{index:06x}b')), FORM_HEADERS)
+            for index in range(3)
+        ])
+        statuses = sorted(status for status, _, _ in results)
+        self.assertEqual(statuses, [200, 503, 503])
+        rejected = [headers for status, headers, _ in results if status == 503]
+        self.assertIn('retry-after', rejected[0])
+        self.assertEqual(self.app.services.admission.stats()['rejected_queue_full'], 2)
+        self.assertEqual(self.app.services.admission.stats()['in_flight'], 0)
+
+    async def test_admission_queue_waits(self):
+        await self.app.aclose()
+        self.app = create_asgi_app({**self.config, 'ADMISSION_MAX_COST': 3, 'ADMISSION_MAX_QUEUE': 10})
+
+        results = await asyncio.gather(*[
+            call(self.app, 'POST', '/merge', form(self._urls(f'{index:06x}a', f'{index:06x}b')), FORM_HEADERS)
+            for index in range(3)
+        ])
+        self.assertEqual([status for status, _, _ in results], [200, 200, 200])
+        # 1件ずつ処理されるため、取得元の同時リクエスト数は1件分（2）まで
+        self.assertEqual(self.stub.stats['max_in_flight'], 2)
+        self.assertEqual(self.app.services.admission.stats()['queued_total'], 2)
+
+    async def test_concurrent_slow_merges(self):
+        # 取得に0.5秒かかる見積もりを2件ずつ含む合算を1000件同時に実行する（受付制御なし）
+        await self.app.aclose()
+        self.app = create_asgi_app({**self.config, 'ADMISSION_ENABLED': False})
+        count = 1000
+        started = time.monotonic()
+        results = await asyncio.gather(*[
+            call(self.app, 'POST', '/merge', form(self._urls(f'{index:06x}a', f'{index:06x}b')), FORM_HEADERS)
+            for index in range(count)
+        ])
+        elapsed = time.monotonic() - started
+
+        self.assertTrue(all(status == 200 for status, _, _ in results))
+        self.assertEqual(self.stub.stats['requests'], count * 2)
+        # 取得はスレッド数ではなく接続数の上限（256）まで同時に待つ
+        self.assertGreater(self.stub.stats['max_in_flight'], 200)
+        self.assertLess(elapsed, 15)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import aiohttp
+from aiohttp import web
+from werkzeug.serving import make_server
+
+from loadtest.mixes import MIXES, iter_url_sets
+from loadtest.run import run_load_test
+from loadtest.stub_calculator import StubCalculator
+from src.app import create_app
+from src.data.parser import EstimateParser
+
+
+class TestStubCalculator(unittest.IsolatedAsyncioTestCase):
+    async def _start(self, stub):
+        self.runner = web.AppRunner(stub.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        return f"http://127.0.0.1:{self.runner.addresses[0][1]}"
+
+    async def asyncTearDown(self):
+        await self.runner.cleanup()
+
+    async def test_synthetic_estimate(self):
+        base_url = await self._start(StubCalculator())
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{base_url}/estimates/synthetic-25-1") as response:
+                self.assertEqual(response.status, 200)
+                first = await response.json()
+            async with session.get(f"{base_url}/estimates/synthetic-25-1") as response:
+                second = await response.json()
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(EstimateParser().parse_from_json(first)['services']), 25)
+
+    async def test_error_rate(self):
+        stub = StubCalculator(error_rate=1.0)
+        base_url = await self._start(stub)
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{base_url}/estimates/aaa111") as response:
+                self.assertEqual(response.status, 500)
+        self.assertEqual(stub.stats['errors'], 1)
+
+        with self.assertRaises(ValueError):
+            StubCalculator(error_rate=1.5)
+
+
+class TestLoadTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.stub = StubCalculator(delay=0.01, jitter=0.01, seed=0)
+        self.runner = web.AppRunner(self.stub.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        stub_port = self.runner.addresses[0][1]
+
+        app = create_app({
+            'TESTING': True,
+            'MERGED_ESTIMATES_DIR': os.path.join(self.temp_dir, 'merged_estimates'),
+            'LOG_DIR': os.path.join(self.temp_dir, 'logs'),
+            'CALCULATOR_ESTIMATE_SOURCE_URL': f'http://127.0.0.1:{stub_port}/estimates/{{id}}',
+            'ADMISSION_CLIENT_RATE': 0
+        })
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.target = f"http://127.0.0.1:{self.server.server_port}"
+
+    async def asyncTearDown(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.server.shutdown)
+        self.thread.join()
+        await self.runner.cleanup()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    async def test_run_load_test(self):
+        url_sets = iter_url_sets(MIXES['small'], seed=0, id_pool=5)
+        summary = await run_load_test(self.target, url_sets, concurrency=4, duration=None, max_requests=12)
+
+        self.assertEqual(summary['requests'], 12)
+        self.assertEqual(summary['statuses'], {'200': 12})
+        self.assertGreater(summary['throughput_rps'], 0)
+        self.assertLessEqual(summary['p50_seconds'], summary['p99_seconds'])
+        # 処理段階ごとの内訳は負荷の間の差分
+        self.assertEqual(summary['stages']['merge']['count'], 12)
+        self.assertIn('fetch', summary['stages'])
+        json.dumps(summary)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import unittest
+import asyncio
+import threading
+import time
+from src.ui.admission import AdmissionController, AdmissionRejected, TokenBucketLimiter, client_address
+
+
+class TestTokenBucketLimiter(unittest.TestCase):
+    def test_consume_and_refill(self):
+        limiter = TokenBucketLimiter(rate=2, burst=10)
+        self.assertEqual(limiter.try_consume('a', 8, now=0), 0)
+        # 残り2トークンで5は不足するため、3トークン分（1.5秒）待つ必要がある
+        self.assertAlmostEqual(limiter.try_consume('a', 5, now=0), 1.5)
+        self.assertEqual(limiter.try_consume('a', 5, now=1.5), 0)
+        # 別のクライアントには影響しない
+        self.assertEqual(limiter.try_consume('b', 10, now=1.5), 0)
+
+    def test_cost_clipped_to_burst(self):
+        limiter = TokenBucketLimiter(rate=1, burst=5)
+        self.assertEqual(limiter.try_consume('a', 100, now=0), 0)
+        self.assertAlmostEqual(limiter.try_consume('a', 100, now=0), 5)
+
+    def test_max_clients(self):
+        limiter = TokenBucketLimiter(rate=1, burst=5, max_clients=2)
+        for client_id in ('a', 'b', 'c'):
+            limiter.try_consume(client_id, 5, now=0)
+        self.assertEqual(len(limiter), 2)
+        # 破棄された 'a' は満タンのバケットから始まる
+        self.assertEqual(limiter.try_consume('a', 5, now=0), 0)
+
+
+class TestClientAddress(unittest.TestCase):
+    def test_without_trusted_proxy(self):
+        self.assertEqual(client_address('10.0.0.1', '1.2.3.4'), '10.0.0.1')
+        self.assertEqual(client_address(None, None), 'unknown')
+
+    def test_trusted_proxy(self):
+        # クライアントが先頭に付けたアドレスは無視し、ロードバランサーが追加した末尾を使う
+        self.assertEqual(client_address('10.0.0.1', '9.9.9.9, 1.2.3.4', trusted_proxies=1), '1.2.3.4')
+        self.assertEqual(client_address('10.0.0.1', '9.9.9.9, 1.2.3.4, 10.0.0.2', trusted_proxies=2), '1.2.3.4')
+        self.assertEqual(client_address('10.0.0.1', '1.2.3.4', trusted_proxies=2), '10.0.0.1')
+
+
+class TestAdmissionController(unittest.TestCase):
+    def test_estimate_cost(self):
+        controller = AdmissionController(base_cost=1, url_cost=2, upload_cost_per_mb=4)
+        self.assertEqual(controller.estimate_cost(3), 7)
+        self.assertEqual(controller.estimate_cost(0, 512 * 1024), 3)
+
+    def test_acquire_and_release(self):
+        controller = AdmissionController(max_cost=10)
+        first = controller.acquire('a', 6)
+        second = controller.acquire('b', 4)
+        stats = controller.stats()
+        self.assertEqual(stats['in_flight'], 2)
+        self.assertEqual(stats['in_use_cost'], 10)
+
+        first.release()
+        first.release()
+        with second:
+            pass
+        stats = controller.stats()
+        self.assertEqual(stats['in_flight'], 0)
+        self.assertEqual(stats['in_use_cost'], 0)
+        self.assertEqual(stats['admitted'], 2)
+
+    def test_queue_full(self):
+        controller = AdmissionController(max_cost=4, max_queue=0)
+        ticket = controller.acquire('a', 4)
+        with self.assertRaises(AdmissionRejected) as context:
+            controller.acquire('b', 1)
+        self.assertEqual(context.exception.status, 503)
+        self.assertEqual(context.exception.reason, 'queue_full')
+        self.assertGreaterEqual(context.exception.retry_after, 1)
+        ticket.release()
+        self.assertEqual(controller.stats()['rejected_queue_full'], 1)
+
+    def test_queue_timeout(self):
+        controller = AdmissionController(max_cost=4, max_queue=4)
+        ticket = controller.acquire('a', 4)
+        with self.assertRaises(AdmissionRejected) as context:
+            controller.acquire('b', 1, timeout=0.05)
+        self.assertEqual(context.exception.reason, 'timeout')
+        stats = controller.stats()
+        self.assertEqual(stats['queued'], 0)
+        self.assertEqual(stats['rejected_timeout'], 1)
+        ticket.release()
+        self.assertEqual(controller.stats()['in_flight'], 0)
+
+    def test_rate_limited(self):
+        controller = AdmissionController(max_cost=100, rate_limiter=TokenBucketLimiter(rate=1, burst=5))
+        controller.acquire('a', 5).release()
+        with self.assertRaises(AdmissionRejected) as context:
+            controller.acquire('a', 3)
+        self.assertEqual(context.exception.status, 429)
+        self.assertEqual(context.exception.reason, 'rate_limited')
+        self.assertIn(context.exception.retry_after, (2, 3))
+        # 別のクライアントは受け付ける
+        controller.acquire('b', 3).release()
+        self.assertEqual(controller.stats()['rejected_rate_limited'], 1)
+
+    def test_waiters_granted_in_order(self):
+        controller = AdmissionController(max_cost=4, max_queue=4)
+        ticket = controller.acquire('a', 4)
+        order = []
+
+        def worker(name, cost):
+            with controller.acquire(name, cost, timeout=5):
+                order.append(name)
+
+        threads = []
+        # 'c' は 'b' が終わるまで入らない
+        for name, cost in (('b', 3), ('c', 2)):
+            thread = threading.Thread(target=worker, args=(name, cost))
+            thread.start()
+            threads.append(thread)
+            while controller.stats()['queued'] < len(threads):
+                time.sleep(0.01)
+
+        ticket.release()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(order, ['b', 'c'])
+        stats = controller.stats()
+        self.assertEqual(stats['queued_total'], 2)
+        self.assertEqual(stats['admitted'], 3)
+        self.assertEqual(stats['in_flight'], 0)
+
+    def test_acquire_async(self):
+        controller = AdmissionController(max_cost=2, max_queue=4)
+
+        async def run():
+            ticket = await controller.acquire_async('a', 2)
+            waiting = asyncio.ensure_future(controller.acquire_async('b', 2, timeout=5))
+            await asyncio.sleep(0.05)
+            self.assertFalse(waiting.done())
+            ticket.release()
+            (await waiting).release()
+
+            ticket = await controller.acquire_async('a', 2)
+            with self.assertRaises(AdmissionRejected):
+                await controller.acquire_async('b', 2, timeout=0.05)
+            # 待機中に取り消した場合は待ち行列から外れる
+            cancelled = asyncio.ensure_future(controller.acquire_async('c', 2, timeout=5))
+            await asyncio.sleep(0.05)
+            cancelled.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await cancelled
+            ticket.release()
+
+        asyncio.run(run())
+        stats = controller.stats()
+        self.assertEqual(stats['queued'], 0)
+        self.assertEqual(stats['in_flight'], 0)
+        self.assertEqual(stats['rejected_timeout'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.ui.assets import StaticAssets
+
+
+class TestStaticAssets(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.temp_dir, 'js'))
+        self._write('js/app.js', 'console.log(1);')
+        self._write('css/app.css', 'body { color: red; }')
+        self._write('README.txt', 'not an asset')
+        self.assets = StaticAssets(self.temp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, path, content):
+        full_path = os.path.join(self.temp_dir, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def test_url_contains_fingerprint(self):
+        self.assertEqual(len(self.assets), 2)
+        url = self.assets.url('js/app.js')
+        self.assertRegex(url, r'^/assets/js/app\.[0-9a-f]{12}\.js$')
+
+        asset = self.assets.get(url[len('/assets/'):])
+        self.assertEqual(asset.body, b'console.log(1);')
+        self.assertEqual(asset.mimetype, 'text/javascript')
+        with self.assertRaises(AttributeError):
+            asset.body = b''
+
+    def test_unknown_asset(self):
+        with self.assertRaises(KeyError):
+            self.assets.url('js/missing.js')
+        self.assertIsNone(self.assets.get('js/app.js'))
+
+    def test_changed_content_changes_url(self):
+        old_url = self.assets.url('css/app.css')
+        self._write('css/app.css', 'body { color: blue; }')
+        self.assets.reload()
+        new_url = self.assets.url('css/app.css')
+        self.assertNotEqual(old_url, new_url)
+        # 以前のデプロイのURLは配信しない
+        self.assertIsNone(self.assets.get(old_url[len('/assets/'):]))
+
+    def test_page_rendered_once(self):
+        calls = []
+
+        def render():
+            calls.append(1)
+            return '<html></html>'
+
+        first = self.assets.page('index.html', render)
+        second = self.assets.page('index.html', render)
+        self.assertIs(first, second)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(first.mimetype, 'text/html')
+
+        self.assets.reload()
+        self.assets.page('index.html', render)
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from benchmarks.cases import CASES, CASES_BY_NAME
+from benchmarks.compare import STATUS_NEW, STATUS_OK, STATUS_REGRESSION, compare_results, format_report
+from benchmarks.inputs import estimate_pair, format_size, parse_size, raw_estimate
+from benchmarks.run import run_benchmarks
+
+
+def _result(case, size, seconds, memory=1024):
+    return {'case': case, 'size': size, 'repeats': 1, 'min_seconds': seconds, 'median_seconds': seconds,
+            'peak_memory_bytes': memory}
+
+
+class TestInputs(unittest.TestCase):
+    def test_parse_size(self):
+        self.assertEqual([parse_size(size) for size in ('10', '1k', '100k', '1M')], [10, 1000, 100000, 1000000])
+        self.assertEqual(format_size(100000), '100k')
+        with self.assertRaises(ValueError):
+            parse_size('0')
+
+    def test_deterministic(self):
+        self.assertEqual(raw_estimate(50, seed=3), raw_estimate(50, seed=3))
+        first, second = estimate_pair(20)
+        # 2つの見積もりのサービスは同じグループにまとまる
+        self.assertEqual([(s['name'], s['region']) for s in first['services']],
+                         [(s['name'], s['region']) for s in second['services']])
+
+
+class TestRun(unittest.TestCase):
+    def test_run_all_cases(self):
+        report = run_benchmarks(CASES, [10], min_time=0, max_repeat=1)
+        self.assertEqual(len(report['results']), len(CASES))
+        for result in report['results']:
+            self.assertEqual(result['size'], 10)
+            self.assertGreater(result['min_seconds'], 0)
+            self.assertIsNotNone(result['peak_memory_bytes'])
+        self.assertIn('python', report['environment'])
+
+    def test_cases_by_name(self):
+        self.assertIn('merger.merge_estimates', CASES_BY_NAME)
+        self.assertIn('cost_merger.merge_estimates', CASES_BY_NAME)
+
+
+class TestCompare(unittest.TestCase):
+    def test_regression_detected(self):
+        baseline = {('a', 1000): _result('a', 1000, 0.100), ('b', 1000): _result('b', 1000, 0.100)}
+        current = {('a', 1000): _result('a', 1000, 0.105), ('b', 1000): _result('b', 1000, 0.150),
+                   ('c', 1000): _result('c', 1000, 0.100)}
+        rows = {row['case']: row for row in compare_results(baseline, current, time_threshold=0.10)}
+        self.assertEqual(rows['a']['status'], STATUS_OK)
+        self.assertEqual(rows['b']['status'], STATUS_REGRESSION)
+        self.assertEqual(rows['c']['status'], STATUS_NEW)
+        self.assertIn('+50.0%', format_report(list(rows.values()), markdown=True))
+
+    def test_memory_regression_and_noise(self):
+        baseline = {('a', 10): _result('a', 10, 0.00001, memory=1000)}
+        # 短すぎる計測の処理時間は判定しない
+        current = {('a', 10): _result('a', 10, 0.00005, memory=1000)}
+        self.assertEqual(compare_results(baseline, current)[0]['status'], STATUS_OK)
+        current = {('a', 10): _result('a', 10, 0.00001, memory=2000)}
+        self.assertEqual(compare_results(baseline, current)[0]['status'], STATUS_REGRESSION)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -33,6 +33,35 @@ class TestCalculatorAPI(unittest.TestCase):
         self.assertTrue(url.startswith('https://calculator.aws/#/estimate?id='))
         self.assertGreater(len(url), len('https://calculator.aws/#/estimate?id='))
 
+    def test_generate_calculator_url_embeds_data(self):
+        url = self.calculator_api.generate_calculator_url(self.test_data)
+        self.assertIn('&data=', url)
+        
+        # 同じ内容なら同じURLになる（キー順序に依存しない）
+        reordered = json.loads(json.dumps(self.test_data, sort_keys=True))
+        self.assertEqual(self.calculator_api.generate_calculator_url(reordered), url)
+
+    def test_generate_calculator_url_memoized(self):
+        with patch.object(self.calculator_api, '_encode_calculator_url',
+                          wraps=self.calculator_api._encode_calculator_url) as mock_encode:
+            first = self.calculator_api.generate_calculator_url(self.test_data)
+            second = self.calculator_api.generate_calculator_url(self.test_data)
+        self.assertEqual(first, second)
+        mock_encode.assert_called_once()
+
+    def test_generate_calculator_url_size_budget(self):
+        # 圧縮されにくいデータで低い圧縮レベルが上限を超える場合は高いレベルを選ぶ
+        data = {'name': 'Large', 'services': [
+            {'name': f'Service {i}', 'description': os.urandom(8).hex() + ' padding ' * 20}
+            for i in range(50)
+        ]}
+        fast_api = CalculatorAPI(max_url_length=10 ** 6)
+        fast_url = fast_api.generate_calculator_url(data)
+        
+        budget_api = CalculatorAPI(max_url_length=len(fast_url) - 1)
+        budget_url = budget_api.generate_calculator_url(data)
+        self.assertLessEqual(len(budget_url), len(fast_url) - 1)
+
     def test_calculate_total_cost(self):
         total_cost = self.calculator_api.calculate_total_cost(self.test_data)
         self.assertEqual(total_cost['monthly'], '150.00 USD')
@@ -78,6 +107,17 @@ class TestCalculatorAPI(unittest.TestCase):
         self.assertEqual(result, '/tmp/test-id.csv')
         mock_open.assert_called()
 
+    def test_export_to_native(self):
+        import tempfile
+        with tempfile.TemporaryDirectory() as temp_dir:
+            result = self.calculator_api.export_to_native(self.test_data, 'test-id', temp_dir)
+            self.assertEqual(result, os.path.join(temp_dir, 'test-id.json'))
+            with open(result, 'r', encoding='utf-8') as f:
+                native = json.load(f)
+        self.assertEqual(native['Name'], 'Test Estimate')
+        self.assertEqual(native['Total Cost']['monthly'], '150.00')
+        self.assertEqual(len(native['Groups']['Services']), 2)
+
     @patch('builtins.open', new_callable=unittest.mock.mock_open)
     def test_export_to_pdf(self, mock_open):
         result = self.calculator_api.export_to_pdf(self.test_data, 'test-id', '/tmp')
@@ -0,0 +1,77 @@
+import unittest
+import os
+import shutil
+import tempfile
+from src.storage.catalog import EstimateCatalog
+
+
+def _estimate(name, monthly_costs):
+    return {
+        'name': name,
+        'currency': 'USD',
+        'services': [
+            {'name': f'Service {i}', 'region': 'us-east-1', 'monthlyCost': cost, 'upfrontCost': 0.0}
+            for i, cost in enumerate(monthly_costs)
+        ]
+    }
+
+
+class TestEstimateCatalog(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.catalog = EstimateCatalog(os.path.join(self.temp_dir, 'catalog.sqlite3'))
+        self.catalog.record('a' * 64, _estimate('Merged: Web + Batch', [100.0, 50.0]), ['web1', 'batch1'], created_at=1000)
+        self.catalog.record('b' * 64, _estimate('Merged: Data Lake', [300.0]), ['lake1'], created_at=2000)
+        self.catalog.record('c' * 64, _estimate('Merged: 100%_Web', [10.0, 10.0, 10.0]), ['web1'], created_at=3000)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_record_summary(self):
+        item = self.catalog.get('a' * 64)
+        self.assertEqual(item['name'], 'Merged: Web + Batch')
+        self.assertEqual(item['total_cost'], {'monthly': 150.0, 'upfront': 0.0, '12_months': 1800.0})
+        self.assertEqual(item['service_count'], 2)
+        self.assertEqual(item['source_ids'], ['web1', 'batch1'])
+        self.assertEqual(item['created_at'], '1970-01-01T00:16:40Z')
+
+    def test_record_existing_adds_sources(self):
+        self.catalog.record('b' * 64, _estimate('Merged: Data Lake', [300.0]), ['lake2'], created_at=9999)
+        item = self.catalog.get('b' * 64)
+        self.assertEqual(item['source_ids'], ['lake1', 'lake2'])
+        self.assertEqual(item['created_at'], '1970-01-01T00:33:20Z')
+        self.assertEqual(self.catalog.search('lake2')['total'], 1)
+
+    def test_list_default_newest_first(self):
+        result = self.catalog.list()
+        self.assertEqual([item['id'][0] for item in result['items']], ['c', 'b', 'a'])
+        self.assertEqual(result['total'], 3)
+        self.assertFalse(result['has_next'])
+
+    def test_list_pagination_and_sort(self):
+        first = self.catalog.list(page=1, per_page=2, sort='monthly', order='asc')
+        second = self.catalog.list(page=2, per_page=2, sort='monthly', order='asc')
+        self.assertEqual([item['id'][0] for item in first['items']], ['c', 'a'])
+        self.assertTrue(first['has_next'])
+        self.assertEqual([item['id'][0] for item in second['items']], ['b'])
+        self.assertFalse(second['has_next'])
+
+    def test_list_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            self.catalog.list(sort='name; DROP TABLE merges')
+        with self.assertRaises(ValueError):
+            self.catalog.list(order='sideways')
+        with self.assertRaises(ValueError):
+            self.catalog.list(per_page=1000)
+
+    def test_search_by_name_and_source(self):
+        self.assertEqual(self.catalog.search('web')['total'], 2)
+        self.assertEqual([item['id'][0] for item in self.catalog.search('lake1')['items']], ['b'])
+
+    def test_search_escapes_wildcards(self):
+        result = self.catalog.search('100%_')
+        self.assertEqual([item['id'][0] for item in result['items']], ['c'])
+
+
+if __name__ == '__main__':
+    unittest.main()
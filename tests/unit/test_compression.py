@@ -0,0 +1,105 @@
+import unittest
+import gzip
+import json
+import zlib
+from werkzeug.test import Client
+from werkzeug.wrappers import Request, Response
+from src.ui.compression import CompressionMiddleware, parse_accept_encoding
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+LARGE_JSON = json.dumps({'services': [{'name': 'Amazon EC2', 'monthlyCost': i} for i in range(200)]})
+
+
+@Request.application
+def _app(request):
+    if request.path == '/large':
+        response = Response(LARGE_JSON, mimetype='application/json')
+        response.set_etag('abc')
+        return response
+    if request.path == '/small':
+        return Response('{"ok": true}', mimetype='application/json')
+    if request.path == '/stream':
+        return Response((json.dumps({'event': i}) + '\n' for i in range(50)), mimetype='application/x-ndjson')
+    if request.path == '/precompressed':
+        response = Response(gzip.compress(LARGE_JSON.encode()), mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
+    if request.path == '/pdf':
+        return Response(b'%PDF' + b'0' * 4096, mimetype='application/pdf')
+    return Response(status=404)
+
+
+class TestCompressionMiddleware(unittest.TestCase):
+    def setUp(self):
+        self.client = Client(CompressionMiddleware(_app, min_size=256))
+
+    def test_gzip(self):
+        response = self.client.get('/large', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.headers['ETag'], 'W/"abc"')
+        self.assertNotIn('Content-Length', response.headers)
+        self.assertEqual(gzip.decompress(response.get_data()).decode(), LARGE_JSON)
+
+    @unittest.skipIf(brotli is None, 'brotli がインストールされていません')
+    def test_brotli_preferred(self):
+        response = self.client.get('/large', headers={'Accept-Encoding': 'gzip, deflate, br'})
+        self.assertEqual(response.headers['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.get_data()).decode(), LARGE_JSON)
+
+    def test_quality_values(self):
+        response = self.client.get('/large', headers={'Accept-Encoding': 'br;q=0, gzip;q=0.5'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        response = self.client.get('/large', headers={'Accept-Encoding': 'gzip;q=0'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_small_response_not_compressed(self):
+        response = self.client.get('/small', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.get_json(), {'ok': True})
+
+    def test_vary_without_accept_encoding(self):
+        # 圧縮しない応答も、圧縮の対象の形式であれば Vary を付ける
+        response = self.client.get('/large')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+        response = self.client.get('/pdf')
+        self.assertNotIn('Vary', response.headers)
+
+    def test_streaming_chunks_are_flushed(self):
+        response = self.client.get('/stream', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        chunks = list(response.iter_encoded())
+        # 最初の断片だけで最初のイベントを復元できる
+        self.assertEqual(decompressor.decompress(chunks[0]).decode(), json.dumps({'event': 0}) + '\n')
+        for chunk in chunks[1:]:
+            decompressor.decompress(chunk)
+        self.assertTrue(decompressor.eof)
+
+    def test_precompressed_passthrough(self):
+        response = self.client.get('/precompressed', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.get_data()).decode(), LARGE_JSON)
+
+    def test_incompressible_type(self):
+        response = self.client.get('/pdf', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertNotIn('Vary', response.headers)
+
+    def test_head_request(self):
+        response = self.client.head('/large', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+
+    def test_parse_accept_encoding(self):
+        self.assertEqual(parse_accept_encoding('gzip;q=0.8, BR, *;q=0'), {'gzip': 0.8, 'br': 1.0, '*': 0.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,203 @@
+import unittest
+from unittest.mock import patch
+import os
+import shutil
+import tempfile
+from src.storage.estimate_store import FileSystemEstimateStore
+from src.storage.sqlite_store import SQLiteEstimateStore
+from src.storage.factory import create_estimate_store
+
+try:
+    import boto3
+    from moto import mock_aws
+except ImportError:
+    boto3 = None
+
+ESTIMATE = {
+    'name': 'Merged: A + B',
+    'currency': 'USD',
+    'services': [
+        {'name': 'Amazon EC2', 'region': 'us-east-1', 'monthlyCost': 100.0, 'upfrontCost': 0.0}
+    ]
+}
+
+
+class EstimateStoreTestMixin:
+    """すべての保存先で共通のテスト"""
+
+    def test_save_and_load(self):
+        estimate_id = self.store.save(ESTIMATE)
+        self.assertEqual(len(estimate_id), 64)
+        self.assertTrue(self.store.exists(estimate_id))
+        self.assertEqual(self.store.load(estimate_id), ESTIMATE)
+
+    def test_identical_estimates_deduplicate(self):
+        first_id = self.store.save(ESTIMATE)
+        reordered = {key: ESTIMATE[key] for key in reversed(list(ESTIMATE))}
+        self.assertEqual(self.store.save(reordered), first_id)
+
+    def test_stream_round_trip(self):
+        large = dict(ESTIMATE, services=ESTIMATE['services'] * 2000)
+        estimate_id = self.store.save(large)
+        chunks = list(self.store.open_stream(estimate_id, chunk_size=4096))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(self.store.load(estimate_id), large)
+
+    def test_missing_estimate(self):
+        missing_id = '0' * 64
+        self.assertFalse(self.store.exists(missing_id))
+        with self.assertRaises(FileNotFoundError):
+            self.store.open_stream(missing_id)
+
+    def test_size_missing(self):
+        with self.assertRaises(FileNotFoundError):
+            self.store.size('0' * 64)
+
+    def test_delete(self):
+        estimate_id = self.store.save(ESTIMATE)
+        self.store.delete(estimate_id)
+        self.assertFalse(self.store.exists(estimate_id))
+        self.store.delete(estimate_id)
+
+    def test_invalid_id(self):
+        self.assertFalse(self.store.exists('../../etc/passwd'))
+        with self.assertRaises(ValueError):
+            self.store.open_stream('../../etc/passwd')
+        # 末尾の改行を含むIDも受け付けない
+        with self.assertRaises(ValueError):
+            self.store.validate_id('a' * 64 + '\n')
+        self.assertFalse(self.store.exists('a' * 64 + '\n'))
+
+    def test_check_writable(self):
+        self.store.check_writable()
+
+
+class TestFileSystemEstimateStore(EstimateStoreTestMixin, unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = FileSystemEstimateStore(self.temp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _stored_files(self):
+        return sorted(os.path.relpath(os.path.join(root, name), self.temp_dir)
+                      for root, _, names in os.walk(self.temp_dir) for name in names)
+
+    def test_check_writable_leaves_no_file(self):
+        self.store.check_writable()
+        self.assertEqual(self._stored_files(), [])
+
+    def test_check_writable_missing_directory(self):
+        shutil.rmtree(self.temp_dir)
+        with self.assertRaises(OSError):
+            self.store.check_writable()
+        os.makedirs(self.temp_dir)
+
+    def test_one_file_per_content(self):
+        estimate_id = self.store.save(ESTIMATE)
+        self.store.save(dict(ESTIMATE))
+        self.assertEqual(self._stored_files(), [os.path.join(estimate_id[:2], estimate_id[2:4], f'{estimate_id}.json')])
+
+    def test_size(self):
+        estimate_id = self.store.save(ESTIMATE)
+        self.assertEqual(self.store.size(estimate_id), os.path.getsize(self.store.path_for(estimate_id)))
+
+    def test_migrate_flat_layout(self):
+        flat_store = FileSystemEstimateStore(self.temp_dir, shard_depth=0)
+        legacy_id = '0f8fad5b-d9cb-469f-a165-70867728950e'
+        flat_store.write_stream(legacy_id, [b'{"name": "legacy", "services": []}'])
+        duplicate_id = flat_store.save(ESTIMATE)
+        self.store.save(ESTIMATE)
+        with open(os.path.join(self.temp_dir, 'notes.json'), 'w') as f:
+            f.write('{}')
+
+        self.assertEqual(self.store.migrate_flat_layout(), [legacy_id])
+        self.assertEqual(self.store.load(legacy_id)['name'], 'legacy')
+        self.assertEqual(self.store.load(duplicate_id), ESTIMATE)
+        self.assertEqual(sorted(name for name in os.listdir(self.temp_dir) if name.endswith('.json')), ['notes.json'])
+
+    def test_existing_estimate_not_rewritten(self):
+        estimate_id = self.store.save(ESTIMATE)
+        with patch('src.storage.estimate_store.os.replace') as mock_replace:
+            self.assertEqual(self.store.save(ESTIMATE), estimate_id)
+        mock_replace.assert_not_called()
+
+    def test_failed_write_leaves_no_file(self):
+        with patch('src.storage.estimate_store.json.JSONEncoder.iterencode', side_effect=IOError('disk full')):
+            with self.assertRaises(IOError):
+                self.store.save(ESTIMATE)
+        self.assertEqual(self._stored_files(), [])
+
+    def test_legacy_uuid_id(self):
+        path = self.store.path_for('0f8fad5b-d9cb-469f-a165-70867728950e')
+        self.assertTrue(path.endswith('0f8fad5b-d9cb-469f-a165-70867728950e.json'))
+
+
+class TestSQLiteEstimateStore(EstimateStoreTestMixin, unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = SQLiteEstimateStore(os.path.join(self.temp_dir, 'estimates.sqlite3'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_failed_write_is_not_visible(self):
+        def failing_chunks():
+            yield b'{"name": '
+            raise IOError('connection lost')
+
+        with self.assertRaises(IOError):
+            self.store.write_stream('1' * 64, failing_chunks())
+        self.assertFalse(self.store.exists('1' * 64))
+
+
+@unittest.skipIf(boto3 is None, 'boto3/moto がインストールされていません')
+class TestS3EstimateStore(EstimateStoreTestMixin, unittest.TestCase):
+    def setUp(self):
+        from src.storage.s3_store import S3EstimateStore
+
+        self.mock = mock_aws()
+        self.mock.start()
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket='estimates')
+        self.store = S3EstimateStore('estimates', client=client)
+
+    def tearDown(self):
+        self.mock.stop()
+
+    def test_check_writable_missing_bucket(self):
+        from src.storage.s3_store import S3EstimateStore
+
+        store = S3EstimateStore('missing', client=self.store.client)
+        with self.assertRaises(Exception):
+            store.check_writable()
+
+
+class TestCreateEstimateStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_default_filesystem(self):
+        store = create_estimate_store(self.temp_dir, environ={})
+        self.assertIsInstance(store, FileSystemEstimateStore)
+
+    def test_sqlite(self):
+        store = create_estimate_store(self.temp_dir, environ={'ESTIMATE_STORAGE_BACKEND': 'sqlite'})
+        self.assertIsInstance(store, SQLiteEstimateStore)
+        self.assertEqual(store.db_path, os.path.join(self.temp_dir, 'estimates.sqlite3'))
+
+    def test_s3_requires_bucket(self):
+        with self.assertRaises(ValueError):
+            create_estimate_store(self.temp_dir, environ={'ESTIMATE_STORAGE_BACKEND': 's3'})
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            create_estimate_store(self.temp_dir, environ={'ESTIMATE_STORAGE_BACKEND': 'ftp'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import logging
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from src.ui.health import ProbeAccessLogFilter, ReadinessChecker, is_probe_path
+
+
+def _record(message, *args):
+    return logging.LogRecord('access', logging.INFO, __file__, 1, message, args, None)
+
+
+class TestProbeAccessLogFilter(unittest.TestCase):
+    def setUp(self):
+        self.filter = ProbeAccessLogFilter()
+
+    def test_werkzeug(self):
+        self.assertFalse(self.filter.filter(_record('%s - - [%s] "%s" %s %s', '127.0.0.1', 'now',
+                                                    'GET /healthz HTTP/1.1', '200', '-')))
+        self.assertTrue(self.filter.filter(_record('%s - - [%s] "%s" %s %s', '127.0.0.1', 'now',
+                                                   'GET / HTTP/1.1', '200', '-')))
+
+    def test_uvicorn(self):
+        message = '%s - "%s %s HTTP/%s" %d'
+        self.assertFalse(self.filter.filter(_record(message, '127.0.0.1:5000', 'GET', '/readyz?full=1', '1.1', 200)))
+        self.assertTrue(self.filter.filter(_record(message, '127.0.0.1:5000', 'GET', '/readyz-old', '1.1', 200)))
+
+    def test_is_probe_path(self):
+        self.assertTrue(is_probe_path('/healthz'))
+        self.assertFalse(is_probe_path('/'))
+        self.assertFalse(is_probe_path(None))
+
+
+class TestReadinessChecker(unittest.TestCase):
+    def setUp(self):
+        self.services = SimpleNamespace(
+            estimate_store=MagicMock(),
+            write_queue=MagicMock(),
+            job_manager=MagicMock(),
+            admission=None,
+            started=True
+        )
+        self.services.write_queue.stats.return_value = {'queued': 0, 'capacity': 256, 'running': True}
+        self.services.job_manager.stats.return_value = {'queued': 0, 'running': 1, 'max_queued': 100}
+
+    def test_ready(self):
+        result = ReadinessChecker(self.services).check()
+        self.assertTrue(result['ready'])
+        self.assertEqual(set(result['checks']), {'storage', 'write_queue', 'jobs', 'admission'})
+
+    def test_storage_not_writable(self):
+        self.services.estimate_store.check_writable.side_effect = OSError('Read-only file system')
+        result = ReadinessChecker(self.services).check()
+        self.assertFalse(result['ready'])
+        self.assertIn('Read-only', result['checks']['storage']['error'])
+
+    def test_queues_saturated(self):
+        self.services.write_queue.stats.return_value = {'queued': 256, 'capacity': 256, 'running': True}
+        self.services.job_manager.stats.return_value = {'queued': 100, 'running': 4, 'max_queued': 100}
+        self.services.admission = MagicMock()
+        self.services.admission.stats.return_value = {'queued': 64, 'max_queue': 64}
+        checks = ReadinessChecker(self.services).check()['checks']
+        self.assertFalse(checks['write_queue']['ok'])
+        self.assertFalse(checks['jobs']['ok'])
+        self.assertFalse(checks['admission']['ok'])
+
+    def test_write_thread_stopped(self):
+        self.services.write_queue.stats.return_value = {'queued': 0, 'capacity': 256, 'running': False}
+        self.assertFalse(ReadinessChecker(self.services).check()['ready'])
+        # バックグラウンド処理の開始前は確認しない
+        self.services.started = False
+        self.assertTrue(ReadinessChecker(self.services).check()['ready'])
+
+    def test_result_cached(self):
+        checker = ReadinessChecker(self.services, cache_seconds=60)
+        checker.check()
+        checker.check()
+        self.assertEqual(self.services.estimate_store.check_writable.call_count, 1)
+
+        checker = ReadinessChecker(self.services, cache_seconds=0)
+        checker.check()
+        checker.check()
+        self.assertEqual(self.services.estimate_store.check_writable.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import threading
+from src.jobs.job_manager import (
+    JobManager, JobQueueFullError, JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED, JOB_QUEUED
+)
+
+
+class TestJobManager(unittest.TestCase):
+    def setUp(self):
+        self.manager = JobManager(max_workers=1, max_queued=1, result_ttl_seconds=60)
+
+    def tearDown(self):
+        self.manager.shutdown()
+
+    def test_success(self):
+        def work(job):
+            job.increment_progress('done')
+            return {'value': 42}
+
+        job = self.manager.submit('test', work, progress={'done': 0})
+        job.future.result(timeout=5)
+        state = self.manager.get(job.id).to_dict()
+        self.assertEqual(state['status'], JOB_SUCCEEDED)
+        self.assertEqual(state['result'], {'value': 42})
+        self.assertEqual(state['progress'], {'done': 1})
+
+    def test_failure(self):
+        def work(job):
+            raise ValueError('broken')
+
+        job = self.manager.submit('test', work)
+        job.future.result(timeout=5)
+        self.assertEqual(job.status, JOB_FAILED)
+        self.assertEqual(job.error, 'broken')
+
+    def test_cancel_running_and_queued(self):
+        started = threading.Event()
+
+        def blocking(job):
+            started.set()
+            while True:
+                job.check_cancelled()
+                job.update_progress(alive=True)
+
+        running = self.manager.submit('test', blocking)
+        started.wait(5)
+        queued = self.manager.submit('test', lambda job: None)
+        self.assertEqual(queued.status, JOB_QUEUED)
+
+        self.manager.cancel(queued.id)
+        self.assertEqual(queued.status, JOB_CANCELLED)
+
+        self.manager.cancel(running.id)
+        running.future.result(timeout=5)
+        self.assertEqual(running.status, JOB_CANCELLED)
+
+    def test_queue_limit(self):
+        release = threading.Event()
+        self.manager.submit('test', lambda job: release.wait(5))
+        self.manager.submit('test', lambda job: None)
+        with self.assertRaises(JobQueueFullError):
+            self.manager.submit('test', lambda job: None)
+        release.set()
+        self.assertEqual(self.manager.stats()['rejected'], 1)
+
+    def test_result_expiry(self):
+        job = self.manager.submit('test', lambda job: 'done')
+        job.future.result(timeout=5)
+        self.assertEqual(self.manager.purge_expired(now=job.finished_at + 30), 0)
+        self.assertEqual(self.manager.purge_expired(now=job.finished_at + 60), 1)
+        self.assertIsNone(self.manager.get(job.id))
+
+    def test_unknown_job(self):
+        self.assertIsNone(self.manager.get('missing'))
+        self.assertIsNone(self.manager.cancel('missing'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+import os
+import shutil
+import tempfile
+import time
+from src.jobs.job_queue import LocalJobQueue
+from src.jobs.status_store import SQLiteJobStatusStore
+from src.jobs.factory import create_job_queue, create_job_status_store
+
+try:
+    import boto3
+    from moto import mock_aws
+except ImportError:
+    boto3 = None
+
+
+class JobQueueTestMixin:
+    """すべてのジョブキューで共通のテスト"""
+
+    def test_send_receive_ack(self):
+        self.queue.send({'job_id': 'a'})
+        message = self.queue.receive()
+        self.assertEqual(message.body, {'job_id': 'a'})
+        self.assertEqual(message.receive_count, 1)
+        self.queue.ack(message)
+        self.assertIsNone(self.queue.receive())
+        self.assertEqual(self.queue.depth(), {'visible': 0, 'in_flight': 0})
+
+    def test_unacked_message_is_redelivered(self):
+        self.queue.send({'job_id': 'b'})
+        first = self.queue.receive()
+        self.assertEqual(self.queue.depth()['in_flight'], 1)
+        time.sleep(1.1)
+        second = self.queue.receive(wait_seconds=1)
+        self.assertEqual(second.body, {'job_id': 'b'})
+        self.assertEqual(second.receive_count, 2)
+        self.assertNotEqual(first.receipt, second.receipt)
+
+
+class TestLocalJobQueue(JobQueueTestMixin, unittest.TestCase):
+    def setUp(self):
+        self.queue = LocalJobQueue(visibility_timeout=1)
+
+
+@unittest.skipIf(boto3 is None, 'boto3/moto がインストールされていません')
+class TestSQSJobQueue(JobQueueTestMixin, unittest.TestCase):
+    def setUp(self):
+        from src.jobs.job_queue import SQSJobQueue
+
+        self.mock = mock_aws()
+        self.mock.start()
+        client = boto3.client('sqs', region_name='us-east-1')
+        queue_url = client.create_queue(QueueName='merge-jobs', Attributes={'VisibilityTimeout': '1'})['QueueUrl']
+        self.queue = SQSJobQueue(queue_url, client=client)
+
+    def tearDown(self):
+        self.mock.stop()
+
+
+class JobStatusStoreTestMixin:
+    """すべてのジョブ状態の保存先で共通のテスト"""
+
+    def test_put_and_get(self):
+        self.assertIsNone(self.store.get('missing'))
+        self.store.put({'id': 'job1', 'status': 'queued', 'finished_at': None})
+        self.store.put({'id': 'job1', 'status': 'running', 'finished_at': None})
+        self.assertEqual(self.store.get('job1')['status'], 'running')
+
+    def test_cancel_survives_put(self):
+        self.store.put({'id': 'job2', 'status': 'running', 'finished_at': None})
+        self.assertFalse(self.store.cancel_requested('job2'))
+        self.store.request_cancel('job2')
+        self.store.put({'id': 'job2', 'status': 'running', 'finished_at': None})
+        self.assertTrue(self.store.cancel_requested('job2'))
+
+    def test_workers(self):
+        self.store.put_worker('w1', {'worker_id': 'w1', 'processed': 3})
+        self.assertEqual([worker['processed'] for worker in self.store.list_workers()], [3])
+
+
+class TestSQLiteJobStatusStore(JobStatusStoreTestMixin, unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = SQLiteJobStatusStore(os.path.join(self.temp_dir, 'jobs.sqlite3'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_purge_expired(self):
+        self.store.put({'id': 'old', 'status': 'succeeded', 'finished_at': 1000})
+        self.store.put({'id': 'running', 'status': 'running', 'finished_at': None})
+        self.assertEqual(self.store.purge_expired(2000), 1)
+        self.assertIsNone(self.store.get('old'))
+        self.assertIsNotNone(self.store.get('running'))
+
+
+@unittest.skipIf(boto3 is None, 'boto3/moto がインストールされていません')
+class TestS3JobStatusStore(JobStatusStoreTestMixin, unittest.TestCase):
+    def setUp(self):
+        from src.jobs.status_store import S3JobStatusStore
+
+        self.mock = mock_aws()
+        self.mock.start()
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket='estimates')
+        self.store = S3JobStatusStore('estimates', client=client)
+
+    def tearDown(self):
+        self.mock.stop()
+
+
+class TestJobFactory(unittest.TestCase):
+    def test_inprocess_by_default(self):
+        self.assertIsNone(create_job_queue(environ={}))
+
+    def test_local(self):
+        self.assertIsInstance(create_job_queue(environ={'JOB_QUEUE_BACKEND': 'local'}), LocalJobQueue)
+
+    def test_sqs_requires_url(self):
+        with self.assertRaises(ValueError):
+            create_job_queue(environ={'JOB_QUEUE_BACKEND': 'sqs'})
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            create_job_queue(environ={'JOB_QUEUE_BACKEND': 'kafka'})
+        with self.assertRaises(ValueError):
+            create_job_status_store('.', environ={'JOB_STATUS_BACKEND': 'redis'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import json
+import random
+import tempfile
+import unittest
+from loadtest.mixes import MIXES, Scenario, iter_url_sets, read_url_sets
+from loadtest.run import check_thresholds, format_report, percentile, summarize
+from loadtest.stages import histogram_quantile, parse_stage_metrics, stage_breakdown
+
+METRICS_BEFORE = """# HELP merger_stage_duration_seconds Duration
+# TYPE merger_stage_duration_seconds histogram
+merger_stage_duration_seconds_bucket{le="0.1",stage="fetch"} 5.0
+merger_stage_duration_seconds_bucket{le="1.0",stage="fetch"} 10.0
+merger_stage_duration_seconds_bucket{le="+Inf",stage="fetch"} 10.0
+merger_stage_duration_seconds_sum{stage="fetch"} 3.0
+merger_stage_duration_seconds_count{stage="fetch"} 10.0
+merger_stage_errors_total{stage="fetch"} 1.0
+merger_services_total{kind="input"} 40.0
+"""
+
+METRICS_AFTER = """merger_stage_duration_seconds_bucket{le="0.1",stage="fetch"} 105.0
+merger_stage_duration_seconds_bucket{le="1.0",stage="fetch"} 110.0
+merger_stage_duration_seconds_bucket{le="+Inf",stage="fetch"} 110.0
+merger_stage_duration_seconds_sum{stage="fetch"} 8.0
+merger_stage_duration_seconds_count{stage="fetch"} 110.0
+merger_stage_errors_total{stage="fetch"} 3.0
+merger_stage_duration_seconds_bucket{le="0.1",stage="merge"} 2.0
+merger_stage_duration_seconds_bucket{le="+Inf",stage="merge"} 2.0
+merger_stage_duration_seconds_sum{stage="merge"} 0.1
+merger_stage_duration_seconds_count{stage="merge"} 2.0
+"""
+
+
+def _sample(scenario, status, seconds):
+    return {'scenario': scenario, 'urls': 2, 'status': status, 'seconds': seconds, 'error': None}
+
+
+class TestMixes(unittest.TestCase):
+    def test_deterministic_url_sets(self):
+        first = iter_url_sets(MIXES['default'], seed=3)
+        second = iter_url_sets(MIXES['default'], seed=3)
+        self.assertEqual([next(first) for _ in range(50)], [next(second) for _ in range(50)])
+
+    def test_scenario_url_set(self):
+        urls = Scenario('pair', 1, 2, 2, 500).url_set(random.Random(0), id_pool=10)
+        self.assertEqual(len(urls), 2)
+        self.assertEqual(len(set(urls)), 2)
+        self.assertTrue(all('id=synthetic-500-' in url for url in urls))
+
+        urls = Scenario('missing', 1, 2, 2, 10, missing_rate=1.0).url_set(random.Random(0), id_pool=10)
+        self.assertIn('id=missing-', urls[-1])
+
+    def test_read_url_sets(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'recorded.jsonl')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(['https://calculator.aws/#/estimate?id=a']) + '\n\n')
+                f.write(json.dumps({'name': 'pair', 'urls': ['https://calculator.aws/#/estimate?id=b']}) + '\n')
+            url_sets = read_url_sets(path)
+            self.assertEqual([name for name, _ in url_sets], [path, 'pair'])
+
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('"not a list"\n')
+            with self.assertRaises(ValueError):
+                read_url_sets(path)
+
+
+class TestStages(unittest.TestCase):
+    def test_parse_stage_metrics(self):
+        stages = parse_stage_metrics(METRICS_BEFORE)
+        self.assertEqual(list(stages), ['fetch'])
+        self.assertEqual(stages['fetch']['count'], 10.0)
+        self.assertEqual(stages['fetch']['errors'], 1.0)
+        self.assertEqual(stages['fetch']['buckets'][float('inf')], 10.0)
+
+    def test_histogram_quantile(self):
+        buckets = [(0.1, 50.0), (1.0, 100.0), (float('inf'), 100.0)]
+        self.assertAlmostEqual(histogram_quantile(0.5, buckets), 0.1)
+        self.assertAlmostEqual(histogram_quantile(0.75, buckets), 0.55)
+        self.assertIsNone(histogram_quantile(0.5, [(0.1, 0.0), (float('inf'), 0.0)]))
+
+    def test_stage_breakdown_uses_deltas(self):
+        breakdown = stage_breakdown(parse_stage_metrics(METRICS_BEFORE), parse_stage_metrics(METRICS_AFTER), 50)
+
+        fetch = breakdown['fetch']
+        self.assertEqual(fetch['count'], 100)
+        self.assertEqual(fetch['errors'], 2)
+        self.assertAlmostEqual(fetch['mean_seconds'], 0.05)
+        self.assertAlmostEqual(fetch['per_request_seconds'], 0.1)
+        # 負荷の間の呼び出しはすべて0.1秒以下
+        self.assertLessEqual(fetch['p99_seconds'], 0.1)
+        self.assertEqual(breakdown['merge']['count'], 2)
+
+
+class TestReport(unittest.TestCase):
+    def test_percentile(self):
+        self.assertEqual(percentile([1.0, 2.0, 3.0, 4.0, 5.0], 0.5), 3.0)
+        self.assertAlmostEqual(percentile([1.0, 2.0], 0.99), 1.99)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_summarize_and_thresholds(self):
+        samples = [_sample('pair', 200, 0.1)] * 97 + [_sample('missing', 400, 0.05), _sample('pair', 503, 0.01),
+                                                      {**_sample('pair', None, 2.0), 'error': 'ServerDisconnectedError'}]
+        stages = stage_breakdown({}, parse_stage_metrics(METRICS_AFTER), len(samples))
+        summary = summarize(samples, 10.0, stages)
+
+        self.assertEqual(summary['requests'], 100)
+        self.assertAlmostEqual(summary['throughput_rps'], 10.0)
+        # 400 は想定どおりの応答のため、エラーに含めない
+        self.assertAlmostEqual(summary['error_rate'], 0.02)
+        self.assertEqual(summary['statuses'], {'200': 97, '400': 1, '503': 1, 'ServerDisconnectedError': 1})
+        self.assertEqual(set(summary['scenarios']), {'pair', 'missing'})
+        self.assertIn('fetch', format_report(summary))
+
+        self.assertEqual(check_thresholds(summary, max_p99=5.0, max_error_rate=0.05), [])
+        self.assertEqual(len(check_thresholds(summary, max_p99=0.05, max_error_rate=0.01)), 2)
+
+    def test_report_without_metrics(self):
+        summary = summarize([_sample('pair', 200, 0.1)], 1.0, None)
+        self.assertIn('/metrics', format_report(summary))
+        self.assertNotIn('unattributed_per_request_seconds', summary)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from unittest.mock import patch
+from src.data.parser import EstimateParser
+from src.merger.estimate_merger import EstimateMerger
+from src.merger.merge_pipeline import MergePipeline
+from src.api.calculator_api import CalculatorAPI
+
+URL_A = 'https://calculator.aws/#/estimate?id=123456abcdef'
+URL_B = 'https://calculator.aws/#/estimate?id=fedcba654321'
+
+UPLOADED = {
+    'name': 'Uploaded',
+    'currency': 'USD',
+    'services': [{'name': 'Amazon S3', 'region': 'us-east-1', 'monthlyCost': 5.0, 'upfrontCost': 0.0}]
+}
+
+
+class TestMergePipeline(unittest.TestCase):
+    def setUp(self):
+        self.parser = EstimateParser()
+        self.saved = []
+        self.pipeline = MergePipeline(self.parser, EstimateMerger(), CalculatorAPI(), self._save)
+
+    def _save(self, merged_estimate, urls):
+        self.saved.append((merged_estimate, urls))
+        return f'{len(self.saved):064d}'
+
+    def test_iter_events(self):
+        events = list(self.pipeline.iter_events([URL_A, URL_B]))
+        self.assertEqual([event['type'] for event in events[:2]], ['fetch', 'fetch'])
+        self.assertEqual(events[-1]['type'], 'total')
+        self.assertEqual(len(self.saved), 1)
+
+    def test_merge_key(self):
+        # URLの順序によらず同じキーになり、見積もりの回数とオプションは区別する
+        self.assertEqual(self.pipeline.merge_key([URL_A, URL_B]), self.pipeline.merge_key([URL_B, URL_A]))
+        self.assertNotEqual(self.pipeline.merge_key([URL_A, URL_B]), self.pipeline.merge_key([URL_A, URL_A, URL_B]))
+        self.assertNotEqual(self.pipeline.merge_key([URL_A], {'format': 'json'}), self.pipeline.merge_key([URL_A]))
+
+    def test_run_invalid_url(self):
+        with self.assertRaises(ValueError):
+            self.pipeline.run(['https://example.com/'])
+
+    def test_merge_batch_fetches_shared_urls_once(self):
+        groups = [
+            {'name': 'a', 'urls': [URL_A, URL_B]},
+            {'name': 'b', 'urls': [URL_A], 'estimates': [UPLOADED]},
+            {'name': 'c', 'urls': [URL_B]}
+        ]
+        with patch.object(self.parser, 'parse_from_url', wraps=self.parser.parse_from_url) as mock_parse:
+            results = self.pipeline.merge_batch(groups)
+
+        self.assertEqual(sorted(call.args[0] for call in mock_parse.call_args_list), sorted([URL_A, URL_B]))
+        self.assertEqual([result['name'] for result in results], ['a', 'b', 'c'])
+        self.assertTrue(all(result['success'] for result in results))
+        self.assertEqual(len(self.saved), 3)
+
+    def test_merge_batch_isolates_group_errors(self):
+        groups = [
+            {'name': 'bad-url', 'urls': ['https://example.com/']},
+            {'name': 'bad-upload', 'estimates': [{'name': 'no services'}]},
+            {'name': 'ok', 'urls': [URL_A]}
+        ]
+        results = self.pipeline.merge_batch(groups)
+        self.assertEqual([result['success'] for result in results], [False, False, True])
+        self.assertIn('URLの解析エラー', results[0]['error'])
+        self.assertIn('1件目', results[1]['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+from unittest.mock import patch
+import os
+import shutil
+import tempfile
+from src.data.parser import EstimateParser
+from src.merger.estimate_merger import EstimateMerger
+from src.merger.merge_pipeline import MergePipeline
+from src.api.calculator_api import CalculatorAPI
+from src.jobs.dispatcher import QueuedJobDispatcher
+from src.jobs.job_queue import LocalJobQueue
+from src.jobs.status_store import SQLiteJobStatusStore
+from src.app import catalog_db_path, load_config
+from src.jobs.factory import check_shared_backends
+from src.jobs.worker import MergeWorker, _create_worker
+
+URLS = [
+    'https://calculator.aws/#/estimate?id=123456abcdef',
+    'https://calculator.aws/#/estimate?id=fedcba654321'
+]
+
+
+class TestMergeWorker(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.saved = []
+        self.queue = LocalJobQueue(visibility_timeout=0)
+        self.status_store = SQLiteJobStatusStore(os.path.join(self.temp_dir, 'jobs.sqlite3'))
+        self.dispatcher = QueuedJobDispatcher(self.queue, self.status_store, backend='local')
+        self.pipeline = MergePipeline(EstimateParser(), EstimateMerger(), CalculatorAPI(), self._save)
+        self.worker = MergeWorker(self.queue, self.status_store, self.pipeline, worker_id='test-worker',
+                                  progress_interval=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _save(self, merged_estimate, urls):
+        self.saved.append(merged_estimate)
+        return '0' * 64
+
+    def _submit(self, urls=URLS):
+        return self.dispatcher.submit('merge', {'urls': urls}, {'urls_total': len(urls)})
+
+    def test_merge_job(self):
+        job = self._submit()
+        self.assertTrue(self.worker.run_once())
+
+        record = self.dispatcher.get(job['id'])
+        self.assertEqual(record['status'], 'succeeded')
+        self.assertEqual(record['progress']['urls_fetched'], 2)
+        self.assertEqual(record['result']['download_url'], f'/download/{"0" * 64}')
+        self.assertEqual(self.queue.depth(), {'visible': 0, 'in_flight': 0})
+        self.assertEqual(self.worker.stats()['completed_last_minute'], 1)
+
+    def test_invalid_url_fails_without_retry(self):
+        job = self._submit(['https://example.com/'])
+        self.worker.run_once()
+        record = self.dispatcher.get(job['id'])
+        self.assertEqual(record['status'], 'failed')
+        self.assertIsNone(self.queue.receive())
+
+    def test_crash_is_redelivered(self):
+        job = self._submit()
+        with patch.object(self.pipeline, 'run', side_effect=RuntimeError('worker lost')):
+            self.worker.run_once()
+        self.assertEqual(self.dispatcher.get(job['id'])['status'], 'running')
+
+        self.worker.run_once()
+        record = self.dispatcher.get(job['id'])
+        self.assertEqual(record['status'], 'succeeded')
+        self.assertEqual(record['attempts'], 2)
+        self.assertEqual(self.worker.stats()['retried'], 1)
+
+    def test_duplicate_delivery_is_idempotent(self):
+        job = self._submit()
+        self.queue.send({'job_id': job['id'], 'kind': 'merge', 'payload': {'urls': URLS}})
+        self.worker.run_once()
+        self.worker.run_once()
+        self.assertEqual(len(self.saved), 1)
+        self.assertEqual(self.worker.stats()['duplicates'], 1)
+
+    def test_max_attempts(self):
+        worker = MergeWorker(self.queue, self.status_store, self.pipeline, max_attempts=1)
+        job = self._submit()
+        with patch.object(self.pipeline, 'run', side_effect=RuntimeError('worker lost')):
+            worker.run_once()
+        worker.run_once()
+        self.assertEqual(self.dispatcher.get(job['id'])['status'], 'failed')
+
+    def test_cancel_queued_job(self):
+        job = self._submit()
+        self.assertEqual(self.dispatcher.cancel(job['id'])['status'], 'cancelled')
+        self.worker.run_once()
+        self.assertEqual(self.saved, [])
+        self.assertEqual(self.dispatcher.get(job['id'])['status'], 'cancelled')
+
+    def test_cancel_running_job(self):
+        job = self._submit()
+        # 受信時は取り消されておらず、最初の進捗保存時に取り消しが要求されている状態
+        with patch.object(self.status_store, 'cancel_requested', side_effect=[False, True]):
+            self.worker.run_once()
+        self.assertEqual(self.dispatcher.get(job['id'])['status'], 'cancelled')
+        self.assertEqual(self.saved, [])
+
+    def test_dispatcher_stats(self):
+        self._submit()
+        self.worker._report(force=True)
+        stats = self.dispatcher.stats()
+        self.assertEqual(stats['depth']['visible'], 1)
+        self.assertEqual([worker['worker_id'] for worker in stats['workers']], ['test-worker'])
+
+
+
+class TestWorkerConfig(unittest.TestCase):
+    def test_sqs_requires_shared_backends(self):
+        environ = {'JOB_QUEUE_BACKEND': 'sqs', 'JOB_QUEUE_SQS_URL': 'https://sqs.example.com/queue'}
+        with self.assertRaisesRegex(ValueError, 'ESTIMATE_STORAGE_BACKEND=s3.*JOB_STATUS_BACKEND=s3'):
+            _create_worker(environ)
+
+        environ.update(ESTIMATE_STORAGE_BACKEND='s3', JOB_STATUS_BACKEND='S3')
+        check_shared_backends(load_config(environ))
+        # キューを使用しない場合は保存先を問わない
+        check_shared_backends(load_config({}))
+
+    def test_empty_catalog_path_uses_default(self):
+        # Webアプリケーションとワーカーで同じ設定の読み込みを使用し、空の値も既定値として扱う
+        config = load_config({'MERGED_ESTIMATES_DIR': 'data', 'CATALOG_DB_PATH': ''})
+        self.assertEqual(catalog_db_path(config), os.path.join('data', 'catalog.sqlite3'))
+        config = load_config({'CATALOG_DB_PATH': '/shared/catalog.sqlite3'})
+        self.assertEqual(catalog_db_path(config), '/shared/catalog.sqlite3')
+
+
+if __name__ == '__main__':
+    unittest.main()
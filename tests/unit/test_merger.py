@@ -114,6 +114,25 @@ class TestEstimateMerger(unittest.TestCase):
         self.assertEqual(ec2_service['monthlyCost'], 300.0)  # 100 + 200
         self.assertEqual(ec2_service['upfrontCost'], 150.0)  # 50 + 100
 
+    def test_iter_merged_services(self):
+        services = list(self.merger.iter_merged_services([self.estimate1, self.estimate2]))
+        self.assertEqual(services, self.merger._merge_services([self.estimate1, self.estimate2]))
+        
+        # 1つだけの場合はそのまま返す
+        services = list(self.merger.iter_merged_services([self.estimate1]))
+        self.assertEqual(services, self.estimate1['services'])
+
+    def test_merge_progress(self):
+        events = []
+        self.merger.merge_estimates([self.estimate1, self.estimate2], events.append)
+        self.assertEqual([event['type'] for event in events], ['merge'] * 3)
+        self.assertEqual([event['merged'] for event in events], [1, 2, 3])
+        self.assertTrue(all(event['total'] == 3 for event in events))
+
+        events = []
+        self.merger.merge_estimates([self.estimate1], events.append)
+        self.assertEqual(len(events), len(self.estimate1['services']))
+
     def test_merge_service_group(self):
         services = [
             {
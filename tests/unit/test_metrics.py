@@ -0,0 +1,71 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from src import metrics
+
+try:
+    from prometheus_client import REGISTRY
+except ImportError:
+    REGISTRY = None
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@unittest.skipIf(REGISTRY is None, 'prometheus_client がインストールされていません')
+class TestMetrics(unittest.TestCase):
+    def test_stage_records_duration(self):
+        before = _sample('merger_stage_duration_seconds_count', {'stage': metrics.STAGE_MERGE})
+        with metrics.stage(metrics.STAGE_MERGE):
+            pass
+        self.assertEqual(_sample('merger_stage_duration_seconds_count', {'stage': metrics.STAGE_MERGE}), before + 1)
+
+    def test_stage_records_error(self):
+        labels = {'stage': metrics.STAGE_FETCH}
+        errors = _sample('merger_stage_errors_total', labels)
+        count = _sample('merger_stage_duration_seconds_count', labels)
+        with self.assertRaises(ValueError):
+            with metrics.stage(metrics.STAGE_FETCH):
+                raise ValueError('not found')
+        self.assertEqual(_sample('merger_stage_errors_total', labels), errors + 1)
+        self.assertEqual(_sample('merger_stage_duration_seconds_count', labels), count + 1)
+
+    def test_counters(self):
+        merged = _sample('merger_services_total', {'kind': 'merged'})
+        hits = _sample('merger_cache_requests_total', {'cache': 'url', 'result': 'hit'})
+        metrics.record_services(5, 3)
+        metrics.record_cache('url', True)
+        self.assertEqual(_sample('merger_services_total', {'kind': 'merged'}), merged + 3)
+        self.assertEqual(_sample('merger_cache_requests_total', {'cache': 'url', 'result': 'hit'}), hits + 1)
+
+    def test_render(self):
+        metrics.record_services(1, 1)
+        body, content_type = metrics.render()
+        self.assertTrue(content_type.startswith('text/plain'))
+        self.assertIn(b'merger_services_total{kind="input"}', body)
+
+    def test_multiprocess_aggregation(self):
+        # ワーカーごとのプロセスで記録した値を、別のプロセスの /metrics で集計できる
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory)
+        record = 'from src import metrics\nwith metrics.stage(metrics.STAGE_MERGE): pass\nmetrics.record_services(4, 2)'
+        for _ in range(2):
+            subprocess.run([sys.executable, '-c', record], cwd=PROJECT_ROOT, env=env, check=True)
+
+        output = subprocess.run(
+            [sys.executable, '-c', 'from src import metrics; print(metrics.render()[0].decode())'],
+            cwd=PROJECT_ROOT, env=env, check=True, capture_output=True, text=True
+        ).stdout
+        self.assertIn('merger_stage_duration_seconds_count{stage="merge"} 2.0', output)
+        self.assertIn('merger_services_total{kind="merged"} 4.0', output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import io
+import json
+import os
+from src.data.parser import EstimateParser
+from src.data.native_writer import NativeExportWriter
+from src.merger.estimate_merger import EstimateMerger
+
+SAMPLES_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'json_samples')
+
+
+class TestNativeExportWriter(unittest.TestCase):
+    def setUp(self):
+        self.parser = EstimateParser()
+        self.merger = EstimateMerger()
+        self.writer = NativeExportWriter()
+
+    def _load_sample(self, name):
+        with open(os.path.join(SAMPLES_DIR, name), 'r', encoding='utf-8') as f:
+            return self.parser.parse_from_json(json.load(f))
+
+    def _round_trip(self, estimate):
+        output = io.StringIO()
+        self.writer.write(estimate, output, share_url='https://calculator.aws/#/estimate?id=abc')
+        return json.loads(output.getvalue())
+
+    def test_parse_native_sample(self):
+        estimate = self._load_sample('My-Estimate.json')
+        self.assertEqual(estimate['name'], 'My Estimate')
+        self.assertEqual(estimate['currency'], 'USD')
+        self.assertEqual(len(estimate['services']), 1)
+        self.assertEqual(estimate['services'][0]['name'], 'Amazon EC2')
+        self.assertEqual(estimate['services'][0]['monthlyCost'], 715.56)
+
+    def test_write_native_format(self):
+        estimate = self._load_sample('My-Estimate.json')
+        native = self._round_trip(estimate)
+        self.assertEqual(list(native.keys()), ['Name', 'Total Cost', 'Metadata', 'Groups'])
+        self.assertEqual(native['Total Cost'], {'monthly': '715.56', 'upfront': '0.00', '12 months': '8586.72'})
+        self.assertEqual(native['Metadata']['Share Url'], 'https://calculator.aws/#/estimate?id=abc')
+        self.assertEqual(native['Groups']['Services'][0]['Service Name'], 'Amazon EC2')
+
+    def test_round_trip_merge(self):
+        merged = self.merger.merge_estimates([
+            self._load_sample('sample1.json'),
+            self._load_sample('sample2.json'),
+            self._load_sample('My-Estimate.json')
+        ])
+        reparsed = self.parser.parse_from_json(self._round_trip(merged))
+        self.assertEqual(reparsed, merged)
+
+    def test_round_trip_preserves_precision(self):
+        estimate = {
+            'name': 'Precision',
+            'currency': 'USD',
+            'services': [{'name': 'Amazon S3', 'region': 'us-east-1', 'monthlyCost': 0.1 + 0.2, 'upfrontCost': 0.0}]
+        }
+        reparsed = self.parser.parse_from_json(self._round_trip(estimate))
+        self.assertEqual(reparsed['services'][0]['monthlyCost'], 0.1 + 0.2)
+
+    def test_empty_services(self):
+        native = self._round_trip({'name': 'Empty', 'services': []})
+        self.assertEqual(native['Groups']['Services'], [])
+
+    def test_parse_nested_groups(self):
+        native = {
+            'Name': 'Nested',
+            'Groups': {
+                'Services': [{'Service Name': 'Amazon S3', 'Region': 'us-east-1',
+                              'Service Cost': {'monthly': '1.00', 'upfront': '0.00'}}],
+                'Groups': [{'Name': 'Child', 'Services': [
+                    {'Service Name': 'AWS Lambda', 'Region': 'us-east-1',
+                     'Service Cost': {'monthly': '2.00', 'upfront': '0.00'}}
+                ]}]
+            }
+        }
+        estimate = self.parser.parse_from_json(native)
+        self.assertEqual([s['name'] for s in estimate['services']], ['Amazon S3', 'AWS Lambda'])
+
+
+if __name__ == '__main__':
+    unittest.main()
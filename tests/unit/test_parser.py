@@ -1,6 +1,9 @@
 import unittest
 from unittest.mock import patch, MagicMock
 import json
+import asyncio
+import threading
+import time
 from src.data.parser import EstimateParser
 
 class TestEstimateParser(unittest.TestCase):
@@ -49,6 +52,37 @@ class TestEstimateParser(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.parser.parse_from_url(invalid_url)
 
+    def test_parse_from_url_embedded_data(self):
+        from src.api.calculator_api import CalculatorAPI
+        url = CalculatorAPI().generate_calculator_url(self.valid_json)
+        
+        with patch('src.data.parser.requests') as mock_requests:
+            result = self.parser.parse_from_url(url)
+        mock_requests.get.assert_not_called()
+        
+        self.assertEqual(result['name'], 'Test Estimate')
+        self.assertEqual(result['services'], self.valid_json['services'])
+
+    def test_decode_estimate_payload_invalid(self):
+        with self.assertRaises(ValueError):
+            self.parser.decode_estimate_payload('not-a-valid-payload')
+
+    def test_decode_estimate_payload_too_large(self):
+        import base64
+        import zlib
+        payload = base64.urlsafe_b64encode(zlib.compress(b' ' * 1024)).decode('ascii')
+        with patch.object(EstimateParser, 'MAX_PAYLOAD_BYTES', 100):
+            with self.assertRaises(ValueError):
+                self.parser.decode_estimate_payload(payload)
+
+    def test_parse_many(self):
+        urls = [self.valid_url, self.invalid_url]
+        results = sorted(self.parser.parse_many(urls), key=lambda result: result[0])
+        self.assertEqual([(index, url) for index, url, _, _ in results], list(enumerate(urls)))
+        self.assertIsNone(results[0][3])
+        self.assertIn('services', results[0][2])
+        self.assertIsInstance(results[1][3], ValueError)
+
     def test_parse_from_json_valid(self):
         result = self.parser.parse_from_json(self.valid_json)
         self.assertEqual(result['name'], 'Test Estimate')
@@ -117,5 +151,86 @@ class TestEstimateParser(unittest.TestCase):
         self.assertGreater(len(mock_data['services']), 0)
         self.assertEqual(mock_data['currency'], 'USD')
 
+    @patch('src.data.parser.requests.get')
+    def test_parse_from_url_estimate_source(self, mock_get):
+        parser = EstimateParser(estimate_source_url='http://stub/estimates/{id}.json')
+        mock_get.return_value = MagicMock(status_code=200)
+        mock_get.return_value.json.return_value = self.valid_json
+
+        result = parser.parse_from_url(self.valid_url)
+        self.assertEqual(result['name'], 'Test Estimate')
+        self.assertEqual(mock_get.call_args[0][0], 'http://stub/estimates/123456abcdef.json')
+
+    @patch('src.data.parser.requests.get')
+    def test_parse_from_url_estimate_source_not_found(self, mock_get):
+        parser = EstimateParser(estimate_source_url='http://stub/estimates')
+        mock_get.return_value = MagicMock(status_code=404)
+
+        with self.assertRaises(ValueError):
+            parser.parse_from_url(self.valid_url)
+        self.assertEqual(mock_get.call_args[0][0], 'http://stub/estimates/123456abcdef')
+
+    @patch('src.data.parser.requests.get')
+    def test_parse_many_coalesces_source_fetches(self, mock_get):
+        parser = EstimateParser(estimate_source_url='http://stub/estimates')
+        started = threading.Event()
+        release = threading.Event()
+
+        def get(url, timeout):
+            started.set()
+            release.wait(5)
+            response = MagicMock(status_code=200)
+            response.json.return_value = self.valid_json
+            return response
+
+        mock_get.side_effect = get
+        results = []
+        events = []
+        threads = [threading.Thread(target=lambda: results.append(parser.parse_from_url(self.valid_url, events.append)))
+                   for _ in range(3)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        while parser.fetch_flight.stats()['shared'] < 2:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual([result['name'] for result in results], ['Test Estimate'] * 3)
+        # 取得結果を共有した呼び出しはキャッシュヒットとして通知する
+        self.assertEqual(sorted(event['source'] for event in events), ['fetched', 'shared', 'shared'])
+        self.assertEqual([event['cached'] for event in events].count(True), 2)
+
+    def test_parse_from_url_progress(self):
+        events = []
+        self.parser.parse_from_url(self.valid_url, events.append)
+        list(self.parser.parse_many([self.valid_url + '&data=invalid'], on_progress=events.append))
+        # 失敗した抽出は通知しない
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['type'], 'fetch')
+        self.assertEqual(events[0]['source'], 'mock')
+        self.assertEqual(events[0]['estimate_id'], '123456abcdef')
+        self.assertFalse(events[0]['cached'])
+
+        # 通知先の例外は抽出に影響しない
+        def fail(event):
+            raise RuntimeError('closed')
+        self.assertTrue(self.parser.parse_from_url(self.valid_url, fail)['services'])
+
+    def test_source_key(self):
+        self.assertEqual(self.parser.source_key(self.valid_url), '123456abcdef')
+        embedded = self.valid_url + '&data=abc'
+        self.assertTrue(self.parser.source_key(embedded).startswith('123456abcdef:'))
+        self.assertNotEqual(self.parser.source_key(embedded), self.parser.source_key(self.valid_url + '&data=abd'))
+        with self.assertRaises(ValueError):
+            self.parser.source_key(self.invalid_url)
+
+    def test_parse_from_url_async_mock_data(self):
+        result = asyncio.run(self.parser.parse_from_url_async(self.valid_url))
+        self.assertEqual(result, self.parser.parse_from_url(self.valid_url))
+
 if __name__ == '__main__':
     unittest.main()
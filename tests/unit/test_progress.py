@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import unittest
+from src.ui.progress import (ProgressBroker, ProgressChannelNotFound, ProgressSubscriptionLimit, format_sse,
+                             is_valid_progress_id)
+
+
+class TestProgressBroker(unittest.TestCase):
+    def setUp(self):
+        self.broker = ProgressBroker(ttl_seconds=60)
+
+    def test_publish_and_subscribe(self):
+        # 合算の開始より先に購読できる
+        subscription = self.broker.subscribe('progress-1')
+        self.broker.publish('progress-1', {'type': 'fetch', 'url': 'a'})
+        self.broker.publish('progress-1', {'type': 'total', 'success': True})
+        self.broker.close('progress-1')
+
+        events, finished = subscription.wait(1)
+        self.assertEqual([event['type'] for _, event in events], ['fetch', 'total'])
+        self.assertTrue(finished)
+        subscription.close()
+        self.assertEqual(self.broker.stats()['subscribers'], 0)
+
+    def test_resume_from_last_event_id(self):
+        for index in range(3):
+            self.broker.publish('progress-1', {'type': 'merge', 'merged': index + 1})
+        self.broker.close('progress-1')
+
+        subscription = self.broker.subscribe('progress-1', last_event_id=2)
+        events, finished = subscription.wait(0)
+        self.assertEqual([event_id for event_id, _ in events], [3])
+        self.assertTrue(finished)
+
+    def test_wait_wakes_on_publish(self):
+        subscription = self.broker.subscribe('progress-1')
+        timer = threading.Timer(0.05, self.broker.publish, ('progress-1', {'type': 'fetch'}))
+        timer.start()
+        events, finished = subscription.wait(5)
+        timer.join()
+        self.assertEqual(len(events), 1)
+        self.assertFalse(finished)
+
+    def test_publish_after_close_ignored(self):
+        self.broker.close('progress-1')
+        self.broker.publish('progress-1', {'type': 'fetch'})
+        self.assertEqual(self.broker.stats()['published'], 0)
+
+    def test_subscriber_limit(self):
+        broker = ProgressBroker(max_subscribers=1)
+        first = broker.subscribe('progress-1')
+        with self.assertRaises(ProgressSubscriptionLimit):
+            broker.subscribe('progress-2')
+        first.close()
+        broker.subscribe('progress-2').close()
+
+    def test_subscriber_limit_override(self):
+        first = self.broker.subscribe('progress-1', max_subscribers=1)
+        with self.assertRaises(ProgressSubscriptionLimit):
+            self.broker.subscribe('progress-2', max_subscribers=1)
+        first.close()
+
+    def test_channel_wait_unknown_channel(self):
+        with self.assertRaises(ProgressChannelNotFound):
+            self.broker.subscribe('progress-1', channel_wait=0.01)
+        stats = self.broker.stats()
+        self.assertEqual(stats['channels'], 0)
+        self.assertEqual(stats['subscribers'], 0)
+        self.assertEqual(stats['unknown_channels'], 1)
+
+    def test_channel_wait_until_merge_starts(self):
+        timer = threading.Timer(0.05, self.broker.publish, ('progress-1', {'type': 'fetch'}))
+        timer.start()
+        subscription = self.broker.subscribe('progress-1', channel_wait=5)
+        timer.join()
+        self.assertEqual(len(subscription.wait(0)[0]), 1)
+        subscription.close()
+
+    def test_channel_limit(self):
+        broker = ProgressBroker(max_channels=2)
+        subscription = broker.subscribe('progress-1')
+        broker.publish('progress-2', {'type': 'fetch'})
+        broker.publish('progress-3', {'type': 'fetch'})
+        self.assertEqual(broker.stats()['channels'], 2)
+        # 破棄されたチャネルの購読者は終了する
+        self.assertTrue(subscription.wait(0)[1])
+
+
+class TestProgressBrokerAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_wait_async_wakes_from_thread(self):
+        broker = ProgressBroker()
+        subscription = broker.subscribe('progress-1')
+        timer = threading.Timer(0.05, broker.publish, ('progress-1', {'type': 'fetch'}))
+        timer.start()
+        events, finished = await subscription.wait_async(5)
+        timer.join()
+        self.assertEqual(len(events), 1)
+        self.assertFalse(finished)
+
+    async def test_many_subscribers(self):
+        broker = ProgressBroker()
+        subscriptions = [broker.subscribe('progress-1') for _ in range(200)]
+        waits = asyncio.gather(*[subscription.wait_async(5) for subscription in subscriptions])
+        await asyncio.sleep(0.01)
+        broker.publish('progress-1', {'type': 'total', 'success': True})
+        broker.close('progress-1')
+        results = await waits
+        self.assertTrue(all(len(events) == 1 and finished for events, finished in results))
+
+
+class TestFormat(unittest.TestCase):
+    def test_format_sse(self):
+        self.assertEqual(format_sse(3, {'type': 'fetch', 'url': 'a'}),
+                         'id: 3\nevent: fetch\ndata: {"url": "a"}\n\n')
+
+    def test_is_valid_progress_id(self):
+        self.assertTrue(is_valid_progress_id('3f2a1b9c-04d5'))
+        self.assertFalse(is_valid_progress_id('short'))
+        self.assertFalse(is_valid_progress_id('../../etc/passwd'))
+        self.assertFalse(is_valid_progress_id('3f2a1b9c-04d5\n'))
+        self.assertFalse(is_valid_progress_id(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
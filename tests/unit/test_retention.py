@@ -0,0 +1,111 @@
+import unittest
+import os
+import shutil
+import tempfile
+import time
+from src.storage.catalog import EstimateCatalog
+from src.storage.estimate_store import FileSystemEstimateStore
+from src.storage.retention import RetentionWorker, migrate_to_sharded_layout
+from src.storage.write_behind import WriteBehindQueue
+
+
+def _estimate(name):
+    return {'name': name, 'currency': 'USD', 'services': [
+        {'name': 'Amazon S3', 'region': 'us-east-1', 'monthlyCost': 10.0, 'upfrontCost': 0.0}
+    ]}
+
+
+class TestRetentionWorker(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = FileSystemEstimateStore(os.path.join(self.temp_dir, 'estimates'))
+        self.catalog = EstimateCatalog(os.path.join(self.temp_dir, 'catalog.sqlite3'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _save(self, name, created_at):
+        estimate = _estimate(name)
+        estimate_id = self.store.save(estimate)
+        self.catalog.record(estimate_id, estimate, created_at=created_at, size_bytes=self.store.size(estimate_id))
+        return estimate_id
+
+    def test_disabled_by_default(self):
+        worker = RetentionWorker(self.store, self.catalog)
+        self.assertFalse(worker.enabled)
+        worker.start()
+        self.assertIsNone(worker._thread)
+
+    def test_ttl_eviction(self):
+        old_id = self._save('old', created_at=1000)
+        new_id = self._save('new', created_at=5000)
+
+        worker = RetentionWorker(self.store, self.catalog, ttl_seconds=3000)
+        result = worker.run_once(now=6000)
+
+        self.assertEqual(result['evicted_expired'], 1)
+        self.assertFalse(self.store.exists(old_id))
+        self.assertFalse(self.catalog.contains(old_id))
+        self.assertTrue(self.store.exists(new_id))
+
+    def test_ttl_counts_from_last_access(self):
+        accessed_id = self._save('accessed', created_at=1000)
+        self.catalog.touch(accessed_id, accessed_at=5000)
+
+        worker = RetentionWorker(self.store, self.catalog, ttl_seconds=3000)
+        self.assertEqual(worker.run_once(now=6000)['evicted_expired'], 0)
+        self.assertTrue(self.store.exists(accessed_id))
+
+    def test_remerged_estimate_survives_ttl(self):
+        # 保持期間を過ぎた見積もりと同じ内容を合算し直すと、返したダウンロードURLは削除されない
+        day = 24 * 60 * 60
+        estimate = _estimate('remerged')
+        estimate_id = self._save('remerged', created_at=time.time() - 10 * day)
+        WriteBehindQueue(self.store, self.catalog, synchronous=True).submit(estimate_id, estimate)
+
+        worker = RetentionWorker(self.store, self.catalog, ttl_seconds=7 * day)
+        self.assertEqual(worker.run_once()['evicted_expired'], 0)
+        self.assertTrue(self.store.exists(estimate_id))
+        self.assertTrue(self.catalog.contains(estimate_id))
+
+    def test_size_cap_evicts_least_recently_used(self):
+        first_id = self._save('first', created_at=1000)
+        second_id = self._save('second', created_at=2000)
+        third_id = self._save('third', created_at=3000)
+        # 最も古い見積もりにアクセスすると、次に古いものが先に削除される
+        self.catalog.touch(first_id, accessed_at=4000)
+
+        cap = self.catalog.total_size() - 1
+        worker = RetentionWorker(self.store, self.catalog, max_total_bytes=cap)
+        result = worker.run_once(now=5000)
+
+        self.assertEqual(result['evicted_size'], 1)
+        self.assertFalse(self.store.exists(second_id))
+        self.assertTrue(self.store.exists(first_id))
+        self.assertTrue(self.store.exists(third_id))
+        self.assertLessEqual(self.catalog.total_size(), cap)
+
+    def test_stats(self):
+        self._save('old', created_at=1000)
+        worker = RetentionWorker(self.store, self.catalog, ttl_seconds=10)
+        worker.run_once(now=5000)
+        worker.run_once(now=5000)
+
+        stats = worker.stats()
+        self.assertEqual(stats['runs'], 2)
+        self.assertEqual(stats['evicted_expired'], 1)
+        self.assertGreater(stats['evicted_bytes'], 0)
+        self.assertEqual(stats['total_bytes'], 0)
+
+    def test_migrate_to_sharded_layout(self):
+        flat_store = FileSystemEstimateStore(self.store.directory, shard_depth=0)
+        estimate_id = flat_store.save(_estimate('legacy'))
+
+        self.assertEqual(migrate_to_sharded_layout(self.store, self.catalog), [estimate_id])
+        self.assertTrue(self.store.exists(estimate_id))
+        item = self.catalog.get(estimate_id)
+        self.assertEqual(item['name'], 'legacy')
+
+
+if __name__ == '__main__':
+    unittest.main()
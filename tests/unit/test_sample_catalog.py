@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import patch
+import json
+import os
+import shutil
+import tempfile
+from src.data.sample_catalog import SampleCatalog
+
+SAMPLES_DIR = os.path.join(os.path.dirname(__file__), '../../json_samples')
+
+SAMPLE = {
+    'name': 'Sample',
+    'currency': 'USD',
+    'services': [{'name': 'Amazon S3', 'region': 'us-east-1', 'monthlyCost': 1.0, 'upfrontCost': 0.0}]
+}
+
+
+class TestSampleCatalog(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self._write('valid', SAMPLE)
+        with open(os.path.join(self.temp_dir, 'broken.json'), 'w') as f:
+            f.write('{not json')
+        self.catalog = SampleCatalog(self.temp_dir, check_interval=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, sample_id, data):
+        path = os.path.join(self.temp_dir, f'{sample_id}.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        return path
+
+    def test_loads_valid_samples_only(self):
+        self.assertEqual(self.catalog.ids(), ['valid'])
+        sample = self.catalog.get('valid')
+        self.assertEqual(json.loads(sample.body), {'success': True, 'data': SAMPLE})
+        self.assertEqual(sample.estimate['services'][0]['name'], 'Amazon S3')
+        self.assertIsNone(self.catalog.get('broken'))
+        self.assertIsNone(self.catalog.get('../valid'))
+
+    def test_sample_is_immutable(self):
+        with self.assertRaises(AttributeError):
+            self.catalog.get('valid').body = b''
+
+    def test_no_io_until_check_interval(self):
+        catalog = SampleCatalog(self.temp_dir, check_interval=3600)
+        with patch('src.data.sample_catalog.os.stat') as mock_stat, \
+                patch('src.data.sample_catalog.open', create=True) as mock_open:
+            for _ in range(10):
+                catalog.get('valid')
+        mock_stat.assert_not_called()
+        mock_open.assert_not_called()
+
+    def test_reload_on_change(self):
+        etag = self.catalog.get('valid').etag
+        path = self._write('valid', dict(SAMPLE, name='Changed'))
+        os.utime(path, ns=(0, 10 ** 18))
+        self._write('added', SAMPLE)
+
+        sample = self.catalog.get('valid')
+        self.assertNotEqual(sample.etag, etag)
+        self.assertEqual(json.loads(sample.body)['data']['name'], 'Changed')
+        self.assertEqual(self.catalog.ids(), ['added', 'valid'])
+
+    def test_repository_samples(self):
+        catalog = SampleCatalog(SAMPLES_DIR)
+        self.assertIn('sample1', catalog.ids())
+        self.assertTrue(catalog.get('sample1').estimate['services'])
+
+
+if __name__ == '__main__':
+    unittest.main()
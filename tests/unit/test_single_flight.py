@@ -0,0 +1,130 @@
+import unittest
+import asyncio
+import threading
+from src.data.single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_result(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {'value': 42}
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do('key', compute)))
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=lambda: results.append(flight.do('key', compute))) for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        while flight.stats()['shared'] < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(flight.stats(), {'executed': 1, 'shared': 3, 'in_flight': 0})
+
+        # 完了後の呼び出しは新たに実行する
+        flight.do('key', compute)
+        self.assertEqual(len(calls), 2)
+
+    def test_error_shared(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def fail():
+            started.set()
+            release.wait(5)
+            raise ValueError('failed')
+
+        errors = []
+
+        def call():
+            try:
+                flight.do('key', fail)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call)]
+        threads[0].start()
+        started.wait(5)
+        threads.append(threading.Thread(target=call))
+        threads[1].start()
+        while flight.stats()['shared'] < 1:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(flight.stats()['in_flight'], 0)
+
+    def test_different_keys_not_shared(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do('a', lambda: 1), 1)
+        self.assertEqual(flight.do('b', lambda: 2), 2)
+        self.assertEqual(flight.stats()['executed'], 2)
+
+
+class TestSingleFlightAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_calls_share_result(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {'value': 42}
+
+        results = await asyncio.gather(*[flight.do_async('key', compute) for _ in range(5)])
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(flight.stats(), {'executed': 1, 'shared': 4, 'in_flight': 0})
+
+    async def test_cancelled_waiter_does_not_cancel_others(self):
+        flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.1)
+            return 'done'
+
+        first = asyncio.ensure_future(flight.do_async('key', compute))
+        second = asyncio.ensure_future(flight.do_async('key', compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        self.assertEqual(await second, 'done')
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+
+    async def test_all_waiters_cancelled(self):
+        flight = SingleFlight()
+        finished = []
+
+        async def compute():
+            await asyncio.sleep(0.1)
+            finished.append(1)
+
+        waiter = asyncio.ensure_future(flight.do_async('key', compute))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0.15)
+        self.assertEqual(finished, [])
+        self.assertEqual(flight.stats()['in_flight'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import io
+import os
+import json
+import tempfile
+import unittest
+from collections import Counter
+from src.data.parser import EstimateParser
+from src.data.synthetic import REGIONS, SyntheticEstimateGenerator, main
+
+
+def _walk_groups(groups, depth=0):
+    """(深さ, グループ) を順に返す"""
+    yield depth, groups
+    for child in groups.get('Groups', []):
+        yield from _walk_groups(child, depth + 1)
+
+
+class TestSyntheticEstimateGenerator(unittest.TestCase):
+    def test_deterministic(self):
+        self.assertEqual(SyntheticEstimateGenerator(7).generate(200), SyntheticEstimateGenerator(7).generate(200))
+        self.assertNotEqual(SyntheticEstimateGenerator(7).generate(200), SyntheticEstimateGenerator(8).generate(200))
+
+    def test_parse_round_trip(self):
+        estimate = SyntheticEstimateGenerator(1).generate(300, 'Synthetic')
+        parsed = EstimateParser().parse_from_json(estimate)
+
+        self.assertEqual(parsed['name'], 'Synthetic')
+        self.assertEqual(len(parsed['services']), 300)
+        total = sum(service['monthlyCost'] for service in parsed['services'])
+        self.assertAlmostEqual(total, float(estimate['Total Cost']['monthly']), places=2)
+        self.assertTrue(all(service['config'] for service in parsed['services']))
+
+    def test_nested_groups(self):
+        estimate = SyntheticEstimateGenerator(2, group_count=3, subgroup_count=2).generate(100)
+        groups = list(_walk_groups(estimate['Groups']))
+
+        self.assertEqual(len(groups), 1 + 3 + 3 * 2)
+        self.assertEqual(max(depth for depth, _ in groups), 2)
+        self.assertEqual(sum(len(group['Services']) for _, group in groups), 100)
+
+    def test_variety_and_skew(self):
+        services = list(SyntheticEstimateGenerator(3).iter_services(5000))
+        names = Counter(service['Service Name'] for service in services)
+        regions = {service['Region'] for service in services}
+
+        self.assertGreater(len(names), 150)
+        self.assertEqual(len(regions), len(REGIONS))
+        # 利用頻度の高いサービスほど多く選ばれる
+        self.assertGreater(names.most_common(1)[0][1], 5000 / len(names) * 10)
+
+    def test_write_streams_same_content(self):
+        generator = SyntheticEstimateGenerator(4)
+        buffer = io.StringIO()
+        totals = generator.write(50, buffer)
+
+        self.assertEqual(json.loads(buffer.getvalue()), generator.generate(50))
+        self.assertEqual(totals, generator.generate(50)['Total Cost'])
+
+    def test_empty_estimate(self):
+        estimate = SyntheticEstimateGenerator(5).generate(0)
+        self.assertEqual(estimate['Total Cost']['monthly'], '0.00')
+        with self.assertRaises(ValueError):
+            SyntheticEstimateGenerator(5).generate(-1)
+
+    def test_cli_writes_multiple_estimates(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            main(['--services', '20', '--estimates', '2', '--seed', '10', '--output', temp_dir])
+            self.assertEqual(sorted(os.listdir(temp_dir)), ['synthetic-10.json', 'synthetic-11.json'])
+            with open(os.path.join(temp_dir, 'synthetic-11.json'), encoding='utf-8') as f:
+                self.assertEqual(json.load(f), SyntheticEstimateGenerator(11).generate(20))
+
+
+if __name__ == '__main__':
+    unittest.main()
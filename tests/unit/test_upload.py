@@ -0,0 +1,117 @@
+import io
+import json
+import unittest
+from src.data.parser import EstimateParser
+from src.data.upload import MultipartEstimateReader, UploadError, iter_uploaded_estimates, multipart_boundary
+
+BOUNDARY = 'testboundary'
+CONTENT_TYPE = f'multipart/form-data; boundary={BOUNDARY}'
+
+NATIVE_ESTIMATE = {
+    'Name': 'Uploaded',
+    'Metadata': {'Currency': 'USD'},
+    'Groups': {
+        'Services': [
+            {'Service Name': 'Amazon EC2', 'Region': 'us-east-1',
+             'Service Cost': {'monthly': '1,200.50', 'upfront': '0'}}
+        ]
+    }
+}
+
+
+def _part(name, filename, content):
+    disposition = f'form-data; name="{name}"'
+    if filename is not None:
+        disposition += f'; filename="{filename}"'
+    return (f'--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n'
+            f'Content-Type: application/json\r\n\r\n').encode('utf-8') + content + b'\r\n'
+
+
+def _body(*parts):
+    return b''.join(parts) + f'--{BOUNDARY}--\r\n'.encode('utf-8')
+
+
+class _CountingStream(io.BytesIO):
+    """読み込んだバイト数を記録するストリーム"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+class TestUpload(unittest.TestCase):
+    def setUp(self):
+        self.parser = EstimateParser()
+
+    def test_multiple_files(self):
+        body = _body(
+            _part('files', 'a.json', json.dumps(NATIVE_ESTIMATE).encode('utf-8')),
+            _part('note', None, b'ignored'),
+            _part('files', 'b.json', json.dumps({'name': 'B', 'services': []}).encode('utf-8'))
+        )
+        results = list(iter_uploaded_estimates(io.BytesIO(body), CONTENT_TYPE, self.parser, chunk_size=7))
+
+        self.assertEqual([filename for filename, _ in results], ['a.json', 'b.json'])
+        service = results[0][1]['services'][0]
+        self.assertEqual(service['name'], 'Amazon EC2')
+        self.assertEqual(service['monthlyCost'], 1200.5)
+        self.assertEqual(results[1][1]['name'], 'B')
+
+    def test_malformed_file_rejected_before_rest_of_body(self):
+        large = json.dumps({'name': 'large', 'services': [], 'padding': 'x' * 500000}).encode('utf-8')
+        body = _body(_part('files', 'bad.json', b'<html>not json</html>'), _part('files', 'large.json', large))
+        stream = _CountingStream(body)
+
+        with self.assertRaises(UploadError) as context:
+            list(iter_uploaded_estimates(stream, CONTENT_TYPE, self.parser, chunk_size=1024))
+        self.assertEqual(context.exception.status, 400)
+        self.assertEqual(context.exception.filename, 'bad.json')
+        self.assertLess(stream.bytes_read, 4096)
+
+    def test_invalid_json(self):
+        body = _body(_part('files', 'broken.json', b'{"name": "x", "services": ['))
+        with self.assertRaises(UploadError) as context:
+            list(iter_uploaded_estimates(io.BytesIO(body), CONTENT_TYPE, self.parser))
+        self.assertIn('broken.json', str(context.exception))
+
+    def test_file_too_large(self):
+        content = json.dumps({'name': 'x', 'services': [], 'padding': 'x' * 5000}).encode('utf-8')
+        body = _body(_part('files', 'big.json', content))
+        with self.assertRaises(UploadError) as context:
+            list(iter_uploaded_estimates(io.BytesIO(body), CONTENT_TYPE, self.parser, max_file_size=1024))
+        self.assertEqual(context.exception.status, 413)
+
+    def test_too_many_files(self):
+        content = json.dumps({'name': 'x', 'services': []}).encode('utf-8')
+        body = _body(*[_part('files', f'{i}.json', content) for i in range(3)])
+        with self.assertRaises(UploadError) as context:
+            list(iter_uploaded_estimates(io.BytesIO(body), CONTENT_TYPE, self.parser, max_files=2))
+        self.assertEqual(context.exception.status, 413)
+
+    def test_no_files(self):
+        body = _body(_part('note', None, b'text'))
+        with self.assertRaises(UploadError):
+            list(iter_uploaded_estimates(io.BytesIO(body), CONTENT_TYPE, self.parser))
+
+    def test_truncated_body(self):
+        body = _part('files', 'a.json', json.dumps({'name': 'x', 'services': []}).encode('utf-8'))[:-10]
+        reader = MultipartEstimateReader(self.parser, BOUNDARY.encode('ascii'))
+        reader.feed(body)
+        with self.assertRaises(UploadError):
+            reader.close()
+
+    def test_multipart_boundary(self):
+        self.assertEqual(multipart_boundary(CONTENT_TYPE), BOUNDARY.encode('ascii'))
+        with self.assertRaises(UploadError):
+            multipart_boundary('application/json')
+        with self.assertRaises(UploadError):
+            multipart_boundary('multipart/form-data')
+
+
+if __name__ == '__main__':
+    unittest.main()
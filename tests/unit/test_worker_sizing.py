@@ -0,0 +1,69 @@
+import unittest
+from unittest.mock import patch
+import os
+import shutil
+import tempfile
+from src.ui.worker_sizing import cpu_limit, memory_limit_bytes, recommended_concurrency
+
+MB = 1024 * 1024
+
+
+class TestWorkerSizing(unittest.TestCase):
+    def setUp(self):
+        self.cgroup_root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cgroup_root)
+
+    def _write(self, relative_path, content):
+        path = os.path.join(self.cgroup_root, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content + '\n')
+
+    @patch('os.sched_getaffinity', return_value=set(range(8)))
+    def test_cpu_limit_cgroup_v2(self, _):
+        self._write('cpu.max', '150000 100000')
+        self.assertEqual(cpu_limit(self.cgroup_root), 1.5)
+
+    @patch('os.sched_getaffinity', return_value=set(range(8)))
+    def test_cpu_limit_cgroup_v2_unlimited(self, _):
+        self._write('cpu.max', 'max 100000')
+        self.assertEqual(cpu_limit(self.cgroup_root), 8)
+
+    @patch('os.sched_getaffinity', return_value=set(range(8)))
+    def test_cpu_limit_cgroup_v1(self, _):
+        self._write('cpu/cpu.cfs_quota_us', '200000')
+        self._write('cpu/cpu.cfs_period_us', '100000')
+        self.assertEqual(cpu_limit(self.cgroup_root), 2)
+
+        self._write('cpu/cpu.cfs_quota_us', '-1')
+        self.assertEqual(cpu_limit(self.cgroup_root), 8)
+
+    def test_memory_limit(self):
+        self._write('memory.max', str(512 * MB))
+        self.assertEqual(memory_limit_bytes(self.cgroup_root), 512 * MB)
+
+    def test_memory_limit_unlimited(self):
+        self._write('memory/memory.limit_in_bytes', str(2 ** 63 - 4096))
+        physical = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+        self.assertEqual(memory_limit_bytes(self.cgroup_root), physical)
+
+    def test_recommended_concurrency_cpu_bound(self):
+        self.assertEqual(recommended_concurrency(2, 8192 * MB, 256 * MB), (5, 4))
+
+    def test_recommended_concurrency_memory_bound(self):
+        # メモリに収まるワーカー数に抑え、スレッド数で同時処理数を補う
+        workers, threads = recommended_concurrency(4, 512 * MB, 256 * MB)
+        self.assertEqual(workers, 2)
+        self.assertEqual(threads, 16)
+
+    def test_recommended_concurrency_fractional_cpu(self):
+        self.assertEqual(recommended_concurrency(0.5, None, 256 * MB), (2, 4))
+
+    def test_recommended_concurrency_minimum(self):
+        self.assertEqual(recommended_concurrency(1, 64 * MB, 256 * MB)[0], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+from unittest.mock import patch
+import os
+import shutil
+import tempfile
+from src.data.canonical import content_hash
+from src.storage.catalog import EstimateCatalog
+from src.storage.estimate_store import FileSystemEstimateStore
+from src.storage.write_behind import WriteBehindQueue
+
+
+def _estimate(name):
+    return {'name': name, 'currency': 'USD', 'services': [
+        {'name': 'Amazon S3', 'region': 'us-east-1', 'monthlyCost': 10.0, 'upfrontCost': 0.0}
+    ]}
+
+
+class TestWriteBehindQueue(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        # テスト内で登録した書き込みスレッドの停止（addCleanup）より後に削除する
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.store = FileSystemEstimateStore(os.path.join(self.temp_dir, 'estimates'))
+        self.catalog = EstimateCatalog(os.path.join(self.temp_dir, 'catalog.sqlite3'))
+
+    def _submit(self, write_queue, name):
+        estimate = _estimate(name)
+        estimate_id = content_hash(estimate)
+        write_queue.submit(estimate_id, estimate, ['123456abcdef'])
+        return estimate_id, estimate
+
+    def test_pending_until_written(self):
+        write_queue = WriteBehindQueue(self.store, self.catalog)
+        estimate_id, estimate = self._submit(write_queue, 'pending')
+        self.assertEqual(write_queue.get_pending(estimate_id), estimate)
+        self.assertFalse(self.store.exists(estimate_id))
+
+        write_queue.flush()
+        self.assertIsNone(write_queue.get_pending(estimate_id))
+        self.assertEqual(self.store.load(estimate_id), estimate)
+        self.assertEqual(self.catalog.total_size(), self.store.size(estimate_id))
+        self.assertEqual(self.catalog.get(estimate_id)['source_ids'], ['123456abcdef'])
+
+    def test_background_batches(self):
+        write_queue = WriteBehindQueue(self.store, self.catalog, batch_size=10)
+        with patch.object(self.store, 'write_batch', wraps=self.store.write_batch) as mock_batch:
+            ids = [self._submit(write_queue, f'estimate-{i}')[0] for i in range(5)]
+            write_queue.start()
+            self.assertTrue(write_queue.flush())
+            write_queue.stop()
+        self.assertEqual(mock_batch.call_count, 1)
+        self.assertTrue(all(self.store.exists(estimate_id) for estimate_id in ids))
+        self.assertEqual(write_queue.stats()['written'], 5)
+
+    def test_duplicate_submissions_written_once(self):
+        write_queue = WriteBehindQueue(self.store, self.catalog)
+        self._submit(write_queue, 'same')
+        self._submit(write_queue, 'same')
+        write_queue.flush()
+        stats = write_queue.stats()
+        self.assertEqual(stats['written'], 1)
+        self.assertEqual(stats['reused'], 1)
+
+    def test_stop_flushes_queue(self):
+        write_queue = WriteBehindQueue(self.store, self.catalog)
+        write_queue.start()
+        estimate_id, _ = self._submit(write_queue, 'shutdown')
+        write_queue.stop()
+        self.assertTrue(self.store.exists(estimate_id))
+        self.assertEqual(write_queue.stats()['pending'], 0)
+
+    def test_full_queue_writes_synchronously(self):
+        write_queue = WriteBehindQueue(self.store, self.catalog, maxsize=1, put_timeout=0)
+        self._submit(write_queue, 'queued')
+        estimate_id, _ = self._submit(write_queue, 'overflow')
+        self.assertTrue(self.store.exists(estimate_id))
+        self.assertEqual(write_queue.stats()['sync_writes'], 1)
+
+    def test_failed_batch_retries_individually(self):
+        write_queue = WriteBehindQueue(self.store, self.catalog)
+        ids = [self._submit(write_queue, f'retry-{i}')[0] for i in range(3)]
+        with patch.object(self.store, 'write_batch', side_effect=OSError('disk full')):
+            write_queue.flush()
+        self.assertTrue(all(self.store.exists(estimate_id) for estimate_id in ids))
+        self.assertEqual(write_queue.stats()['errors'], 0)
+
+    def test_failed_write_stays_pending_and_retries(self):
+        write_queue = WriteBehindQueue(self.store, self.catalog, retry_backoff=0.05)
+        # 失敗しても書き込みスレッドを tearDown の後まで残さない
+        self.addCleanup(write_queue.stop)
+        estimate_id, estimate = self._submit(write_queue, 'unavailable')
+        with patch.object(self.store, 'write_batch', side_effect=OSError('unavailable')), \
+                patch.object(self.store, 'write_stream', side_effect=OSError('unavailable')):
+            write_queue.start()
+            self.assertFalse(write_queue.flush(timeout=0.2))
+            # 失敗したデータはダウンロードできるよう書き込み待ちのまま残す
+            self.assertEqual(write_queue.get_pending(estimate_id), estimate)
+            stats = write_queue.stats()
+            self.assertEqual(stats['retrying'], 1)
+            self.assertGreaterEqual(stats['retries'], 2)
+
+        # 保存先が回復したら再試行で書き込まれる
+        self.assertTrue(write_queue.flush(timeout=5))
+        write_queue.stop()
+        self.assertTrue(self.store.exists(estimate_id))
+        self.assertIsNone(write_queue.get_pending(estimate_id))
+        self.assertEqual(write_queue.stats()['retrying'], 0)
+        self.assertIsNotNone(self.catalog.get(estimate_id))
+
+    def test_stop_retries_failed_writes(self):
+        write_queue = WriteBehindQueue(self.store, self.catalog, retry_backoff=60)
+        with patch.object(self.store, 'write_batch', side_effect=OSError('unavailable')), \
+                patch.object(self.store, 'write_stream', side_effect=OSError('unavailable')):
+            estimate_id, _ = self._submit(write_queue, 'retry-on-stop')
+            self.assertFalse(write_queue.flush())
+        self.assertEqual(write_queue.stats()['retrying'], 1)
+        write_queue.stop()
+        self.assertTrue(self.store.exists(estimate_id))
+        self.assertEqual(write_queue.stats()['pending'], 0)
+
+    def test_synchronous(self):
+        write_queue = WriteBehindQueue(self.store, self.catalog, synchronous=True)
+        estimate_id, _ = self._submit(write_queue, 'synchronous')
+        self.assertTrue(self.store.exists(estimate_id))
+        self.assertIsNone(write_queue.get_pending(estimate_id))
+        stats = write_queue.stats()
+        self.assertEqual(stats['queued'], 0)
+        self.assertEqual(stats['sync_writes'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()